@@ -0,0 +1,90 @@
+#ifndef TSP_BOUND_HPP
+#define TSP_BOUND_HPP
+
+#include "tsp_types.hpp"
+#include <string>
+
+/**
+ * @file tsp_bound.hpp
+ * @brief Ograniczenia dolne kosztu trasy i luka rozwiązania względem ograniczenia.
+ *
+ * Funkcja celu to suma kosztów odcinków (odległość + paliwo) i kar za okna czasowe.
+ * Kary są nieujemne, więc ograniczenie dolne sumy kosztów odcinków cyklu Hamiltona
+ * jest ograniczeniem dolnym funkcji celu.
+ */
+
+/**
+ * @brief Metoda wyznaczania ograniczenia dolnego.
+ */
+enum class BoundMethod
+{
+    None,       ///< Bez ograniczenia (luka nieznana).
+    Assignment, ///< Relaksacja problemu przydziału (algorytm węgierski, O(n^3)).
+    HeldKarp,   ///< 1-drzewo Held-Karpa z krokami subgradientowymi (O(n^2) na iterację).
+    Auto        ///< Held-Karp, a dla małych instancji także przydział - lepsze z dwóch.
+};
+
+/**
+ * @brief Zamienia nazwę metody (none|assignment|held-karp|auto) na BoundMethod.
+ * @param name Nazwa metody.
+ * @param method Wynik.
+ * @return `false` dla nieznanej nazwy.
+ */
+bool ParseBoundMethod(const std::string &name, BoundMethod &method);
+
+/// Nazwa metody jak w opcji --bound.
+const char *BoundMethodName(BoundMethod method);
+
+/**
+ * @brief Wyznaczone ograniczenie dolne.
+ */
+struct LowerBound
+{
+    BoundMethod method = BoundMethod::None; ///< Metoda, która dała `value` (None - brak ograniczenia).
+    double value = 0.0;                     ///< Ograniczenie dolne funkcji celu.
+    int iterations = 0;                     ///< Iteracje subgradientowe (Held-Karp).
+    double time = 0.0;                      ///< Czas obliczeń [s].
+};
+
+/**
+ * @brief Ograniczenie z relaksacji problemu przydziału.
+ *
+ * Każde miasto ma dokładnie jednego następnika i poprzednika (bez pętli u -> u), ale
+ * rozwiązanie może się składać z wielu cykli. Uwzględnia asymetrię kosztów.
+ */
+double AssignmentBound(const ProblemData &data);
+
+/**
+ * @brief Ograniczenie Held-Karpa: maksymalizacja po potencjałach miast kosztu 1-drzewa.
+ *
+ * Koszty odcinków symetryzowane są jako min(c_uv, c_vu) - cykl skierowany kosztuje co
+ * najmniej tyle co ten sam cykl nieskierowany. Krok subgradientowy (deg - 2) z długością
+ * Polyaka względem kosztu trasy najbliższego sąsiada; mnożnik kroku jest połowiony, gdy
+ * ograniczenie przestaje rosnąć.
+ *
+ * @param max_iterations Maksymalna liczba iteracji.
+ * @param iterations Wynik: wykonane iteracje (nullptr - bez zapisu).
+ */
+double HeldKarpBound(const ProblemData &data, int max_iterations, int *iterations = nullptr);
+
+/**
+ * @brief Liczba iteracji Held-Karpa dla instancji rozmiaru n (stały budżet pracy O(n^2 * iteracje)).
+ */
+int HeldKarpIterations(int n);
+
+/**
+ * @brief Ograniczenie dolne wybraną metodą (dla tablicy float32 pomniejszone o błąd zaokrągleń).
+ */
+LowerBound ComputeLowerBound(const ProblemData &data, BoundMethod method);
+
+/**
+ * @brief Luka względna (koszt - ograniczenie) / koszt; 0, gdy koszt nie jest dodatni.
+ */
+double RelativeGap(double cost, double bound);
+
+/**
+ * @brief Koszt, przy którym luka względem `bound` spada do `target_gap` (target_gap >= 1 - każdy koszt).
+ */
+double TargetCost(double bound, double target_gap);
+
+#endif
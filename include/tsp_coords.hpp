@@ -0,0 +1,104 @@
+#ifndef TSP_COORDS_HPP
+#define TSP_COORDS_HPP
+
+#include <string>
+#include <utility>
+#include <vector>
+
+/**
+ * @file tsp_coords.hpp
+ * @brief Instancje zapisane jako współrzędne - odległości liczone na żądanie (bez macierzy n x n).
+ */
+
+/**
+ * @brief Sposób liczenia odległości ze współrzędnych (reguły zaokrąglania jak w tsp_distance.py).
+ */
+enum class DistanceType
+{
+    Euc2D,   ///< TSPLIB EUC_2D: nint(odległość euklidesowa).
+    Ceil2D,  ///< TSPLIB CEIL_2D: ceil(odległość euklidesowa).
+    Man2D,   ///< TSPLIB MAN_2D: nint(|dx| + |dy|).
+    Max2D,   ///< TSPLIB MAX_2D: max(nint|dx|, nint|dy|).
+    Att,     ///< TSPLIB ATT: pseudoeuklidesowa.
+    Geo,     ///< TSPLIB GEO: odległość po kuli ziemskiej, współrzędne w stopniach.minutach.
+    Euc2DR2  ///< EUC_2D_R2 (tsp_gen.py --coords): euklidesowa zaokrąglona do 2 miejsc po przecinku.
+};
+
+/**
+ * @brief Zamienia nazwę typu (`edge_weight_type` z pliku) na DistanceType.
+ * @return `false` dla nieobsługiwanej nazwy.
+ */
+bool ParseDistanceType(const std::string &name, DistanceType &type);
+
+/**
+ * @brief Koszty i czasy odcinków wyliczane ze współrzędnych miast.
+ *
+ * Koszt odcinka to $d + a \cdot d + b \cdot d^2$, czas przejazdu $d / speed$ - te same wyrażenia
+ * co przy budowie tablicy gęstej, więc instancja ze współrzędnymi daje te same koszty co
+ * odpowiadająca jej instancja z macierzami.
+ *
+ * Opcjonalna pamięć podręczna wierszy: każdy wątek OpenMP ma `cache_rows` gniazd (wiersz u trafia
+ * do gniazda u mod cache_rows). Wiersz wypełniany jest na żądanie przez CacheRow() - przed
+ * przeglądaniem wszystkich sąsiadów miasta (konstrukcja zachłanna); pojedyncze odczyty
+ * z losowych wierszy (SA) liczone są bezpośrednio.
+ */
+class CoordEdges
+{
+public:
+    /**
+     * @param type Sposób liczenia odległości.
+     * @param coords Współrzędne miast.
+     * @param speed Prędkość (czas = odległość / speed).
+     * @param a Parametr liniowy kosztu paliwa.
+     * @param b Parametr kwadratowy kosztu paliwa.
+     * @param cache_rows Liczba wierszy w pamięci podręcznej każdego wątku (0 - bez pamięci).
+     */
+    CoordEdges(DistanceType type, const std::vector<std::pair<double, double>> &coords, double speed,
+               double a, double b, int cache_rows);
+
+    double Distance(int u, int v) const; ///< Odległość u -> v (0 dla u == v).
+    double Cost(int u, int v) const;     ///< Koszt odcinka u -> v (odległość + paliwo).
+    double Time(int u, int v) const;     ///< Czas przejazdu u -> v.
+
+    /// Umieszcza wiersz u w pamięci podręcznej wywołującego wątku (bez pamięci - nic nie robi).
+    void CacheRow(int u) const;
+
+    int CacheRows() const { return cache_rows_; } ///< Wierszy na wątek.
+
+    /// Typy płaskie (wszystkie poza GEO) - odległość zależy od położenia na płaszczyźnie.
+    bool Planar() const { return type_ != DistanceType::Geo; }
+    double X(int u) const { return x_[u]; } ///< Współrzędna x miasta (dla GEO w radianach).
+    double Y(int u) const { return y_[u]; } ///< Współrzędna y miasta (dla GEO w radianach).
+    double Speed() const { return speed_; } ///< Prędkość (czas = odległość / speed).
+
+    /**
+     * @brief Dolne ograniczenie Distance(u, v) dla miast odległych euklidesowo o co najmniej r.
+     *
+     * Tylko typy płaskie (Planar()); wykorzystywane przez siatkę kandydatów konstrukcji zachłannej.
+     */
+    double LowerBound(double r) const;
+
+private:
+    /// Pamięć podręczna jednego wątku: koszty i czasy `cache_rows` wierszy.
+    struct RowCache
+    {
+        std::vector<int> rows;       ///< Wiersz w gnieździe (-1 - puste).
+        std::vector<double> cost;    ///< cache_rows x n.
+        std::vector<double> time;    ///< cache_rows x n.
+    };
+
+    /// Gniazdo z wierszem u w pamięci wywołującego wątku albo nullptr.
+    const RowCache *Cached(int u, std::size_t &offset) const;
+
+    DistanceType type_;
+    std::vector<double> x_;
+    std::vector<double> y_;
+    double speed_;
+    double a_;
+    double b_;
+    int n_;
+    int cache_rows_;
+    mutable std::vector<RowCache> caches_; ///< Po jednej na wątek (każdy wątek pisze tylko do swojej).
+};
+
+#endif
@@ -2,22 +2,156 @@
 #define TSP_GREEDY_SOLVER_HPP
 
 #include "tsp_types.hpp"
+#include "tsp_local_search.hpp"
+#include "tsp_incumbent.hpp"
 #include <random>
+#include <optional>
+#include <cstdint>
+#include <vector>
+#include <limits>
+#include <algorithm>
+
+class SolverStats;
 
 /**
  * @file tsp_greedy_solver.hpp
  * @brief Deklaracje algorytmu zachłannego dla TSP z oknami czasowymi i paliwem.
  */
 
+/**
+ * @brief Siatka kubełkowa miast (instancje ze współrzędnymi płaskimi).
+ *
+ * Miasta uporządkowane według komórek: komórka `c` obejmuje items[start[c]] .. items[start[c + 1] - 1],
+ * komórka (x, y) ma indeks y * cols + x.
+ */
+struct CandidateGrid
+{
+    double x0 = 0.0;          ///< Lewy dolny róg siatki (x).
+    double y0 = 0.0;          ///< Lewy dolny róg siatki (y).
+    double cell = 1.0;        ///< Bok komórki.
+    int cols = 1;             ///< Liczba komórek w poziomie.
+    int rows = 1;             ///< Liczba komórek w pionie.
+    std::vector<int> cell_of; ///< Komórka każdego miasta.
+    std::vector<int> start;   ///< Początki komórek w `items` (cols * rows + 1 elementów).
+    std::vector<int> items;   ///< Miasta uporządkowane według komórek.
+};
+
+/**
+ * @brief Indeks kandydatów dla konstrukcji zachłannej (zamiast przeglądu wszystkich n miast w każdym kroku).
+ *
+ * Ocena kandydata v przy wyjeździe w chwili T (koszt krawędzi + 2 * kara + 0.5 * oczekiwanie) jest nie
+ * mniejsza niż koszt krawędzi + 2 * max(0, T - l_v) + 0.5 * max(0, e_v - T - tmax). Miasta pobierane są
+ * na przemian z dwóch uporządkowanych strumieni:
+ * - przestrzennego (rosnący koszt krawędzi): dla instancji ze współrzędnymi płaskimi (typy poza GEO,
+ *   a, b >= 0) pierścienie komórek siatki wokół bieżącego miasta (budowa w O(n)), w pozostałych
+ *   przypadkach listy `k` najtańszych krawędzi z każdego miasta (budowa w O(n^2));
+ * - czasowego (rosnące ograniczenie kary i oczekiwania): miasta według końca i początku okna.
+ *
+ * Przegląd kończy się, gdy suma ograniczeń obu strumieni przekracza k-tą najlepszą ocenę. RCL
+ * (rosnąco według oceny, remisy według numeru miasta) jest więc taka sama jak przy pełnym przeglądzie,
+ * a trasy przy zadanym ziarnie identyczne. Strumień czasowy obejmuje wszystkie nieodwiedzone miasta,
+ * więc gdy bliscy kandydaci nie wystarczą, przegląd kontynuowany jest bez osobnego przypadku.
+ *
+ * Liczony raz dla instancji i współdzielony przez wszystkie wątki (tylko do odczytu).
+ */
+class GreedyCandidates
+{
+public:
+    /**
+     * @param data Dane problemu (tablica krawędzi musi być już zbudowana).
+     * @param k Długość list kandydatów (przycinana do n - 1; z siatką nieużywana).
+     */
+    GreedyCandidates(const ProblemData &data, int k);
+
+    /// Siatka (instancje ze współrzędnymi płaskimi) albo nullptr - wtedy używane są listy.
+    const CandidateGrid *Grid() const { return grid_ ? &*grid_ : nullptr; }
+
+    /// Kandydaci z miasta `city`, rosnąco według kosztu krawędzi (K() elementów).
+    const int *Of(int city) const { return lists_.data() + static_cast<std::size_t>(city) * k_; }
+
+    int K() const { return k_; } ///< Długość list kandydatów (0 z siatką).
+
+    /// Górne ograniczenie czasu przejazdu z miasta `city` do dowolnego innego.
+    double MaxTime(int city) const { return max_time_[city]; }
+
+    const std::vector<int> &ByOpening() const { return by_opening_; } ///< Miasta rosnąco według e_i.
+    const std::vector<int> &ByClosing() const { return by_closing_; } ///< Miasta rosnąco według l_i.
+
+private:
+    int k_ = 0;
+    std::vector<int> lists_;
+    std::optional<CandidateGrid> grid_;
+    std::vector<double> max_time_;
+    std::vector<int> by_opening_;
+    std::vector<int> by_closing_;
+};
+
+/**
+ * @brief Dane ograniczenia dolnego kosztu dokończenia trasy (odcinanie konstrukcji zachłannych).
+ *
+ * Do każdego nieodwiedzonego miasta (i z powrotem do bazy) trzeba wjechać co najmniej najtańszą
+ * krawędzią wchodzącą, a przyjazd nastąpi nie wcześniej niż T + najkrótszy czas dojazdu tmin_v,
+ * więc kara wynosi co najmniej max(0, T + tmin_v - l_v). T nie maleje, więc suma obu składników
+ * po pozostałych miastach aktualizowana jest w O(1) na krok (miasta uporządkowane według l_v - tmin_v).
+ *
+ * Dla instancji ze współrzędnymi najtańsze krawędzie i czasy wchodzące nie są liczone (wymagałyby
+ * O(n^2) odległości) - ograniczenie zawiera wtedy tylko kary max(0, T - l_v).
+ */
+class GreedyBound
+{
+public:
+    explicit GreedyBound(const ProblemData &data);
+
+    double MinInCost(int city) const { return min_in_cost_[city]; } ///< Najtańsza krawędź wchodząca.
+    double MinInTime(int city) const { return min_in_time_[city]; } ///< Najkrótszy czas dojazdu.
+
+    /// Miasta rosnąco według l_v - tmin_v (chwili wyjazdu, od której kara przyjazdu jest dodatnia).
+    const std::vector<int> &ByDeadline() const { return by_deadline_; }
+
+private:
+    std::vector<double> min_in_cost_;
+    std::vector<double> min_in_time_;
+    std::vector<int> by_deadline_;
+};
+
+/**
+ * @brief Próg przerywania jednej konstrukcji.
+ *
+ * Konstrukcja jest przerywana, gdy koszt częściowy z ograniczeniem dolnym reszty trasy przekracza
+ * Limit() - wtedy nie może dać rozwiązania lepszego od progu.
+ */
+struct GreedyCutoff
+{
+    const GreedyBound *bound = nullptr;   ///< Ograniczenie dolne reszty trasy.
+    const Incumbent *incumbent = nullptr; ///< Wspólny koszt najlepszego rozwiązania (nullptr - tylko `limit`).
+    double limit = std::numeric_limits<double>::max(); ///< Własny próg (np. najlepsze rozwiązanie wątku).
+
+    double Limit() const { return incumbent != nullptr ? std::min(limit, incumbent->BestCost()) : limit; }
+};
+
+/**
+ * @brief Odcinanie konstrukcji w RunParallelGreedySolver: ograniczenie i (wynik) liczniki.
+ */
+struct GreedyPruning
+{
+    const GreedyBound *bound = nullptr; ///< Ograniczenie dolne reszty trasy.
+    long long constructions = 0;        ///< Wynik: wszystkie konstrukcje.
+    long long pruned = 0;               ///< Wynik: konstrukcje przerwane.
+    double time_saved = 0.0;            ///< Wynik: szacowany czas pominiętych kroków (suma po wątkach) [s].
+};
+
 /**
  * @brief Generuje pojedyncze rozwiązanie metodą zachłanną z RCL.
  *
  * @param data Dane problemu.
  * @param k_best Rozmiar listy RCL.
  * @param rng Generator losowy.
- * @return Wygenerowane rozwiązanie.
+ * @param index Indeks kandydatów (nullptr - przegląd wszystkich miast w każdym kroku).
+ * @param cutoff Próg przerywania (nullptr - konstrukcja zawsze do końca).
+ * @return Wygenerowane rozwiązanie; przerwane ma `is_valid == false`, koszt `max()` i niepełną trasę.
  */
-Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rng);
+Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rng,
+                           const GreedyCandidates *index = nullptr, const GreedyCutoff *cutoff = nullptr);
 
 /**
  * @brief Uruchamia wielokrotnie algorytm zachłanny i zwraca najlepsze znalezione rozwiązanie.
@@ -27,8 +161,29 @@ Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rn
  * @param data Dane problemu.
  * @param iterations Liczba iteracji konstrukcji rozwiązania.
  * @param k_best Liczba najlepszych kandydatów w (RCL).
+ * @param seed Opcjonalne ziarno (powtarzalne wyniki przy stałej liczbie wątków).
+ * @param local_search Listy kandydatów do przeszukiwania lokalnego najlepszego rozwiązania
+ *                     każdego wątku (nullptr - bez przeszukiwania).
+ * @param incumbent Wspólne najlepsze rozwiązanie (zgłaszane są do niego poprawy). Jeśli ma
+ *                  limit czasu, konstrukcje powtarzane są aż do jego upływu (`iterations` jest
+ *                  wtedy pomijane); z przeszukiwaniem lokalnym ostatnie kLocalSearchTimeShare
+ *                  limitu zostaje na przeszukiwanie (Incumbent::ReserveTime). Po osiągnięciu kosztu docelowego (Incumbent::SetTarget)
+ *                  kolejne konstrukcje nie są wykonywane.
+ * @param stats Liczniki wątków (konstrukcje, czas pracy, przeszukiwanie lokalne; nullptr - bez pomiarów).
+ * @param candidates Indeks kandydatów konstrukcji (nullptr - pełny przegląd w każdym kroku).
+ * @param pruning Odcinanie konstrukcji (nullptr - wyłączone). Progiem jest wspólny koszt najlepszego
+ *                rozwiązania, a z przeszukiwaniem lokalnym najlepsze rozwiązanie wątku (poprawiane
+ *                jest to samo rozwiązanie co bez odcinania). Każda konstrukcja ma wtedy własne ziarno
+ *                losowane z generatora wątku, więc przerwanie nie zmienia kolejnych konstrukcji,
+ *                a wynik przy zadanym ziarnie nie zależy od przeplotu wątków.
  * @return Najlepsze znalezione rozwiązanie.
  */
-Solution RunParallelGreedySolver(const ProblemData &data, int iterations, int k_best);
+Solution RunParallelGreedySolver(const ProblemData &data, int iterations, int k_best,
+                                 std::optional<std::uint32_t> seed = std::nullopt,
+                                 const NeighborLists *local_search = nullptr,
+                                 Incumbent *incumbent = nullptr,
+                                 SolverStats *stats = nullptr,
+                                 const GreedyCandidates *candidates = nullptr,
+                                 GreedyPruning *pruning = nullptr);
 
 #endif
\ No newline at end of file
@@ -0,0 +1,102 @@
+#ifndef TSP_INCUMBENT_HPP
+#define TSP_INCUMBENT_HPP
+
+#include "tsp_types.hpp"
+#include <atomic>
+#include <mutex>
+#include <ostream>
+
+/**
+ * @file tsp_incumbent.hpp
+ * @brief Wspólne (dla wątków) najlepsze rozwiązanie, zegar przebiegu i limit czasu.
+ */
+
+/**
+ * @brief Najlepsze dotychczas znalezione rozwiązanie wszystkich wątków.
+ *
+ * Koszt przechowywany jest atomowo, więc sprawdzenie "czy to nowe najlepsze" nie wymaga
+ * blokady; blokada brana jest tylko przy faktycznej poprawie. Każda poprawa może być
+ * zapisana jako linia JSON ({"time", "cost", "route"}) do strumienia - wywołujący może
+ * użyć wyniku przed końcem obliczeń.
+ *
+ * Obiekt mierzy też czas od utworzenia i pilnuje opcjonalnego limitu czasu oraz kosztu
+ * docelowego (np. z ograniczenia dolnego i docelowej luki) - solvery kończą pracę,
+ * gdy Stopped(). Końcowa część limitu może być zarezerwowana (ReserveTime) na etap
+ * przeszukiwania lokalnego: konstrukcja i wyżarzanie kończą się wtedy przy SearchStopped().
+ */
+class Incumbent
+{
+public:
+    /**
+     * @param time_limit Limit czasu w sekundach (0 - bez limitu).
+     * @param stream Strumień na kolejne najlepsze rozwiązania (nullptr - bez zapisu).
+     */
+    explicit Incumbent(double time_limit = 0.0, std::ostream *stream = nullptr);
+
+    /**
+     * @brief Zgłasza rozwiązanie; zapisuje je, jeśli jest lepsze od dotychczasowego.
+     * @param solution Rozwiązanie kandydujące.
+     * @return `true`, jeśli rozwiązanie zostało nowym najlepszym.
+     */
+    bool Offer(const Solution &solution);
+
+    /// Koszt najlepszego rozwiązania (bez blokady; +inf, jeśli brak).
+    double BestCost() const { return best_cost_.load(std::memory_order_relaxed); }
+
+    /// Kopia najlepszego rozwiązania.
+    Solution Best() const;
+
+    double Elapsed() const;                         ///< Sekundy od utworzenia obiektu.
+    bool Limited() const { return time_limit_ > 0.0; } ///< Czy obowiązuje limit czasu.
+    double TimeLimit() const { return time_limit_; }   ///< Limit czasu [s].
+
+    /// Czy minął limit czasu (zawsze `false` bez limitu).
+    bool Expired() const { return Limited() && Elapsed() >= time_limit_; }
+
+    /**
+     * @brief Rezerwuje końcowy ułamek `share` limitu czasu (np. na przeszukiwanie lokalne).
+     *
+     * Termin przeszukiwania (SearchStopped, Progress) przypada wtedy na (1 - share) limitu;
+     * Stopped() nadal oznacza pełny limit. Wywoływane przed uruchomieniem wątków.
+     */
+    void ReserveTime(double share);
+
+    /// Czy minął termin przeszukiwania (limit pomniejszony o rezerwę; `false` bez limitu).
+    bool SearchExpired() const { return Limited() && Elapsed() >= search_limit_; }
+
+    /// Ułamek wykorzystanego czasu do terminu przeszukiwania w [0, 1] (0 bez limitu).
+    double Progress() const;
+
+    /**
+     * @brief Ustawia koszt docelowy: rozwiązanie nie droższe kończy obliczenia.
+     *
+     * Wywoływane przed uruchomieniem solvera (wartość nie jest chroniona blokadą).
+     */
+    void SetTarget(double target_cost);
+
+    /// Czy zgłoszono rozwiązanie nie droższe od kosztu docelowego.
+    bool TargetReached() const { return target_reached_.load(std::memory_order_relaxed); }
+
+    /// Czy obowiązuje warunek zakończenia: limit czasu albo koszt docelowy.
+    bool Stoppable() const { return Limited() || has_target_; }
+
+    /// Czy obliczenia mają się zakończyć (minął limit czasu albo osiągnięto koszt docelowy).
+    bool Stopped() const { return TargetReached() || Expired(); }
+
+    /// Czy zakończyć konstrukcję/wyżarzanie (minął termin przeszukiwania albo osiągnięto koszt docelowy).
+    bool SearchStopped() const { return TargetReached() || SearchExpired(); }
+
+private:
+    double start_;
+    double time_limit_;
+    double search_limit_;
+    std::ostream *stream_;
+    std::atomic<double> best_cost_;
+    bool has_target_ = false;
+    double target_cost_ = 0.0;
+    std::atomic<bool> target_reached_{false};
+    mutable std::mutex mutex_;
+    Solution best_;
+};
+
+#endif
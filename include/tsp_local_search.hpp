@@ -0,0 +1,119 @@
+#ifndef TSP_LOCAL_SEARCH_HPP
+#define TSP_LOCAL_SEARCH_HPP
+
+#include "tsp_types.hpp"
+#include "tsp_route_eval.hpp"
+#include "tsp_incumbent.hpp"
+#include <random>
+#include <vector>
+#include <deque>
+
+/**
+ * @file tsp_local_search.hpp
+ * @brief Przeszukiwanie lokalne (2-opt, Or-opt, zamiana) oparte na listach najbliższych sąsiadów.
+ */
+
+/**
+ * @brief Listy k najbliższych miast (wg odległości $c_{ij}$) dla każdego miasta.
+ *
+ * Liczone raz dla instancji i współdzielone przez wszystkie wątki (tylko do odczytu).
+ */
+class NeighborLists
+{
+public:
+    /**
+     * @brief Buduje listy kandydatów.
+     * @param data Dane problemu.
+     * @param k Liczba sąsiadów na miasto (przycinana do n - 1).
+     */
+    NeighborLists(const ProblemData &data, int k);
+
+    /// Sąsiedzi miasta, od najbliższego (K() elementów).
+    const int *Of(int city) const { return lists_.data() + static_cast<std::size_t>(city) * k_; }
+
+    int K() const { return k_; } ///< Liczba sąsiadów na miasto.
+
+private:
+    int k_;
+    std::vector<int> lists_;
+};
+
+/**
+ * @brief Część limitu czasu zostawiana na przeszukiwanie lokalne wyniku (greedy i SA).
+ *
+ * Bez rezerwy konstrukcja lub wyżarzanie zużywa cały limit, a przeszukiwanie lokalne
+ * kończy się przy pierwszym sprawdzeniu zegara.
+ */
+constexpr double kLocalSearchTimeShare = 0.2;
+
+/**
+ * @brief Deterministyczne przeszukiwanie lokalne z bitami "don't look".
+ *
+ * Dla każdego aktywnego miasta sprawdzane są ruchy tworzące krawędź do jednego z jego
+ * najbliższych sąsiadów: 2-opt, przeniesienie fragmentu 1-3 miast (Or-opt, także
+ * odwróconego) oraz zamiana miast. Pierwszy ruch poprawiający koszt jest wykonywany,
+ * a miasta na jego końcach ponownie aktywowane. Koniec, gdy żadne miasto nie jest aktywne.
+ */
+class LocalSearch
+{
+public:
+    /**
+     * @param data Dane problemu.
+     * @param neighbors Listy kandydatów (muszą żyć dłużej niż obiekt).
+     */
+    LocalSearch(const ProblemData &data, const NeighborLists &neighbors);
+
+    /**
+     * @brief Poprawia rozwiązanie do optimum lokalnego.
+     * @param solution Rozwiązanie startowe.
+     * @param clock Opcjonalny zegar z limitem czasu - po jego upływie (albo po osiągnięciu kosztu
+     *              docelowego) przeszukiwanie jest przerywane.
+     * @return Rozwiązanie nie gorsze od startowego.
+     */
+    Solution Improve(const Solution &solution, const Incumbent *clock = nullptr);
+
+private:
+    /// Próbuje ruchów zaczepionych w mieście `city`; zwraca true po wykonaniu ruchu.
+    bool ImproveCity(int city);
+
+    /// Wykonuje ruch, jeśli poprawia koszt.
+    bool TryMove(int start, int end, const RouteSegment *segments, int count);
+
+    /// 2-opt tworzący krawędź między pozycjami p i q.
+    bool TryTwoOpt(int p, int q);
+
+    /// Przeniesienie fragmentu [s, e] za pozycję `after` (w obu kierunkach).
+    bool TryRelocate(int s, int e, int after);
+
+    /// Or-opt: fragmenty 1-3 miast zaczynające/kończące się na p wstawiane obok q.
+    bool TryOrOpt(int p, int q);
+
+    /// Zamiana miast na pozycjach x i y.
+    bool TrySwap(int x, int y);
+
+    /// Ponownie aktywuje miasto (wstawia do kolejki, jeśli nieaktywne).
+    void Activate(int city);
+
+    const ProblemData &data_;
+    const NeighborLists &neighbors_;
+    RouteEvaluator eval_;
+    std::deque<int> queue_;    ///< Miasta aktywne (do sprawdzenia).
+    std::vector<char> active_; ///< Bit "don't look" (0 - miasto pomijane).
+};
+
+/**
+ * @brief Losuje ruch 2-opt tworzący krawędź między losowym miastem a jednym z jego sąsiadów.
+ *
+ * Ruch odwraca fragment [i, j] bieżącej trasy ewaluatora.
+ *
+ * @param eval Ewaluator z bieżącą trasą.
+ * @param neighbors Listy kandydatów.
+ * @param rng Generator liczb losowych.
+ * @param i Początek fragmentu (wynik).
+ * @param j Koniec fragmentu (wynik).
+ * @return `false`, jeśli wylosowana para nie daje zmiany trasy.
+ */
+bool DrawNeighborInvert(const RouteEvaluator &eval, const NeighborLists &neighbors,
+                        std::mt19937 &rng, int &i, int &j);
+
+#endif
@@ -0,0 +1,130 @@
+#ifndef TSP_ROUTE_EVAL_HPP
+#define TSP_ROUTE_EVAL_HPP
+
+#include "tsp_types.hpp"
+#include <vector>
+
+/**
+ * @file tsp_route_eval.hpp
+ * @brief Przyrostowa ocena ruchów na trasie (bez kopiowania i pełnego przeliczania).
+ */
+
+/**
+ * @brief Fragment bieżącej trasy w nowej kolejności odwiedzin.
+ *
+ * Miasta z pozycji od `first` do `last` włącznie; gdy `first > last`, fragment
+ * przechodzony jest w odwrotnej kolejności.
+ */
+struct RouteSegment
+{
+    int first; ///< Pozycja pierwszego odwiedzanego miasta.
+    int last;  ///< Pozycja ostatniego odwiedzanego miasta.
+};
+
+/**
+ * @brief Trasa wraz z sumami prefiksowymi pozwalającymi szybko ocenić ruch (2-opt, Or-opt, zamiana).
+ *
+ * Dla pozycji p trasy przechowywane są:
+ * - suma kosztów (odległość + paliwo) odcinków do pozycji p - w kierunku trasy
+ *   oraz w kierunku odwrotnym (macierze nie muszą być symetryczne),
+ * - czas przyjazdu (po ewentualnym oczekiwaniu) i suma kar do pozycji p.
+ *
+ * Ruch to nowe ułożenie fragmentów trasy w oknie pozycji [start, end] (2-opt, Or-opt,
+ * zamiana miast). Zmiana kosztu przejazdu liczona jest w O(liczba fragmentów). Kary za okna
+ * czasowe liczone są dokładnie: symulacja zaczyna się od zapamiętanego czasu przed
+ * fragmentem i kończy, gdy czas przyjazdu za fragmentem zrówna się z zapamiętanym
+ * (dalsze kary są wtedy identyczne i brane z sum prefiksowych).
+ */
+class RouteEvaluator
+{
+public:
+    /**
+     * @brief Tworzy ewaluator dla danych problemu.
+     * @param data Dane problemu (muszą żyć dłużej niż ewaluator).
+     */
+    explicit RouteEvaluator(const ProblemData &data);
+
+    /**
+     * @brief Ustawia trasę i przelicza wszystkie sumy prefiksowe (O(n)).
+     * @param route Trasa zaczynająca i kończąca się w mieście 0.
+     */
+    void Assign(const std::vector<int> &route);
+
+    /**
+     * @brief Koszt trasy po odwróceniu fragmentu [i, j] - bez modyfikacji trasy.
+     *
+     * Koszt przejazdu w O(1), kary w O(j - i + k), gdzie k to liczba pozycji za
+     * fragmentem, po których czasy przyjazdu się wyrównują (w najgorszym przypadku O(n)).
+     *
+     * @param i Początek fragmentu (1 <= i < j).
+     * @param j Koniec fragmentu (j <= n - 1).
+     * @return Wartość funkcji celu trasy po ruchu.
+     */
+    double InvertCost(int i, int j) const;
+
+    /**
+     * @brief Koszt trasy po zastąpieniu pozycji [start, end] podanymi fragmentami.
+     *
+     * Fragmenty muszą pokrywać dokładnie pozycje [start, end] (1 <= start, end <= n - 1).
+     *
+     * Koszt przejazdu w O(liczba fragmentów), kary w O(end - start + k), gdzie k to liczba
+     * pozycji za oknem, po których czasy przyjazdu się wyrównują. Gdy się nie wyrównują
+     * (np. ruch opóźnia przyjazd, a za oknem nie ma oczekiwania), symulacja biegnie do końca
+     * trasy - w najgorszym przypadku ocena ruchu kosztuje O(n), a nie O(1).
+     *
+     * @param start Pierwsza zmieniana pozycja.
+     * @param end Ostatnia zmieniana pozycja.
+     * @param segments Fragmenty w nowej kolejności.
+     * @param count Liczba fragmentów.
+     * @return Wartość funkcji celu trasy po ruchu.
+     */
+    double MoveCost(int start, int end, const RouteSegment *segments, int count) const;
+
+    /**
+     * @brief Wykonuje ruch opisany jak w MoveCost i aktualizuje sumy od pozycji start.
+     *
+     * `end` służy tylko do sprawdzenia pokrycia [start, end] (TSP_CHECK_INCREMENTAL).
+     */
+    void ApplyMove(int start, int end, const RouteSegment *segments, int count);
+
+    /**
+     * @brief Odwraca fragment [i, j] w miejscu i aktualizuje sumy od pozycji i.
+     * @param i Początek fragmentu.
+     * @param j Koniec fragmentu.
+     */
+    void ApplyInvert(int i, int j);
+
+    /// Wartość funkcji celu bieżącej trasy (identyczna z EvaluateSolution).
+    double Cost() const { return travel_[last_] + penalty_[last_]; }
+
+    /// Bieżąca trasa.
+    const std::vector<int> &Route() const { return route_; }
+
+    /// Pozycja miasta w trasie (dla miasta 0 - pozycja startowa 0).
+    int Position(int city) const { return position_[city]; }
+
+private:
+    /// Przelicza sumy prefiksowe od pozycji `from` do końca trasy.
+    void Rebuild(int from);
+
+    /// Koszt odcinka u -> v (odległość + paliwo).
+    double EdgeCost(int u, int v) const;
+
+    /// Czas przyjazdu do v przy wyjeździe z u w chwili `time` (z oczekiwaniem na okno).
+    double Arrive(int u, int v, double time) const;
+
+    /// Kara za spóźnienie w mieście v przy czasie przyjazdu `time`.
+    double Late(int v, double time) const;
+
+    const ProblemData &data_;
+    std::vector<int> route_;
+    std::vector<int> position_;      ///< Pozycja każdego miasta w trasie.
+    std::vector<int> buffer_;        ///< Bufor na przestawiane miasta (ApplyMove).
+    int last_ = 0;                   ///< Indeks ostatniej pozycji trasy (powrót do 0).
+    std::vector<double> travel_;     ///< Koszt przejazdu pozycji 0..p w kierunku trasy.
+    std::vector<double> travel_rev_; ///< Ten sam prefiks liczony po odcinkach odwróconych (v -> u).
+    std::vector<double> arrival_;    ///< Czas przyjazdu na pozycję p.
+    std::vector<double> penalty_;    ///< Suma kar na pozycjach 1..p.
+};
+
+#endif
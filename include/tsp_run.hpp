@@ -0,0 +1,180 @@
+#ifndef TSP_RUN_HPP
+#define TSP_RUN_HPP
+
+#include <cstdint>
+#include <fstream>
+#include <memory>
+#include <optional>
+#include <ostream>
+#include <string>
+#include <vector>
+#include "args.hxx"
+#include "json.hpp"
+#include "tsp_types.hpp"
+#include "tsp_greedy_solver.hpp"
+#include "tsp_sa_solver.hpp"
+#include "tsp_stats.hpp"
+#include "tsp_bound.hpp"
+
+/**
+ * @file tsp_run.hpp
+ * @brief Opcje tsp_solver i pojedyncze uruchomienie solvera - wspólne dla wywołania z wiersza
+ * poleceń, trybu --batch i usługi --serve.
+ */
+
+/**
+ * @brief Opcje wiersza poleceń.
+ *
+ * Ten sam zestaw opcji obowiązuje dla pojedynczego wywołania, dla każdego wiersza
+ * manifestu `--batch` i dla żądań usługi `--serve` (parser tworzony jest osobno dla
+ * każdego wiersza/żądania).
+ */
+struct Cli
+{
+    args::ArgumentParser parser{"TSP z ograniczeniem czasu i paliwa", "Program rozwiazujacy problem komiwojazera (TSP) wykorzystujący algorytm symulowanego wyżarzania oraz zachłanny ulosowiony."};
+    args::HelpFlag help{parser, "help", "Wyswietl to menu pomocy", {'h', "help"}};
+
+    // Ścieżki plików
+    args::ValueFlag<std::string> arg_input{parser, "input_path", "Sciezka do pliku wejsciowego", {'d', "data"}};
+    args::ValueFlag<std::string> arg_output{parser, "output_path", "Sciezka do pliku wynikowego", {'o', "output"}};
+    args::ValueFlag<std::string> arg_batch{parser, "manifest", "Wiele uruchomien w jednym procesie: plik JSON Lines z wierszami {input, output, algorithm, params, threads, id} ('-' = stdin); wyniki jako JSON Lines na stdout, opcje z wiersza polecen sa domyslnymi dla kazdego wiersza", {"batch"}};
+    args::ValueFlag<int> arg_batch_cache{parser, "instances", "Batch/serve: liczba wczytanych instancji trzymanych w pamieci (domyslnie 4)", {"batch-cache"}};
+
+    // Usługa
+    args::ValueFlag<std::string> arg_serve{parser, "socket_path", "Usluga: przyjmuj zadania (JSON, jedno na wiersz) na gniezdzie Unix; instancje w pamieci wg skrotu zawartosci, opcje z wiersza polecen sa domyslnymi dla kazdego zadania", {"serve"}};
+    args::ValueFlag<int> arg_workers{parser, "workers", "Usluga: liczba jednoczesnie wykonywanych zadan (domyslnie 1)", {"workers"}};
+    args::ValueFlag<int> arg_queue{parser, "queue", "Usluga: maksymalna liczba zadan oczekujacych na wolny watek (domyslnie 16)", {"queue"}};
+
+    // Algorytm
+    args::Group group{parser, "Algorytmy (wybierz jeden):", args::Group::Validators::AtMostOne};
+    args::Flag arg_greedy{group, "greedy", "Uzyj algorytmu zachlannego (domyslnie)", {'g', "greedy"}};
+    args::Flag arg_sa{group, "sa", "Uzyj algorytmu symulowanego wyzarzania", {'s', "sa"}};
+
+    // parametry algorytmów
+    args::ValueFlag<int> arg_iterations{parser, "iterations", "Liczba iteracji (domyslnie 1000)", {'i', "iterations"}};
+    args::ValueFlag<int> arg_k{parser, "k", "Liczba k najlepszych (domyslnie 4)", {'k'}};
+    args::ValueFlag<double> arg_T{parser, "T", "Temperatura początkowa (domyslnie 5000)", {'T'}};
+    args::ValueFlag<double> arg_cooling_rate{parser, "cooling_rate", "Współczynnik chłodzenia (domyslnie 0.99)", {'c'}};
+    args::ValueFlag<double> arg_t{parser, "t", "Minimalna temperatura (domyslnie 0.1)", {'t'}};
+    args::ValueFlag<std::string> arg_sa_mode{parser, "sa_mode", "SA: tryb wspolpracy watkow independent|tempering|islands (domyslnie independent)", {"sa-mode"}};
+    args::ValueFlag<int> arg_exchange{parser, "exchange_interval", "SA: co ile krokow temperatury watki wymieniaja rozwiazania (domyslnie 10)", {"exchange-interval"}};
+    args::ValueFlag<double> arg_time_limit{parser, "seconds", "Limit czasu obliczen w sekundach; SA chlodzi wg uplywu czasu, greedy powtarza konstrukcje do konca limitu", {"time-limit"}};
+    args::ValueFlag<std::string> arg_stream{parser, "stream_path", "Plik JSON Lines z kolejnymi najlepszymi rozwiazaniami (time, cost, route); '-' = stdout", {"stream"}};
+    args::Flag arg_stats{parser, "stats", "Zapisz w wyniku blok stats: czasy faz, liczniki watkow, przepustowosc, akceptacje", {"stats"}};
+    args::Flag arg_stats_trace{parser, "stats_trace", "Jak --stats, dodatkowo przebieg temperatury i kosztu SA", {"stats-trace"}};
+    args::Flag arg_float32{parser, "float32", "Tablica kosztow i czasow krawedzi w pojedynczej precyzji (mniej pamieci; koszt wyniku liczony w double). Tablica jest kopia obok macierzy wejsciowych (takze zmapowanych z .tspb): pamiec ok. 2n^2 * (8 B + 4 B) zamiast 2n^2 * (8 B + 8 B)", {"float32"}};
+    args::ValueFlag<int> arg_row_cache{parser, "rows", "Instancje ze wspolrzednymi: wiersze odleglosci w pamieci podrecznej kazdego watku (domyslnie 0)", {"row-cache"}};
+    args::ValueFlag<int> arg_greedy_candidates{parser, "k", "Konstrukcja zachlanna z indeksem kandydatow (ta sama RCL, bez przegladu wszystkich miast): k najtanszych krawedzi na miasto, dla wspolrzednych plaskich siatka; 0 - wylaczony (domyslnie)", {"greedy-candidates"}};
+    args::Flag arg_prune{parser, "prune", "Greedy: przerywaj konstrukcje, ktorych koszt czesciowy z ograniczeniem dolnym reszty trasy przekracza najlepsze znane rozwiazanie", {"prune"}};
+    args::ValueFlag<std::string> arg_bound{parser, "method", "Ograniczenie dolne kosztu (pole gap wyniku): none|assignment|held-karp|auto (domyslnie none, z --target-gap auto)", {"bound"}};
+    args::ValueFlag<double> arg_target_gap{parser, "gap", "Zakoncz, gdy luka (koszt - ograniczenie dolne) / koszt spadnie do tej wartosci, np. 0.01 (domyslnie bez progu)", {"target-gap"}};
+    args::ValueFlag<std::uint32_t> arg_seed{parser, "seed", "Ziarno generatora liczb losowych (domyslnie losowe)", {"seed"}};
+
+    // Przeszukiwanie lokalne
+    args::Flag arg_local_search{parser, "local_search", "Popraw wynik przeszukiwaniem lokalnym (2-opt, Or-opt, zamiana)", {"local-search"}};
+    args::ValueFlag<int> arg_neighbors{parser, "neighbors", "Liczba najblizszych sasiadow na liscie kandydatow (domyslnie 10)", {"neighbors"}};
+    args::ValueFlag<double> arg_neighbor_bias{parser, "neighbor_bias", "SA: prawdopodobienstwo ruchu 2-opt do sasiada z listy (domyslnie 0)", {"neighbor-bias"}};
+};
+
+/**
+ * @brief Parametry jednego uruchomienia solvera (odczytane z Cli, z wartościami domyślnymi).
+ */
+struct RunOptions
+{
+    std::optional<std::string> input;
+    std::optional<std::string> output;
+    std::string algorithm = "greedy";
+    int iterations = 1000;
+    int k_best = 4;
+    double initial_temp = 5000.0;
+    double cooling_rate = 0.99;
+    double min_temp = 0.1;
+    SAMode sa_mode = SAMode::Independent;
+    std::string sa_mode_name = "independent";
+    int exchange_interval = 10;
+    bool local_search = false;
+    int neighbor_k = 10;
+    double neighbor_bias = 0.0;
+    double time_limit = 0.0;
+    int greedy_candidates_k = 0;
+    bool prune = false;
+    BoundMethod bound = BoundMethod::None;
+    double target_gap = 0.0;
+    bool float32 = false;
+    int row_cache = 0;
+    std::optional<std::string> stream_path;
+    std::optional<std::uint32_t> seed;
+    bool stats = false;
+    bool stats_trace = false;
+};
+
+/**
+ * @brief Przepisuje opcje z parsera do RunOptions.
+ * @param error Komunikat błędu (gdy zwraca `false`).
+ */
+bool ReadOptions(Cli &cli, RunOptions &opts, std::string &error);
+
+/**
+ * @brief Dopisuje do `tokens` argumenty z opisu JSON (wiersz manifestu, żądanie usługi).
+ *
+ * `algorithm` (greedy|sa) staje się flagą `--greedy`/`--sa` i zastępuje flagę algorytmu obecną
+ * już w `tokens` (argumenty domyślne z wiersza poleceń). `params` to obiekt {opcja: wartość}
+ * (nazwa jak w wierszu poleceń bez kresek; `true` - flaga, `false`/null - pominięta) albo lista
+ * argumentów w postaci jak dla tsp_solver.
+ *
+ * @param error Komunikat błędu (gdy zwraca `false`).
+ */
+bool AppendJsonArgs(const nlohmann::json &algorithm, const nlohmann::json &params,
+                    std::vector<std::string> &tokens, std::string &error);
+
+/**
+ * @brief Otwiera strumień kolejnych najlepszych rozwiązań (brak --stream - nullptr).
+ * @return `false`, gdy nie można otworzyć pliku.
+ */
+bool OpenStream(const RunOptions &opts, std::ofstream &file, std::ostream *&stream);
+
+/// Instrumentacja tylko na żądanie (bez niej solvery nie zbierają liczników).
+std::unique_ptr<SolverStats> MakeStats(const RunOptions &opts);
+
+/**
+ * @brief Sprawdza, czy trasa jest pełnym cyklem 0 -> ... -> 0 przez wszystkie n miast.
+ * @param error Komunikat błędu (gdy zwraca `false`).
+ */
+bool CheckRoute(const std::vector<int> &route, int n, std::string &error);
+
+/// Wynik jednego uruchomienia solvera.
+struct RunResult
+{
+    Solution best;
+    double elapsed = 0.0;   ///< Czas obliczeń (od list kandydatów do końca solvera) [s].
+    bool pruned = false;    ///< Czy działało odcinanie konstrukcji (--prune).
+    GreedyPruning pruning;  ///< Liczniki odcinania (gdy `pruned`).
+    LowerBound lower_bound; ///< Ograniczenie dolne (BoundMethod::None - nie liczone; czas poza `elapsed`).
+};
+
+/**
+ * @brief Uruchamia wybrany solver na wczytanych danych.
+ *
+ * Listy kandydatów, indeks konstrukcji zachłannej i ograniczenia dolne (odcinania i luki)
+ * liczone są dla każdego uruchomienia (zależą od jego parametrów). Ograniczenie luki liczone jest
+ * tylko na żądanie (--bound, --target-gap), przed startem zegara limitu czasu i poza `elapsed`.
+ * Z docelową luką (--target-gap) solver kończy pracę, gdy koszt najlepszego rozwiązania spadnie do
+ * TargetCost(ograniczenie, luka). Liczba wątków - jak ustawiona
+ * w wywołującym wątku (omp_set_num_threads).
+ *
+ * Trasa startowa (`warm_route`, sprawdzona przez CheckRoute): SA zaczyna od niej we wszystkich
+ * łańcuchach; greedy zgłasza ją (po przeszukiwaniu lokalnym, jeśli włączone) jako pierwsze
+ * najlepsze rozwiązanie - zaostrza odcinanie (--prune), a wynik nie jest od niej gorszy.
+ *
+ * @param stream Strumień kolejnych najlepszych rozwiązań (nullptr - bez zapisu).
+ * @param stats Instrumentacja (nullptr - bez pomiarów).
+ * @param log Komunikaty o budowie indeksu (w trybie --batch/--serve - strumień pusty).
+ * @param warm_route Trasa startowa (nullptr - brak).
+ */
+RunResult Solve(const ProblemData &data, const RunOptions &opts, std::ostream *stream, SolverStats *stats,
+                std::ostream &log, const std::vector<int> *warm_route = nullptr);
+
+/// Liczniki odcinania w postaci klucza `pruning` wyniku (--batch, --serve).
+nlohmann::json PruningJson(const GreedyPruning &pruning);
+
+#endif
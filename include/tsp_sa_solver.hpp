@@ -2,12 +2,30 @@
 #define TSP_SA_SOLVER_HPP
 
 #include "tsp_types.hpp"
+#include "tsp_local_search.hpp"
+#include "tsp_incumbent.hpp"
+#include <optional>
+#include <cstdint>
+#include <string>
+
+class SolverStats;
+class GreedyCandidates;
 
 /**
  * @file tsp_sa_solver.hpp
  * @brief Deklaracje algorytmu Symulowanego Wyżarzania (Simulated Annealing) dla TSP.
  */
 
+/**
+ * @brief Sposób współpracy wątków w algorytmie SA.
+ */
+enum class SAMode
+{
+    Independent, ///< Niezależne przebiegi, porównanie wyników na końcu.
+    Tempering,   ///< Parallel tempering: stała temperatura na wątek, wymiana stanów między sąsiednimi temperaturami.
+    Islands      ///< Model wysp: wspólny harmonogram chłodzenia, migracja najlepszego rozwiązania po pierścieniu.
+};
+
 /**
  * @brief Parametry konfiguracyjne dla algorytmu Symulowanego Wyżarzania.
  */
@@ -18,13 +36,46 @@ struct SAParams
     double min_temp;         ///< Temperatura końcowa (warunek stopu).
     int iterations_per_temp; ///< Liczba prób zmiany sąsiedztwa dla jednej temperatury.
     int k_best_greedy;       ///< Parametr k dla generowania rozwiązania początkowego (z alg. zachłannego).
+    const GreedyCandidates *greedy_candidates = nullptr; ///< Indeks kandydatów konstrukcji początkowej (nullptr - pełny przegląd).
+    const std::vector<int> *initial_route = nullptr; ///< Trasa startowa wszystkich łańcuchów zamiast konstrukcji zachłannej (pełna trasa 0 -> ... -> 0).
+    std::optional<std::uint32_t> seed; ///< Ziarno generatorów (brak - losowe).
+    const NeighborLists *neighbors = nullptr; ///< Listy kandydatów (nullptr - tylko ruchy losowe).
+    double neighbor_bias = 0.0; ///< Prawdopodobieństwo ruchu 2-opt do sąsiada z listy zamiast losowego.
+    bool local_search = false;  ///< Przeszukiwanie lokalne najlepszego rozwiązania wątku (wymaga `neighbors`).
+    SAMode mode = SAMode::Independent; ///< Tryb współpracy wątków.
+    int exchange_interval = 10; ///< Co ile kroków temperatury (po iterations_per_temp prób) następuje wymiana.
+    Incumbent *incumbent = nullptr; ///< Wspólne najlepsze rozwiązanie, limit czasu i koszt docelowy (nullptr - brak).
+    SolverStats *stats = nullptr;   ///< Liczniki i przebieg temperatury (nullptr - bez pomiarów).
 };
 
+/**
+ * @brief Zamienia nazwę trybu ("independent", "tempering", "islands") na SAMode.
+ * @param name Nazwa trybu.
+ * @param mode Wynik.
+ * @return `false` dla nieznanej nazwy.
+ */
+bool ParseSAMode(const std::string &name, SAMode &mode);
+
 /**
  * @brief Uruchamia wielokrotnie algorytm Symulowanego Wyżarzania.
  *
- * Każdy wątek generuje własne rozwiązanie początkowe metodą zachłanną (używając GenGreedySolution),
+ * Każdy wątek generuje własne rozwiązanie początkowe metodą zachłanną (używając GenGreedySolution)
+ * albo zaczyna od podanej trasy (`initial_route`, np. poprzedni wynik po zmianie okien czasowych),
  * a następnie przeprowadza proces wyżarzania, próbując ulepszyć to rozwiązanie.
+ * Opcjonalnie najlepsze rozwiązanie wątku jest poprawiane przeszukiwaniem lokalnym.
+ *
+ * W trybach współpracy (SAMode::Tempering, SAMode::Islands) wątki wymieniają się
+ * rozwiązaniami co `exchange_interval` kroków temperatury - wyłącznie na barierach,
+ * bez blokad w pętli głównej. Decyzje o wymianie zależą tylko od ziarna i liczby wątków,
+ * więc przebieg z ziarnem jest powtarzalny. Łączna liczba prób na wątek jest taka sama
+ * jak w trybie niezależnym.
+ *
+ * Z limitem czasu (`incumbent` z TimeLimit() > 0) temperatura zależy od wykorzystanej
+ * części limitu: T(t) = T0 * (T_min / T0)^(t / limit), a obliczenia kończą się po jego
+ * upływie (sprawdzane co kilkanaście prób). Harmonogram cooling_rate jest wtedy pomijany.
+ * Z przeszukiwaniem lokalnym wyżarzanie kończy się wcześniej - ostatnie kLocalSearchTimeShare
+ * limitu zostaje na przeszukiwanie wyniku (Incumbent::ReserveTime), `limit` we wzorze
+ * to wtedy termin przeszukiwania.
  * Zwracane jest najlepsze rozwiązanie znalezione przez wszystkie wątki.
  *
  * @param data Dane problemu.
@@ -0,0 +1,38 @@
+#ifndef TSP_SERVICE_HPP
+#define TSP_SERVICE_HPP
+
+#include <string>
+#include <vector>
+#include "tsp_run.hpp"
+
+/**
+ * @file tsp_service.hpp
+ * @brief Usługa `tsp_solver --serve`: wczytane instancje w pamięci, żądania przez gniazdo Unix.
+ */
+
+/**
+ * @brief Uruchamia usługę na gnieździe Unix `--serve` (do żądania "shutdown" albo SIGINT/SIGTERM).
+ *
+ * Protokół: jedno żądanie JSON na wiersz, odpowiedź - jeden wiersz JSON (z `status` "OK" albo
+ * "ERROR" i `error`; pole `id` żądania jest powtarzane). Połączenie może przesłać wiele żądań.
+ *
+ * - `{"op": "load", "path" | "instance"}` - wczytuje instancję (plik albo obiekt JSON w formacie
+ *   pliku) i zwraca jej `key` - skrót zawartości. Instancje trzymane są w pamięci (najdawniej
+ *   używane usuwane po przekroczeniu `--batch-cache`); ten sam plik nie jest wczytywany ponownie.
+ * - `{"op": "solve", "key" | "path" | "instance", "algorithm", "params", "time_limit", "threads",
+ *   "windows", "warm_start"}` - obliczenia na puli `--workers` wątków (najwyżej `--queue` żądań
+ *   czeka). `params` jak w manifeście --batch; `windows` (n x 2) zastępuje okna czasowe bez
+ *   kopiowania macierzy; `warm_start` - trasa startowa albo `true` (ostatnia trasa zwrócona dla
+ *   tej instancji). Odpowiedź ma postać pliku wyniku (z trasą) oraz `key`, `warm_start`, `queue_time`.
+ * - `{"op": "status"}`, `{"op": "evict", "key"}`, `{"op": "shutdown"}`.
+ *
+ * Opcje wiersza poleceń są wartościami domyślnymi każdego żądania; opcje wczytywania instancji
+ * (--float32) obowiązują dla całej usługi, a pamięć wierszy (--row-cache) jest wyłączona
+ * (jest współdzielona przez wątki o tym samym numerze OpenMP, a zadania wykonują się równolegle).
+ *
+ * @param defaults Argumenty wywołania (bez nazwy programu).
+ * @return Kod wyjścia procesu.
+ */
+int RunService(Cli &cli, const std::vector<std::string> &defaults);
+
+#endif
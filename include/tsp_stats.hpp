@@ -0,0 +1,103 @@
+#ifndef TSP_STATS_HPP
+#define TSP_STATS_HPP
+
+#include "json.hpp"
+#include <string>
+#include <utility>
+#include <vector>
+
+/**
+ * @file tsp_stats.hpp
+ * @brief Liczniki i pomiary czasu solvera (blok `stats` w pliku wyników).
+ */
+
+/**
+ * @brief Liczniki jednego wątku.
+ *
+ * Każdy wątek pisze wyłącznie do własnej struktury (bez synchronizacji); pętle gorące
+ * zliczają do zmiennych lokalnych i dodają je tu po zakończeniu kroku.
+ */
+struct ThreadStats
+{
+    double busy_time = 0.0;         ///< Czas pracy wątku w regionie równoległym [s].
+    double local_search_time = 0.0; ///< Czas przeszukiwania lokalnego [s].
+    long long constructions = 0;    ///< Konstrukcje zachłanne (w SA - rozwiązanie początkowe).
+    long long pruned = 0;           ///< Greedy: konstrukcje przerwane przez ograniczenie dolne (--prune).
+    double pruned_time_saved = 0.0; ///< Greedy: szacowany czas pominiętych kroków przerwanych konstrukcji [s].
+    long long proposed = 0;         ///< SA: ocenione ruchy.
+    long long accepted = 0;         ///< SA: zaakceptowane ruchy.
+    long long improvements = 0;     ///< Poprawy najlepszego rozwiązania wątku.
+    long long exchanges = 0;        ///< SA: przejęte rozwiązania innych wątków.
+    long long sweeps = 0;           ///< SA: wykonane kroki temperatury.
+};
+
+/**
+ * @brief Punkt przebiegu temperatury (jeden lub kilka kolejnych kroków temperatury wątku).
+ */
+struct TempSample
+{
+    double time;        ///< Czas od startu solvera na końcu kroku [s].
+    double temp;        ///< Temperatura (pierwszego kroku w punkcie).
+    long long proposed; ///< Ocenione ruchy.
+    long long accepted; ///< Zaakceptowane ruchy.
+    double cost;        ///< Koszt bieżącej trasy na końcu kroku.
+    double best;        ///< Koszt najlepszego rozwiązania wątku na końcu kroku.
+};
+
+/**
+ * @brief Instrumentacja przebiegu: czasy faz, liczniki wątków i opcjonalny przebieg temperatury.
+ *
+ * Włączana na żądanie (solvery przyjmują wskaźnik; nullptr - brak pomiarów). Przebieg
+ * temperatury ma ograniczoną długość: po zapełnieniu sąsiednie punkty są łączone parami,
+ * a kolejne obejmują dwa razy więcej kroków - rozmiar wyniku nie zależy od czasu działania.
+ */
+class SolverStats
+{
+public:
+    /**
+     * @param trace Czy zapisywać przebieg temperatury (SA).
+     */
+    explicit SolverStats(bool trace = false);
+
+    /// Przygotowuje liczniki dla `threads` wątków (przed regionem równoległym) i zapamiętuje chwilę startu.
+    void Prepare(int threads);
+
+    /// Sekundy od ostatniego Prepare().
+    double Elapsed() const;
+
+    /// Liczniki wątku `tid`.
+    ThreadStats &Thread(int tid) { return threads_[tid]; }
+
+    /// Dodaje czas fazy (np. "load", "solve"); kolejne wywołania sumują się.
+    void AddPhase(const std::string &name, double seconds);
+
+    bool TraceEnabled() const { return trace_; } ///< Czy zapisywany jest przebieg temperatury.
+
+    /**
+     * @brief Dopisuje krok temperatury wątku do przebiegu (tylko gdy TraceEnabled()).
+     * @param tid Numer wątku.
+     * @param sample Pomiar jednego kroku.
+     */
+    void Record(int tid, const TempSample &sample);
+
+    /// Blok `stats`: fazy, wątki, podsumowanie (przepustowość, akceptacja, nierównomierność) i przebieg.
+    nlohmann::json ToJson() const;
+
+private:
+    /// Przebieg jednego wątku z łączeniem punktów.
+    struct Trace
+    {
+        std::vector<TempSample> samples;
+        TempSample pending{};
+        long long pending_steps = 0;
+        long long stride = 1; ///< Kroków temperatury na punkt.
+    };
+
+    bool trace_;
+    double start_ = 0.0;
+    std::vector<std::pair<std::string, double>> phases_;
+    std::vector<ThreadStats> threads_;
+    std::vector<Trace> traces_;
+};
+
+#endif
@@ -8,21 +8,172 @@
 
 #include <vector>
 #include <string>
+#include <memory>
+#include <cstddef>
+#include "tsp_coords.hpp"
+
+/**
+ * @brief Gęsta macierz n x n przechowywana w jednym ciągłym obszarze pamięci (wierszami).
+ *
+ * Dane mogą należeć do macierzy albo pochodzić z zewnętrznego bufora (np. pliku
+ * zmapowanego w pamięci) - wtedy `owner` utrzymuje bufor przy życiu.
+ * Kopie macierzy współdzielą ten sam (niemodyfikowalny) bufor.
+ */
+class DenseMatrix
+{
+public:
+    DenseMatrix() = default;
+
+    /**
+     * @brief Przejmuje na własność wartości macierzy.
+     * @param n Rozmiar macierzy.
+     * @param values Wartości (n*n elementów, wierszami).
+     */
+    void Assign(int n, std::vector<double> values)
+    {
+        auto storage = std::make_shared<std::vector<double>>(std::move(values));
+        n_ = n;
+        values_ = storage->data();
+        owner_ = std::move(storage);
+    }
+
+    /**
+     * @brief Używa zewnętrznego bufora bez kopiowania.
+     * @param n Rozmiar macierzy.
+     * @param values Wskaźnik na n*n elementów (wierszami).
+     * @param owner Obiekt utrzymujący bufor przy życiu.
+     */
+    void Borrow(int n, const double *values, std::shared_ptr<const void> owner)
+    {
+        n_ = n;
+        values_ = values;
+        owner_ = std::move(owner);
+    }
+
+    /// Wiersz macierzy - pozwala na zapis `m[i][j]`.
+    const double *operator[](int row) const { return values_ + static_cast<std::size_t>(row) * n_; }
+
+    int Size() const { return n_; }              ///< Liczba wierszy/kolumn.
+    const double *Data() const { return values_; } ///< Początek danych.
+
+private:
+    int n_ = 0;
+    const double *values_ = nullptr;
+    std::shared_ptr<const void> owner_;
+};
+
+/**
+ * @brief Tablica krawędzi używana przez solvery: koszt odcinka i czas przejazdu.
+ *
+ * Koszt $c_{ij} + a \cdot c_{ij} + b \cdot c_{ij}^2$ liczony jest raz przy wczytaniu danych.
+ * Macierz kosztów i macierz czasów leżą jedna za drugą w jednym buforze wyrównanym do 64 B,
+ * a każdy wiersz dopełniony jest do wielokrotności 64 B (wiersz zaczyna się na początku linii
+ * pamięci podręcznej). W trybie float32 tablica zajmuje połowę miejsca kosztem precyzji
+ * (błąd względny pojedynczej krawędzi ok. 6e-8).
+ *
+ * Tablica jest kopią: macierze `c_matrix` i `t_matrix` zostają w ProblemData (listy sąsiadów,
+ * dokładna ocena wyniku), także gdy są zmapowane z pliku .tspb. Pamięć instancji z macierzami
+ * to więc 2 n^2 wartości wejściowych (8 B; dla .tspb strony mapowania) i 2 n^2 wartości
+ * tablicy (8 B, z --float32 4 B). --float32 zmniejsza tylko tę drugą część.
+ *
+ * Dla instancji ze współrzędnymi (UseCoords) tablicy nie ma - wartości liczy CoordEdges.
+ */
+class EdgeTable
+{
+public:
+    /**
+     * @brief Wylicza tablicę z macierzy wejściowych (zob. tsp_utils.cpp).
+     * @param c Macierz odległości.
+     * @param t Macierz czasów przejazdu.
+     * @param a Parametr liniowy kosztu paliwa.
+     * @param b Parametr kwadratowy kosztu paliwa.
+     * @param single_precision Wartości typu float zamiast double.
+     */
+    void Build(const DenseMatrix &c, const DenseMatrix &t, double a, double b, bool single_precision);
+
+    /**
+     * @brief Tryb współrzędnych: koszty i czasy liczone na żądanie przez `coords`.
+     */
+    void UseCoords(std::shared_ptr<const CoordEdges> coords)
+    {
+        *this = EdgeTable();
+        coords_ = coords.get();
+        owner_ = std::move(coords);
+    }
+
+    /// Koszt odcinka u -> v (odległość + paliwo).
+    double Cost(int u, int v) const
+    {
+        if (coords_ != nullptr)
+            return coords_->Cost(u, v);
+        std::size_t k = Index(u, v);
+        return single_ ? cost_f_[k] : cost_d_[k];
+    }
+
+    /// Czas przejazdu u -> v.
+    double Time(int u, int v) const
+    {
+        if (coords_ != nullptr)
+            return coords_->Time(u, v);
+        std::size_t k = Index(u, v);
+        return single_ ? time_f_[k] : time_d_[k];
+    }
+
+    /// Zapowiedź przeglądania całego wiersza u (tryb współrzędnych: pamięć podręczna wierszy).
+    void CacheRow(int u) const
+    {
+        if (coords_ != nullptr)
+            coords_->CacheRow(u);
+    }
+
+    const CoordEdges *Coords() const { return coords_; } ///< Źródło wartości w trybie współrzędnych (albo nullptr).
+    bool SinglePrecision() const { return single_; } ///< Czy wartości są typu float.
+    std::size_t Bytes() const { return bytes_; }     ///< Rozmiar obu macierzy z dopełnieniem [B].
+
+private:
+    std::size_t Index(int u, int v) const { return static_cast<std::size_t>(u) * stride_ + v; }
+
+    bool single_ = false;
+    std::size_t stride_ = 0; ///< Elementów na wiersz (z dopełnieniem).
+    std::size_t bytes_ = 0;
+    const double *cost_d_ = nullptr;
+    const double *time_d_ = nullptr;
+    const float *cost_f_ = nullptr;
+    const float *time_f_ = nullptr;
+    const CoordEdges *coords_ = nullptr;
+    std::shared_ptr<const void> owner_;
+};
 
 /**
  * @brief Dane wejściowe problemu TSP.
  *
  * Zawiera macierze kosztów i czasów podróży, okna czasowe oraz parametry kosztu paliwa.
+ * Solvery odczytują krawędzie przez EdgeCost() i TravelTime() (tablica `edges`);
+ * macierze wejściowe służą do budowy tablicy, list sąsiadów i dokładnej oceny wyniku.
+ * Instancja ze współrzędnymi nie ma macierzy (`c_matrix` i `t_matrix` są puste).
  */
 struct ProblemData
 {
     int n;                                          ///< Liczba miast.
-    std::vector<std::vector<double>> c_matrix;      ///< Macierz odległości/kosztów $c_{ij}$.
-    std::vector<std::vector<double>> t_matrix;      ///< Macierz czasów przejazdu $t_{ij}$.
+    DenseMatrix c_matrix;                           ///< Macierz odległości/kosztów $c_{ij}$.
+    DenseMatrix t_matrix;                           ///< Macierz czasów przejazdu $t_{ij}$.
+    EdgeTable edges;                                ///< Koszty odcinków i czasy (z c_matrix, t_matrix, a, b).
     std::vector<std::pair<double, double>> windows; ///< Okna czasowe $[e_i, l_i]$.
     double a;                                       ///< Parametr liniowy kosztu paliwa.
     double b;                                       ///< Parametr kwadratowy kosztu paliwa.
     double M;                                       ///< Stała (np. do funkcji kary / big-M).
+
+    /// Koszt odcinka u -> v (odległość + paliwo).
+    double EdgeCost(int u, int v) const { return edges.Cost(u, v); }
+
+    /// Czas przejazdu u -> v.
+    double TravelTime(int u, int v) const { return edges.Time(u, v); }
+
+    /// Odległość $c_{ij}$ (z macierzy albo ze współrzędnych).
+    double Distance(int u, int v) const
+    {
+        return edges.Coords() != nullptr ? edges.Coords()->Distance(u, v) : c_matrix[u][v];
+    }
 };
 
 /**
@@ -2,7 +2,14 @@
 #define TSP_UTILS_HPP
 
 #include "tsp_types.hpp"
+#include "json.hpp"
 #include <string>
+#include <random>
+#include <optional>
+#include <cstdint>
+
+class SolverStats;
+struct LowerBound;
 
 /**
  * @file tsp_utils.hpp
@@ -10,7 +17,11 @@
  */
 
 /**
- * @brief Wczytuje dane problemu z pliku JSON.
+ * @brief Wczytuje dane problemu z pliku JSON lub binarnego `.tspb`.
+ *
+ * Format wybierany jest na podstawie rozszerzenia pliku. Plik `.tspb` jest mapowany
+ * w pamięci, a macierze typu double są używane bezpośrednio (bez kopiowania).
+ *
  * @param filename Ścieżka do pliku wejściowego.
  * @param data Struktura, do której zostaną zapisane dane.
  * @return `true` jeśli wczytanie i parsowanie zakończyło się powodzeniem.
@@ -30,8 +41,29 @@
  * "M": 10000            // Stała Big M (double)
  * }
  * @endcode
+ *
+ * @par Format binarny (.tspb, little-endian)
+ * Nagłówek 64 B: `"TSPB"`, wersja (u32), n (u32), rozmiar elementu (u32: 4 lub 8),
+ * a, b, M (f64), 24 B zarezerwowane. Dalej kolejno: c_matrix (n*n), t_matrix (n*n)
+ * i t_windows (n*2), wszystkie o zadanym rozmiarze elementu.
+ *
+ * Po wczytaniu budowana jest tablica krawędzi `data.edges` (EdgeTable::Build).
+ *
+ * @par Tryb współrzędnych (JSON)
+ * Zamiast macierzy plik może zawierać `coords` (n x 2), `edge_weight_type` (EUC_2D, GEO,
+ * CEIL_2D, MAN_2D, MAX_2D, ATT, EUC_2D_R2) i `speed`. Macierze nie są wtedy tworzone,
+ * a koszty i czasy liczy CoordEdges (EdgeTable::UseCoords).
+ *
+ * @param single_precision Tablica krawędzi w pojedynczej precyzji (float32; nie dotyczy współrzędnych).
+ * @param row_cache Tryb współrzędnych: liczba wierszy w pamięci podręcznej każdego wątku.
  */
-bool LoadData(const std::string &filename, ProblemData &data);
+bool LoadData(const std::string &filename, ProblemData &data, bool single_precision = false, int row_cache = 0);
+
+/**
+ * @brief Wczytuje dane problemu z obiektu JSON (format jak w pliku dla LoadData).
+ * @return `true` jeśli wszystkie wymagane klucze mają poprawne wartości.
+ */
+bool LoadDataJson(const nlohmann::json &j, ProblemData &data, bool single_precision = false, int row_cache = 0);
 
 /**
  * @brief Oblicza koszt paliwa dla odcinka o zadanej długości.
@@ -46,11 +78,19 @@ bool LoadData(const std::string &filename, ProblemData &data);
 double CalcFuelCost(double distance, double a, double b);
 
 /**
- * @brief Zapisuje wyniki do pliku JSON.
- * @param filename Ścieżka do pliku wyjściowego.
+ * @brief Wynik w formacie pliku wynikowego: total_cost, route, is_valid, execution_time, gap (i stats).
+ *
+ * `gap` to luka względna (total_cost - lower_bound) / total_cost; null bez ograniczenia dolnego
+ * albo bez poprawnego rozwiązania. Z ograniczeniem zapisywane są też `lower_bound`, `bound_method`
+ * i `lower_bound_time` (czas ograniczenia, nie wliczany do `execution_time`).
+ *
  * @param solution Znalezione rozwiązanie.
  * @param execution_time Czas wykonania obliczeń.
+ * @param stats Instrumentacja przebiegu - blok `stats` (nullptr - brak bloku).
+ * @param bound Ograniczenie dolne (nullptr - luka nieznana).
  */
+nlohmann::json ResultJson(const Solution &solution, double execution_time, const SolverStats *stats = nullptr,
+                          const LowerBound *bound = nullptr);
 
 /**
  * @brief Zapisuje wyniki do pliku JSON.
@@ -58,8 +98,22 @@ double CalcFuelCost(double distance, double a, double b);
  * @param filename Ścieżka do pliku wyjściowego.
  * @param solution Znalezione rozwiązanie.
  * @param execution_time Czas wykonania obliczeń.
+ * @param stats Instrumentacja przebiegu - zapisywana jako blok `stats` (nullptr - brak bloku).
+ * @param bound Ograniczenie dolne - pola `lower_bound`, `bound_method`, `lower_bound_time` i `gap` (nullptr - `gap` null).
  */
-void SaveResults(const std::string &filename, const Solution &solution, double execution_time);
+void SaveResults(const std::string &filename, const Solution &solution, double execution_time,
+                 const SolverStats *stats = nullptr, const LowerBound *bound = nullptr);
+
+/**
+ * @brief Tworzy generator liczb losowych dla bieżącego wątku OpenMP.
+ *
+ * Z ziarnem wynik zależy wyłącznie od (seed, numer wątku), więc przy tej samej
+ * liczbie wątków przebieg jest powtarzalny. Bez ziarna używany jest `std::random_device`.
+ *
+ * @param seed Opcjonalne ziarno bazowe.
+ * @return Generator dla wątku.
+ */
+std::mt19937 MakeThreadRng(const std::optional<std::uint32_t> &seed);
 
 /**
  * @brief Wylicza koszt trasy (odległość + paliwo + kara za okna czasowe).
@@ -69,4 +123,16 @@ void SaveResults(const std::string &filename, const Solution &solution, double e
  */
 double EvaluateSolution(const ProblemData &data, const std::vector<int> &route);
 
+/**
+ * @brief Koszt trasy liczony z macierzy wejściowych w podwójnej precyzji (bez tablicy krawędzi).
+ *
+ * Przy tablicy double wynik jest identyczny z EvaluateSolution; przy float32 - to dokładny
+ * koszt zwracanego rozwiązania.
+ *
+ * @param data Dane problemu.
+ * @param route Trasa (sekwencja indeksów miast).
+ * @return Wartość funkcji celu dla trasy.
+ */
+double EvaluateSolutionExact(const ProblemData &data, const std::vector<int> &route);
+
 #endif
\ No newline at end of file
@@ -0,0 +1,212 @@
+import sys
+import time
+import argparse
+import numpy as np
+from tsp_utils import eprint, calcFuelCost
+from tsp_instance import loadInstance
+from tsp_distance import denseInstance
+
+# Odpowiednik src/tsp_bound.cpp dla narzędzi w Pythonie (MiniZinc). Funkcja celu to koszty
+# odcinków (odległość + paliwo) i nieujemne kary za okna - ograniczenie dolne kosztu cyklu
+# Hamiltona jest więc ograniczeniem dolnym funkcji celu.
+
+BOUND_METHODS = ("none", "assignment", "held-karp", "auto")
+
+# Parametry jak w tsp_bound.cpp
+HELD_KARP_WORK = 1e8
+HELD_KARP_MIN_ITERATIONS = 10
+HELD_KARP_MAX_ITERATIONS = 1000
+HELD_KARP_PATIENCE = 10
+HELD_KARP_MIN_STEP = 1e-4
+AUTO_ASSIGNMENT_MAX_N = 600
+
+
+def edgeCosts(data):
+    """Macierz kosztów odcinków c + a*c + b*c^2 (instancja z macierzami, zob. denseInstance)."""
+    n = data['n']
+    c = np.asarray(data['c_matrix'], dtype=np.float64).reshape(n, n)
+    return c + calcFuelCost(c, data['a'], data['b'])
+
+
+def assignmentBound(cost):
+    """
+    Relaksacja problemu przydziału (algorytm węgierski z potencjałami, O(n^3)).
+    Pętle u -> u są wykluczone; rozwiązanie może się składać z wielu cykli.
+    """
+    n = len(cost)
+    if n < 2:
+        return 0.0
+    # Indeksy od 1; kolumna 0 to sztuczny punkt startowy ścieżki powiększającej
+    matrix = np.full((n + 1, n + 1), np.inf)
+    matrix[1:, 1:] = cost
+    np.fill_diagonal(matrix, np.inf)
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    assigned = np.zeros(n + 1, dtype=np.int64)
+    way = np.zeros(n + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        assigned[0] = row
+        col0 = 0
+        min_slack = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        while True:
+            used[col0] = True
+            row0 = assigned[col0]
+            slack = matrix[row0] - u[row0] - v
+            better = ~used & (slack < min_slack)
+            min_slack[better] = slack[better]
+            way[better] = col0
+            free = np.where(used, np.inf, min_slack)
+            free[0] = np.inf
+            col1 = int(np.argmin(free))
+            delta = free[col1]
+            u[assigned[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+            col0 = col1
+            if assigned[col0] == 0:
+                break
+        # Odwrócenie ścieżki powiększającej
+        while col0 != 0:
+            col1 = way[col0]
+            assigned[col0] = assigned[col1]
+            col0 = col1
+
+    return float(cost[assigned[1:] - 1, np.arange(n)].sum())
+
+
+def heldKarpIterations(n):
+    """Liczba iteracji Held-Karpa (stały budżet pracy n^2 * iteracje)."""
+    return int(np.clip(HELD_KARP_WORK / max(1.0, float(n) * n), HELD_KARP_MIN_ITERATIONS, HELD_KARP_MAX_ITERATIONS))
+
+
+def _nearestNeighborCost(cost):
+    n = len(cost)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    city, total = 0, 0.0
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, cost[city])
+        nxt = int(np.argmin(row))
+        total += row[nxt]
+        visited[nxt] = True
+        city = nxt
+    return total + cost[city, 0]
+
+
+def heldKarpBound(cost, max_iterations=None):
+    """
+    Ograniczenie Held-Karpa: 1-drzewo (Prim na miastach 1..n-1 i dwa najtańsze odcinki miasta 0)
+    z krokami subgradientowymi deg - 2. Koszty symetryzowane jako min(c_uv, c_vu).
+    Zwraca (ograniczenie, wykonane iteracje).
+    """
+    n = len(cost)
+    if n < 3:
+        return (float(cost[0, 1] + cost[1, 0]) if n == 2 else 0.0), 0
+    if max_iterations is None:
+        max_iterations = heldKarpIterations(n)
+
+    sym = np.minimum(cost, cost.T)
+    upper = _nearestNeighborCost(sym)
+    pi = np.zeros(n)
+    best = -np.inf
+    step_scale = 2.0
+    stall = 0
+    done = 0
+
+    while done < max_iterations:
+        done += 1
+        weights = sym + pi[:, None] + pi[None, :]
+
+        # Prim na miastach 1..n-1 (wektorowo po wierszach)
+        degree = np.zeros(n, dtype=np.int64)
+        in_tree = np.zeros(n, dtype=bool)
+        in_tree[:2] = True
+        key = weights[1].copy()
+        parent = np.ones(n, dtype=np.int64)
+        tree = 0.0
+        for _ in range(n - 2):
+            nxt = int(np.argmin(np.where(in_tree, np.inf, key)))
+            in_tree[nxt] = True
+            tree += key[nxt]
+            degree[nxt] += 1
+            degree[parent[nxt]] += 1
+            better = ~in_tree & (weights[nxt] < key)
+            key[better] = weights[nxt][better]
+            parent[better] = nxt
+
+        first, second = np.argsort(weights[0, 1:], kind="stable")[:2] + 1
+        tree += weights[0, first] + weights[0, second]
+        degree[0] = 2
+        degree[first] += 1
+        degree[second] += 1
+
+        value = tree - 2.0 * pi.sum()
+        if value > best:
+            best = value
+            stall = 0
+        else:
+            stall += 1
+            if stall >= HELD_KARP_PATIENCE:
+                step_scale *= 0.5
+                stall = 0
+
+        # Subgradient zerowy - 1-drzewo jest trasą, ograniczenie jest optymalne
+        subgradient = degree - 2
+        norm = float(subgradient @ subgradient)
+        if norm == 0.0 or step_scale < HELD_KARP_MIN_STEP or value >= upper:
+            break
+        pi += step_scale * (upper - value) / norm * subgradient
+
+    return float(best), done
+
+
+def lowerBound(data, method="auto"):
+    """
+    Ograniczenie dolne funkcji celu wybraną metodą (jak --bound w tsp_solver).
+    Zwraca słownik: value, method (metoda, która dała wartość; None - brak), iterations, time.
+    """
+    if method not in BOUND_METHODS:
+        raise ValueError(f"Nieznana metoda ograniczenia: {method}")
+    result = {"value": None, "method": None, "iterations": 0, "time": 0.0}
+    if method == "none":
+        return result
+
+    start = time.perf_counter()
+    cost = edgeCosts(data)
+    if method in ("held-karp", "auto"):
+        result["value"], result["iterations"] = heldKarpBound(cost)
+        result["method"] = "held-karp"
+    if method == "assignment" or (method == "auto" and len(cost) <= AUTO_ASSIGNMENT_MAX_N):
+        value = assignmentBound(cost)
+        if result["value"] is None or value > result["value"]:
+            result["value"] = value
+            result["method"] = "assignment"
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def relativeGap(cost, bound):
+    """Luka względna (koszt - ograniczenie) / koszt; None bez ograniczenia, 0 dla kosztu niedodatniego."""
+    if bound is None or cost is None:
+        return None
+    if not cost > 0:
+        return 0.0
+    return max(0.0, (cost - bound) / cost)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ograniczenie dolne kosztu trasy instancji TSP z oknami czasowymi")
+    parser.add_argument("-d", "--data", required=True, help="Plik instancji (.json lub .tspb)")
+    parser.add_argument("--bound", choices=BOUND_METHODS, default="auto",
+                        help="Metoda ograniczenia (domyślnie: auto)")
+    args = parser.parse_args()
+
+    bound = lowerBound(denseInstance(loadInstance(args.data)), args.bound)
+    if bound["method"] is None:
+        eprint("Brak ograniczenia.")
+        sys.exit(0)
+    eprint(f"Ograniczenie dolne: {bound['value']} ({bound['method']}, {bound['iterations']} iteracji, "
+           f"{bound['time']:.3f} s)")
+    print(bound["value"])
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from tsp_utils import eprint, loadJson
+
+DEFAULT_CACHE_DIR = ".tsp_cache"
+
+_hash_memo = {}
+
+
+def fileHash(path):
+    """SHA-256 zawartości pliku (zapamiętywany dla niezmienionego pliku)."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    memo_key = (path, st.st_mtime_ns, st.st_size)
+    if memo_key not in _hash_memo:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _hash_memo[memo_key] = h.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def executableHash(path):
+    """Hash pliku solvera (ścieżka lub nazwa z PATH); gdy pliku brak - hash samej nazwy."""
+    resolved = path if os.path.exists(path) else shutil.which(path)
+    if resolved is None:
+        return hashlib.sha256(path.encode()).hexdigest()
+    return fileHash(resolved)
+
+
+def cacheKey(instance_path, solver_files, solver_name, params):
+    """
+    Klucz wyniku: hash zawartości instancji, plików solvera (binarka / model / skrypt),
+    nazwy solvera oraz wszystkich parametrów.
+    """
+    payload = {
+        "instance": fileHash(instance_path),
+        "solver": [executableHash(p) for p in solver_files],
+        "solver_name": solver_name,
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Pamięć podręczna wyników adresowana zawartością.
+
+    Każdy wpis to plik <dir>/<key[:2]>/<key>.json z metadanymi i pełnym wynikiem solvera.
+    Czas modyfikacji pliku oznacza ostatnie użycie (dla usuwania LRU).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        paths = []
+        for sub in sorted(os.listdir(self.cache_dir)):
+            sub_dir = os.path.join(self.cache_dir, sub)
+            if os.path.isdir(sub_dir):
+                paths.extend(os.path.join(sub_dir, name) for name in sorted(os.listdir(sub_dir))
+                             if name.endswith(".json"))
+        return paths
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = loadJson(path)
+        except (OSError, ValueError):
+            return None
+        os.utime(path) # ostatnie użycie
+        return entry
+
+    def put(self, key, meta, result):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = dict(meta, key=key, created=time.time(), result=result)
+        # Zapis atomowy - przerwany przebieg nie zostawi uszkodzonego wpisu
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def restore(self, key, output_path):
+        """Odtwarza plik wyniku z pamięci podręcznej. Zwraca False, gdy brak wpisu."""
+        entry = self.get(key)
+        if entry is None:
+            return False
+        with open(output_path, 'w') as f:
+            json.dump(entry["result"], f, indent=4)
+        return True
+
+    def store(self, key, meta, output_path):
+        """Zapisuje plik wyniku do pamięci podręcznej."""
+        self.put(key, meta, loadJson(output_path))
+
+    def evict(self, keys):
+        removed = 0
+        for key in keys:
+            path = self._path(key)
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def prune(self, max_entries=None, max_bytes=None, max_age_days=None):
+        """Usuwa najdawniej używane wpisy, aż pamięć spełni wszystkie limity."""
+        items = []
+        for path in self.entries():
+            st = os.stat(path)
+            items.append((st.st_mtime, st.st_size, path))
+        items.sort() # najstarsze użycie na początku
+
+        now = time.time()
+        total = sum(size for _, size, _ in items)
+        removed = 0
+        for mtime, size, path in items:
+            too_old = max_age_days is not None and now - mtime > max_age_days * 86400
+            too_many = max_entries is not None and len(items) - removed > max_entries
+            too_big = max_bytes is not None and total > max_bytes
+            if not (too_old or too_many or too_big):
+                continue
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+
+def addCacheArguments(parser):
+    """Wspólne opcje pamięci podręcznej dla skryptów testowych."""
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Katalog pamięci podręcznej wyników (domyślnie: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Nie używaj pamięci podręcznej wyników")
+    parser.add_argument("--resume", action="store_true",
+                        help="Wznów przebieg: użyj istniejących plików instancji zamiast generować je ponownie")
+
+
+def cachedJob(job, cache, key_fn, meta, output_path):
+    """
+    Podpina pamięć podręczną pod zadanie: przed uruchomieniem wynik odtwarzany jest
+    z pamięci (status CACHED), a po udanym uruchomieniu - zapisywany do niej.
+    Klucz liczony jest dopiero w chwili startu, gdy instancja już istnieje.
+    """
+    state = {}
+
+    def lookup():
+        state["key"] = key_fn()
+        return cache.restore(state["key"], output_path)
+
+    def done():
+        cache.store(state["key"], meta, output_path)
+
+    job.cached = lookup
+    job.on_done = done
+    return job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zarządzanie pamięcią podręczną wyników testów TSP")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Katalog pamięci podręcznej")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Wypisz wpisy")
+    sub.add_parser("stats", help="Liczba wpisów i rozmiar")
+
+    p_prune = sub.add_parser("prune", help="Usuń najdawniej używane wpisy ponad limity")
+    p_prune.add_argument("--max-entries", type=int, default=None, help="Maksymalna liczba wpisów")
+    p_prune.add_argument("--max-size", type=float, default=None, help="Maksymalny rozmiar [MB]")
+    p_prune.add_argument("--max-age", type=float, default=None, help="Maksymalny wiek od ostatniego użycia [dni]")
+
+    p_evict = sub.add_parser("evict", help="Usuń wpisy o podanych kluczach")
+    p_evict.add_argument("keys", nargs="+", help="Klucze wpisów")
+
+    sub.add_parser("clear", help="Usuń całą pamięć podręczną")
+
+    args = parser.parse_args()
+    cache = ResultCache(args.cache_dir)
+
+    if args.command == "list":
+        for path in cache.entries():
+            entry = loadJson(path)
+            print(f"{entry['key']}  {entry.get('solver_name', '?'):<12} n={entry.get('n', '?'):<6} "
+                  f"{json.dumps(entry.get('params', {}), sort_keys=True)}")
+    elif args.command == "stats":
+        paths = cache.entries()
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"Wpisów: {len(paths)}, rozmiar: {size / 1e6:.2f} MB")
+    elif args.command == "prune":
+        max_bytes = args.max_size * 1e6 if args.max_size is not None else None
+        removed = cache.prune(args.max_entries, max_bytes, args.max_age)
+        eprint(f"Usunięto wpisów: {removed}")
+    elif args.command == "evict":
+        removed = cache.evict(args.keys)
+        eprint(f"Usunięto wpisów: {removed}")
+    elif args.command == "clear":
+        cache.clear()
+        eprint(f"Wyczyszczono {args.cache_dir}")
+    sys.exit(0)
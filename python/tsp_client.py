@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import socket
+import argparse
+from tsp_utils import eprint, loadJson
+
+# Gniazdo usługi: tsp_solver --serve /tmp/tsp_solver.sock
+DEFAULT_SOCKET = "/tmp/tsp_solver.sock"
+
+
+class ServiceError(RuntimeError):
+    """Odpowiedź usługi ze statusem ERROR."""
+
+
+class TspClient:
+    """
+    Klient usługi tsp_solver --serve (gniazdo Unix, jedno żądanie JSON na wiersz).
+    Połączenie jest otwierane przy pierwszym żądaniu i używane dla kolejnych.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._buffer = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            self._buffer = b""
+
+    def request(self, **fields):
+        """Wysyła żądanie i zwraca odpowiedź; status ERROR zgłaszany jest jako ServiceError."""
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            self._sock.connect(self.socket_path)
+        self._sock.sendall((json.dumps(fields) + "\n").encode())
+        while b"\n" not in self._buffer:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                self.close()
+                raise ServiceError("usługa zamknęła połączenie")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        response = json.loads(line)
+        if response.get("status") != "OK":
+            raise ServiceError(response.get("error", "nieznany błąd"))
+        return response
+
+    def load(self, path=None, instance=None):
+        """Wczytuje instancję w usłudze; zwraca {key, n, cached}."""
+        return self.request(op="load", **_instanceFields(None, path, instance))
+
+    def solve(self, key=None, path=None, instance=None, algorithm=None, params=None, time_limit=None,
+              threads=None, windows=None, warm_start=None):
+        """
+        Rozwiązuje instancję (klucz z load, ścieżka albo słownik instancji).
+        params: słownik {opcja: wartość} albo lista argumentów jak dla tsp_solver.
+        windows: nowe okna czasowe (n par [e, l]); warm_start: trasa albo True (ostatnia zwrócona trasa).
+        Zwraca wynik w formacie pliku tsp_solver (z trasą) oraz key, warm_start, queue_time.
+        """
+        fields = _instanceFields(key, path, instance)
+        optional = {"algorithm": algorithm, "params": params, "time_limit": time_limit,
+                    "threads": threads, "windows": windows, "warm_start": warm_start}
+        fields.update({k: v for k, v in optional.items() if v is not None})
+        return self.request(op="solve", **fields)
+
+    def status(self):
+        return self.request(op="status")
+
+    def evict(self, key):
+        return self.request(op="evict", key=key)["evicted"]
+
+    def shutdown(self):
+        self.request(op="shutdown")
+        self.close()
+
+
+def _instanceFields(key, path, instance):
+    # Usługa może mieć inny katalog roboczy - ścieżki wysyłane są jako bezwzględne
+    if key is not None:
+        return {"key": key}
+    if path is not None:
+        return {"path": os.path.abspath(path)}
+    if instance is not None:
+        return {"instance": instance}
+    raise ValueError("Podaj key, path albo instance")
+
+
+def _windowsArg(path):
+    # Plik z listą par [e, l] albo instancja (pole t_windows)
+    data = loadJson(path)
+    return data["t_windows"] if isinstance(data, dict) else data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Klient usługi tsp_solver --serve")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Gniazdo usługi (domyślnie: {DEFAULT_SOCKET})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_load = sub.add_parser("load", help="Wczytaj instancję i wypisz jej klucz")
+    p_load.add_argument("-d", "--data", required=True, help="Plik instancji (.json lub .tspb)")
+
+    p_solve = sub.add_parser("solve", help="Rozwiąż instancję; opcje solvera po '--'")
+    source = p_solve.add_mutually_exclusive_group(required=True)
+    source.add_argument("-d", "--data", help="Plik instancji (.json lub .tspb)")
+    source.add_argument("--key", help="Klucz instancji wczytanej wcześniej")
+    p_solve.add_argument("-o", "--output", help="Plik wynikowy JSON (domyślnie standardowe wyjście)")
+    p_solve.add_argument("--time-limit", type=float, default=None, help="Budżet czasu [s]")
+    p_solve.add_argument("--threads", type=int, default=None, help="Wątki OpenMP zadania")
+    p_solve.add_argument("--windows", default=None, help="Nowe okna czasowe: plik JSON z parami [e, l] lub instancja")
+    p_solve.add_argument("--warm-start", action="store_true", help="Zacznij od ostatniej trasy zwróconej dla tej instancji")
+    p_solve.add_argument("solver_args", nargs=argparse.REMAINDER, help="Opcje tsp_solver, np. -- --sa -i 2000")
+
+    p_evict = sub.add_parser("evict", help="Usuń instancję z pamięci usługi")
+    p_evict.add_argument("key", help="Klucz instancji")
+
+    sub.add_parser("status", help="Stan usługi i wczytane instancje")
+    sub.add_parser("shutdown", help="Zatrzymaj usługę")
+
+    args = parser.parse_args()
+
+    try:
+        with TspClient(args.socket) as client:
+            if args.command == "load":
+                response = client.load(path=args.data)
+                print(response["key"])
+                eprint(f"n={response['n']}, {'już wczytana' if response['cached'] else 'wczytana'}")
+            elif args.command == "solve":
+                solver_args = [a for a in args.solver_args if a != "--"]
+                result = client.solve(key=args.key, path=args.data, params=solver_args or None,
+                                      time_limit=args.time_limit, threads=args.threads,
+                                      windows=_windowsArg(args.windows) if args.windows else None,
+                                      warm_start=True if args.warm_start else None)
+                eprint(f"[{result['algorithm']}] {result['key']}: koszt {result['total_cost']}, "
+                       f"{result['execution_time']:.3f} s (kolejka {result['queue_time']:.3f} s)")
+                if args.output:
+                    with open(args.output, 'w') as f:
+                        json.dump(result, f, indent=4)
+                else:
+                    json.dump(result, sys.stdout, indent=4)
+                    print()
+            elif args.command == "evict":
+                eprint("Usunięto" if client.evict(args.key) else "Brak instancji")
+            elif args.command == "status":
+                json.dump(client.status(), sys.stdout, indent=4)
+                print()
+            elif args.command == "shutdown":
+                client.shutdown()
+                eprint("Usługa zatrzymana")
+    except (OSError, ServiceError) as e:
+        eprint(f"[BŁĄD] {e}")
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,100 @@
+import numpy as np
+from tsp_instance import blockRows
+
+# Typy odległości TSPLIB liczone ze współrzędnych (zaokrąglanie wg specyfikacji TSPLIB)
+# oraz EUC_2D_R2 - odległość euklidesowa zaokrąglona do 2 miejsc (jak macierze z tsp_gen.py)
+COORD_TYPES = ("EUC_2D", "CEIL_2D", "MAN_2D", "MAX_2D", "ATT", "GEO", "EUC_2D_R2")
+
+RRR = 6378.388 # Promień Ziemi (TSPLIB)
+
+def nint(x):
+    """Zaokrąglanie TSPLIB do najbliższej liczby całkowitej: int(x + 0.5) dla x >= 0."""
+    return np.floor(x + 0.5)
+
+def prepareCoords(kind, coords):
+    """
+    Przygotowuje współrzędne do liczenia odległości.
+    Dla GEO zamienia stopnie.minuty na radiany (raz dla wszystkich miast).
+    """
+    if kind not in COORD_TYPES:
+        raise ValueError(f"Nieobsługiwany EDGE_WEIGHT_TYPE: {kind}")
+
+    coords = np.asarray(coords, dtype=np.float64)
+    if kind == "GEO":
+        deg = np.trunc(coords)
+        minutes = coords - deg
+        return np.pi * (deg + 5.0 * minutes / 3.0) / 180.0
+    return coords
+
+def pairDistance(kind, x1, y1, x2, y2):
+    """Odległości między punktami (x1, y1) i (x2, y2) - tablice NumPy z rozgłaszaniem."""
+    if kind == "GEO":
+        # x = szerokość, y = długość geograficzna
+        q1 = np.cos(y1 - y2)
+        q2 = np.cos(x1 - x2)
+        q3 = np.cos(x1 + x2)
+        arg = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+        d = np.trunc(RRR * np.arccos(arg) + 1.0)
+    else:
+        dx = x1 - x2
+        dy = y1 - y2
+        if kind == "EUC_2D":
+            d = nint(np.hypot(dx, dy))
+        elif kind == "CEIL_2D":
+            d = np.ceil(np.hypot(dx, dy))
+        elif kind == "MAN_2D":
+            d = nint(np.abs(dx) + np.abs(dy))
+        elif kind == "MAX_2D":
+            d = np.maximum(nint(np.abs(dx)), nint(np.abs(dy)))
+        elif kind == "ATT":
+            r = np.sqrt((dx * dx + dy * dy) / 10.0)
+            t = nint(r)
+            d = np.where(t < r, t + 1.0, t)
+        elif kind == "EUC_2D_R2":
+            d = np.round(np.hypot(dx, dy), 2)
+        else:
+            raise ValueError(f"Nieobsługiwany EDGE_WEIGHT_TYPE: {kind}")
+    return d
+
+def distanceBlock(kind, coords, start, stop):
+    """
+    Odległości z miast start..stop-1 do wszystkich miast (wektorowo, wg TSPLIB).
+    `coords` muszą pochodzić z prepareCoords(kind, ...). Przekątna ma wartość 0.
+    """
+    d = pairDistance(kind, coords[start:stop, 0, None], coords[start:stop, 1, None],
+                     coords[None, :, 0], coords[None, :, 1])
+    rows = np.arange(start, stop)
+    d[rows - start, rows] = 0.0
+    return d
+
+def routeDistances(kind, coords, u, v):
+    """Odległości odcinków u -> v (tablice indeksów dowolnego kształtu); u == v daje 0."""
+    d = pairDistance(kind, coords[u, 0], coords[u, 1], coords[v, 0], coords[v, 1])
+    return np.where(u == v, 0.0, d)
+
+def isCoordsInstance(data):
+    """Czy instancja zawiera współrzędne zamiast macierzy (writeCoordsInstance)."""
+    return "coords" in data
+
+def instanceCoords(data):
+    """Typ odległości, przygotowane współrzędne i prędkość instancji ze współrzędnymi."""
+    kind = data.get("edge_weight_type", "EUC_2D")
+    return kind, prepareCoords(kind, data["coords"]), float(data.get("speed", 1.0))
+
+def denseInstance(data):
+    """
+    Instancja z pełnymi macierzami c_matrix i t_matrix (t = c / speed) - dla narzędzi, które
+    ich wymagają (MiniZinc, moduł tsp_native). Instancje z macierzami zwracane są bez zmian.
+    """
+    if not isCoordsInstance(data):
+        return data
+    kind, coords, speed = instanceCoords(data)
+    c_matrix = np.vstack(list(distanceBlocks(kind, coords))) if len(coords) else np.zeros((0, 0))
+    return dict(data, c_matrix=c_matrix, t_matrix=c_matrix / speed)
+
+def distanceBlocks(kind, coords):
+    """Generator kolejnych bloków wierszy pełnej macierzy odległości."""
+    n = len(coords)
+    step = blockRows(n)
+    for start in range(0, n, step):
+        yield distanceBlock(kind, coords, start, min(start + step, n))
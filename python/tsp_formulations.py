@@ -0,0 +1,33 @@
+import os
+
+# Katalog z modelami MiniZinc (../minizinc względem skryptów)
+MODEL_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "minizinc"))
+
+# Warianty modelu TSP. Wszystkie przyjmują te same dane i zwracają trasę w tym samym formacie:
+#   model - plik w MODEL_DIR
+#   route - zmienna, z której odtwarzana jest trasa: "x" (macierz przejść) lub "succ" (następniki)
+#   scale - ile razy cel Z jest większy od kosztu (modele całkowitoliczbowe)
+#   hints - zmienne rozwiązania startowego i ich typ (adnotacje warm_start)
+FORMULATIONS = {
+    # Macierz binarna x, MTZ, jedno big-M z danych (model bazowy)
+    "mtz": {"model": "tsp_model.mzn", "route": "x", "scale": 1,
+            "hints": {"x": "int", "u": "int", "T": "float"}},
+    # Jak mtz, ale MTZ Desrochers-Laporte i big-M liczone dla każdego łuku z okien czasowych
+    "tight": {"model": "tsp_model_tight.mzn", "route": "x", "scale": 1,
+              "hints": {"x": "int", "u": "int", "T": "float"}},
+    # Następniki + circuit dla solverów CP
+    "circuit": {"model": "tsp_model_circuit.mzn", "route": "succ", "scale": 1,
+                "hints": {"succ": "int", "T": "float"}},
+    # Następniki + circuit, koszty i czasy całkowite (x100) - dla solverów bez liczb zmiennoprzecinkowych
+    "int": {"model": "tsp_model_int.mzn", "route": "succ", "scale": 100,
+            "hints": {"succ": "int", "T": "int"}},
+}
+
+DEFAULT_FORMULATION = "mtz"
+
+
+def modelPath(formulation, model=None):
+    """Plik modelu: podany jawnie lub domyślny dla wariantu."""
+    if model:
+        return model
+    return os.path.join(MODEL_DIR, FORMULATIONS[formulation]["model"])
@@ -1,57 +1,59 @@
-import json
-import random
-import math
 import argparse
+import numpy as np
 from tsp_utils import eprint
+from tsp_instance import BINARY_EXT, blockRows, saveInstance, writeCoordsInstance
 
-def checkJson(name: str) -> str:
-    if not name.lower().endswith(".json"):
+def checkExtension(name: str) -> str:
+    if not name.lower().endswith((".json", BINARY_EXT)):
         return name + ".json"
     return name
 
-def distance(p1, p2):
-    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+def distanceBlock(coords, start, stop):
+    """Odległości euklidesowe z miast start..stop-1 do wszystkich miast (wektorowo)."""
+    dx = coords[start:stop, 0, None] - coords[None, :, 0]
+    dy = coords[start:stop, 1, None] - coords[None, :, 1]
+    return np.hypot(dx, dy)
 
-def generateData(n_cities, filename, no_fuel=False, no_time=False):
-    width, height = 100, 100
-    coords = []
-    
-    for _ in range(n_cities):
-        coords.append((random.uniform(0, width), random.uniform(0, height)))
-    
-    c_matrix = [] # odległości
-    t_matrix = [] # czas
-    
-    speed = 1.0 # d/t
-    
-    for i in range(n_cities):
-        row_c = []
-        row_t = []
-        for j in range(n_cities):
-            if i == j:
-                d = 0
-                t = 0
-            else:
-                d = distance(coords[i], coords[j])
-                t = (d / speed)
-            row_c.append(round(d, 2))
-            row_t.append(round(t, 2))
-        c_matrix.append(row_c)
-        t_matrix.append(row_t)
+def matrixBlocks(coords, speed=None):
+    """
+    Generator bloków wierszy macierzy odległości (speed=None)
+    lub czasów przejazdu (t = d / speed), zaokrąglonych do 2 miejsc.
+    """
+    n = len(coords)
+    step = blockRows(n)
+    for start in range(0, n, step):
+        block = distanceBlock(coords, start, min(start + step, n))
+        if speed is not None:
+            block = block / coords.dtype.type(speed)
+        yield np.round(block, 2)
 
-    t_windows = []
+def generateWindows(rng, n_cities, no_time=False, dtype=np.float64):
     horizon = n_cities * 20 # przybliżony czas na odwiedzenie wszystkich miast
-    
-    for i in range(n_cities):
-        if no_time:
-            t_windows.append([0, horizon * 100])
-        else:
-            if i == 0:
-                t_windows.append([0, horizon]) # baza ma najszersze okno czasowe aby dało się odwiedzić wszystkie miasta
-            else:
-                start = random.uniform(0, horizon * 0.7)
-                duration = random.uniform(10, 30)
-                t_windows.append([round(start, 2), round(start + duration, 2)])
+    t_windows = np.empty((n_cities, 2), dtype=dtype)
+
+    if no_time:
+        t_windows[:, 0] = 0
+        t_windows[:, 1] = horizon * 100
+        return t_windows
+
+    start = rng.uniform(0, horizon * 0.7, n_cities)
+    duration = rng.uniform(10, 30, n_cities)
+    t_windows[:, 0] = np.round(start, 2)
+    t_windows[:, 1] = np.round(start + duration, 2)
+    # baza ma najszersze okno czasowe aby dało się odwiedzić wszystkie miasta
+    if n_cities > 0:
+        t_windows[0] = (0, horizon)
+    return t_windows
+
+def generateData(n_cities, filename, no_fuel=False, no_time=False, float32=False, seed=None, coords_only=False):
+    width, height = 100, 100
+    dtype = np.float32 if float32 else np.float64
+    rng = np.random.default_rng(seed)
+
+    coords = rng.uniform((0, 0), (width, height), size=(n_cities, 2)).astype(dtype)
+    t_windows = generateWindows(rng, n_cities, no_time, dtype)
+
+    speed = 1.0 # d/t
 
     if no_fuel:
         a = 0.0
@@ -60,29 +62,36 @@ def generateData(n_cities, filename, no_fuel=False, no_time=False):
         a = 0.5
         b = 0.01
 
-    data = {
-        "n": n_cities,
-        "c_matrix": c_matrix, # c_ij
-        "t_matrix": t_matrix, # t_ij
-        "t_windows": t_windows, # [e_i, l_i]
-        "a": a, # paliwo liniowy
-        "b": b, # paliwo kwadratowy
-        "M": 10000 # stała
-    }
-
-    filename = checkJson(filename)
+    filename = checkExtension(filename)
     path = filename
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=4)
-    
+    if coords_only:
+        # Bez macierzy: EUC_2D_R2 daje te same odległości co matrixBlocks (zaokrąglenie do 2 miejsc)
+        if path.lower().endswith(BINARY_EXT):
+            raise SystemExit(f"--coords obsługuje tylko format JSON (nie {BINARY_EXT})")
+        writeCoordsInstance(path, coords, "EUC_2D_R2", speed, t_windows, a, b, 10000)
+        eprint(f"Wygenerowano plik {path} dla {n_cities} miast (współrzędne).")
+        return
+
+    saveInstance(path, n_cities,
+                 matrixBlocks(coords),         # c_ij
+                 matrixBlocks(coords, speed),  # t_ij
+                 t_windows,                    # [e_i, l_i]
+                 a, b,                         # paliwo liniowy / kwadratowy
+                 10000,                        # stała
+                 dtype)
+
     eprint(f"Wygenerowano plik {path} dla {n_cities} miast.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate Data for TSP problem")
     parser.add_argument("-n", "--n-cities", type=int, default=20, help="Number of cities")
-    parser.add_argument("-o", "--output", type=str, default="tsp_data.json", help="Output file name")
-    
+    parser.add_argument("-o", "--output", type=str, default="tsp_data.json", help="Output file name (.json or .tspb)")
+
     parser.add_argument("--no-fuel", action="store_true", help="Generate data without fuel constraints")
     parser.add_argument("--no-time", action="store_true", help="Generate data without time constraints")
+    parser.add_argument("--float32", action="store_true", help="Compute matrices in float32 (halves memory)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (same seed -> same instance)")
+    parser.add_argument("--coords", action="store_true",
+                        help="Store only coordinates and speed (no matrices); distances are computed on demand")
     args = parser.parse_args()
-    generateData(args.n_cities, args.output, args.no_fuel, args.no_time)
+    generateData(args.n_cities, args.output, args.no_fuel, args.no_time, args.float32, args.seed, args.coords)
@@ -0,0 +1,195 @@
+import os
+import json
+import contextlib
+import numpy as np
+from tsp_utils import loadJson
+
+# Docelowa liczba elementów macierzy przetwarzanych w jednym bloku wierszy.
+BLOCK_ELEMS = 1 << 20
+
+# Format binarny (.tspb), little-endian:
+#   nagłówek 64 B: magic "TSPB", version u32, n u32, elem_size u32 (4/8),
+#                  a f64, b f64, M f64, zarezerwowane
+#   c_matrix n*n, t_matrix n*n, t_windows n*2 (typ zgodny z elem_size)
+BINARY_EXT = ".tspb"
+BINARY_MAGIC = b"TSPB"
+BINARY_VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("n", "<u4"),
+    ("elem_size", "<u4"),
+    ("a", "<f8"),
+    ("b", "<f8"),
+    ("M", "<f8"),
+    ("reserved", "V24"),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+@contextlib.contextmanager
+def _atomicPath(path):
+    """
+    Ścieżka pliku tymczasowego podmienianego na `path` po udanym zapisie (os.replace) -
+    przerwany zapis nie zostawi niepełnej instancji pod docelową nazwą (--resume).
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def blockRows(n):
+    """Liczba wierszy w bloku tak, aby blok miał ok. BLOCK_ELEMS elementów."""
+    return max(1, BLOCK_ELEMS // max(n, 1))
+
+def isBinaryInstance(path):
+    return path.lower().endswith(BINARY_EXT)
+
+def _writeMatrix(f, blocks, fmt):
+    first = True
+    row_fmt = None
+    for block in blocks:
+        if row_fmt is None:
+            row_fmt = "[" + ", ".join([fmt] * block.shape[1]) + "]"
+        for row in block.tolist():
+            f.write("        " if first else ",\n        ")
+            f.write(row_fmt % tuple(row))
+            first = False
+    f.write("\n    ]")
+
+def writeJsonInstance(path, n, c_blocks, t_blocks, t_windows, a, b, M, fmt="%.2f"):
+    """
+    Zapisuje instancję w formacie JSON (ten sam schemat co json.dump),
+    strumieniowo, blok po bloku wierszy.
+
+    c_blocks / t_blocks to iterowalne bloki wierszy (tablice NumPy k x n),
+    więc w pamięci nigdy nie ma całej macierzy ani całego tekstu pliku.
+    """
+    with _atomicPath(path) as tmp_path, open(tmp_path, 'w') as f:
+        f.write("{\n")
+        f.write(f'    "n": {int(n)},\n')
+        f.write('    "c_matrix": [\n')
+        _writeMatrix(f, c_blocks, fmt)
+        f.write(',\n    "t_matrix": [\n')
+        _writeMatrix(f, t_blocks, fmt)
+        f.write(',\n    "t_windows": [')
+        f.write(", ".join(f"[{fmt}, {fmt}]" % (e, l) for e, l in np.asarray(t_windows).tolist()))
+        f.write("]")
+        f.write(f',\n    "a": {json.dumps(a)},\n')
+        f.write(f'    "b": {json.dumps(b)},\n')
+        f.write(f'    "M": {json.dumps(M)}\n')
+        f.write("}\n")
+
+def writeCoordsInstance(path, coords, edge_weight_type, speed, t_windows, a, b, M):
+    """
+    Zapisuje instancję bez macierzy: tylko współrzędne, typ odległości (TSPLIB) i prędkość.
+    Odległości c_ij wyznacza się na żądanie ze współrzędnych, a t_ij = c_ij / speed.
+    """
+    with _atomicPath(path) as tmp_path, open(tmp_path, 'w') as f:
+        f.write("{\n")
+        f.write(f'    "n": {len(coords)},\n')
+        f.write(f'    "edge_weight_type": {json.dumps(edge_weight_type)},\n')
+        f.write(f'    "speed": {json.dumps(float(speed))},\n')
+        f.write('    "coords": [')
+        f.write(", ".join(f"[{x!r}, {y!r}]" for x, y in np.asarray(coords, dtype=np.float64).tolist()))
+        f.write('],\n    "t_windows": ')
+        f.write(json.dumps(np.asarray(t_windows).tolist()))
+        f.write(f',\n    "a": {json.dumps(a)},\n')
+        f.write(f'    "b": {json.dumps(b)},\n')
+        f.write(f'    "M": {json.dumps(M)}\n')
+        f.write("}\n")
+
+def _binaryLayout(n, elem_size):
+    mat_bytes = n * n * elem_size
+    c_off = HEADER_SIZE
+    t_off = c_off + mat_bytes
+    w_off = t_off + mat_bytes
+    return c_off, t_off, w_off, w_off + n * 2 * elem_size
+
+def _binaryArrays(path, n, dtype, mode):
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if n == 0:
+        empty = np.empty((0, 0), dtype=dtype)
+        return empty, empty, np.empty((0, 2), dtype=dtype)
+    c_off, t_off, w_off, _ = _binaryLayout(n, dtype.itemsize)
+    c = np.memmap(path, dtype=dtype, mode=mode, offset=c_off, shape=(n, n))
+    t = np.memmap(path, dtype=dtype, mode=mode, offset=t_off, shape=(n, n))
+    w = np.memmap(path, dtype=dtype, mode=mode, offset=w_off, shape=(n, 2))
+    return c, t, w
+
+def writeBinaryInstance(path, n, c_blocks, t_blocks, t_windows, a, b, M, dtype=np.float64):
+    """Zapisuje instancję w formacie binarnym (.tspb), blok po bloku wierszy."""
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Nieobsługiwany typ macierzy: {dtype}")
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = BINARY_MAGIC
+    header["version"] = BINARY_VERSION
+    header["n"] = n
+    header["elem_size"] = dtype.itemsize
+    header["a"] = a
+    header["b"] = b
+    header["M"] = M
+
+    with _atomicPath(path) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(_binaryLayout(n, dtype.itemsize)[3])
+
+        c, t, w = _binaryArrays(tmp_path, n, dtype, "r+")
+        for dst, blocks in ((c, c_blocks), (t, t_blocks)):
+            row = 0
+            for block in blocks:
+                dst[row:row + len(block)] = block
+                row += len(block)
+        w[:] = t_windows
+        for arr in (c, t, w):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        del c, t, w
+
+def saveInstance(path, n, c_blocks, t_blocks, t_windows, a, b, M, dtype=np.float64, fmt="%.2f"):
+    """Zapisuje instancję w formacie wybranym na podstawie rozszerzenia pliku."""
+    if isBinaryInstance(path):
+        writeBinaryInstance(path, n, c_blocks, t_blocks, t_windows, a, b, M, dtype)
+    else:
+        writeJsonInstance(path, n, c_blocks, t_blocks, t_windows, a, b, M, fmt)
+
+def loadBinaryInstance(path):
+    """
+    Mapuje plik .tspb w pamięci (bez kopiowania macierzy).
+    Zwraca słownik z tymi samymi kluczami co plik JSON.
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != BINARY_MAGIC:
+        raise ValueError(f"{path}: to nie jest plik instancji {BINARY_EXT}")
+    if header["version"][0] != BINARY_VERSION:
+        raise ValueError(f"{path}: nieobsługiwana wersja formatu {header['version'][0]}")
+
+    n = int(header["n"][0])
+    elem_size = int(header["elem_size"][0])
+    dtype = {4: np.float32, 8: np.float64}.get(elem_size)
+    if dtype is None:
+        raise ValueError(f"{path}: nieobsługiwany rozmiar elementu {elem_size}")
+    if os.path.getsize(path) < _binaryLayout(n, elem_size)[3]:
+        raise ValueError(f"{path}: plik jest obcięty")
+
+    c, t, w = _binaryArrays(path, n, dtype, "r")
+    return {
+        "n": n,
+        "c_matrix": c,
+        "t_matrix": t,
+        "t_windows": w,
+        "a": float(header["a"][0]),
+        "b": float(header["b"][0]),
+        "M": float(header["M"][0]),
+    }
+
+def loadInstance(path):
+    """Wczytuje instancję w formacie JSON lub binarnym (wg rozszerzenia)."""
+    if isBinaryInstance(path):
+        return loadBinaryInstance(path)
+    return loadJson(path)
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from tsp_utils import eprint, runCommand
+
+OK_STATES = ("OK", "CACHED")
+FAILED_STATES = ("FAILED", "TIMEOUT", "SKIPPED")
+
+
+class Job:
+    """
+    Pojedyncze polecenie w puli zadań.
+
+    `cmd` to lista argumentów procesu albo funkcja Pythona wywoływana w wątku puli
+    (np. solver w procesie interpretera); dla funkcji limit czasu nie jest egzekwowany,
+    a wyjątek oznacza status FAILED.
+
+    Zadanie startuje dopiero, gdy wszystkie zależności (deps) zakończą się statusem OK;
+    jeśli którakolwiek się nie powiedzie, zadanie otrzymuje status SKIPPED.
+
+    Opcjonalnie: cached() - zwraca True, gdy wynik już istnieje (zadanie nie jest
+    uruchamiane, status CACHED); on_done() - wywoływane po udanym uruchomieniu;
+    batch - wiersz manifestu tsp_solver --batch (zadania łączone przez batchJobs).
+    """
+
+    def __init__(self, name, cmd, deps=(), timeout=None, threads=None):
+        self.name = name
+        self.cmd = cmd
+        self.deps = list(deps)
+        self.timeout = timeout
+        self.threads = threads  # OMP_NUM_THREADS dla zadania (None = bez zmian)
+        self.cached = None
+        self.on_done = None
+        self.batch = None
+        self.status = "PENDING"
+        self.elapsed = None
+
+    def env(self):
+        if self.threads is None:
+            return None
+        env = os.environ.copy()
+        env["OMP_NUM_THREADS"] = str(self.threads)
+        return env
+
+
+def defaultThreads(jobs):
+    """Liczba wątków OpenMP na zadanie tak, aby równoległe zadania nie przeciążały rdzeni."""
+    return max(1, (os.cpu_count() or 1) // max(jobs, 1))
+
+
+def jobThreads(args):
+    """OMP_NUM_THREADS wynikające z opcji addJobArguments (None = nie ustawiaj)."""
+    if args.threads_per_job is not None:
+        return args.threads_per_job
+    return defaultThreads(args.jobs) if args.jobs > 1 else None
+
+
+def _callJob(job):
+    try:
+        job.cmd()
+    except Exception as e:
+        eprint(f"[BŁĄD] {job.name}: {e}")
+        return "FAILED"
+    return "OK"
+
+
+def _runJob(job):
+    start = time.perf_counter()
+    if job.cached is not None and job.cached():
+        job.status = "CACHED"
+    else:
+        if callable(job.cmd):
+            job.status = _callJob(job)
+        else:
+            job.status = runCommand(job.cmd, timeout=job.timeout, env=job.env(), fatal=False)
+        if job.status == "OK" and job.on_done is not None:
+            try:
+                job.on_done()
+            except (OSError, ValueError) as e:
+                eprint(f"[UWAGA] {job.name}: nie zapisano wyniku w pamięci podręcznej: {e}")
+    job.elapsed = time.perf_counter() - start
+    return job
+
+
+def runJobs(jobs, max_workers=1):
+    """
+    Wykonuje zadania w puli max_workers wątków z uwzględnieniem zależności.
+
+    Gotowe zadania uruchamiane są w kolejności utworzenia, więc generowanie kolejnych
+    instancji nakłada się na obliczenia dla wcześniejszych. Błąd lub przekroczenie czasu
+    oznacza tylko dane zadanie (i zależne od niego) - reszta przebiegu trwa dalej.
+    """
+    pending = list(jobs)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for job in list(pending):
+                if any(dep.status in FAILED_STATES for dep in job.deps):
+                    job.status = "SKIPPED"
+                    for member in getattr(job, "members", ()):
+                        member.status = "SKIPPED"
+                    pending.remove(job)
+                    eprint(f"   [SKIPPED] {job.name}")
+
+            ready = [job for job in pending if all(dep.status in OK_STATES for dep in job.deps)]
+            for job in ready[:max_workers - len(running)]:
+                pending.remove(job)
+                job.status = "RUNNING"
+                running[pool.submit(_runJob, job)] = job
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                future.result()
+                eprint(f"   [{job.status}] {job.name} ({job.elapsed:.2f}s)")
+
+    return jobs
+
+
+class BatchJob(Job):
+    """
+    Zadania solvera wykonywane jednym procesem `solver --batch manifest`.
+
+    Członkowie (zadania z polem batch) zachowują własne statusy: zadania odtworzone z pamięci
+    podręcznej nie trafiają do manifestu, a status pozostałych ustalany jest z wierszy wyników
+    solvera (wypisywanych na bieżąco). Limit czasu dotyczy całego procesu
+    (timeout na wiersz x liczba wierszy).
+    """
+
+    def __init__(self, name, solver, members, manifest_path, deps=(), threads=None, timeout=None):
+        super().__init__(name, self._run, deps=deps, timeout=timeout, threads=threads)
+        self.solver = solver
+        self.members = list(members)
+        self.manifest_path = manifest_path
+
+    def _run(self):
+        pending = []
+        for member in self.members:
+            if member.cached is not None and member.cached():
+                member.status = "CACHED"
+                eprint(f"   [CACHED] {member.name}")
+            else:
+                member.status = "RUNNING"
+                pending.append(member)
+        if not pending:
+            return
+
+        with open(self.manifest_path, 'w') as f:
+            for i, member in enumerate(pending):
+                f.write(json.dumps(dict(member.batch, id=i)) + "\n")
+
+        proc = subprocess.Popen([self.solver, "--batch", self.manifest_path], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True, env=self.env())
+        timer = None
+        if self.timeout is not None:
+            timer = threading.Timer(self.timeout * len(pending), proc.kill)
+            timer.start()
+        try:
+            for line in proc.stdout:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                member = pending[record["id"]]
+                member.elapsed = record.get("execution_time")
+                member.status = "OK" if record["status"] == "OK" else "FAILED"
+                if member.status == "OK" and member.on_done is not None:
+                    try:
+                        member.on_done()
+                    except (OSError, ValueError) as e:
+                        eprint(f"[UWAGA] {member.name}: nie zapisano wyniku w pamięci podręcznej: {e}")
+                elapsed = f" ({member.elapsed:.2f}s)" if member.elapsed is not None else ""
+                eprint(f"   [{member.status}] {member.name}{elapsed}" +
+                       ("" if member.status == "OK" else f": {record.get('error')}"))
+            proc.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        # Wiersze bez wyniku: proces przerwany (limit czasu) lub zakończony błędem
+        killed = timer is not None and proc.returncode is not None and proc.returncode < 0
+        for member in pending:
+            if member.status == "RUNNING":
+                member.status = "TIMEOUT" if killed else "FAILED"
+                eprint(f"   [{member.status}] {member.name}")
+
+
+def batchJobs(jobs, solver, manifest_dir, workers=1, threads=None, timeout=None):
+    """
+    Łączy zadania z polem batch w co najwyżej `workers` zadań BatchJob.
+
+    Zadania na tej samej instancji trafiają do jednego manifestu (instancja wczytywana jest raz);
+    instancje rozdzielane są na najmniej obciążone manifesty. Zależności między łączonymi
+    zadaniami (np. od rozgrzewki) nie są przenoszone - w manifeście obowiązuje kolejność utworzenia.
+    """
+    batched = set(jobs)
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.batch["input"], []).append(job)
+
+    chunks = [[] for _ in range(max(1, min(workers, len(groups))))]
+    for members in groups.values():
+        min(chunks, key=len).extend(members)
+
+    os.makedirs(manifest_dir, exist_ok=True)
+    batches = []
+    for i, members in enumerate(chunks):
+        deps = []
+        for member in members:
+            deps += [dep for dep in member.deps if dep not in batched and dep not in deps]
+        batches.append(BatchJob(f"batch #{i} ({len(members)} uruchomień)", solver, members,
+                                os.path.join(manifest_dir, f"batch_{i}.jsonl"), deps=deps,
+                                threads=threads, timeout=timeout))
+    return batches
+
+
+def addJobArguments(parser):
+    """Wspólne opcje puli zadań dla skryptów testowych."""
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Liczba równolegle wykonywanych zadań (domyślnie: 1)")
+    parser.add_argument("--threads-per-job", type=int, default=None,
+                        help="OMP_NUM_THREADS dla każdego zadania (domyślnie: rdzenie / jobs)")
+    parser.add_argument("--job-timeout", type=float, default=None,
+                        help="Limit czasu pojedynczego zadania w sekundach (po nim zadanie jest oznaczane jako TIMEOUT)")
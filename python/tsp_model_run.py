@@ -1,10 +1,28 @@
 import minizinc
+import asyncio
 import json
 import argparse
 import os
+import re
+import math
 import time
+import numpy as np
 from datetime import timedelta
-from tsp_utils import eprint 
+from tsp_utils import eprint, loadJson
+from tsp_instance import loadInstance
+from tsp_distance import denseInstance
+from tsp_validate import checkRouteStructure, simulateRoutes
+from tsp_formulations import FORMULATIONS, DEFAULT_FORMULATION, modelPath
+from tsp_bound import BOUND_METHODS, lowerBound, relativeGap
+
+SOLVE_ITEM = re.compile(r"solve\s+minimize\s+Z\s*;")
+
+# Zapas ograniczenia górnego - koszt heurystyki liczony jest w innej kolejności działań niż w modelu
+UPPER_BOUND_SLACK = 1e-6
+
+def asList(value):
+    """Tablice NumPy (np. z pliku .tspb) zamienia na listy dla MiniZinc."""
+    return value.tolist() if hasattr(value, "tolist") else value
 
 def reconstructRoute(x_matrix, start_node=0):
     n = len(x_matrix)
@@ -36,37 +54,427 @@ def reconstructRoute(x_matrix, start_node=0):
 
     return route
 
-def solveTspMinizinc(model_path, data_path, solver_name, timeout_sec, output_path):
-    eprint(f"Model:   {model_path}")
-    eprint(f"Dane:    {data_path}")
-    eprint(f"Wynik:   {output_path}")
-    eprint(f"Solver:  {solver_name}")
-    eprint(f"Timeout: {timeout_sec}s")
-    eprint(f"--------------------")
+def successorRoute(succ, start_node=0):
+    """Trasa z tablicy następników (modele z circuit)."""
+    route = [start_node]
+    current = start_node
+    for _ in range(len(succ)):
+        current = succ[current]
+        route.append(current)
+        if current == start_node:
+            break
+    return route
 
-    solver = minizinc.Solver.lookup(solver_name)
+def resultRoute(result, spec):
+    """Trasa z rozwiązania modelu (tablica następników albo macierz przejść x)."""
+    if spec["route"] == "succ":
+        return successorRoute(result["succ"])
+    return reconstructRoute(result["x"])
 
-    model = minizinc.Model(model_path)
-    instance = minizinc.Instance(solver, model)
+def routeObjective(data, sim):
+    """
+    Koszt pojedynczej trasy z simulateRoutes w sensie celu Z: powrót do bazy nie ma
+    okna czasowego (w modelu T[0] to chwila wyjazdu).
+    """
+    n = data["n"]
+    windows = np.asarray(data["t_windows"], dtype=np.float64).reshape(-1, 2)
+    penalty = sim["penalty"][0, :n - 1].sum() + max(0.0, windows[0, 0] - windows[0, 1])
+    return float(sim["travel_cost"][0] + penalty)
+
+def routeCost(data, route):
+    """Dokładny koszt trasy w sensie celu Z (None dla trasy niepełnej)."""
+    if checkRouteStructure(route, data["n"]):
+        return None
+    return routeObjective(data, simulateRoutes(data, np.asarray([route])))
+
+def warmStartHints(data, route):
+    """
+    Zamienia trasę heurystyki (format SaveResults) na wartości zmiennych modelu:
+    x (spłaszczona macierz przejść), u (pozycja miasta w trasie), succ (następniki),
+    T (czas przyjazdu) oraz koszt tej trasy w sensie celu Z (ograniczenie górne).
+    """
+    n = data["n"]
+    errors = checkRouteStructure(route, n)
+    if errors:
+        raise ValueError("Nieprawidłowa trasa startowa: " + " ".join(errors))
+
+    x_hint = np.zeros((n, n), dtype=int)
+    u_hint = np.zeros(n, dtype=int)
+    succ_hint = np.zeros(n, dtype=int)
+    for k in range(n):
+        x_hint[route[k], route[k + 1]] = 1
+        u_hint[route[k]] = k
+        succ_hint[route[k]] = route[k + 1]
+
+    windows = np.asarray(data["t_windows"], dtype=np.float64).reshape(-1, 2)
+    sim = simulateRoutes(data, np.asarray([route]))
+
+    # W modelu T[0] to chwila wyjazdu z bazy; powrót do bazy nie ma okna czasowego
+    T_hint = np.zeros(n)
+    T_hint[0] = windows[0, 0]
+    T_hint[route[1:n]] = sim["arrival"][0, :n - 1]
+    z_upper = routeObjective(data, sim)
 
-    with open(data_path, 'r') as f:
-        data = json.load(f)
+    return {
+        "x_hint": x_hint.ravel().tolist(),
+        "u_hint": u_hint.tolist(),
+        "succ_hint": succ_hint.tolist(),
+        "T_hint": T_hint.tolist(),
+        "z_upper": z_upper,
+    }
+
+def warmStartData(formulation, hints, n):
+    """
+    Dane rozwiązania startowego dla wariantu modelu (tylko jego zmienne, w jego skali).
+    Ograniczenie górne ma zapas: względny na błędy zaokrągleń, a w modelach
+    całkowitoliczbowych także n (każdy z n łuków i n kar zaokrąglany jest o <= 0.5).
+    """
+    spec = FORMULATIONS[formulation]
+    scale = spec["scale"]
+    data = {}
+    for var in spec["hints"]:
+        values = hints[f"{var}_hint"]
+        if var == "T" and scale != 1:
+            values = [round(scale * v) for v in values]
+        data[f"{var}_hint"] = values
+
+    z_upper = hints["z_upper"] * scale * (1 + UPPER_BOUND_SLACK) + UPPER_BOUND_SLACK
+    data["z_upper"] = math.ceil(z_upper) + n if scale != 1 else z_upper
+    return data
+
+def warmStartModel(model_path, formulation):
+    """Model z danymi podpowiedzi, ograniczeniem Z <= z_upper i adnotacją warm_start."""
+    with open(model_path) as f:
+        text = f.read()
+    if not SOLVE_ITEM.search(text):
+        raise ValueError(f"Model {model_path} nie zawiera 'solve minimize Z;' - nie można dodać rozwiązania startowego.")
+
+    spec = FORMULATIONS[formulation]
+    decls = "".join(f"array[int] of {kind}: {var}_hint;\n" for var, kind in spec["hints"].items())
+    decls += f"{'int' if spec['scale'] != 1 else 'float'}: z_upper;\nconstraint Z <= z_upper;\n"
+    hints = ", ".join(f"warm_start(array1d({var}), {var}_hint)" for var in spec["hints"])
+    solve = f"solve :: warm_start_array([{hints}]) minimize Z;"
+
+    model = minizinc.Model()
+    model.add_string(SOLVE_ITEM.sub(solve, text) + "\n" + decls)
+    return model
+
+def gapReached(objective, bound, gap_abs, gap_rel):
+    """Czy luka między rozwiązaniem a dolnym ograniczeniem solvera osiągnęła cel."""
+    if bound is None or (gap_abs is None and gap_rel is None):
+        return False
+    gap = objective - bound
+    if gap_abs is not None and gap <= gap_abs:
+        return True
+    return gap_rel is not None and gap <= gap_rel * max(abs(objective), 1e-9)
+
+def parsePortfolio(spec, formulation):
+    """
+    Lista "solver[:wariant],..." -> [(solver, wariant), ...].
+    Wpisy bez wariantu używają wariantu z --formulation.
+    """
+    entries = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, variant = item.partition(":")
+        variant = variant or formulation
+        if variant not in FORMULATIONS:
+            raise ValueError(f"Nieznany wariant modelu '{variant}' w portfolio (dostępne: {', '.join(sorted(FORMULATIONS))})")
+        entries.append((name, variant))
+    return entries
+
+class SharedIncumbent:
+    """
+    Najlepsze rozwiązanie i najlepsze ograniczenie dolne wspólne dla wszystkich solverów
+    (w trybie pojedynczego solvera - tylko jego własne). Na tej podstawie podejmowane są
+    decyzje o zatrzymaniu: stagnacja, docelowa luka i udowodnienie optymalności.
+    bound: ograniczenie dolne wyznaczone przed startem (tsp_bound) - także dla solverów CP,
+    które własnego ograniczenia nie raportują.
+    """
+
+    def __init__(self, start_time, bound=None):
+        self.start_time = start_time
+        self.objective = None
+        self.bound = bound
+        self.solver = None
+        self.last_improvement = None
+        self.trace = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def offer(self, solver, objective, bound):
+        """Zgłasza rozwiązanie (i ograniczenie) solvera. Zwraca True, jeśli to nowe najlepsze."""
+        if bound is not None and (self.bound is None or bound > self.bound):
+            self.bound = bound
+        if self.objective is not None and objective >= self.objective:
+            return False
+
+        self.objective = objective
+        self.solver = solver
+        self.last_improvement = self.elapsed()
+        self.trace.append({"time": self.last_improvement, "objective": objective,
+                           "bound": self.bound, "solver": solver})
+        return True
+
+    def stallWait(self, stall_sec):
+        """Sekundy do zatrzymania przez stagnację (None - brak limitu lub brak rozwiązania)."""
+        if stall_sec <= 0 or self.last_improvement is None:
+            return None
+        return max(0.0, self.last_improvement + stall_sec - self.elapsed())
+
+    def proven(self):
+        """Czy ograniczenie dolne któregoś solvera dowodzi optymalności najlepszego rozwiązania."""
+        if self.objective is None or self.bound is None:
+            return False
+        return self.bound >= self.objective - UPPER_BOUND_SLACK * max(abs(self.objective), 1.0)
+
+async def solveWithTrace(name, instance, timeout_sec, stall_sec, gap_abs, gap_rel, shared, data,
+                         formulation=DEFAULT_FORMULATION):
+    """
+    Rozwiązuje instancję jednym solverem, odbierając rozwiązania pośrednie.
+    Każda poprawa celu trafia do przebiegu zbieżności solvera (czas od startu, cel, ograniczenie),
+    w jednostkach kosztu, i jest zgłaszana do shared. W modelach całkowitoliczbowych (scale != 1)
+    cel to suma zaokrąglonych kosztów - kosztem jest wtedy dokładny koszt trasy rozwiązania
+    (routeCost), porównywalny z celami pozostałych wariantów.
+    Zatrzymuje solver, gdy najlepszy wspólny cel nie poprawił się przez stall_sec sekund,
+    osiągnięto lukę lub wspólne ograniczenie dowodzi optymalności. Anulowanie zadania
+    (portfolio) kończy proces solvera i zwraca dotychczasowy przebieg.
+    Zwraca słownik: result (ostatni wynik z rozwiązaniem), status, statistics, trace, stop_reason.
+    """
+    run = {"solver": name, "result": None, "status": minizinc.Status.UNKNOWN,
+           "statistics": {}, "trace": [], "stop_reason": None}
+    trace = run["trace"]
+    spec = FORMULATIONS[formulation]
+    scale = spec["scale"]
+
+    solutions = instance.solutions(timeout=timedelta(seconds=timeout_sec), intermediate_solutions=True)
+    pending = None
+    try:
+        while True:
+            # Oczekiwanie bez anulowania - stagnacja liczona jest od ostatniej poprawy dowolnego solvera
+            if pending is None:
+                pending = asyncio.ensure_future(solutions.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=shared.stallWait(stall_sec))
+            if not done:
+                if shared.stallWait(stall_sec) == 0.0:
+                    run["stop_reason"] = "stall"
+                    eprint(f"[{name}] Brak poprawy przez {stall_sec}s - zatrzymanie solvera.")
+                    break
+                continue
+
+            finished, pending = pending, None
+            try:
+                result = finished.result()
+            except StopAsyncIteration:
+                break
+
+            run["status"] = result.status
+            run["statistics"].update(result.statistics)
+            if result.solution is None:
+                continue
+
+            objective = result.objective / scale
+            if scale != 1:
+                exact = routeCost(data, resultRoute(result, spec))
+                if exact is not None:
+                    objective = exact
+            if trace and objective >= trace[-1]["objective"]:
+                continue
+
+            run["result"] = result
+            bound = result.statistics.get("objectiveBound")
+            if bound is not None:
+                bound = bound / scale
+            trace.append({
+                "time": shared.elapsed(),
+                "objective": objective,
+                "bound": bound
+            })
+            shared.offer(name, objective, bound)
+            eprint(f"[{trace[-1]['time']:8.2f}s] [{name}] Koszt: {objective}"
+                   + (f" (ograniczenie: {bound})" if bound is not None else ""))
+
+            if gapReached(shared.objective, shared.bound, gap_abs, gap_rel):
+                run["stop_reason"] = "gap"
+                eprint(f"[{name}] Osiągnięto docelową lukę - zatrzymanie solvera.")
+                break
+            if shared.proven():
+                run["stop_reason"] = "bound"
+                eprint(f"[{name}] Ograniczenie dolne dowodzi optymalności - zatrzymanie solvera.")
+                break
+    except asyncio.CancelledError:
+        run["stop_reason"] = "cancelled"
+    finally:
+        # Przerwanie oczekującego odczytu kończy generator (i proces solvera) przed zamknięciem
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await solutions.aclose()
+
+    return run
+
+def runFinal(run):
+    """Czy przebieg kończy wyścig portfolio (dowód optymalności lub spełnione kryterium stopu)."""
+    return run["status"] == minizinc.Status.OPTIMAL_SOLUTION or run["stop_reason"] in ("gap", "bound", "stall")
+
+async def solvePortfolio(runs, timeout_sec, stall_sec, gap_abs, gap_rel, shared, data):
+    """
+    Uruchamia solvery współbieżnie na tej samej instancji.
+    Kończy, gdy któryś udowodni optymalność (albo spełni kryterium stopu), anulując pozostałe;
+    w przeciwnym razie czeka na wszystkie (najpóźniej do timeoutu).
+    runs: lista (nazwa, instancja, wariant). Zwraca listę przebiegów w tej samej kolejności.
+    """
+    tasks = [asyncio.ensure_future(solveWithTrace(name, instance, timeout_sec, stall_sec,
+                                                  gap_abs, gap_rel, shared, data, variant))
+             for name, instance, variant in runs]
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if any(not task.cancelled() and task.exception() is None and runFinal(task.result())
+                   for task in done):
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for (name, _, _), task in zip(runs, tasks):
+        if task.cancelled():
+            # Anulowane przed startem - brak przebiegu
+            results.append({"solver": name, "result": None, "status": minizinc.Status.UNKNOWN,
+                            "statistics": {}, "trace": [], "stop_reason": "cancelled"})
+        elif task.exception() is not None:
+            eprint(f"[{name}] Błąd solvera: {task.exception()}")
+            results.append({"solver": name, "result": None, "status": minizinc.Status.ERROR,
+                            "statistics": {}, "trace": [], "stop_reason": "error",
+                            "error": str(task.exception())})
+        else:
+            results.append(task.result())
+    return results
+
+def pickWinner(runs):
+    """Zwycięzca: pierwszy dowód optymalności, w przeciwnym razie najlepszy cel (wcześniejszy przy remisie)."""
+    optimal = [r for r in runs if r["status"] == minizinc.Status.OPTIMAL_SOLUTION and r["trace"]]
+    if optimal:
+        return min(optimal, key=lambda r: r["trace"][-1]["time"])
+    solved = [r for r in runs if r["result"] is not None]
+    if not solved:
+        return None
+    return min(solved, key=lambda r: (r["trace"][-1]["objective"], r["trace"][-1]["time"]))
+
+def buildInstance(solver, model_path, formulation, data, hints):
+    """Instancja MiniZinc danego wariantu modelu (z rozwiązaniem startowym, jeśli podano hints)."""
+    if hints is not None:
+        model = warmStartModel(model_path, formulation)
+    else:
+        model = minizinc.Model(model_path)
+    instance = minizinc.Instance(solver, model)
 
     instance["n"] = data["n"]
-    instance["c_matrix"] = data["c_matrix"]
-    instance["t_matrix"] = data["t_matrix"]
-    instance["t_windows"] = data["t_windows"]
+    instance["c_matrix"] = asList(data["c_matrix"])
+    instance["t_matrix"] = asList(data["t_matrix"])
+    instance["t_windows"] = asList(data["t_windows"])
     instance["a"] = data["a"]
     instance["b"] = data["b"]
     instance["M"] = data["M"]
+    if hints is not None:
+        for name, value in warmStartData(formulation, hints, data["n"]).items():
+            instance[name] = value
+    return instance
+
+def solveTspMinizinc(model_path, data_path, solver_name, timeout_sec, output_path,
+                     stall_sec=0.0, gap_abs=None, gap_rel=None, warm_start_path=None,
+                     formulation=DEFAULT_FORMULATION, portfolio=None, bound_method=None):
+    """
+    portfolio: lista (solver, wariant) uruchamianych współbieżnie; None - tylko solver_name.
+    model_path dotyczy wpisów z wariantem formulation (pozostałe używają modelu swojego wariantu).
+    bound_method: ograniczenie dolne liczone przed startem, poza czasem wykonania (tsp_bound);
+    None - "auto" z gap_abs/gap_rel, w przeciwnym razie bez ograniczenia. Luka liczona jest
+    względem lepszego z nich i ograniczenia raportowanego przez solver.
+    """
+    entries = portfolio if portfolio else [(solver_name, formulation)]
+    eprint(f"Model:   {model_path} ({formulation})")
+    eprint(f"Dane:    {data_path}")
+    eprint(f"Wynik:   {output_path}")
+    if portfolio:
+        eprint(f"Portfolio: {', '.join(f'{name} ({variant})' for name, variant in entries)}")
+    else:
+        eprint(f"Solver:  {solver_name}")
+    eprint(f"Timeout: {timeout_sec}s")
+    if stall_sec > 0:
+        eprint(f"Stagnacja: {stall_sec}s")
+    if gap_abs is not None or gap_rel is not None:
+        eprint(f"Luka:    bezwzględna {gap_abs}, względna {gap_rel}")
+    if warm_start_path:
+        eprint(f"Start:   {warm_start_path}")
+    eprint(f"--------------------")
+
+    data = denseInstance(loadInstance(data_path)) # model MiniZinc wymaga macierzy
+
+    warm_start = None
+    hints = None
+    if warm_start_path:
+        hints = warmStartHints(data, loadJson(warm_start_path)["route"])
+        warm_start = {"source": warm_start_path, "upper_bound": hints["z_upper"]}
+        eprint(f"Ograniczenie górne z heurystyki: {hints['z_upper']:.2f}")
+
+    if bound_method is None:
+        bound_method = "auto" if gap_abs is not None or gap_rel is not None else "none"
+    lower_bound = lowerBound(data, bound_method)
+    if lower_bound["method"] is not None:
+        eprint(f"Ograniczenie dolne: {lower_bound['value']:.2f} ({lower_bound['method']}, "
+               f"{lower_bound['time']:.3f}s)")
+
+    runs = []
+    for name, variant in entries:
+        if portfolio:
+            # W portfolio pomijane są solvery niezainstalowane
+            try:
+                solver = minizinc.Solver.lookup(name)
+            except LookupError:
+                eprint(f"[{name}] Solver niedostępny - pominięty.")
+                continue
+        else:
+            solver = minizinc.Solver.lookup(name)
+        path = model_path if variant == formulation else modelPath(variant)
+        runs.append((name, variant, buildInstance(solver, path, variant, data, hints)))
+    if not runs:
+        raise RuntimeError("Żaden solver z portfolio nie jest dostępny.")
 
     eprint("Rozpoczynanie obliczeń...")
 
     start_time = time.perf_counter()
-    result = instance.solve(timeout=timedelta(seconds=timeout_sec))
+    shared = SharedIncumbent(start_time, lower_bound["value"])
+    if portfolio:
+        solved = asyncio.run(solvePortfolio([(name, instance, variant) for name, variant, instance in runs],
+                                            timeout_sec, stall_sec, gap_abs, gap_rel, shared, data))
+    else:
+        name, variant, instance = runs[0]
+        solved = [asyncio.run(solveWithTrace(name, instance, timeout_sec, stall_sec, gap_abs, gap_rel,
+                                             shared, data, variant))]
     end_time = time.perf_counter()
     wall_time = end_time - start_time
 
+    for run, (_, variant, _) in zip(solved, runs):
+        run["formulation"] = variant
+    winner = pickWinner(solved) or solved[0]
+    result, status, statistics = winner["result"], winner["status"], winner["statistics"]
+    stop_reason = winner["stop_reason"]
+    if portfolio:
+        # Powód zakończenia wyścigu (pozostałe solvery zostały anulowane)
+        stop_reason = next((run["stop_reason"] for run in solved
+                            if run["stop_reason"] in ("gap", "bound", "stall")), None)
+    spec = FORMULATIONS[winner["formulation"]]
+    trace = shared.trace if portfolio else winner["trace"]
+
     output_data = {
         "execution_time": wall_time,
         "solve_time": None,
@@ -75,56 +483,135 @@ def solveTspMinizinc(model_path, data_path, solver_name, timeout_sec, output_pat
         "timeout_hit": False,
         "route": [],
         "total_cost": float('inf'),
-        "status": str(result.status)
+        "status": str(status),
+        "solver": winner["solver"],
+        "formulation": winner["formulation"],
+        "stop_reason": stop_reason,
+        "objective_bound": shared.bound,
+        "lower_bound": lower_bound["value"],
+        "bound_method": lower_bound["method"],
+        "lower_bound_time": lower_bound["time"],
+        "gap": None,
+        "first_solution_time": trace[0]["time"] if trace else None,
+        "trace": trace
     }
 
-    if result.status == minizinc.Status.OPTIMAL_SOLUTION or result.status == minizinc.Status.SATISFIED:
+    if portfolio:
+        # Przebieg każdego solvera - do wyboru domyślnego solvera dla rozmiaru instancji
+        output_data["portfolio"] = {
+            "winner": winner["solver"],
+            "runs": [{
+                "solver": run["solver"],
+                "formulation": run["formulation"],
+                "status": str(run["status"]),
+                "stop_reason": run["stop_reason"],
+                "objective": run["trace"][-1]["objective"] if run["trace"] else None,
+                "first_solution_time": run["trace"][0]["time"] if run["trace"] else None,
+                "trace": run["trace"],
+                "error": run.get("error")
+            } for run in solved]
+        }
+        eprint(f"Zwycięzca portfolio: {winner['solver']} ({winner['formulation']})")
+
+    if warm_start is not None:
+        output_data["warm_start"] = warm_start
+
+    # Optymalność udowodniona przez ograniczenie innego solvera też się liczy
+    proven = status == minizinc.Status.OPTIMAL_SOLUTION or shared.proven()
+
+    if result is not None and status in (minizinc.Status.OPTIMAL_SOLUTION, minizinc.Status.SATISFIED):
+        objective = winner["trace"][-1]["objective"]
         eprint("=== WYNIK ===")
-        eprint(f"Status: {result.status}")
-        eprint(f"Koszt całkowity: {result.objective}")
+        eprint(f"Status: {status}")
+        eprint(f"Koszt całkowity: {objective}")
+        eprint(f"Kolejnych poprawień: {len(trace)}")
         
-        output_data["total_cost"] = result.objective
+        output_data["total_cost"] = objective
         output_data["is_valid"] = True
-        output_data["is_optimal"] = (result.status == minizinc.Status.OPTIMAL_SOLUTION)
+        output_data["is_optimal"] = proven
+        output_data["gap"] = relativeGap(objective, shared.bound)
+        if output_data["gap"] is not None:
+            eprint(f"Luka względem ograniczenia dolnego: {100 * output_data['gap']:.2f}%")
         
-        x_matrix = result["x"]
-        route = reconstructRoute(x_matrix)
-        output_data["route"] = route
+        output_data["route"] = resultRoute(result, spec)
         
-        time_stat = result.statistics.get('solveTime')
+        time_stat = statistics.get('solveTime')
         if time_stat is not None:
             seconds = time_stat.total_seconds() if hasattr(time_stat, "total_seconds") else float(time_stat)
             output_data["solve_time"] = seconds
             eprint(f"Czas obliczeń (solveTime): {seconds:.4f}s")
 
         eprint(f"Czas całkowity (wall): {wall_time:.4f}s")
-        output_data["timeout_hit"] = wall_time >= max(timeout_sec - 0.5, 0.0) and not output_data["is_optimal"]
+
+        if warm_start is not None:
+            # Ile solver poprawił rozwiązanie startowe i ile czasu zajęło udowodnienie wyniku
+            improvement = warm_start["upper_bound"] - objective
+            warm_start["improvement"] = improvement
+            warm_start["improvement_rel"] = improvement / max(abs(warm_start["upper_bound"]), 1e-9)
+            warm_start["improved"] = improvement > UPPER_BOUND_SLACK * max(abs(warm_start["upper_bound"]), 1.0)
+            eprint(f"Poprawa względem heurystyki: {improvement:.2f} ({100 * warm_start['improvement_rel']:.2f}%)")
+        output_data["timeout_hit"] = (stop_reason is None and not output_data["is_optimal"]
+                                      and wall_time >= max(timeout_sec - 0.5, 0.0))
             
-    elif result.status == minizinc.Status.UNSATISFIABLE:
+    elif status == minizinc.Status.UNSATISFIABLE:
         eprint("=== WYNIK: UNSATISFIABLE ===")
         eprint("Nie znaleziono rozwiązania.")
         output_data["is_valid"] = False
         
-    elif result.status == minizinc.Status.UNKNOWN:
+    elif status == minizinc.Status.UNKNOWN:
         eprint("=== WYNIK: UNKNOWN ===")
         eprint("Upłynął limit czasu.")
-        output_data["is_valid"] = False
+        if warm_start is not None:
+            # Solver niczego nie znalazł - wynikiem pozostaje rozwiązanie startowe
+            eprint("Wynikiem pozostaje rozwiązanie startowe (heurystyka).")
+            output_data["route"] = loadJson(warm_start_path)["route"]
+            output_data["total_cost"] = warm_start["upper_bound"]
+            output_data["is_valid"] = True
+            output_data["gap"] = relativeGap(warm_start["upper_bound"], shared.bound)
+            warm_start["improvement"] = 0.0
+            warm_start["improvement_rel"] = 0.0
+            warm_start["improved"] = False
+            warm_start["fallback"] = True
+        else:
+            output_data["is_valid"] = False
         output_data["timeout_hit"] = True
     else:
-        eprint(f"Status końcowy: {result.status}")
+        eprint(f"Status końcowy: {status}")
 
     with open(output_path, 'w') as f:
         json.dump(output_data, f, indent=4)
         eprint(f"Zapisano wyniki do pliku: {output_path}")
 
+# Domyślne portfolio: MIP na wzmocnionym modelu, CP na modelach z circuit
+DEFAULT_PORTFOLIO = "coin-bc:tight,gecode:circuit,chuffed:int,cp-sat:int"
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Uruchom model MiniZinc TSP.")
     
-    parser.add_argument("-m", "--model", type=str, required=True, help="Ścieżka do pliku modelu (.mzn)")
-    parser.add_argument("-d", "--data", type=str, required=True, help="Ścieżka do pliku danych (.json)")    
+    parser.add_argument("-m", "--model", type=str, default=None,
+                        help="Ścieżka do pliku modelu (.mzn); domyślnie model wybranego wariantu z katalogu minizinc")
+    parser.add_argument("-f", "--formulation", choices=sorted(FORMULATIONS), default=DEFAULT_FORMULATION,
+                        help="Wariant modelu: mtz (bazowy), tight (wzmocnione MTZ i big-M), circuit (CP), "
+                             "int (CP, koszty całkowite) (domyślnie: mtz)")
+    parser.add_argument("-d", "--data", type=str, required=True, help="Ścieżka do pliku danych (.json lub .tspb)")    
     parser.add_argument("-o", "--output", type=str, help="Ścieżka do pliku wyjściowego JSON")
     parser.add_argument("-s", "--solver", type=str, default="coin-bc", help="Nazwa solvera (domyślnie: coin-bc)")
+    parser.add_argument("-p", "--portfolio", nargs="?", const=DEFAULT_PORTFOLIO, default=None,
+                        help="Wyścig solverów: lista solver[:wariant],... uruchamiana współbieżnie; "
+                             f"bez wartości: {DEFAULT_PORTFOLIO} (niezainstalowane są pomijane)")
     parser.add_argument("-t", "--timeout", type=int, default=120, help="Limit czasu w sekundach (domyślnie: 120)")
+    parser.add_argument("--stall", type=float, default=0.0,
+                        help="Zatrzymaj, gdy koszt nie poprawił się przez tyle sekund (domyślnie: wyłączone)")
+    parser.add_argument("--gap-abs", type=float, default=None,
+                        help="Zatrzymaj, gdy koszt - ograniczenie dolne solvera <= wartość")
+    parser.add_argument("--gap-rel", "--target-gap", type=float, default=None,
+                        help="Zatrzymaj, gdy (koszt - ograniczenie dolne) / koszt <= wartość, np. 0.01")
+    parser.add_argument("--bound", choices=BOUND_METHODS, default=None,
+                        help="Ograniczenie dolne liczone przed startem (pole gap wyniku i --gap-*; "
+                             "także dla solverów CP bez własnego ograniczenia) "
+                             "(domyślnie: auto z --gap-abs/--gap-rel, w przeciwnym razie none)")
+    parser.add_argument("-w", "--warm-start", type=str, default=None,
+                        help="Plik wyniku heurystyki (tsp_solver) - rozwiązanie startowe i ograniczenie górne celu")
 
     args = parser.parse_args()
 
@@ -134,4 +621,11 @@ if __name__ == "__main__":
         base_name = os.path.splitext(args.data)[0]
         output_file = f"{base_name}_result_mzn.json"
 
-    solveTspMinizinc(args.model, args.data, args.solver, args.timeout, output_file)
\ No newline at end of file
+    try:
+        portfolio = parsePortfolio(args.portfolio, args.formulation) if args.portfolio else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    solveTspMinizinc(modelPath(args.formulation, args.model), args.data, args.solver, args.timeout, output_file,
+                     args.stall, args.gap_abs, args.gap_rel, args.warm_start, args.formulation, portfolio,
+                     args.bound)
@@ -1,55 +1,133 @@
 import os
 import json
 import argparse
-from tsp_utils import loadJson, eprint, runCommand
+from tsp_utils import loadJson, eprint
+from tsp_jobs import Job, runJobs, jobThreads, addJobArguments, OK_STATES
+from tsp_cache import ResultCache, cacheKey, cachedJob, addCacheArguments
+from tsp_stats import deriveSeed
+from tsp_formulations import FORMULATIONS, DEFAULT_FORMULATION, modelPath
+from tsp_store import ResultStore, addStoreArguments
 
 def loadResult(path):
     if not os.path.exists(path):
         return None
 
     data = loadJson(path)
-    return {
+    result = {
         "time": data.get("execution_time", 0.0),
         "cost": data.get("total_cost", 0.0),
         "is_valid": data.get("is_valid", False),
-        "status": data.get("status", "UNKNOWN")
+        "status": data.get("status", "UNKNOWN"),
+        "gap": data.get("gap")
     }
+    if data.get("trace"):
+        # Przebieg zbieżności w tym samym układzie co w tsp_test_run.py: [[czas, koszt], ...]
+        result["trace"] = [[entry["time"], entry["objective"]] for entry in data["trace"]]
+        result["stop_reason"] = data.get("stop_reason")
+    if "warm_start" in data:
+        result["warm_start"] = data["warm_start"]
+    if "portfolio" in data:
+        # Zwycięzca i czas pierwszego rozwiązania każdego solvera - do wyboru domyślnych solverów
+        result["solver"] = data["portfolio"]["winner"]
+        result["portfolio"] = {run["solver"] + ":" + run["formulation"]: {
+            "status": run["status"],
+            "objective": run["objective"],
+            "first_solution_time": run["first_solution_time"]
+        } for run in data["portfolio"]["runs"]}
+    return result
+
+def failedResult(status):
+    return {"time": None, "cost": None, "is_valid": False, "status": status}
 
 def runTest(args):
     os.makedirs(args.data, exist_ok=True)
     os.makedirs(args.output, exist_ok=True)
 
-    test_data = []
+    eprint(f"--- ROZPOCZĘCIE TESTU MINIZINC (Max N: {args.max_n}, zadania: {args.jobs}) ---")
 
-    eprint(f"--- ROZPOCZĘCIE TESTU MINIZINC (Max N: {args.max_n}) ---")
+    # Domyślnie zadanie ma zapas ponad limit czasu solvera (kompilacja modelu, zapis wyników)
+    job_timeout = args.job_timeout if args.job_timeout is not None else args.timeout + 60
+    threads = jobThreads(args)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    model = modelPath(args.formulation, args.model)
+    jobs = []
+    planned = []
 
     for n in range(0, args.max_n + 1, args.step):
-        eprint(f"[n={n}] ...")
-
-        record = {
-            "n": n,
-            "minizinc": {}
-        }
-
-        input_file = os.path.join(args.data, f"test_n{n}.json")
+        input_file = os.path.join(args.data, f"test_n{n}.{args.instance_format}")
         cmd_gen = ["python3", args.gen_script, "-n", str(n), "-o", input_file]
-        runCommand(cmd_gen)
+        if args.seed is not None:
+            cmd_gen += ["--seed", str(deriveSeed(args.seed, n))]
+        gen_job = Job(f"gen n={n}", cmd_gen)
+        if args.resume:
+            gen_job.cached = lambda path=input_file: os.path.exists(path)
+        jobs.append(gen_job)
+
+        # Rozwiązanie startowe z heurystyki (SA) - ograniczenie górne i podpowiedź dla solvera
+        deps = [gen_job]
+        if args.warm_start_bin:
+            out_heur = os.path.join(args.output, f"result_n{n}_warm_start.json")
+            cmd_heur = [args.warm_start_bin, "-d", input_file, "-o", out_heur, "--sa"]
+            if args.seed is not None:
+                cmd_heur += ["--seed", str(deriveSeed(args.seed, n))]
+            heur_job = Job(f"warm start n={n}", cmd_heur, deps=[gen_job], timeout=job_timeout, threads=threads)
+            jobs.append(heur_job)
+            deps.append(heur_job)
 
         out_mzn = os.path.join(args.output, f"result_n{n}_mzn.json")
         cmd_mzn = [
             "python3", args.model_script,
-            "-m", args.model,
+            "-m", model,
             "-d", input_file,
             "-o", out_mzn,
             "-s", args.solver,
-            "-t", str(args.timeout)
+            "-t", str(args.timeout),
+            "--formulation", args.formulation
         ]
-        runCommand(cmd_mzn)
+        if args.stall > 0:
+            cmd_mzn += ["--stall", str(args.stall)]
+        if args.gap_abs is not None:
+            cmd_mzn += ["--gap-abs", str(args.gap_abs)]
+        if args.gap_rel is not None:
+            cmd_mzn += ["--gap-rel", str(args.gap_rel)]
+        if args.warm_start_bin:
+            cmd_mzn += ["--warm-start", out_heur]
+        if args.portfolio:
+            cmd_mzn += ["--portfolio", args.portfolio]
+        mzn_job = Job(f"minizinc n={n}", cmd_mzn, deps=deps, timeout=job_timeout, threads=threads)
+        if cache is not None:
+            params = {"args": cmd_mzn[8:], "threads": threads}
+            # Z rozwiązaniem startowym hashowana jest też jego zawartość (klucz liczony po zadaniu
+            # heurystyki) - bez --seed trasa zmienia się między przebiegami, a ścieżka nie
+            code_files = [model, args.model_script] + ([args.warm_start_bin, out_heur] if args.warm_start_bin else [])
+            key_fn = lambda path=input_file, params=params, code_files=code_files: cacheKey(
+                path, code_files, args.solver, params)
+            cachedJob(mzn_job, cache, key_fn, {"n": n, "solver_name": args.solver, "params": params}, out_mzn)
+
+        jobs.append(mzn_job)
+        planned.append((n, mzn_job, out_mzn, input_file, cmd_mzn[8:]))
+
+    runJobs(jobs, args.jobs)
+
+    store = None
+    if not args.no_store:
+        store = ResultStore(args.store)
+        sweep_id = store.beginSweep("tsp_model_test", vars(args))
 
-        record["minizinc"] = loadResult(out_mzn)
-        test_data.append(record)
-
-        eprint(f"   -> Zakończono n={n}")
+    test_data = []
+    for n, job, out, input_file, mzn_args in planned:
+        result = loadResult(out) if job.status in OK_STATES else failedResult(job.status)
+        test_data.append({"n": n, "minizinc": result})
+        if store is not None:
+            params = {"args": mzn_args, "solver": args.solver, "threads": threads, "seed": args.seed}
+            store.addRun(sweep_id, n, "minizinc", result, params=params, instance=input_file)
+
+    cached = sum(job.status == "CACHED" for job in jobs)
+    if cached:
+        eprint(f"Zadania pominięte dzięki pamięci podręcznej / wznowieniu: {cached}")
+    failed = [job.name for job in jobs if job.status not in OK_STATES]
+    if failed:
+        eprint(f"Nieudane zadania ({len(failed)}): {', '.join(failed)}")
 
     eprint("--- ZAPISYWANIE WYNIKÓW ---")
 
@@ -57,21 +135,39 @@ def runTest(args):
         json.dump(test_data, f, indent=4)
 
     eprint(f"Pełny wynik testu zapisano do pliku: {args.summary_file}")
+    if store is not None:
+        store.close()
+        eprint(f"Uruchomienia dopisano do bazy {args.store} (przebieg {sweep_id})")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test czasu działania modelu MiniZinc (TSP)")
 
-    parser.add_argument("-m", "--model", required=True, help="Ścieżka do pliku modelu (.mzn)")
+    parser.add_argument("-m", "--model", default=None,
+                        help="Ścieżka do pliku modelu (.mzn); domyślnie model wybranego wariantu")
+    parser.add_argument("-f", "--formulation", choices=sorted(FORMULATIONS), default=DEFAULT_FORMULATION,
+                        help="Wariant modelu: mtz, tight, circuit, int (domyślnie: mtz)")
     parser.add_argument("--model-script", default="tsp_model_run.py", help="Skrypt uruchamiający MiniZinc")
     parser.add_argument("-s", "--solver", default="coin-bc", help="Nazwa solvera (domyślnie: coin-bc)")
+    parser.add_argument("-p", "--portfolio", default=None,
+                        help="Wyścig solverów w każdym zadaniu: lista solver[:wariant],... (zob. tsp_model_run.py)")
     parser.add_argument("-t", "--timeout", type=int, default=120, help="Limit czasu w sekundach (domyślnie: 120)")
+    parser.add_argument("--stall", type=float, default=0.0, help="Zatrzymanie po tylu sekundach bez poprawy (domyślnie: wyłączone)")
+    parser.add_argument("--gap-abs", type=float, default=None, help="Zatrzymanie po osiągnięciu bezwzględnej luki")
+    parser.add_argument("--gap-rel", type=float, default=None, help="Zatrzymanie po osiągnięciu względnej luki")
+    parser.add_argument("--warm-start-bin", default=None,
+                        help="Plik wykonywalny tsp_solver - jego wynik (SA) jest rozwiązaniem startowym dla MiniZinc")
 
     parser.add_argument("--gen-script", default="tsp_gen.py", help="Skrypt generujący dane")
     parser.add_argument("--max-n", type=int, default=50, help="Maksymalna liczba miast (n)")
     parser.add_argument("--step", type=int, default=5, help="Krok zwiększania n")
     parser.add_argument("-d", "--data", default="data_test", help="Katalog na wygenerowane dane")
+    parser.add_argument("--instance-format", choices=["json", "tspb"], default="json", help="Format plików instancji (domyślnie: json)")
     parser.add_argument("-o", "--output", default="results_mzn", help="Katalog na wyniki poszczególnych uruchomień")
     parser.add_argument("--summary-file", default="test_summary_mzn.json", help="Plik końcowy z wynikami")
+    parser.add_argument("--seed", type=int, default=None, help="Ziarno bazowe generowania instancji (domyślnie losowe)")
+    addJobArguments(parser)
+    addCacheArguments(parser)
+    addStoreArguments(parser)
 
     args = parser.parse_args()
     runTest(args)
@@ -5,6 +5,7 @@ from typing import List, Optional
 import matplotlib.pyplot as plt
 
 from tsp_utils import eprint, loadJson
+from tsp_store import addQueryArguments, querySummary
 
 
 def _compute_cap(times: List[float], statuses: List[str], user_cap: Optional[float]) -> Optional[float]:
@@ -20,17 +21,15 @@ def _compute_cap(times: List[float], statuses: List[str], user_cap: Optional[flo
     return max(non_sat_times) * 1.1
 
 
-def plot_mzn_summary(json_file: str, output_path: str, cap_satisfied: Optional[float]) -> None:
-    if not os.path.exists(json_file):
-        eprint(f"Błąd: Nie znaleziono pliku {json_file}")
+def plot_mzn_summary(data: List[dict], output_path: str, cap_satisfied: Optional[float]) -> None:
+    if not data:
+        eprint("Błąd: Brak wyników do narysowania")
         return
 
-    data = loadJson(json_file)
-    data.sort(key=lambda x: x.get("n", 0))
-
     ns = [d.get("n", 0) for d in data]
-    times = [d.get("minizinc", {}).get("time", 0.0) for d in data]
-    statuses = [d.get("minizinc", {}).get("status", "UNKNOWN") for d in data]
+    # Nieudane zadania (FAILED/TIMEOUT) nie mają czasu - rysowane jako 0
+    times = [(d.get("minizinc") or {}).get("time") or 0.0 for d in data]
+    statuses = [(d.get("minizinc") or {}).get("status", "UNKNOWN") for d in data]
 
     cap = _compute_cap(times, statuses, cap_satisfied)
 
@@ -92,7 +91,7 @@ def plot_mzn_summary(json_file: str, output_path: str, cap_satisfied: Optional[f
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Wykres wyników MiniZinc z oznaczeniem SATISFIED")
-    parser.add_argument("-d", "--data", required=True, help="Plik JSON z wynikami zbiorczymi")
+    parser.add_argument("-d", "--data", default=None, help="Plik JSON z wynikami zbiorczymi")
     parser.add_argument("-o", "--output", default="data/tmp_mzn_plot.png", help="Ścieżka wyjściowa wykresu")
     parser.add_argument(
         "--cap-satisfied",
@@ -100,6 +99,19 @@ if __name__ == "__main__":
         default=None,
         help="Ręczny limit przycięcia słupków SATISFIED (sekundy). Domyślnie auto.",
     )
+    addQueryArguments(parser)
     args = parser.parse_args()
-
-    plot_mzn_summary(args.data, args.output, args.cap_satisfied)
+    if (args.data is None) == (args.store is None):
+        parser.error("wymagane jest -d lub --store")
+
+    if args.store is not None:
+        data = querySummary(args, ["minizinc"])
+    elif os.path.exists(args.data):
+        data = loadJson(args.data)
+        data.sort(key=lambda x: x.get("n", 0))
+    else:
+        eprint(f"Błąd: Nie znaleziono pliku {args.data}")
+        data = None
+
+    if data is not None:
+        plot_mzn_summary(data, args.output, args.cap_satisfied)
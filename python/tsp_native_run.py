@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import numpy as np
+from tsp_instance import loadInstance
+from tsp_distance import denseInstance
+
+# Moduł tsp_native budowany jest opcjonalnie: cmake -DTSP_BUILD_PYTHON=ON
+NATIVE_MODULE = "tsp_native"
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def loadNative(native_path=None):
+    """Importuje moduł tsp_native (opcjonalnie z podanego katalogu kompilacji)."""
+    if native_path is not None and native_path not in sys.path:
+        sys.path.insert(0, os.path.abspath(native_path))
+    try:
+        import tsp_native
+    except ImportError as e:
+        raise ImportError(f"Nie można zaimportować modułu {NATIVE_MODULE} ({e}). "
+                          f"Zbuduj go z -DTSP_BUILD_PYTHON=ON i podaj katalog kompilacji.") from e
+    return tsp_native
+
+
+def instanceArrays(path):
+    """
+    Macierze instancji jako tablice float64 (wczytywane raz na proces).
+    Pliki .tspb z elementami 8 B są mapowane w pamięci i trafiają do solvera bez kopiowania.
+    """
+    path = os.path.abspath(path)
+    memo_key = (path, os.stat(path).st_mtime_ns)
+    with _instances_lock:
+        if memo_key not in _instances:
+            data = denseInstance(loadInstance(path)) # moduł przyjmuje tylko macierze
+            n = data['n']
+            _instances[memo_key] = {
+                "c_matrix": np.ascontiguousarray(data['c_matrix'], dtype=np.float64).reshape(n, n),
+                "t_matrix": np.ascontiguousarray(data['t_matrix'], dtype=np.float64).reshape(n, n),
+                "t_windows": np.ascontiguousarray(data['t_windows'], dtype=np.float64).reshape(n, 2),
+                "a": float(data['a']),
+                "b": float(data['b']),
+                "M": float(data['M']),
+            }
+        return _instances[memo_key]
+
+
+def _solverParser():
+    # Te same opcje co w tsp_solver (src/main.cpp), bez ścieżek plików
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-g", "--greedy", action="store_true")
+    group.add_argument("-s", "--sa", action="store_true")
+    parser.add_argument("-i", "--iterations", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("-T", type=float, default=5000.0)
+    parser.add_argument("-c", type=float, default=0.99)
+    parser.add_argument("-t", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--local-search", action="store_true")
+    parser.add_argument("--neighbors", type=int, default=10)
+    parser.add_argument("--neighbor-bias", type=float, default=0.0)
+    parser.add_argument("--sa-mode", default="independent")
+    parser.add_argument("--exchange-interval", type=int, default=10)
+    parser.add_argument("--time-limit", type=float, default=0.0)
+    parser.add_argument("--stream", default=None)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--stats-trace", action="store_true")
+    parser.add_argument("--float32", action="store_true")
+    parser.add_argument("--greedy-candidates", type=int, default=0)
+    parser.add_argument("--prune", action="store_true")
+    parser.add_argument("--bound", default=None)
+    parser.add_argument("--target-gap", type=float, default=0.0)
+    return parser
+
+
+def solve(native, instance, solver_args, threads=None):
+    """
+    Rozwiązuje instancję w procesie interpretera.
+    solver_args to argumenty w postaci jak dla tsp_solver, np. ["--sa", "-T", "5000"].
+    Zwraca słownik: total_cost, route, is_valid, execution_time, gap (i stats dla --stats, pruning dla --prune).
+    Ograniczenie dolne liczone jest tylko z --bound lub --target-gap, poza execution_time (lower_bound_time).
+    """
+    opts = _solverParser().parse_args(solver_args)
+    if opts.sa:
+        return native.RunParallelSASolver(**instance, initial_temp=opts.T, cooling_rate=opts.c,
+                                          min_temp=opts.t, iterations=opts.iterations, k_best=opts.k,
+                                          seed=opts.seed, threads=threads, local_search=opts.local_search,
+                                          neighbors=opts.neighbors, neighbor_bias=opts.neighbor_bias,
+                                          mode=opts.sa_mode, exchange_interval=opts.exchange_interval,
+                                          time_limit=opts.time_limit, stream=opts.stream,
+                                          stats=opts.stats, stats_trace=opts.stats_trace, float32=opts.float32,
+                                          greedy_candidates=opts.greedy_candidates, bound=opts.bound,
+                                          target_gap=opts.target_gap)
+    return native.RunParallelGreedySolver(**instance, iterations=opts.iterations, k_best=opts.k,
+                                          seed=opts.seed, threads=threads, local_search=opts.local_search,
+                                          neighbors=opts.neighbors, time_limit=opts.time_limit,
+                                          stream=opts.stream, stats=opts.stats, stats_trace=opts.stats_trace,
+                                          float32=opts.float32, greedy_candidates=opts.greedy_candidates,
+                                          prune=opts.prune, bound=opts.bound, target_gap=opts.target_gap)
+
+
+def solveToFile(native, input_file, output_file, solver_args, threads=None):
+    """Jak wywołanie tsp_solver -d input_file -o output_file: wynik w tym samym formacie JSON."""
+    result = solve(native, instanceArrays(input_file), solver_args, threads)
+    with open(output_file, 'w') as f:
+        json.dump(result, f, indent=4)
+    return result
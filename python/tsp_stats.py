@@ -0,0 +1,68 @@
+import numpy as np
+
+def deriveSeed(*parts):
+    """Deterministyczne 32-bitowe ziarno wyprowadzone z ziarna bazowego i indeksów przebiegu."""
+    return int(np.random.SeedSequence([int(p) for p in parts]).generate_state(1)[0])
+
+def summarizeSamples(values, confidence=0.95, n_boot=2000, seed=0):
+    """
+    Statystyki próby: mediana, kwartyle (IQR), min/max, średnia oraz przedział ufności
+    dla mediany (bootstrap percentylowy, ziarno stałe - wynik powtarzalny).
+    Brakujące wartości (None) są pomijane.
+    """
+    samples = np.array([v for v in values if v is not None], dtype=np.float64)
+    if samples.size == 0:
+        return None
+
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    stats = {
+        "count": int(samples.size),
+        "median": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "iqr": float(q3 - q1),
+        "min": float(samples.min()),
+        "max": float(samples.max()),
+        "mean": float(samples.mean()),
+        "confidence": confidence,
+        "ci_low": float(median),
+        "ci_high": float(median),
+    }
+
+    if samples.size > 1:
+        rng = np.random.default_rng(seed)
+        boot = np.median(rng.choice(samples, size=(n_boot, samples.size), replace=True), axis=1)
+        alpha = (1.0 - confidence) / 2.0
+        stats["ci_low"], stats["ci_high"] = (float(x) for x in np.percentile(boot, [100 * alpha, 100 * (1 - alpha)]))
+
+    return stats
+
+def aggregateRuns(runs):
+    """Łączy powtórzenia jednego algorytmu: mediana jako wartość główna + pełne statystyki."""
+    ok = [r for r in runs if r.get("time") is not None]
+    if not ok:
+        status = runs[0].get("status", "FAILED") if runs else "FAILED"
+        return {"time": None, "cost": None, "is_valid": False, "status": status}
+
+    time_stats = summarizeSamples([r["time"] for r in ok])
+    cost_stats = summarizeSamples([r["cost"] for r in ok])
+    aggregated = {
+        "time": time_stats["median"],
+        "cost": cost_stats["median"],
+        "is_valid": all(r["is_valid"] for r in ok),
+        "runs": len(runs),
+        "failed": len(runs) - len(ok),
+        "time_stats": time_stats,
+        "cost_stats": cost_stats,
+    }
+    stats = aggregateStats([r["stats"] for r in ok if "stats" in r])
+    if stats is not None:
+        aggregated["stats"] = stats
+    return aggregated
+
+def aggregateStats(samples):
+    """Mediana każdego licznika instrumentacji po powtórzeniach (None, gdy brak pomiarów)."""
+    if not samples:
+        return None
+    keys = [k for k, v in samples[0].items() if isinstance(v, (int, float))]
+    return {k: summarizeSamples([s[k] for s in samples if k in s])["median"] for k in keys}
@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import subprocess
+from tsp_utils import eprint, loadJson
+from tsp_cache import fileHash
+from tsp_stats import aggregateRuns
+
+DEFAULT_STORE = "tsp_results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    id INTEGER PRIMARY KEY,
+    hash TEXT UNIQUE NOT NULL,
+    n INTEGER NOT NULL,
+    path TEXT
+);
+CREATE TABLE IF NOT EXISTS sweeps (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    script TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    host TEXT NOT NULL,
+    args TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    sweep_id INTEGER NOT NULL REFERENCES sweeps(id),
+    instance_id INTEGER REFERENCES instances(id),
+    n INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    host TEXT NOT NULL,
+    created REAL NOT NULL,
+    replicate INTEGER,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    time REAL,
+    cost REAL,
+    is_valid INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    source TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS runs_n_algorithm_revision ON runs(n, algorithm, revision);
+CREATE INDEX IF NOT EXISTS runs_sweep ON runs(sweep_id);
+"""
+
+# Nazwy plików wyników harnessów: result_n{n}_{alg}[_i{k}][_r{r}].json
+RESULT_FILE = re.compile(r"^result_n(\d+)_([a-z_]+?)(?:_i(\d+))?(?:_r(\d+))?\.json$")
+# Sufiks pliku wyniku tsp_model_test.py -> nazwa algorytmu w zestawieniu
+FILE_ALGORITHMS = {"mzn": "minizinc"}
+
+
+def gitRevision():
+    """Rewizja repozytorium (git describe, z sufiksem -dirty przy zmianach); "unknown" poza gitem."""
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    return out.stdout.strip() if out.returncode == 0 and out.stdout.strip() else "unknown"
+
+
+class ResultStore:
+    """
+    Baza wyników przebiegów (SQLite).
+
+    Każde wywołanie harnessu to jeden przebieg (sweeps: skrypt, rewizja, host, argumenty),
+    a każde uruchomienie solvera - wiersz runs (n, algorytm, parametry, czas, koszt, status
+    i pełny wynik jako JSON). Instancje identyfikowane są hashem zawartości.
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL") # odczyt (wykresy) w trakcie zapisu
+        self.conn.executescript(SCHEMA)
+        self.revision = None
+        self.host = None
+
+    def close(self):
+        self.conn.close()
+
+    def beginSweep(self, script, args, revision=None, host=None, created=None):
+        """Rejestruje przebieg harnessu. Zwraca jego identyfikator."""
+        self.revision = revision or gitRevision()
+        self.host = host or socket.gethostname()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO sweeps (created, script, revision, host, args) VALUES (?, ?, ?, ?, ?)",
+                (created or time.time(), script, self.revision, self.host, json.dumps(args, sort_keys=True)))
+        return cur.lastrowid
+
+    def _instance(self, path, n):
+        if path is None or not os.path.exists(path):
+            return None
+        digest = fileHash(path)
+        self.conn.execute("INSERT OR IGNORE INTO instances (hash, n, path) VALUES (?, ?, ?)",
+                          (digest, n, os.path.abspath(path)))
+        return self.conn.execute("SELECT id FROM instances WHERE hash = ?", (digest,)).fetchone()["id"]
+
+    def addRun(self, sweep_id, n, algorithm, result, params=None, instance=None, replicate=None,
+               source=None, created=None):
+        """
+        Zapisuje wynik jednego uruchomienia (słownik w formacie loadResult harnessów).
+        Wpis z tym samym `source` (plik importu) nie jest dodawany ponownie.
+        """
+        result = result or {"time": None, "cost": None, "is_valid": False, "status": "MISSING"}
+        status = result.get("status") or ("OK" if result.get("time") is not None else "FAILED")
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO runs (sweep_id, instance_id, n, algorithm, revision, host, created, replicate, "
+                "params, status, time, cost, is_valid, result, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sweep_id, self._instance(instance, n), n, algorithm, self.revision, self.host,
+                 created or time.time(), replicate, json.dumps(params or {}, sort_keys=True), status,
+                 result.get("time"), result.get("cost"), int(bool(result.get("is_valid"))),
+                 json.dumps(result), source))
+
+    def removeSweep(self, sweep_id):
+        """Usuwa przebieg razem z jego uruchomieniami."""
+        with self.conn:
+            self.conn.execute("DELETE FROM runs WHERE sweep_id = ?", (sweep_id,))
+            self.conn.execute("DELETE FROM sweeps WHERE id = ?", (sweep_id,))
+
+    def latestSweep(self, algorithms=None):
+        """Najnowszy przebieg (z wynikami podanych algorytmów); None, gdy baza jest pusta."""
+        sql = "SELECT MAX(sweep_id) AS id FROM runs"
+        values = []
+        if algorithms:
+            sql += f" WHERE algorithm IN ({', '.join('?' * len(algorithms))})"
+            values = list(algorithms)
+        return self.conn.execute(sql, values).fetchone()["id"]
+
+    def sweeps(self):
+        return self.conn.execute(
+            "SELECT s.*, COUNT(r.id) AS runs, MIN(r.n) AS n_min, MAX(r.n) AS n_max "
+            "FROM sweeps s LEFT JOIN runs r ON r.sweep_id = s.id GROUP BY s.id ORDER BY s.id").fetchall()
+
+    def runs(self, algorithms=None, revision=None, sweep=None, host=None, n_min=None, n_max=None):
+        """Wiersze runs spełniające filtry (None - bez filtra), posortowane po n."""
+        where, values = [], []
+        if algorithms:
+            where.append(f"algorithm IN ({', '.join('?' * len(algorithms))})")
+            values += list(algorithms)
+        for column, value in (("revision", revision), ("sweep_id", sweep), ("host", host)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                values.append(value)
+        if n_min is not None:
+            where.append("n >= ?")
+            values.append(n_min)
+        if n_max is not None:
+            where.append("n <= ?")
+            values.append(n_max)
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql + " ORDER BY n, algorithm, id", values).fetchall()
+
+    def summary(self, algorithms, **filters):
+        """
+        Zestawienie w formacie test_summary*.json: rekord na n, w nim wynik każdego algorytmu
+        (pojedyncze uruchomienie lub mediana powtórzeń ze statystykami, jak w tsp_test_run.py).
+        """
+        grouped = {}
+        for row in self.runs(algorithms, **filters):
+            grouped.setdefault(row["n"], {}).setdefault(row["algorithm"], []).append(json.loads(row["result"]))
+        records = []
+        for n, by_alg in grouped.items():
+            record = {"n": n}
+            for alg, results in by_alg.items():
+                record[alg] = results[0] if len(results) == 1 else aggregateRuns(results)
+            records.append(record)
+        return records
+
+    def importFile(self, path, sweep_id):
+        """
+        Importuje plik JSON: zestawienie (lista rekordów z kluczem n) lub pojedynczy wynik
+        result_n{n}_{alg}*.json. Zwraca liczbę dodanych uruchomień.
+        """
+        before = self.conn.total_changes
+        created = os.path.getmtime(path)
+        source = os.path.abspath(path)
+        data = loadJson(path)
+        if isinstance(data, list):
+            for record in data:
+                for alg, result in record.items():
+                    if isinstance(result, dict):
+                        self.addRun(sweep_id, record["n"], alg, result, params={"seed": record.get("seed")},
+                                    source=f"{source}#{record['n']}/{alg}", created=created)
+        else:
+            match = RESULT_FILE.match(os.path.basename(path))
+            if match is None:
+                eprint(f"[POMINIĘTO] Nieznany plik wyniku: {path}")
+                return 0
+            n, alg, _, replicate = match.groups()
+            result = {
+                "time": data.get("execution_time"),
+                "cost": data.get("total_cost"),
+                "is_valid": data.get("is_valid", False),
+            }
+            if "status" in data:
+                result["status"] = data["status"]
+            self.addRun(sweep_id, int(n), FILE_ALGORITHMS.get(alg, alg), result,
+                        replicate=int(replicate) if replicate is not None else None,
+                        source=source, created=created)
+        return self.conn.total_changes - before
+
+
+def addStoreArguments(parser):
+    """Opcje zapisu do bazy wyników dla harnessów."""
+    parser.add_argument("--store", default=DEFAULT_STORE,
+                        help=f"Baza wyników SQLite, do której dopisywane są uruchomienia (domyślnie: {DEFAULT_STORE})")
+    parser.add_argument("--no-store", action="store_true", help="Nie zapisuj wyników do bazy")
+
+
+def addQueryArguments(parser):
+    """Opcje wyboru wyników z bazy dla skryptów wykresów."""
+    parser.add_argument("--store", default=None, help="Baza wyników SQLite (zamiast pliku JSON)")
+    parser.add_argument("--sweep", type=int, default=None,
+                        help="Identyfikator przebiegu (domyślnie najnowszy, jeśli nie podano --revision)")
+    parser.add_argument("--revision", default=None, help="Tylko wyniki z tej rewizji")
+    parser.add_argument("--host", default=None, help="Tylko wyniki z tego hosta")
+    parser.add_argument("--n-min", type=int, default=None, help="Najmniejsze n")
+    parser.add_argument("--n-max", type=int, default=None, help="Największe n")
+
+
+def querySummary(args, algorithms):
+    """Zestawienie z bazy według opcji addQueryArguments (posortowane po n)."""
+    store = ResultStore(args.store)
+    try:
+        sweep = args.sweep
+        if sweep is None and args.revision is None:
+            sweep = store.latestSweep(algorithms)
+        return store.summary(algorithms, revision=args.revision, sweep=sweep, host=args.host,
+                             n_min=args.n_min, n_max=args.n_max)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baza wyników testów TSP (SQLite)")
+    parser.add_argument("--store", default=DEFAULT_STORE, help=f"Plik bazy (domyślnie: {DEFAULT_STORE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Importuj istniejące wyniki JSON (pliki lub katalogi)")
+    p_import.add_argument("paths", nargs="+", help="Zestawienia test_summary*.json, pliki result_n*.json lub katalogi z nimi")
+    p_import.add_argument("--revision", default="imported", help="Rewizja przypisana importowanym wynikom")
+
+    sub.add_parser("sweeps", help="Wypisz przebiegi")
+
+    p_export = sub.add_parser("export", help="Zapisz zestawienie w formacie test_summary*.json")
+    p_export.add_argument("algorithms", nargs="+", help="Algorytmy (np. greedy_det greedy_rand sa, minizinc)")
+    p_export.add_argument("-o", "--output", required=True, help="Plik wyjściowy")
+    p_export.add_argument("--sweep", type=int, default=None, help="Identyfikator przebiegu (domyślnie najnowszy)")
+    p_export.add_argument("--revision", default=None, help="Tylko wyniki z tej rewizji")
+    p_export.add_argument("--host", default=None, help="Tylko wyniki z tego hosta")
+    p_export.add_argument("--n-min", type=int, default=None, help="Najmniejsze n")
+    p_export.add_argument("--n-max", type=int, default=None, help="Największe n")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = ResultStore(args.store)
+        added = 0
+        for path in args.paths:
+            if os.path.isdir(path):
+                files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if RESULT_FILE.match(name)]
+            else:
+                files = [path]
+            if not files:
+                continue
+            # Jeden przebieg na importowaną ścieżkę; czas - najstarszy plik
+            sweep_id = store.beginSweep("import", {"path": os.path.abspath(path)}, revision=args.revision,
+                                        created=min(os.path.getmtime(f) for f in files))
+            path_added = sum(store.importFile(f, sweep_id) for f in files)
+            if path_added == 0:
+                store.removeSweep(sweep_id) # wszystko już było zaimportowane
+            added += path_added
+        store.close()
+        eprint(f"Zaimportowano uruchomień: {added}")
+    elif args.command == "sweeps":
+        store = ResultStore(args.store)
+        for s in store.sweeps():
+            print(f"{s['id']:>5}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(s['created']))}  "
+                  f"{s['script']:<16} {s['revision']:<20} {s['host']:<16} runs={s['runs']} "
+                  f"n={s['n_min']}..{s['n_max']}")
+        store.close()
+    elif args.command == "export":
+        data = querySummary(args, args.algorithms)
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=4)
+        eprint(f"Zapisano {len(data)} rekordów do pliku: {args.output}")
+    sys.exit(0)
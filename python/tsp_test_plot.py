@@ -2,32 +2,91 @@ import matplotlib.pyplot as plt
 import argparse
 import os
 from tsp_utils import eprint, loadJson
+from tsp_store import addQueryArguments, querySummary
 
-def plotCharts(json_file, output_dir):
-    if not os.path.exists(json_file):
-        eprint(f"Błąd: Nie znaleziono pliku {json_file}")
-        return
+ALGORITHMS = ["greedy_det", "greedy_rand", "sa"]
 
-    data = loadJson(json_file)
-    data.sort(key=lambda x: x['n'])
+def series(data, alg, key):
+    """Wartości dla algorytmu; nieudane przebiegi (brak wyniku) jako NaN - przerwa na wykresie."""
+    values = []
+    for d in data:
+        value = (d.get(alg) or {}).get(key)
+        values.append(float('nan') if value is None else value)
+    return values
 
-    ns = [d['n'] for d in data]
-    
-    time_gd = [d['greedy_det']['time'] for d in data]
-    time_gr = [d['greedy_rand']['time'] for d in data]
-    time_sa = [d['sa']['time'] for d in data]
+def band(data, alg, key):
+    """Dolna/górna granica pasma (kwartyle Q1-Q3) z trybu zestawu; None gdy brak statystyk."""
+    stats = [(d.get(alg) or {}).get(f"{key}_stats") for d in data]
+    if not any(stats):
+        return None
+    low = [s['q1'] if s else float('nan') for s in stats]
+    high = [s['q3'] if s else float('nan') for s in stats]
+    return low, high
+
+def plotSeries(ns, data, alg, key, fmt, label, **kwargs):
+    """Mediana (lub pojedynczy pomiar) jako linia + pasmo IQR, jeśli są powtórzenia."""
+    line, = plt.plot(ns, series(data, alg, key), fmt, label=label, **kwargs)
+    bounds = band(data, alg, key)
+    if bounds is not None:
+        plt.fill_between(ns, bounds[0], bounds[1], color=line.get_color(), alpha=0.2, linewidth=0)
+
+def statSeries(data, alg, key):
+    """Licznik instrumentacji (klucz stats) dla algorytmu; brak pomiaru jako NaN."""
+    values = []
+    for d in data:
+        value = ((d.get(alg) or {}).get("stats") or {}).get(key)
+        values.append(float('nan') if value is None else value)
+    return values
+
+def plotStatsCharts(ns, data, output_dir):
+    """Wykresy z instrumentacji solvera (--stats w tsp_test_run.py). Zwraca liczbę wykresów."""
+    if not any((d.get(alg) or {}).get("stats") for d in data for alg in ALGORITHMS):
+        return 0
+
+    # Przepustowość: ruchy SA i konstrukcje zachłanne na sekundę
+    plt.figure(figsize=(10, 6))
+    plt.plot(ns, statSeries(data, 'greedy_rand', 'constructions_per_s'), 's-', label='Zachłanny Ulosowiony (konstrukcje/s)')
+    plt.plot(ns, statSeries(data, 'sa', 'moves_per_s'), '^-', label='Symulowane Wyżarzanie (ruchy/s)')
+    plt.xlabel('Liczba miast (n)')
+    plt.ylabel('Przepustowość [1/s] (log)')
+    plt.yscale('log')
+    plt.title('Przepustowość solvera')
+    plt.legend()
+    plt.savefig(os.path.join(output_dir, "wykres_przepustowosc.png"))
+    plt.close()
 
-    cost_gd = [d['greedy_det']['cost'] for d in data]
-    cost_gr = [d['greedy_rand']['cost'] for d in data]
-    cost_sa = [d['sa']['cost'] for d in data]
+    # Akceptacja ruchów SA i nierównomierność obciążenia wątków
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+    ax1.plot(ns, statSeries(data, 'sa', 'acceptance_rate'), '^-', color='tab:green', label='Akceptacja ruchów SA')
+    ax1.set_xlabel('Liczba miast (n)')
+    ax1.set_ylabel('Odsetek zaakceptowanych ruchów')
+    ax2 = ax1.twinx()
+    ax2.plot(ns, statSeries(data, 'greedy_rand', 'imbalance'), 's--', color='tab:orange', label='Nierównomierność wątków (greedy)')
+    ax2.plot(ns, statSeries(data, 'sa', 'imbalance'), '^--', color='tab:red', label='Nierównomierność wątków (SA)')
+    ax2.set_ylabel('Najdłuższy / średni czas wątku')
+    ax2.grid(False)
+    lines = ax1.get_legend_handles_labels()
+    lines2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines[0] + lines2[0], lines[1] + lines2[1])
+    plt.title('Akceptacja ruchów i równomierność obciążenia')
+    plt.savefig(os.path.join(output_dir, "wykres_akceptacja.png"))
+    plt.close()
+    return 2
 
+def plotCharts(data, output_dir):
+    if not data:
+        eprint("Błąd: Brak wyników do narysowania")
+        return
+
+    ns = [d['n'] for d in data]
+    
     plt.style.use('seaborn-v0_8-whitegrid')
 
     # Czas obliczeń (Skala liniowa)
     plt.figure(figsize=(10, 6))
-    plt.plot(ns, time_gd, 'o-', label='Zachłanny Deterministyczny')
-    plt.plot(ns, time_gr, 's-', label='Zachłanny Ulosowiony')
-    plt.plot(ns, time_sa, '^-', label='Symulowane Wyżarzanie')
+    plotSeries(ns, data, 'greedy_det', 'time', 'o-', 'Zachłanny Deterministyczny')
+    plotSeries(ns, data, 'greedy_rand', 'time', 's-', 'Zachłanny Ulosowiony')
+    plotSeries(ns, data, 'sa', 'time', '^-', 'Symulowane Wyżarzanie')
     plt.xlabel('Liczba miast (n)')
     plt.ylabel('Czas wykonania [s]')
     plt.title('Złożoność czasowa algorytmów')
@@ -37,9 +96,9 @@ def plotCharts(json_file, output_dir):
 
     # Czas obliczeń (Skala logarytmiczna)
     plt.figure(figsize=(10, 6))
-    plt.plot(ns, time_gd, 'o-', label='Zachłanny Deterministyczny')
-    plt.plot(ns, time_gr, 's-', label='Zachłanny Ulosowiony')
-    plt.plot(ns, time_sa, '^-', label='Symulowane Wyżarzanie')
+    plotSeries(ns, data, 'greedy_det', 'time', 'o-', 'Zachłanny Deterministyczny')
+    plotSeries(ns, data, 'greedy_rand', 'time', 's-', 'Zachłanny Ulosowiony')
+    plotSeries(ns, data, 'sa', 'time', '^-', 'Symulowane Wyżarzanie')
     plt.xlabel('Liczba miast (n)')
     plt.ylabel('Czas wykonania [s] (log)')
     plt.yscale('log')
@@ -50,9 +109,9 @@ def plotCharts(json_file, output_dir):
 
     # Jakość rozwiązań
     plt.figure(figsize=(10, 6))
-    plt.plot(ns, cost_gd, 'o--', label='Zachłanny Deterministyczny', alpha=0.7)
-    plt.plot(ns, cost_gr, 's-', label='Zachłanny Ulosowiony')
-    plt.plot(ns, cost_sa, '^-', label='Symulowane Wyżarzanie', linewidth=2)
+    plotSeries(ns, data, 'greedy_det', 'cost', 'o--', 'Zachłanny Deterministyczny', alpha=0.7)
+    plotSeries(ns, data, 'greedy_rand', 'cost', 's-', 'Zachłanny Ulosowiony')
+    plotSeries(ns, data, 'sa', 'cost', '^-', 'Symulowane Wyżarzanie', linewidth=2)
     plt.xlabel('Liczba miast (n)')
     plt.ylabel('Całkowity koszt trasy')
     plt.title('Porównanie jakości rozwiązań')
@@ -60,13 +119,27 @@ def plotCharts(json_file, output_dir):
     plt.savefig(os.path.join(output_dir, "wykres_jakosc.png"))
     plt.close()
 
-    eprint(f"Wygenerowano 3 wykresy w katalogu: {output_dir}")
+    charts = 3 + plotStatsCharts(ns, data, output_dir)
+    eprint(f"Wygenerowano {charts} wykresów w katalogu: {output_dir}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generowanie wykresów z wyników JSON")
-    parser.add_argument("-d", "--data", required=True, help="Plik JSON z wynikami zbiorczymi")
+    parser.add_argument("-d", "--data", default=None, help="Plik JSON z wynikami zbiorczymi")
     parser.add_argument("-o", "--output-dir", default=".", help="Katalog wyjściowy na obrazki")
+    addQueryArguments(parser)
     args = parser.parse_args()
+    if (args.data is None) == (args.store is None):
+        parser.error("wymagane jest -d lub --store")
+
+    if args.store is not None:
+        data = querySummary(args, ALGORITHMS)
+    elif os.path.exists(args.data):
+        data = loadJson(args.data)
+        data.sort(key=lambda x: x['n'])
+    else:
+        eprint(f"Błąd: Nie znaleziono pliku {args.data}")
+        data = None
 
     os.makedirs(args.output_dir, exist_ok=True)
-    plotCharts(args.data, args.output_dir)
\ No newline at end of file
+    if data is not None:
+        plotCharts(data, args.output_dir)
\ No newline at end of file
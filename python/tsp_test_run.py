@@ -1,65 +1,227 @@
 import os
 import sys
-import subprocess
 import json
 import argparse
-from tsp_utils import loadJson, eprint, runCommand
+from tsp_utils import loadJson, eprint
+from tsp_jobs import Job, runJobs, batchJobs, jobThreads, addJobArguments, OK_STATES
+from tsp_cache import ResultCache, cacheKey, cachedJob, addCacheArguments
+from tsp_stats import deriveSeed, aggregateRuns
+from tsp_store import ResultStore, addStoreArguments
+from tsp_native_run import loadNative, solveToFile
+
+def streamPath(out):
+    """Plik JSON Lines z kolejnymi najlepszymi rozwiązaniami obok pliku wyniku."""
+    return os.path.splitext(out)[0] + "_stream.jsonl"
+
+def loadTrace(path):
+    """Przebieg zbieżności [[czas, koszt], ...] ze strumienia solvera (brak pliku - None)."""
+    if not os.path.exists(path):
+        return None
+    trace = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                trace.append([entry["time"], entry["cost"]])
+    return trace
 
 def loadResult(path):
     if not os.path.exists(path):
         return None
     
     data = loadJson(path)
-    return {
+    result = {
         "time": data.get("execution_time", 0.0),
         "cost": data.get("total_cost", 0.0),
-        "is_valid": data.get("is_valid", False)
+        "is_valid": data.get("is_valid", False),
+        "gap": data.get("gap")
     }
+    trace = loadTrace(streamPath(path))
+    if trace is not None:
+        result["trace"] = trace
+    if "stats" in data:
+        # Podsumowanie instrumentacji solvera (bez liczników wątków i przebiegu temperatury)
+        result["stats"] = dict(data["stats"]["summary"], phases=data["stats"]["phases"])
+    return result
+
+def failedResult(status):
+    return {"time": None, "cost": None, "is_valid": False, "status": status}
+
+def localSearchArgs(args):
+    """Opcje przeszukiwania lokalnego (dla algorytmów ulosowionych)."""
+    extra = []
+    if args.local_search:
+        extra += ["--local-search"]
+    if args.neighbor_bias > 0.0:
+        extra += ["--neighbor-bias", str(args.neighbor_bias)]
+    if extra:
+        extra += ["--neighbors", str(args.neighbors)]
+    return extra
+
+def saModeArgs(args):
+    """Tryb współpracy wątków SA (domyślny tryb niezależny nie zmienia wywołania)."""
+    if args.sa_mode == "independent":
+        return []
+    return ["--sa-mode", args.sa_mode, "--exchange-interval", str(args.exchange_interval)]
+
+def statsArgs(args):
+    """Instrumentacja solvera (blok stats w pliku wyniku)."""
+    return ["--stats"] if args.stats else []
+
+def greedyCandidatesArgs(args):
+    """Indeks kandydatów konstrukcji zachłannej (te same trasy, bez przeglądu wszystkich miast)."""
+    if args.greedy_candidates <= 0:
+        return []
+    return ["--greedy-candidates", str(args.greedy_candidates)]
+
+def pruneArgs(args):
+    """Odcinanie konstrukcji greedy_rand ograniczeniem dolnym (liczniki pruned w bloku stats)."""
+    return ["--prune"] if args.prune else []
+
+def targetGapArgs(args):
+    """Zatrzymanie po osiągnięciu luki względem ograniczenia dolnego (0 - pełny przebieg)."""
+    if args.target_gap <= 0.0:
+        return []
+    return ["--target-gap", str(args.target_gap)]
+
+def timeLimitArgs(args):
+    """Limit czasu solvera (algorytmy ulosowione; 0 - bez limitu)."""
+    if args.time_limit <= 0.0:
+        return []
+    return ["--time-limit", str(args.time_limit)]
+
+# Parametry wywołania solvera dla każdego algorytmu
+ALGORITHMS = {
+    "greedy_det": lambda args: ["--greedy", "-k", "1", "--iterations", "1"]
+                               + greedyCandidatesArgs(args) + statsArgs(args),
+    "greedy_rand": lambda args: ["--greedy", "--iterations", str(args.iterations), "-k", "4"]
+                                + localSearchArgs(args) + greedyCandidatesArgs(args) + pruneArgs(args)
+                                + timeLimitArgs(args) + targetGapArgs(args) + statsArgs(args),
+    "sa": lambda args: ["--sa", "--iterations", str(args.iterations), "-T", "5000", "-c", "0.99"]
+                       + localSearchArgs(args) + saModeArgs(args) + greedyCandidatesArgs(args)
+                       + timeLimitArgs(args) + targetGapArgs(args) + statsArgs(args),
+}
 
 def runTest(args):
     
     os.makedirs(args.data, exist_ok=True)
     os.makedirs(args.output, exist_ok=True)
+
+    # Tryb zestawu: N instancji x M powtórzeń dla każdego n
+    suite = args.instances > 1 or args.replicates > 1
     
-    test_data = []
+    eprint(f"--- ROZPOCZĘCIE TESTU (Max N: {args.max_n}, zadania: {args.jobs}) ---")
+    if suite:
+        eprint(f"Zestaw: {args.instances} instancji x {args.replicates} powtórzeń, rozgrzewka: {args.warmup}, ziarno: {args.seed}")
+
+    threads = jobThreads(args)
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+
+    # Solver w procesie interpretera (moduł tsp_native) zamiast uruchamiania tsp_solver
+    native = None
+    if args.in_process:
+        try:
+            native = loadNative(args.native_path)
+        except ImportError as e:
+            eprint(f"[BŁĄD] {e}")
+            sys.exit(1)
+    solver_files = [native.__file__] if native is not None else [args.bin]
+
+    def solverCommand(input_file, out, solver_args):
+        if native is None:
+            return [args.bin, "-d", input_file, "-o", out] + solver_args
+        return lambda: solveToFile(native, input_file, out, solver_args, threads)
 
-    eprint(f"--- ROZPOCZĘCIE TESTU (Max N: {args.max_n}) ---")
+    def solverJob(name, input_file, out, solver_args, deps):
+        job = Job(name, solverCommand(input_file, out, solver_args), deps=deps,
+                  timeout=args.job_timeout, threads=threads)
+        # Wiersz manifestu dla --batch (te same argumenty co w wywołaniu tsp_solver)
+        job.batch = {"input": input_file, "output": out, "params": solver_args}
+        return job
+    jobs = []
+    planned = []
 
     for n in range(5, args.max_n + 1, args.step):
-        eprint(f"[n={n}] ...")
-
-        record = {
-            "n": n,
-            "greedy_det": {},
-            "greedy_rand": {},
-            "sa": {}
-        }
-
-        input_file = os.path.join(args.data, f"test_n{n}.json")
-        cmd_gen = ["python3", args.gen_script, "-n", str(n), "-o", input_file]
-        runCommand(cmd_gen)
-
-        out_greedy_det = os.path.join(args.output, f"result_n{n}_greedy_det.json")
-        out_greedy_rand = os.path.join(args.output, f"result_n{n}_greedy_rand.json")
-        out_sa = os.path.join(args.output, f"result_n{n}_sa.json")
-
-        cmd_gd = [args.bin, "-d", input_file, "-o", out_greedy_det, "--greedy", 
-                  "-k", "1", "--iterations", "1"]
-        runCommand(cmd_gd)
-        record["greedy_det"] = loadResult(out_greedy_det)
-
-        cmd_gr = [args.bin, "-d", input_file, "-o", out_greedy_rand, "--greedy", 
-                  "--iterations", str(args.iterations), "-k", "4"]
-        runCommand(cmd_gr)
-        record["greedy_rand"] = loadResult(out_greedy_rand)
-
-        cmd_sa = [args.bin, "-d", input_file, "-o", out_sa, "--sa", 
-                  "--iterations", str(args.iterations), "-T", "5000", "-c", "0.99"]
-        runCommand(cmd_sa)
-        record["sa"] = loadResult(out_sa)
-        
+        solve_jobs = {alg: [] for alg in ALGORITHMS}
+        warmups = {alg: [] for alg in ALGORITHMS}
+
+        for k in range(args.instances):
+            tag = f"_i{k}" if suite else ""
+            input_file = os.path.join(args.data, f"test_n{n}{tag}.{args.instance_format}")
+            cmd_gen = ["python3", args.gen_script, "-n", str(n), "-o", input_file]
+            if args.seed is not None:
+                cmd_gen += ["--seed", str(deriveSeed(args.seed, n, k))]
+            gen_job = Job(f"gen n={n}{tag}", cmd_gen)
+            if args.resume:
+                gen_job.cached = lambda path=input_file: os.path.exists(path)
+            jobs.append(gen_job)
+
+            for alg, alg_args in ALGORITHMS.items():
+                # Rozgrzewka (wyniki odrzucane) przed pomiarami danego algorytmu
+                if k == 0:
+                    for w in range(args.warmup):
+                        warmups[alg].append(solverJob(f"warmup {alg} n={n} #{w}", input_file, os.devnull,
+                                                      alg_args(args), deps=[gen_job]))
+                        jobs.append(warmups[alg][-1])
+
+                for r in range(args.replicates):
+                    run_tag = tag + (f"_r{r}" if suite else "")
+                    out = os.path.join(args.output, f"result_n{n}_{alg}{run_tag}.json")
+                    solver_args = alg_args(args)
+                    if args.seed is not None:
+                        solver_args += ["--seed", str(deriveSeed(args.seed, n, k, r))]
+                    # Strumień nie wpływa na wynik - nie wchodzi do klucza pamięci podręcznej
+                    stream_args = ["--stream", streamPath(out)] if args.stream else []
+                    job = solverJob(f"{alg} n={n}{run_tag}", input_file, out, solver_args + stream_args,
+                                    deps=[gen_job] + warmups[alg])
+                    if cache is not None:
+                        # Parametry = wszystkie argumenty poza ścieżkami wejścia/wyjścia
+                        params = {"args": solver_args, "threads": threads, "replicate": r}
+                        key_fn = lambda path=input_file, alg=alg, params=params: cacheKey(path, solver_files, alg, params)
+                        cachedJob(job, cache, key_fn, {"n": n, "solver_name": alg, "params": params}, out)
+                    jobs.append(job)
+                    solve_jobs[alg].append((job, out, {"args": solver_args, "threads": threads, "instance": k,
+                                                       "replicate": r, "path": input_file}))
+
+        planned.append((n, solve_jobs))
+
+    if args.batch:
+        # Cały przebieg jako manifesty tsp_solver --batch (po jednym procesie na zadanie puli)
+        gen_jobs = [job for job in jobs if job.batch is None]
+        solver_jobs = [job for job in jobs if job.batch is not None]
+        runJobs(gen_jobs + batchJobs(solver_jobs, args.bin, os.path.join(args.output, "manifests"), args.jobs,
+                                     threads=threads, timeout=args.job_timeout), args.jobs)
+    else:
+        runJobs(jobs, args.jobs)
+
+    store = None
+    if not args.no_store:
+        store = ResultStore(args.store)
+        sweep_id = store.beginSweep("tsp_test_run", vars(args))
+
+    test_data = []
+    for n, solve_jobs in planned:
+        record = {"n": n}
+        for alg, runs in solve_jobs.items():
+            results = [loadResult(out) if job.status in OK_STATES else failedResult(job.status)
+                       for job, out, _ in runs]
+            if store is not None:
+                for result, (_, _, run) in zip(results, runs):
+                    params = {"args": run["args"], "threads": run["threads"], "instance": run["instance"],
+                              "seed": args.seed, "in_process": args.in_process}
+                    store.addRun(sweep_id, n, alg, result, params=params, instance=run["path"],
+                                 replicate=run["replicate"])
+            record[alg] = aggregateRuns(results) if suite else results[0]
+        if suite:
+            record["seed"] = args.seed
         test_data.append(record)
-        eprint(f"   -> Zakończono n={n}")
+
+    cached = sum(job.status == "CACHED" for job in jobs)
+    if cached:
+        eprint(f"Zadania pominięte dzięki pamięci podręcznej / wznowieniu: {cached}")
+    failed = [job.name for job in jobs if job.status not in OK_STATES]
+    if failed:
+        eprint(f"Nieudane zadania ({len(failed)}): {', '.join(failed)}")
 
     eprint("--- ZAPISYWANIE WYNIKÓW ---")
     
@@ -67,18 +229,60 @@ def runTest(args):
         json.dump(test_data, f, indent=4)
         
     eprint(f"Pełny wynik testu zapisano do pliku: {args.summary_file}")
+    if store is not None:
+        store.close()
+        eprint(f"Uruchomienia dopisano do bazy {args.store} (przebieg {sweep_id})")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Automatyzacja testów TSP: Generowanie -> Obliczenia -> JSON")
 
-    parser.add_argument("--bin", required=True, help="Ścieżka do pliku wykonywalnego C++")
+    parser.add_argument("--bin", default=None, help="Ścieżka do pliku wykonywalnego C++")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Wywołuj solver w procesie Pythona (moduł tsp_native) zamiast uruchamiać --bin")
+    parser.add_argument("--native-path", default=None, help="Katalog z modułem tsp_native (np. katalog kompilacji)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Wysyłaj uruchomienia --bin jako manifest tsp_solver --batch (jeden proces na zadanie puli)")
     parser.add_argument("--gen-script", default="tsp_gen.py", help="Ścieżka do skryptu generującego")
     parser.add_argument("--max-n", type=int, default=50, help="Maksymalna liczba miast (n)")
     parser.add_argument("--step", type=int, default=5, help="Krok zwiększania n")
     parser.add_argument("-d", "--data", default="data_test", help="Katalog na wygenerowane dane")
+    parser.add_argument("--instance-format", choices=["json", "tspb"], default="json", help="Format plików instancji (domyślnie: json)")
     parser.add_argument("-o", "--output", default="results_test", help="Katalog na wyniki poszczególnych uruchomień")
     parser.add_argument("--summary-file", default="test_summary.json", help="Plik końcowy z wynikami")
     parser.add_argument("-i", "--iterations", type=int, default=1000, help="Liczba iteracji")
+    parser.add_argument("--seed", type=int, default=None, help="Ziarno bazowe dla generowania instancji i solvera (domyślnie losowe)")
+    parser.add_argument("--instances", type=int, default=1, help="Liczba instancji dla każdego n (domyślnie: 1)")
+    parser.add_argument("--replicates", type=int, default=1, help="Liczba powtórzeń solvera na instancję (domyślnie: 1)")
+    parser.add_argument("--warmup", type=int, default=0, help="Liczba przebiegów rozgrzewających na (n, algorytm), bez pomiaru")
+    parser.add_argument("--local-search", action="store_true",
+                        help="Przeszukiwanie lokalne wyniku greedy_rand i sa (2-opt, Or-opt, zamiana)")
+    parser.add_argument("--neighbors", type=int, default=10, help="Liczba sąsiadów na liście kandydatów (domyślnie: 10)")
+    parser.add_argument("--neighbor-bias", type=float, default=0.0,
+                        help="SA: prawdopodobieństwo ruchu 2-opt do sąsiada z listy (domyślnie: 0)")
+    parser.add_argument("--greedy-candidates", type=int, default=0,
+                        help="Indeks kandydatów konstrukcji zachłannej: k najtańszych krawędzi na miasto (0 - wyłączony)")
+    parser.add_argument("--prune", action="store_true",
+                        help="greedy_rand: przerywaj konstrukcje, które nie mogą poprawić najlepszego wyniku")
+    parser.add_argument("--target-gap", type=float, default=0.0,
+                        help="greedy_rand i sa: zatrzymaj po osiągnięciu luki względem ograniczenia dolnego, "
+                             "np. 0.05 (domyślnie: 0 - pełny przebieg)")
+    parser.add_argument("--sa-mode", choices=["independent", "tempering", "islands"], default="independent",
+                        help="Tryb współpracy wątków SA (domyślnie: independent)")
+    parser.add_argument("--exchange-interval", type=int, default=10,
+                        help="SA: co ile kroków temperatury wątki wymieniają rozwiązania (domyślnie: 10)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Instrumentacja solvera: przepustowość, akceptacja, nierównomierność wątków (klucz stats w wynikach)")
+    parser.add_argument("--time-limit", type=float, default=0.0,
+                        help="Limit czasu greedy_rand i sa w sekundach (domyślnie: brak)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Zapisuj kolejne najlepsze rozwiązania (plik *_stream.jsonl) i dołącz przebieg zbieżności do wyników")
+    addJobArguments(parser)
+    addCacheArguments(parser)
+    addStoreArguments(parser)
 
     args = parser.parse_args()
+    if args.bin is None and not args.in_process:
+        parser.error("wymagane jest --bin lub --in-process")
+    if args.batch and (args.bin is None or args.in_process):
+        parser.error("--batch wymaga --bin (bez --in-process)")
     runTest(args)
\ No newline at end of file
@@ -1,132 +1,171 @@
 # Algorytm napisany przy użyciu Gemini Pro 3
-import json
-import math
+import argparse
 import sys
+import numpy as np
+from tsp_instance import BINARY_EXT, isBinaryInstance, saveInstance, writeCoordsInstance
+from tsp_distance import COORD_TYPES, prepareCoords, distanceBlocks
 
-def nint(x):
-    """Standardowa funkcja zaokrąglania TSPLIB do najbliższej liczby całkowitej."""
-    return int(x + 0.5)
-
-def dist_euc_2d(c1, c2):
-    """Oblicza odległość Euklidesową (płaską)."""
-    xd = c1[0] - c2[0]
-    yd = c1[1] - c2[1]
-    # Wg standardu TSPLIB odległości są często zaokrąglane do całkowitych
-    return nint(math.sqrt(xd*xd + yd*yd))
-
-def dist_geo(c1, c2):
-    """Oblicza odległość Geograficzną (dla problemów typu Ulysses16)."""
-    # Konwersja ze stopni na radiany wg specyfikacji TSPLIB
-    def to_rad(x):
-        deg = int(x)
-        min_val = x - deg
-        return math.pi * (deg + 5.0 * min_val / 3.0) / 180.0
-
-    lat1, lon1 = to_rad(c1[0]), to_rad(c1[1])
-    lat2, lon2 = to_rad(c2[0]), to_rad(c2[1])
-    
-    RRR = 6378.388 # Promień Ziemi
-    
-    q1 = math.cos(lon1 - lon2)
-    q2 = math.cos(lat1 - lat2)
-    q3 = math.cos(lat1 + lat2)
-    
-    return int(RRR * math.acos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0)
-
-def convert_tsp_to_json(tsp_filename, json_filename):
-    coords = []
-    edge_weight_type = "EUC_2D" # Domyślny
-    dimension = 0
+# Liczba wag w sekcji EDGE_WEIGHT_SECTION dla danego EDGE_WEIGHT_FORMAT
+EXPLICIT_FORMATS = {
+    "FULL_MATRIX": lambda n: n * n,
+    "UPPER_ROW": lambda n: n * (n - 1) // 2,
+    "LOWER_ROW": lambda n: n * (n - 1) // 2,
+    "UPPER_DIAG_ROW": lambda n: n * (n + 1) // 2,
+    "LOWER_DIAG_ROW": lambda n: n * (n + 1) // 2,
+}
 
-    print(f"Konwertowanie {tsp_filename}...")
+# Okna czasowe "dummy" - praktycznie bez ograniczeń
+NO_WINDOW = [0.0, 1000000.0]
+
+def read_tsplib(tsp_filename):
+    """
+    Strumieniowo (linia po linii) czyta plik TSPLIB.
+    Zwraca nagłówek (słownik), współrzędne (n x 2) lub None oraz wagi EXPLICIT (płaska tablica) lub None.
+    """
+    header = {}
+    coords = None
+    weights = None
+    n_coords = 0
+    n_weights = 0
+    section = None
 
     with open(tsp_filename, 'r') as f:
-        lines = f.readlines()
-        
-        in_coord_section = False
-        
-        for line in lines:
+        for line in f:
             line = line.strip()
-            if not line or line == "EOF":
-                continue
-            
-            if line.startswith("EDGE_WEIGHT_TYPE"):
-                parts = line.split(":")
-                edge_weight_type = parts[1].strip()
-            
-            elif line.startswith("DIMENSION"):
-                parts = line.split(":")
-                dimension = int(parts[1].strip())
-
-            elif line.startswith("NODE_COORD_SECTION"):
-                in_coord_section = True
+            if not line:
                 continue
-            
-            elif in_coord_section:
-                # Format: ID X Y
-                parts = line.split()
-                if len(parts) >= 3:
-                    # Ignorujemy ID (parts[0]), bierzemy X i Y
-                    try:
-                        x = float(parts[1])
-                        y = float(parts[2])
-                        coords.append((x, y))
-                    except ValueError:
-                        continue
-
-    if len(coords) != dimension:
-        print(f"Uwaga: Oczekiwano {dimension} miast, wczytano {len(coords)}.")
-        dimension = len(coords)
-
-    # Budowanie macierzy
-    c_matrix = []
-    t_matrix = []
-    
-    for i in range(dimension):
-        row_c = []
-        row_t = []
-        for j in range(dimension):
-            if i == j:
-                d = 0.0
-            else:
-                if edge_weight_type == "GEO":
-                    d = float(dist_geo(coords[i], coords[j]))
-                else:
-                    # Domyślnie EUC_2D
-                    d = float(dist_euc_2d(coords[i], coords[j]))
-            
-            row_c.append(d)
-            row_t.append(d) # Zakładamy prędkość 1.0
-        c_matrix.append(row_c)
-        t_matrix.append(row_t)
+            if line == "EOF":
+                break
+
+            parts = line.split()
+            if section is not None:
+                # Sekcja kończy się na pierwszym słowie kluczowym
+                if not parts[0][0].isalpha():
+                    if section == "NODE_COORD_SECTION":
+                        # Format: ID X Y (ID ignorujemy)
+                        if len(parts) >= 3 and n_coords < len(coords):
+                            coords[n_coords] = (float(parts[1]), float(parts[2]))
+                            n_coords += 1
+                    elif section == "EDGE_WEIGHT_SECTION":
+                        values = np.array(parts, dtype=np.float64)
+                        count = min(len(values), len(weights) - n_weights)
+                        weights[n_weights:n_weights + count] = values[:count]
+                        n_weights += count
+                    continue
+                section = None
+
+            keyword = line.split(":")[0].strip()
+            if keyword.endswith("_SECTION"):
+                section = keyword
+                if "DIMENSION" not in header:
+                    raise ValueError("Brak DIMENSION przed sekcją danych")
+                dimension = int(header["DIMENSION"])
+                if section == "NODE_COORD_SECTION":
+                    coords = np.empty((dimension, 2), dtype=np.float64)
+                elif section == "EDGE_WEIGHT_SECTION":
+                    fmt = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX")
+                    if fmt not in EXPLICIT_FORMATS:
+                        raise ValueError(f"Nieobsługiwany EDGE_WEIGHT_FORMAT: {fmt}")
+                    weights = np.empty(EXPLICIT_FORMATS[fmt](dimension), dtype=np.float64)
+            elif ":" in line:
+                key, value = line.split(":", 1)
+                header[key.strip()] = value.strip()
+
+    if coords is not None:
+        coords = coords[:n_coords]
+    if weights is not None and n_weights != len(weights):
+        raise ValueError(f"EDGE_WEIGHT_SECTION: oczekiwano {len(weights)} wag, wczytano {n_weights}")
+
+    return header, coords, weights
+
+def explicit_matrix(fmt, weights, n):
+    """Buduje pełną macierz n x n z wag sekcji EDGE_WEIGHT_SECTION."""
+    if fmt == "FULL_MATRIX":
+        m = weights.reshape(n, n).copy()
+    else:
+        m = np.zeros((n, n), dtype=np.float64)
+        if fmt == "UPPER_ROW":
+            rows, cols = np.triu_indices(n, 1)
+        elif fmt == "LOWER_ROW":
+            rows, cols = np.tril_indices(n, -1)
+        elif fmt == "UPPER_DIAG_ROW":
+            rows, cols = np.triu_indices(n, 0)
+        else: # LOWER_DIAG_ROW
+            rows, cols = np.tril_indices(n, 0)
+        m[rows, cols] = weights
+        m[cols, rows] = weights
+    np.fill_diagonal(m, 0.0)
+    return m
+
+def matrix_rows(m, step=1024):
+    for start in range(0, len(m), step):
+        yield m[start:start + step]
+
+def convert_tsp_to_json(tsp_filename, json_filename, coords_only=False):
+    print(f"Konwertowanie {tsp_filename}...")
+
+    header, coords, weights = read_tsplib(tsp_filename)
+    edge_weight_type = header.get("EDGE_WEIGHT_TYPE", "EUC_2D") # Domyślny
+    dimension = int(header.get("DIMENSION", 0))
+
+    if edge_weight_type == "EXPLICIT":
+        if coords_only:
+            raise ValueError("Dla EDGE_WEIGHT_TYPE: EXPLICIT nie ma współrzędnych - nie można zapisać samych współrzędnych")
+        if weights is None:
+            raise ValueError("Brak EDGE_WEIGHT_SECTION dla EDGE_WEIGHT_TYPE: EXPLICIT")
+    else:
+        if edge_weight_type not in COORD_TYPES:
+            raise ValueError(f"Nieobsługiwany EDGE_WEIGHT_TYPE: {edge_weight_type}")
+        if coords is None:
+            raise ValueError("Brak NODE_COORD_SECTION")
+        if len(coords) != dimension:
+            print(f"Uwaga: Oczekiwano {dimension} miast, wczytano {len(coords)}.")
+            dimension = len(coords)
 
     # Generowanie danych "dummy" dla Twojego specyficznego solvera
     # Wyłączamy paliwo i okna czasowe
-    t_windows = [[0.0, 1000000.0] for _ in range(dimension)]
-    
-    data = {
-        "n": dimension,
-        "c_matrix": c_matrix,
-        "t_matrix": t_matrix,
-        "t_windows": t_windows,
-        "a": 0.0,
-        "b": 0.0,
-        "M": 10000
-    }
-
-    with open(json_filename, 'w') as f:
-        json.dump(data, f, indent=4)
-        
+    t_windows = np.tile(NO_WINDOW, (dimension, 1))
+
+    if coords_only:
+        if isBinaryInstance(json_filename):
+            raise ValueError(f"Tryb samych współrzędnych obsługuje tylko format JSON (nie {BINARY_EXT})")
+        writeCoordsInstance(json_filename, coords, edge_weight_type, 1.0, t_windows, 0.0, 0.0, 10000)
+    elif edge_weight_type == "EXPLICIT":
+        fmt = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX")
+        m = explicit_matrix(fmt, weights, dimension)
+        value_fmt = "%.1f" if np.array_equal(m, np.round(m)) else "%.10g"
+        # Zakładamy prędkość 1.0 (t_ij = c_ij)
+        saveInstance(json_filename, dimension, matrix_rows(m), matrix_rows(m),
+                     t_windows, 0.0, 0.0, 10000, fmt=value_fmt)
+    else:
+        # Macierze liczone wektorowo blok po bloku (prędkość 1.0 => t_ij = c_ij)
+        prepared = prepareCoords(edge_weight_type, coords)
+        saveInstance(json_filename, dimension,
+                     distanceBlocks(edge_weight_type, prepared),
+                     distanceBlocks(edge_weight_type, prepared),
+                     t_windows, 0.0, 0.0, 10000, fmt="%.1f")
+
     print(f"Gotowe! Zapisano jako {json_filename}")
     print(f"Typ odległości: {edge_weight_type}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Użycie: python tsplib_to_json.py <plik.tsp>")
+    parser = argparse.ArgumentParser(description="Konwersja instancji TSPLIB do formatu JSON lub .tspb")
+    parser.add_argument("input", help="Plik TSPLIB (.tsp)")
+    parser.add_argument("output", nargs="?", help=f"Plik wynikowy (.json lub {BINARY_EXT}); domyślnie <plik>.json")
+    parser.add_argument("--coords-only", action="store_true",
+                        help="Zapisz tylko współrzędne (bez macierzy) - odległości liczone są na żądanie")
+    args = parser.parse_args()
+
+    input_file = args.input
+    if args.output:
+        output_file = args.output
     else:
-        input_file = sys.argv[1]
         output_file = input_file.replace(".tsp", ".json")
         if output_file == input_file:
              output_file += ".json"
-        
-        convert_tsp_to_json(input_file, output_file)
\ No newline at end of file
+
+    try:
+        convert_tsp_to_json(input_file, output_file, args.coords_only)
+    except ValueError as e:
+        print(f"Błąd: {e}")
+        sys.exit(1)
@@ -12,13 +12,32 @@ def loadJson(filename):
 def calcFuelCost(dist, a, b):
     return a * dist + b * (dist ** 2)
 
-def runCommand(cmd):
+def runCommand(cmd, timeout=None, env=None, fatal=True):
+    """
+    Uruchamia polecenie. Przy błędzie (fatal=True) kończy program,
+    w przeciwnym razie zwraca status: "OK", "FAILED" lub "TIMEOUT".
+    """
     try:
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=timeout, env=env)
     except subprocess.CalledProcessError as e:
         eprint(f"[BŁĄD] {e.returncode}:")
         eprint(f"Polecenie: {' '.join(cmd)}")
         eprint(f"--- ERROR ---")
         eprint(e.stderr)
         eprint(f"----------------------------")
-        sys.exit(1)
+        if fatal:
+            sys.exit(1)
+        return "FAILED"
+    except OSError as e:
+        eprint(f"[BŁĄD] Nie można uruchomić polecenia: {e}")
+        eprint(f"Polecenie: {' '.join(cmd)}")
+        if fatal:
+            sys.exit(1)
+        return "FAILED"
+    except subprocess.TimeoutExpired:
+        eprint(f"[TIMEOUT] Przekroczono limit {timeout}s:")
+        eprint(f"Polecenie: {' '.join(cmd)}")
+        if fatal:
+            sys.exit(1)
+        return "TIMEOUT"
+    return "OK"
@@ -1,33 +1,32 @@
+import os
+import sys
+import json
 import argparse
+import numpy as np
 from tsp_utils import eprint, loadJson, calcFuelCost
+from tsp_instance import blockRows, loadInstance
+from tsp_distance import isCoordsInstance, instanceCoords, routeDistances
 
+EPSILON = 0.05 # Tolerancja na błędy zmiennoprzecinkowe
 
-def validateSolution(data_path, solution_path):
-    eprint(f"--- WALIDATOR TSP ---")
-    eprint(f"Dane: {data_path}")
-    eprint(f"Rozwiązanie: {solution_path}")
-
-    data = loadJson(data_path) 
-    sol = loadJson(solution_path)
-
-    n = data['n']
-    c_matrix = data['c_matrix']
-    t_matrix = data['t_matrix']
-    windows = data['t_windows']
-    a = data['a']
-    b = data['b']
-    
-    route = sol['route']
-    reported_cost = sol['total_cost']
 
+def checkRouteStructure(route, n):
+    """Sprawdza strukturę trasy. Zwraca listę błędów (pusta = poprawna)."""
     errors = []
 
-    # Weryfikacja struktury trasy
-    
     # Sprawdzenie długości
     if len(route) != n + 1:
         errors.append(f"Długość trasy wynosi {len(route)}, oczekiwano {n + 1}.")
-    
+
+    if not route:
+        return errors
+
+    # Sprawdzenie zakresu indeksów
+    bad = [v for v in route if not isinstance(v, int) or v < 0 or v >= n]
+    if bad:
+        errors.append(f"Nieprawidłowe indeksy miast: {sorted(set(map(str, bad)))}")
+        return errors
+
     # Sprawdzenie startu i końca
     if route[0] != 0 or route[-1] != 0:
         errors.append("Trasa musi zaczynać się i kończyć w wierzchołku 0.")
@@ -37,20 +36,58 @@ def validateSolution(data_path, solution_path):
     if len(unique_cities) != n:
         missing = set(range(n)) - unique_cities
         errors.append(f"Nie odwiedzono wszystkich miast. Brakujące: {missing}")
-    
+
     if len(route) > 1 and len(set(route[:-1])) != len(route[:-1]):
          errors.append("W trasie występują powtórzenia miast (nie licząc powrotu do bazy).")
 
-    if errors:
-        eprint(f"[BŁĄD STRUKTURY TRASY]")
-        for e in errors:
-            eprint(f"- {e}")
-        return False
+    return errors
+
+
+def simulateRoutes(data, routes):
+    """
+    Symulacja przejścia wielu tras naraz (tablica k x (n+1)).
+
+    Czas przyjazdu po oczekiwaniu T_j = max(T_{j-1} + t, e_j), T_0 = 0, liczony jest
+    bez pętli: T = S + max(0, cummax(e - S)), gdzie S to skumulowany czas jazdy.
+    Zwraca słownik tablic k x n (dla każdego odcinka) oraz sumy kosztów.
+    """
+    windows = np.asarray(data['t_windows'], dtype=np.float64).reshape(-1, 2)
+    a = data['a']
+    b = data['b']
+
+    u = routes[:, :-1]
+    v = routes[:, 1:]
 
-    # Symulacja trasy
-    calculated_cost = 0.0
-    current_time = 0.0
-    
+    if isCoordsInstance(data):
+        # Odległości tylko dla odcinków tras (bez macierzy n x n)
+        kind, coords, speed = instanceCoords(data)
+        dist = routeDistances(kind, coords, u, v)
+        drive = dist / speed
+    else:
+        dist = np.asarray(data['c_matrix'], dtype=np.float64)[u, v]
+        drive = np.asarray(data['t_matrix'], dtype=np.float64)[u, v]
+    fuel = calcFuelCost(dist, a, b)
+
+    travel = np.cumsum(drive, axis=1)
+    wait_shift = np.maximum(np.maximum.accumulate(windows[v, 0] - travel, axis=1), 0.0)
+    arrival = travel + wait_shift
+    penalty = np.maximum(arrival - windows[v, 1], 0.0)
+
+    travel_cost = (dist + fuel).sum(axis=1)
+    total_penalty = penalty.sum(axis=1)
+
+    return {
+        "dist": dist,
+        "fuel": fuel,
+        "arrival": arrival,
+        "penalty": penalty,
+        "travel_cost": travel_cost,
+        "total_penalty": total_penalty,
+        "total_cost": travel_cost + total_penalty,
+    }
+
+
+def printTrace(route, sim, row, windows):
     eprint("--- Symulacja Przejścia ---")
     eprint(f"{'Odcinek':<15} | {'Dyst.':<8} | {'Paliwo':<8} | {'Przyjazd':<10} | {'Okno':<15} | {'Kara':<8}")
     eprint("-" * 80)
@@ -58,65 +95,150 @@ def validateSolution(data_path, solution_path):
     for i in range(len(route) - 1):
         u = route[i]
         v = route[i+1]
-
-        dist = c_matrix[u][v]
-        travel_time = t_matrix[u][v]
-        
-        fuel = calcFuelCost(dist, a, b)
-        step_cost = dist + fuel
-        
-        arrival_time = current_time + travel_time
-        
-        e_v = windows[v][0]
-        l_v = windows[v][1]
-        
-        wait_time = 0.0
-        penalty = 0.0
-        
-        actual_arrival = arrival_time
-        
-        # Przyjazd za wcześnie
-        if actual_arrival < e_v:
-            wait_time = e_v - actual_arrival
-            actual_arrival = e_v
-        
-        # Przyjazd za późno
-        if actual_arrival > l_v:
-            penalty = actual_arrival - l_v
-        
-        calculated_cost += step_cost + penalty
-        
+        e_v, l_v = windows[v][0], windows[v][1]
         win_str = f"[{e_v:.1f}, {l_v:.1f}]"
-        eprint(f"{u:>3} -> {v:<3}     | {dist:<8.2f} | {fuel:<8.2f} | {actual_arrival:<10.2f} | {win_str:<15} | {penalty:<8.2f}")
-
-        current_time = actual_arrival
+        eprint(f"{u:>3} -> {v:<3}     | {sim['dist'][row, i]:<8.2f} | {sim['fuel'][row, i]:<8.2f} | "
+               f"{sim['arrival'][row, i]:<10.2f} | {win_str:<15} | {sim['penalty'][row, i]:<8.2f}")
 
     eprint("-" * 80)
 
-    # Porównanie wyników
-    diff = abs(calculated_cost - reported_cost)
-    epsilon = 0.05 # Tolerancja na błędy zmiennoprzecinkowe
 
-    eprint(f"Koszt zgłoszony w pliku:   {reported_cost:.4f}")
-    eprint(f"Koszt obliczony przez walidator: {calculated_cost:.4f}")
-    eprint(f"Różnica: {diff:.6f}")
+def collectSolutionFiles(paths):
+    """Rozwija katalogi do listy plików *.json (posortowanych)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(".json")))
+        else:
+            files.append(path)
+    return files
+
+
+def validateBatch(data_path, solution_paths, trace=False, epsilon=EPSILON):
+    """
+    Waliduje wiele rozwiązań dla jednej instancji (instancja wczytywana raz).
+    Zwraca listę raportów - po jednym słowniku na rozwiązanie.
+    """
+    data = loadInstance(data_path)
+    n = data['n']
+    windows = np.asarray(data['t_windows'], dtype=np.float64).reshape(-1, 2)
+
+    reports = []
+    routes = []
+    for path in solution_paths:
+        report = {
+            "solution": path,
+            "valid": False,
+            "passed": False,
+            "reported_cost": None,
+            "calculated_cost": None,
+            "cost_diff": None,
+            "total_penalty": None,
+            "errors": [],
+        }
+        reports.append(report)
+
+        try:
+            sol = loadJson(path)
+            route = sol['route']
+            reported_cost = sol['total_cost']
+            if isinstance(reported_cost, bool) or not isinstance(reported_cost, (int, float)):
+                raise TypeError(f"total_cost nie jest liczbą: {reported_cost!r}")
+            report["reported_cost"] = reported_cost
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            report["errors"].append(f"Nie można wczytać rozwiązania: {e!r}")
+            continue
+
+        report["errors"] = checkRouteStructure(route, n)
+        if report["errors"]:
+            continue
+
+        report["valid"] = True
+        routes.append((report, route))
+
+    # Symulacja w porcjach, aby ograniczyć pamięć (k x n na każdą tablicę)
+    step = blockRows(n + 1)
+    for start in range(0, len(routes), step):
+        chunk = routes[start:start + step]
+        sim = simulateRoutes(data, np.array([route for _, route in chunk], dtype=np.int64))
+
+        for row, (report, route) in enumerate(chunk):
+            calculated_cost = float(sim["total_cost"][row])
+            diff = abs(calculated_cost - report["reported_cost"])
+            report["calculated_cost"] = calculated_cost
+            report["total_penalty"] = float(sim["total_penalty"][row])
+            report["cost_diff"] = diff
+            report["passed"] = diff < epsilon
+            if not report["passed"]:
+                report["errors"].append(f"Rozbieżność kosztu {diff:.6f} przekracza tolerancję ({epsilon}).")
+
+            if trace:
+                eprint(f"Rozwiązanie: {report['solution']}")
+                printTrace(route, sim, row, windows)
+
+    return reports
+
+
+def validateSolution(data_path, solution_path, trace=True):
+    eprint(f"--- WALIDATOR TSP ---")
+    eprint(f"Dane: {data_path}")
+    eprint(f"Rozwiązanie: {solution_path}")
+
+    report = validateBatch(data_path, [solution_path], trace)[0]
 
-    if diff < epsilon:
+    if not report["valid"]:
+        eprint(f"[BŁĄD STRUKTURY TRASY]")
+        for e in report["errors"]:
+            eprint(f"- {e}")
+        return False
+
+    eprint(f"Koszt zgłoszony w pliku:   {report['reported_cost']:.4f}")
+    eprint(f"Koszt obliczony przez walidator: {report['calculated_cost']:.4f}")
+    eprint(f"Różnica: {report['cost_diff']:.6f}")
+
+    if report["passed"]:
         eprint(f"=== WERYFIKACJA POZYTYWNA (OK) ===")
         return True
     else:
         eprint(f"=== WERYFIKACJA NEGATYWNA (BŁĄD KOSZTÓW) ===")
-        eprint(f"Rozbieżność przekracza tolerancję ({epsilon}).")
+        eprint(f"Rozbieżność przekracza tolerancję ({EPSILON}).")
         return False
 
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Validator dla problemu TSP z ograniczeniami czasu i paliwa.")
-    parser.add_argument("-d", "--data", required=True, help="Plik JSON z danymi wejściowymi")
-    parser.add_argument("-s", "--solution", required=True, help="Plik JSON z rozwiązaniem")
-    
+    parser.add_argument("-d", "--data", required=True, help="Plik z danymi wejściowymi (.json lub .tspb)")
+    parser.add_argument("-s", "--solution", required=True, nargs="+",
+                        help="Plik(i) JSON z rozwiązaniem lub katalog(i) z plikami rozwiązań")
+    parser.add_argument("--trace", action="store_true", help="Wypisz przebieg trasy odcinek po odcinku")
+    parser.add_argument("--report", default="-", help="Plik raportu JSON ('-' = standardowe wyjście)")
+    parser.add_argument("--epsilon", type=float, default=EPSILON, help=f"Tolerancja kosztu (domyślnie: {EPSILON})")
+
     args = parser.parse_args()
-    
-    if (validateSolution(args.data, args.solution)):
-        exit(0)
+
+    solutions = collectSolutionFiles(args.solution)
+    reports = validateBatch(args.data, solutions, args.trace, args.epsilon)
+
+    passed = sum(r["passed"] for r in reports)
+    for r in reports:
+        status = "OK" if r["passed"] else "BŁĄD"
+        details = f"różnica {r['cost_diff']:.6f}, kara {r['total_penalty']:.2f}" if r["valid"] else "; ".join(r["errors"])
+        eprint(f"[{status}] {r['solution']}: {details}")
+    eprint(f"Poprawnych: {passed}/{len(reports)}")
+
+    summary = {
+        "data": args.data,
+        "epsilon": args.epsilon,
+        "checked": len(reports),
+        "passed": passed,
+        "results": reports,
+    }
+    if args.report == "-":
+        json.dump(summary, sys.stdout, indent=4)
+        print()
     else:
-        exit(1)
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+    sys.exit(0 if passed == len(reports) else 1)
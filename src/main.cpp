@@ -1,170 +1,516 @@
 #include <iostream>
 #include <omp.h>
 #include <string>
-#include "args.hxx"
+#include <optional>
+#include <memory>
+#include <cstdint>
+#include <fstream>
+#include <list>
+#include <vector>
 #include "tsp_types.hpp"
 #include "tsp_utils.hpp"
-#include "tsp_greedy_solver.hpp"
-#include "tsp_sa_solver.hpp"
+#include "tsp_run.hpp"
+#include "tsp_service.hpp"
 
 /**
  * @file main.cpp
  * @brief Główny plik programu rozwiązującego problem TSP z ograniczeniami.
- * 
+ *
  * Program obsługuje argumenty wiersza poleceń, wczytuje dane,
  * uruchamia wybrany algorytm (Greedy lub Simulated Annealing)
- * i zapisuje wyniki.
+ * i zapisuje wyniki. W trybie `--batch` jeden proces wykonuje kolejne
+ * uruchomienia z pliku manifestu, a w trybie `--serve` działa jako usługa
+ * (tsp_service.hpp).
  */
 
-/**
- * @brief Główna funkcja programu.
- * 
- * @param argc Liczba argumentów wywołania.
- * @param argv Tablica argumentów wywołania.
- * @return int Kod wyjścia (0 - sukces, 1 - błąd).
- */
-int main(int argc, char *argv[])
+using json = nlohmann::json;
+
+namespace
 {
-    args::ArgumentParser parser("TSP z ograniczeniem czasu i paliwa", "Program rozwiazujacy problem komiwojazera (TSP) wykorzystujący algorytm symulowanego wyżarzania oraz zachłanny ulosowiony.");
-    args::HelpFlag help(parser, "help", "Wyswietl to menu pomocy", {'h', "help"});
+    /// Parametry przebiegu wypisywane przed obliczeniami (pojedyncze wywołanie).
+    void PrintSetup(const ProblemData &data, const RunOptions &opts)
+    {
+        std::cerr << "Wczytano " << data.n << " miast." << std::endl;
+        if (data.edges.Coords() != nullptr)
+        {
+            std::cerr << "Tryb wspolrzednych: odleglosci liczone na zadanie";
+            if (data.edges.Coords()->CacheRows() > 0)
+            {
+                std::cerr << ", pamiec podreczna " << data.edges.Coords()->CacheRows() << " wierszy/watek";
+            }
+            std::cerr << std::endl;
+        }
+        else if (opts.float32)
+        {
+            std::cerr << "Tablica krawedzi: float32, " << data.edges.Bytes() / (1024.0 * 1024.0) << " MB" << std::endl;
+        }
+        std::cerr << "Liczba watkow: " << omp_get_max_threads() << std::endl;
+        std::cerr << "Algorytm: " << opts.algorithm << std::endl;
+        if (opts.seed)
+        {
+            std::cerr << "Ziarno: " << *opts.seed << std::endl;
+        }
+
+        if (opts.algorithm == "greedy") {
+            std::cerr << "Liczba iteracji: " << opts.iterations << ", k najlepszych: " << opts.k_best << std::endl;
+        } else if (opts.algorithm == "sa") {
+            std::cerr << "SA Params: T=" << opts.initial_temp << ", cooling=" << opts.cooling_rate
+                      << ", min_T=" << opts.min_temp << ", iter_per_temp=" << opts.iterations
+                      << ", k_greedy=" << opts.k_best << ", tryb=" << opts.sa_mode_name;
+            if (opts.sa_mode != SAMode::Independent)
+            {
+                std::cerr << ", wymiana co " << opts.exchange_interval;
+            }
+            std::cerr << std::endl;
+        }
+        if (opts.time_limit > 0.0)
+        {
+            std::cerr << "Limit czasu: " << opts.time_limit << " s" << std::endl;
+        }
+        if (opts.target_gap > 0.0)
+        {
+            std::cerr << "Docelowa luka: " << opts.target_gap << std::endl;
+        }
+        if (opts.local_search || opts.neighbor_bias > 0.0)
+        {
+            std::cerr << "Listy kandydatow: " << opts.neighbor_k << " sasiadow"
+                      << (opts.local_search ? ", przeszukiwanie lokalne" : "")
+                      << (opts.neighbor_bias > 0.0 ? ", bias=" + std::to_string(opts.neighbor_bias) : "") << std::endl;
+        }
+    }
 
-    // Ścieżki plików
-    args::ValueFlag<std::string> arg_input(parser, "input_path", "Sciezka do pliku wejsciowego", {'d', "data"});
-    args::ValueFlag<std::string> arg_output(parser, "output_path", "Sciezka do pliku wynikowego", {'o', "output"});
+    /**
+     * @brief Pojedyncze wywołanie: jedna instancja (-d), jeden plik wyniku (-o).
+     */
+    int RunSingle(Cli &cli)
+    {
+        if (!cli.arg_input)
+        {
+            std::cerr << "Blad: Nie podano pliku wejsciowego." << std::endl;
+            std::cerr << cli.parser;
+            return 1;
+        }
 
-    // Algorytm
-    args::Group group(parser, "Algorytmy (wybierz jeden):", args::Group::Validators::AtMostOne);
-    args::Flag arg_greedy(group, "greedy", "Uzyj algorytmu zachlannego (domyslnie)", {'g', "greedy"});
-    args::Flag arg_sa(group, "sa", "Uzyj algorytmu symulowanego wyzarzania", {'s', "sa"});
+        RunOptions opts;
+        std::string error;
+        if (!ReadOptions(cli, opts, error))
+        {
+            std::cerr << "Blad: " << error << std::endl;
+            return 1;
+        }
+        const std::string &input = *opts.input;
 
+        /// Strumień kolejnych najlepszych rozwiązań (otwierany przed obliczeniami)
+        std::ofstream stream_file;
+        std::ostream *stream = nullptr;
+        if (!OpenStream(opts, stream_file, stream))
+        {
+            std::cerr << "Blad: Nie mozna otworzyc pliku strumienia " << *opts.stream_path << std::endl;
+            return 1;
+        }
 
-    // parametry algorytmów
-    args::ValueFlag<int> arg_iterations(parser, "iterations", "Liczba iteracji (domyslnie 1000)", {'i', "iterations"});
-    args::ValueFlag<int> arg_k(parser, "k", "Liczba k najlepszych (domyslnie 4)", {'k'});
-    args::ValueFlag<double> arg_T(parser, "T", "Temperatura początkowa (domyslnie 5000)", {'T'});
-    args::ValueFlag<double> arg_cooling_rate(parser, "cooling_rate", "Współczynnik chłodzenia (domyslnie 0.99)", {'c'});
-    args::ValueFlag<double> arg_t(parser, "t", "Minimalna temperatura (domyslnie 0.1)", {'t'});
+        std::unique_ptr<SolverStats> stats = MakeStats(opts);
+
+        std::cerr << "--- TSP z ograniczeniem czasu i paliwa ---" << std::endl;
+
+        double load_start = omp_get_wtime();
+        ProblemData data;
+        if (!LoadData(input, data, opts.float32, opts.row_cache))
+        {
+            std::cerr << "Nie udalo sie wczytac pliku " << input << std::endl;
+            return 1;
+        }
+        if (stats)
+        {
+            stats->AddPhase("load", omp_get_wtime() - load_start);
+        }
+
+        PrintSetup(data, opts);
+        RunResult result = Solve(data, opts, stream, stats.get(), std::cerr);
+        const Solution &best = result.best;
+
+        std::cerr << "----------------------------------------" << std::endl;
+        std::cerr << "Czas obliczen: " << result.elapsed << " s" << std::endl;
+        std::cerr << "Najlepszy znaleziony koszt Z: " << best.total_cost << std::endl;
+        if (result.lower_bound.method != BoundMethod::None && best.is_valid)
+        {
+            std::cerr << "Luka wzgledem ograniczenia dolnego: "
+                      << 100.0 * RelativeGap(best.total_cost, result.lower_bound.value) << "%" << std::endl;
+        }
+        if (result.pruned)
+        {
+            const GreedyPruning &pruning = result.pruning;
+            std::cerr << "Odciete konstrukcje: " << pruning.pruned << "/" << pruning.constructions << " ("
+                      << (pruning.constructions > 0 ? 100.0 * pruning.pruned / pruning.constructions : 0.0)
+                      << "%), zaoszczedzony czas watkow ~" << pruning.time_saved << " s" << std::endl;
+        }
+        std::cerr << "Trasa: ";
+        for (size_t i = 0; i < best.route.size(); ++i)
+        {
+            std::cerr << best.route[i];
+            if (i < best.route.size() - 1)
+                std::cerr << " -> ";
+        }
+        std::cerr << std::endl;
+
+        std::string output_filename;
+        if (opts.output)
+        {
+            output_filename = *opts.output;
+        }
+        else
+        {
+            output_filename = input;
+            size_t lastindex = output_filename.find_last_of(".");
+            if (lastindex != std::string::npos)
+            {
+                output_filename = output_filename.substr(0, lastindex);
+            }
+            output_filename += "_result.json";
+        }
+
+        SaveResults(output_filename, best, result.elapsed, stats.get(), &result.lower_bound);
+        std::cerr << "Wyniki zapisano do: " << output_filename << std::endl;
 
-    try
-    {
-        parser.ParseCLI(argc, argv);
-    }
-    catch (const args::Help &)
-    {
-        std::cerr << parser;
         return 0;
     }
-    catch (const args::ParseError &e)
+
+    /**
+     * @brief Wczytane instancje trybu --batch (najdawniej używane usuwane po przekroczeniu pojemności).
+     *
+     * Kluczem jest ścieżka i opcje wpływające na wczytanie (--float32, --row-cache).
+     * Pliki nie powinny zmieniać się w trakcie przebiegu.
+     */
+    class InstanceCache
     {
-        std::cerr << e.what() << std::endl;
-        std::cerr << parser;
-        return 1;
-    }
-    catch (const args::ValidationError &e)
+    public:
+        explicit InstanceCache(int capacity) : capacity_(capacity) {}
+
+        /**
+         * @brief Instancja z pamięci albo wczytana z pliku.
+         * @param hit Czy instancja była już wczytana.
+         * @return nullptr, gdy nie udało się wczytać pliku.
+         */
+        std::shared_ptr<const ProblemData> Get(const RunOptions &opts, bool &hit)
+        {
+            hit = false;
+            for (auto it = entries_.begin(); it != entries_.end(); ++it)
+            {
+                if (it->path == *opts.input && it->float32 == opts.float32 && it->row_cache == opts.row_cache)
+                {
+                    entries_.splice(entries_.begin(), entries_, it);
+                    hit = true;
+                    return entries_.front().data;
+                }
+            }
+
+            auto data = std::make_shared<ProblemData>();
+            if (!LoadData(*opts.input, *data, opts.float32, opts.row_cache))
+            {
+                return nullptr;
+            }
+            if (capacity_ > 0)
+            {
+                entries_.push_front({*opts.input, opts.float32, opts.row_cache, data});
+                while (static_cast<int>(entries_.size()) > capacity_)
+                {
+                    entries_.pop_back();
+                }
+            }
+            return data;
+        }
+
+    private:
+        struct Entry
+        {
+            std::string path;
+            bool float32;
+            int row_cache;
+            std::shared_ptr<const ProblemData> data;
+        };
+
+        int capacity_;
+        std::list<Entry> entries_; ///< Od ostatnio używanej.
+    };
+
+    /**
+     * @brief Argumenty solvera z wiersza manifestu (dopisywane po opcjach z wiersza poleceń).
+     */
+    bool ManifestArgs(const json &entry, std::vector<std::string> &tokens, std::string &error)
     {
-        std::cerr << e.what() << std::endl;
-        std::cerr << parser;
-        return 1;
+        if (!entry.contains("input") || !entry["input"].is_string())
+        {
+            error = "brak sciezki instancji (input)";
+            return false;
+        }
+        tokens.push_back("--data");
+        tokens.push_back(entry["input"].get<std::string>());
+        if (entry.contains("output") && !entry["output"].is_null())
+        {
+            if (!entry["output"].is_string())
+            {
+                error = "output musi byc sciezka";
+                return false;
+            }
+            tokens.push_back("--output");
+            tokens.push_back(entry["output"].get<std::string>());
+        }
+        return AppendJsonArgs(entry.value("algorithm", json()), entry.value("params", json()), tokens, error);
     }
 
-    if (!arg_input)
+    /**
+     * @brief Jeden wiersz manifestu: parsowanie opcji, instancja z pamięci, obliczenia, zapis.
+     * @param report Wiersz wyników (uzupełniany także przy błędzie).
+     * @return `false` przy błędzie (komunikat w `report["error"]`).
+     */
+    bool RunBatchEntry(const json &entry, const std::vector<std::string> &defaults, int default_threads,
+                       InstanceCache &cache, json &report)
     {
-        std::cerr << "Blad: Nie podano pliku wejsciowego." << std::endl;
-        std::cerr << parser;
-        return 1;
-    }
+        std::vector<std::string> tokens = defaults;
+        std::string error;
+        if (!ManifestArgs(entry, tokens, error))
+        {
+            report["error"] = error;
+            return false;
+        }
 
-    std::string filename = args::get(arg_input);
+        Cli cli;
+        RunOptions opts;
+        try
+        {
+            cli.parser.ParseArgs(tokens);
+        }
+        catch (const args::Error &e)
+        {
+            report["error"] = std::string("opcje: ") + e.what();
+            return false;
+        }
+        if (!ReadOptions(cli, opts, error))
+        {
+            report["error"] = error;
+            return false;
+        }
+        report["input"] = *opts.input;
+        report["algorithm"] = opts.algorithm;
+        if (opts.output)
+        {
+            report["output"] = *opts.output;
+        }
 
-    int iterations = arg_iterations ? args::get(arg_iterations) : 1000;
-    int k_best = arg_k ? args::get(arg_k) : 4;
-    std::string algorithm = "greedy";
-    if (arg_sa) {
-        algorithm = "sa";
-    }
-    
-    // Parametry SA
-    double initial_temp = arg_T ? args::get(arg_T) : 5000.0;
-    double cooling_rate = arg_cooling_rate ? args::get(arg_cooling_rate) : 0.99;
-    double min_temp = arg_t ? args::get(arg_t) : 0.1;
+        /// stdout zajmują wiersze wyników
+        if (opts.stream_path && *opts.stream_path == "-")
+        {
+            report["error"] = "--stream - jest niedostepne w trybie --batch";
+            return false;
+        }
+        std::ofstream stream_file;
+        std::ostream *stream = nullptr;
+        if (!OpenStream(opts, stream_file, stream))
+        {
+            report["error"] = "nie mozna otworzyc pliku strumienia " + *opts.stream_path;
+            return false;
+        }
 
-    std::cerr << "--- TSP z ograniczeniem czasu i paliwa ---" << std::endl;
+        int threads = default_threads;
+        if (entry.contains("threads") && !entry["threads"].is_null())
+        {
+            if (!entry["threads"].is_number_integer() || entry["threads"].get<int>() < 1)
+            {
+                report["error"] = "threads musi byc dodatnia liczba calkowita";
+                return false;
+            }
+            threads = entry["threads"].get<int>();
+        }
+        /// Pula wątków OpenMP jest ta sama dla kolejnych wierszy - zmienia się tylko liczba wątków
+        omp_set_num_threads(threads);
+        report["threads"] = threads;
 
-    ProblemData data;
-    if (!LoadData(filename, data))
-    {
-        std::cerr << "Nie udalo sie wczytac pliku " << filename << std::endl;
-        return 1;
+        std::unique_ptr<SolverStats> stats = MakeStats(opts);
+        double load_start = omp_get_wtime();
+        bool cached = false;
+        std::shared_ptr<const ProblemData> data = cache.Get(opts, cached);
+        double load_time = omp_get_wtime() - load_start;
+        if (!data)
+        {
+            report["error"] = "nie udalo sie wczytac pliku " + *opts.input;
+            return false;
+        }
+        if (stats)
+        {
+            stats->AddPhase("load", load_time);
+        }
+        report["cached"] = cached;
+        report["load_time"] = load_time;
+
+        std::ostream null_log(nullptr);
+        RunResult result = Solve(*data, opts, stream, stats.get(), null_log);
+
+        json solution = ResultJson(result.best, result.elapsed, stats.get(), &result.lower_bound);
+        if (opts.output)
+        {
+            SaveResults(*opts.output, result.best, result.elapsed, stats.get(), &result.lower_bound);
+            /// Trasa i instrumentacja są w pliku wyniku
+            solution.erase("route");
+            solution.erase("stats");
+        }
+        report.update(solution);
+        if (result.pruned)
+        {
+            report["pruning"] = PruningJson(result.pruning);
+        }
+        return true;
     }
 
-    std::cerr << "Wczytano " << data.n << " miast." << std::endl;
-    std::cerr << "Liczba watkow: " << omp_get_max_threads() << std::endl;
-    std::cerr << "Algorytm: " << algorithm << std::endl;
-    
-    if (algorithm == "greedy") {
-        std::cerr << "Liczba iteracji: " << iterations << ", k najlepszych: " << k_best << std::endl;
-    } else if (algorithm == "sa") {
-        std::cerr << "SA Params: T=" << initial_temp << ", cooling=" << cooling_rate 
-                  << ", min_T=" << min_temp << ", iter_per_temp=" << iterations 
-                  << ", k_greedy=" << k_best << std::endl;
+    /**
+     * @brief Argumenty wywołania bez opcji trybu (`--batch`, `--serve` z wartością) - wartości
+     * domyślne dla wierszy manifestu i żądań usługi.
+     */
+    std::vector<std::string> DefaultArgs(int argc, char *argv[])
+    {
+        std::vector<std::string> defaults;
+        for (int i = 1; i < argc; ++i)
+        {
+            std::string arg = argv[i];
+            if (arg == "--batch" || arg == "--serve")
+            {
+                ++i;
+                continue;
+            }
+            if (arg.rfind("--batch=", 0) == 0 || arg.rfind("--serve=", 0) == 0)
+                continue;
+            defaults.push_back(arg);
+        }
+        return defaults;
     }
 
-    Solution best;
-    double start_time = omp_get_wtime();
+    /**
+     * @brief Tryb --batch: kolejne wiersze manifestu w jednym procesie.
+     *
+     * Każdy wiersz to obiekt JSON: `input` (wymagane), `output` (bez niego trasa trafia do wiersza
+     * wyników), `algorithm` (greedy|sa), `params`, `threads` i dowolne `id` powtarzane w wyniku.
+     * Opcje z wiersza poleceń poprzedzają opcje wiersza (są wartościami domyślnymi); `algorithm`
+     * wiersza zastępuje flagę --greedy/--sa z wiersza poleceń.
+     * Wyniki wypisywane są na stdout jako JSON Lines zaraz po obliczeniu każdego wiersza;
+     * błąd wiersza ({"status": "ERROR", "error": ...}) nie przerywa przebiegu.
+     *
+     * @return 0, gdy wszystkie wiersze zakończyły się powodzeniem, w przeciwnym razie 1.
+     */
+    int RunBatch(Cli &cli, const std::vector<std::string> &defaults)
+    {
+        std::string manifest_path = args::get(cli.arg_batch);
+        std::ifstream manifest_file;
+        std::istream *manifest = &std::cin;
+        if (manifest_path != "-")
+        {
+            manifest_file.open(manifest_path);
+            if (!manifest_file.is_open())
+            {
+                std::cerr << "Blad: Nie mozna otworzyc manifestu " << manifest_path << std::endl;
+                return 1;
+            }
+            manifest = &manifest_file;
+        }
+
+        InstanceCache cache(cli.arg_batch_cache ? args::get(cli.arg_batch_cache) : 4);
+        int default_threads = omp_get_max_threads();
+        double batch_start = omp_get_wtime();
+        int runs = 0;
+        int failed = 0;
+
+        std::cerr << "--- TSP z ograniczeniem czasu i paliwa: manifest " << manifest_path << " ---" << std::endl;
+
+        std::string line;
+        int line_number = 0;
+        while (std::getline(*manifest, line))
+        {
+            ++line_number;
+            if (line.find_first_not_of(" \t\r") == std::string::npos)
+            {
+                continue;
+            }
+
+            json report;
+            report["line"] = line_number;
+            bool ok = false;
+            json entry = json::parse(line, nullptr, false);
+            if (entry.is_discarded() || !entry.is_object())
+            {
+                report["error"] = "wiersz nie jest obiektem JSON";
+            }
+            else
+            {
+                if (entry.contains("id"))
+                {
+                    report["id"] = entry["id"];
+                }
+                ok = RunBatchEntry(entry, defaults, default_threads, cache, report);
+            }
+            report["status"] = ok ? "OK" : "ERROR";
+
+            ++runs;
+            if (ok)
+            {
+                std::cerr << "[" << line_number << "] " << report["algorithm"].get<std::string>() << " "
+                          << report["input"].get<std::string>() << ": koszt " << report["total_cost"].get<double>()
+                          << ", " << report["execution_time"].get<double>() << " s"
+                          << (report["cached"].get<bool>() ? " (instancja w pamieci)" : "") << std::endl;
+            }
+            else
+            {
+                ++failed;
+                std::cerr << "[" << line_number << "] Blad: " << report["error"].get<std::string>() << std::endl;
+            }
+            std::cout << report.dump() << std::endl;
+        }
+
+        std::cerr << "----------------------------------------" << std::endl;
+        std::cerr << "Uruchomienia: " << runs << ", bledy: " << failed
+                  << ", czas: " << omp_get_wtime() - batch_start << " s" << std::endl;
+        return failed == 0 ? 0 : 1;
+    }
+}
 
-    if (algorithm == "greedy")
+/**
+ * @brief Główna funkcja programu.
+ *
+ * @param argc Liczba argumentów wywołania.
+ * @param argv Tablica argumentów wywołania.
+ * @return int Kod wyjścia (0 - sukces, 1 - błąd).
+ */
+int main(int argc, char *argv[])
+{
+    Cli cli;
+    try
     {
-        best = RunParallelGreedySolver(data, iterations, k_best);
+        cli.parser.ParseCLI(argc, argv);
     }
-    else if (algorithm == "sa")
+    catch (const args::Help &)
     {
-        SAParams params;
-        params.initial_temp = initial_temp;
-        params.cooling_rate = cooling_rate;
-        params.min_temp = min_temp;
-        params.iterations_per_temp = iterations;
-        params.k_best_greedy = k_best;
-        
-        best = RunParallelSASolver(data, params);
+        std::cerr << cli.parser;
+        return 0;
     }
-    else
+    catch (const args::ParseError &e)
     {
-        std::cerr << "Nieznany algorytm: " << algorithm << std::endl;
+        std::cerr << e.what() << std::endl;
+        std::cerr << cli.parser;
         return 1;
     }
-
-    double end_time = omp_get_wtime();
-
-    std::cerr << "----------------------------------------" << std::endl;
-    std::cerr << "Czas obliczen: " << (end_time - start_time) << " s" << std::endl;
-    std::cerr << "Najlepszy znaleziony koszt Z: " << best.total_cost << std::endl;
-    std::cerr << "Trasa: ";
-    for (size_t i = 0; i < best.route.size(); ++i)
+    catch (const args::ValidationError &e)
     {
-        std::cerr << best.route[i];
-        if (i < best.route.size() - 1)
-            std::cerr << " -> ";
+        std::cerr << e.what() << std::endl;
+        std::cerr << cli.parser;
+        return 1;
     }
-    std::cerr << std::endl;
 
-    std::string output_filename;
-    if (arg_output)
+    if (cli.arg_serve)
     {
-        output_filename = args::get(arg_output);
+        /// Opcje wywołania są wartościami domyślnymi każdego żądania
+        return RunService(cli, DefaultArgs(argc, argv));
     }
-    else
+    if (cli.arg_batch)
     {
-        output_filename = filename;
-        size_t lastindex = output_filename.find_last_of(".");
-        if (lastindex != std::string::npos)
-        {
-            output_filename = output_filename.substr(0, lastindex);
-        }
-        output_filename += "_result.json";
+        /// Opcje wywołania są wartościami domyślnymi każdego wiersza manifestu
+        return RunBatch(cli, DefaultArgs(argc, argv));
     }
-
-    SaveResults(output_filename, best, end_time - start_time);
-    std::cerr << "Wyniki zapisano do: " << output_filename << std::endl;
-
-    return 0;
-}
\ No newline at end of file
+    return RunSingle(cli);
+}
@@ -0,0 +1,202 @@
+#include <iostream>
+#include <iomanip>
+#include <vector>
+#include <random>
+#include <string>
+#include <numeric>
+#include <algorithm>
+#include <cmath>
+#include <omp.h>
+#include "tsp_types.hpp"
+#include "tsp_utils.hpp"
+#include "tsp_greedy_solver.hpp"
+
+/**
+ * @file tsp_bench.cpp
+ * @brief Mikrobenchmark odczytu krawędzi: macierze wejściowe + CalcFuelCost vs tablica krawędzi.
+ *
+ * Budowa: `cmake --build . --target tsp_bench`.
+ * Użycie: `tsp_bench [n ...]` (domyślnie 200 1000 4000). Jeden wątek, losowa instancja.
+ */
+
+/// Losowa instancja euklidesowa (jak tsp_gen.py: czas = odległość / prędkość, szerokie okna).
+static ProblemData RandomProblem(int n, std::mt19937 &rng)
+{
+    std::uniform_real_distribution<double> coord(0.0, 1000.0);
+    std::vector<double> x(n), y(n);
+    for (int i = 0; i < n; ++i)
+    {
+        x[i] = coord(rng);
+        y[i] = coord(rng);
+    }
+
+    std::vector<double> c(static_cast<std::size_t>(n) * n), t(c.size());
+    for (int i = 0; i < n; ++i)
+    {
+        for (int j = 0; j < n; ++j)
+        {
+            double d = std::hypot(x[i] - x[j], y[i] - y[j]);
+            c[static_cast<std::size_t>(i) * n + j] = d;
+            t[static_cast<std::size_t>(i) * n + j] = d / 50.0;
+        }
+    }
+
+    ProblemData data;
+    data.n = n;
+    data.a = 0.1;
+    data.b = 0.001;
+    data.M = 1e6;
+    data.c_matrix.Assign(n, std::move(c));
+    data.t_matrix.Assign(n, std::move(t));
+    std::uniform_real_distribution<double> start(0.0, 20.0 * n);
+    data.windows.assign(n, {0.0, 0.0});
+    for (int i = 1; i < n; ++i)
+    {
+        double e = start(rng);
+        data.windows[i] = {e, e + 200.0};
+    }
+    return data;
+}
+
+/**
+ * @brief Najlepszy z `repeats` czas wywołania `fn` w nanosekundach na krawędź.
+ */
+template <typename Fn>
+static double NsPerEdge(Fn fn, double edges, int repeats, double &checksum)
+{
+    double best = 1e300;
+    for (int r = 0; r < repeats; ++r)
+    {
+        double start = omp_get_wtime();
+        checksum += fn();
+        best = std::min(best, omp_get_wtime() - start);
+    }
+    return best * 1e9 / edges;
+}
+
+int main(int argc, char *argv[])
+{
+    std::vector<int> sizes;
+    for (int i = 1; i < argc; ++i)
+    {
+        sizes.push_back(std::stoi(argv[i]));
+    }
+    if (sizes.empty())
+    {
+        sizes = {200, 1000, 4000};
+    }
+    omp_set_num_threads(1);
+
+    const int repeats = 5;
+    double checksum = 0.0; ///< Zapobiega usunięciu obliczeń przez kompilator.
+
+    std::cout << std::setw(7) << "n" << std::setw(14) << "wzorzec" << std::setw(12) << "wejscie"
+              << std::setw(12) << "double" << std::setw(12) << "float32" << std::setw(14) << "blad f32"
+              << "   [ns / krawedz]" << std::endl;
+
+    for (int n : sizes)
+    {
+        std::mt19937 rng(12345);
+        ProblemData exact = RandomProblem(n, rng);
+        ProblemData fused = exact;
+        fused.edges.Build(exact.c_matrix, exact.t_matrix, exact.a, exact.b, false);
+        ProblemData single = exact;
+        single.edges.Build(exact.c_matrix, exact.t_matrix, exact.a, exact.b, true);
+
+        /// Losowe trasy - odczyt krawędzi z losowych wierszy (ocena rozwiązania, SA)
+        int routes = std::max(1, 4000000 / n);
+        std::vector<std::vector<int>> tours(routes, std::vector<int>(n + 1, 0));
+        for (auto &tour : tours)
+        {
+            std::iota(tour.begin() + 1, tour.end() - 1, 1);
+            std::shuffle(tour.begin() + 1, tour.end() - 1, rng);
+        }
+        auto eval = [&tours](double (*fn)(const ProblemData &, const std::vector<int> &), const ProblemData &data)
+        {
+            return [&tours, fn, &data]()
+            {
+                double sum = 0.0;
+                for (const auto &tour : tours)
+                    sum += fn(data, tour);
+                return sum;
+            };
+        };
+        double route_edges = static_cast<double>(routes) * n;
+        double ns_exact = NsPerEdge(eval(EvaluateSolutionExact, exact), route_edges, repeats, checksum);
+        double ns_fused = NsPerEdge(eval(EvaluateSolution, fused), route_edges, repeats, checksum);
+        double ns_single = NsPerEdge(eval(EvaluateSolution, single), route_edges, repeats, checksum);
+
+        double max_error = 0.0;
+        for (int r = 0; r < std::min(routes, 100); ++r)
+        {
+            double expected = EvaluateSolutionExact(exact, tours[r]);
+            if (EvaluateSolution(fused, tours[r]) != expected)
+            {
+                std::cerr << "Blad: koszt z tablicy double rozni sie od dokladnego" << std::endl;
+                return 1;
+            }
+            max_error = std::max(max_error, std::abs(EvaluateSolution(single, tours[r]) - expected) / expected);
+        }
+        std::cout << std::setw(7) << n << std::setw(14) << "trasa" << std::fixed << std::setprecision(2)
+                  << std::setw(12) << ns_exact << std::setw(12) << ns_fused << std::setw(12) << ns_single
+                  << std::scientific << std::setprecision(1) << std::setw(14) << max_error << std::endl;
+
+        /// Konstrukcja zachłanna - przegląd wierszy (wzorzec GenGreedySolution)
+        int constructions = std::max(1, 20000000 / (n * n));
+        double greedy_edges = static_cast<double>(constructions) * n * (n - 1) / 2.0;
+        auto greedy = [constructions](const ProblemData &data)
+        {
+            return [constructions, &data]()
+            {
+                std::mt19937 local_rng(7);
+                double sum = 0.0;
+                for (int i = 0; i < constructions; ++i)
+                    sum += GenGreedySolution(data, 4, local_rng).total_cost;
+                return sum;
+            };
+        };
+        /// Odczyt wejściowy w tym samym wzorcu: wiersz c + CalcFuelCost, wiersz t
+        auto scan_exact = [constructions, &exact]()
+        {
+            double sum = 0.0;
+            for (int i = 0; i < constructions; ++i)
+            {
+                for (int u = 0; u < exact.n; ++u)
+                {
+                    for (int v = u + 1; v < exact.n; ++v)
+                    {
+                        double dist = exact.c_matrix[u][v];
+                        sum += dist + CalcFuelCost(dist, exact.a, exact.b) + exact.t_matrix[u][v];
+                    }
+                }
+            }
+            return sum;
+        };
+        auto scan = [constructions](const ProblemData &data)
+        {
+            return [constructions, &data]()
+            {
+                double sum = 0.0;
+                for (int i = 0; i < constructions; ++i)
+                {
+                    for (int u = 0; u < data.n; ++u)
+                    {
+                        for (int v = u + 1; v < data.n; ++v)
+                            sum += data.EdgeCost(u, v) + data.TravelTime(u, v);
+                    }
+                }
+                return sum;
+            };
+        };
+        std::cout << std::setw(7) << n << std::setw(14) << "wiersze" << std::fixed << std::setprecision(2)
+                  << std::setw(12) << NsPerEdge(scan_exact, greedy_edges, repeats, checksum)
+                  << std::setw(12) << NsPerEdge(scan(fused), greedy_edges, repeats, checksum)
+                  << std::setw(12) << NsPerEdge(scan(single), greedy_edges, repeats, checksum) << std::endl;
+        std::cout << std::setw(7) << n << std::setw(14) << "zachlanny" << std::setw(12) << "-"
+                  << std::setw(12) << NsPerEdge(greedy(fused), greedy_edges, repeats, checksum)
+                  << std::setw(12) << NsPerEdge(greedy(single), greedy_edges, repeats, checksum) << std::endl;
+    }
+
+    std::cerr << "(suma kontrolna " << checksum << ")" << std::endl;
+    return 0;
+}
@@ -0,0 +1,403 @@
+#include "tsp_bound.hpp"
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <vector>
+#include <omp.h>
+
+/**
+ * @file tsp_bound.cpp
+ * @brief Implementacja ograniczeń dolnych (przydział, Held-Karp).
+ */
+
+namespace
+{
+    /// Budżet pracy Held-Karpa w trybie domyślnym: n^2 * iteracje (ok. 0.3 s).
+    constexpr double kHeldKarpWork = 1e8;
+    constexpr int kHeldKarpMinIterations = 10;
+    constexpr int kHeldKarpMaxIterations = 1000;
+
+    /// Iteracje bez poprawy ograniczenia, po których mnożnik kroku jest połowiony.
+    constexpr int kHeldKarpPatience = 10;
+    /// Najmniejszy mnożnik kroku - poniżej ograniczenie praktycznie już nie rośnie.
+    constexpr double kHeldKarpMinStep = 1e-4;
+
+    /// Tryb auto: przydział (O(n^3)) liczony także do tej liczby miast.
+    constexpr int kAutoAssignmentMaxN = 600;
+
+    /// Największa instancja z tablicą kosztów symetrycznych (float, n^2 * 4 B - 100 MB).
+    constexpr int kMaxTableN = 5000;
+
+    /// Względny błąd kosztu z tablicy float32 (z zapasem) - o tyle pomniejszane jest ograniczenie.
+    constexpr double kSinglePrecisionSlack = 1e-6;
+
+    /**
+     * @brief Koszty odcinków symetryzowane jako min(c_uv, c_vu).
+     *
+     * Do kMaxTableN miast liczone raz do tablicy float (n x n, wiersze równolegle) - iteracje
+     * Held-Karpa czytają wtedy tylko pamięć, a odległości ze współrzędnych nie są liczone
+     * ponownie. Większe instancje: odczyt wprost z EdgeCost (dla współrzędnych koszty są
+     * symetryczne). Błąd zaokrąglenia tablicy pokrywa Slack().
+     */
+    class SymmetricCosts
+    {
+    public:
+        explicit SymmetricCosts(const ProblemData &data) : data_(data), n_(data.n)
+        {
+            bool coords = data.edges.Coords() != nullptr;
+            if (n_ > kMaxTableN)
+            {
+                symmetric_ = coords;
+                return;
+            }
+            values_.resize(static_cast<std::size_t>(n_) * n_);
+#pragma omp parallel for schedule(static)
+            for (int u = 0; u < n_; ++u)
+            {
+                for (int v = 0; v < n_; ++v)
+                {
+                    double cost = coords ? data.EdgeCost(u, v) : std::min(data.EdgeCost(u, v), data.EdgeCost(v, u));
+                    values_[Index(u, v)] = static_cast<float>(cost);
+                }
+            }
+        }
+
+        double operator()(int u, int v) const
+        {
+            if (!values_.empty())
+                return values_[Index(u, v)];
+            return symmetric_ ? data_.EdgeCost(u, v) : std::min(data_.EdgeCost(u, v), data_.EdgeCost(v, u));
+        }
+
+        /// Względny zapas na zaokrąglenie wartości tablicy.
+        double Slack() const { return values_.empty() ? 0.0 : kSinglePrecisionSlack; }
+
+    private:
+        std::size_t Index(int u, int v) const { return static_cast<std::size_t>(u) * n_ + v; }
+
+        const ProblemData &data_;
+        int n_;
+        bool symmetric_ = false;
+        std::vector<float> values_;
+    };
+}
+
+bool ParseBoundMethod(const std::string &name, BoundMethod &method)
+{
+    if (name == "none")
+        method = BoundMethod::None;
+    else if (name == "assignment")
+        method = BoundMethod::Assignment;
+    else if (name == "held-karp")
+        method = BoundMethod::HeldKarp;
+    else if (name == "auto")
+        method = BoundMethod::Auto;
+    else
+        return false;
+    return true;
+}
+
+const char *BoundMethodName(BoundMethod method)
+{
+    switch (method)
+    {
+    case BoundMethod::Assignment:
+        return "assignment";
+    case BoundMethod::HeldKarp:
+        return "held-karp";
+    case BoundMethod::Auto:
+        return "auto";
+    default:
+        return "none";
+    }
+}
+
+/**
+ * @brief Algorytm węgierski z potencjałami (wiersz po wierszu, O(n^3)).
+ *
+ * Pętle u -> u mają koszt nieskończony; dla n >= 2 przydział bez pętli zawsze istnieje.
+ */
+double AssignmentBound(const ProblemData &data)
+{
+    int n = data.n;
+    if (n < 2)
+        return 0.0;
+
+    const double inf = std::numeric_limits<double>::infinity();
+    /// Indeksy od 1; kolumna 0 to sztuczny punkt startowy ścieżki powiększającej
+    std::vector<double> row_potential(n + 1, 0.0), col_potential(n + 1, 0.0), min_slack(n + 1);
+    std::vector<int> assigned(n + 1, 0), way(n + 1, 0);
+    std::vector<char> used(n + 1);
+
+    for (int row = 1; row <= n; ++row)
+    {
+        assigned[0] = row;
+        int col0 = 0;
+        std::fill(min_slack.begin(), min_slack.end(), inf);
+        std::fill(used.begin(), used.end(), 0);
+        do
+        {
+            used[col0] = 1;
+            int row0 = assigned[col0];
+            int col1 = 0;
+            double delta = inf;
+            for (int col = 1; col <= n; ++col)
+            {
+                if (used[col])
+                    continue;
+                double cost = row0 == col ? inf : data.EdgeCost(row0 - 1, col - 1);
+                double slack = cost - row_potential[row0] - col_potential[col];
+                if (slack < min_slack[col])
+                {
+                    min_slack[col] = slack;
+                    way[col] = col0;
+                }
+                if (min_slack[col] < delta)
+                {
+                    delta = min_slack[col];
+                    col1 = col;
+                }
+            }
+            for (int col = 0; col <= n; ++col)
+            {
+                if (used[col])
+                {
+                    row_potential[assigned[col]] += delta;
+                    col_potential[col] -= delta;
+                }
+                else
+                {
+                    min_slack[col] -= delta;
+                }
+            }
+            col0 = col1;
+        } while (assigned[col0] != 0);
+
+        /// Odwrócenie ścieżki powiększającej
+        do
+        {
+            int col1 = way[col0];
+            assigned[col0] = assigned[col1];
+            col0 = col1;
+        } while (col0 != 0);
+    }
+
+    double total = 0.0;
+    for (int col = 1; col <= n; ++col)
+    {
+        total += data.EdgeCost(assigned[col] - 1, col - 1);
+    }
+    return total;
+}
+
+double HeldKarpBound(const ProblemData &data, int max_iterations, int *iterations)
+{
+    int n = data.n;
+    if (iterations != nullptr)
+    {
+        *iterations = 0;
+    }
+    if (n < 3)
+    {
+        /// Jedyna trasa 0 -> 1 -> 0 (albo trasa pusta)
+        return n == 2 ? data.EdgeCost(0, 1) + data.EdgeCost(1, 0) : 0.0;
+    }
+
+    const double inf = std::numeric_limits<double>::infinity();
+    SymmetricCosts cost(data);
+
+    /// Koszt trasy najbliższego sąsiada - ograniczenie górne do długości kroku
+    double upper = 0.0;
+    {
+        std::vector<char> visited(n, 0);
+        visited[0] = 1;
+        int city = 0;
+        for (int step = 1; step < n; ++step)
+        {
+            int next = -1;
+            double next_cost = inf;
+            for (int v = 1; v < n; ++v)
+            {
+                if (!visited[v] && cost(city, v) < next_cost)
+                {
+                    next_cost = cost(city, v);
+                    next = v;
+                }
+            }
+            visited[next] = 1;
+            upper += next_cost;
+            city = next;
+        }
+        upper += cost(city, 0);
+    }
+
+    std::vector<double> pi(n, 0.0), key(n);
+    std::vector<int> parent(n), degree(n);
+    std::vector<char> in_tree(n);
+    double best = -inf;
+    double step_scale = 2.0;
+    int stall = 0;
+    int done = 0;
+
+    while (done < max_iterations)
+    {
+        ++done;
+
+        /// 1-drzewo: minimalne drzewo rozpinające miast 1..n-1 (Prim, O(n^2)) i dwa najtańsze odcinki miasta 0
+        std::fill(degree.begin(), degree.end(), 0);
+        std::fill(in_tree.begin(), in_tree.end(), 0);
+        in_tree[1] = 1;
+        int next = -1;
+        double next_key = inf;
+        for (int v = 2; v < n; ++v)
+        {
+            key[v] = cost(1, v) + pi[1] + pi[v];
+            parent[v] = 1;
+            if (key[v] < next_key)
+            {
+                next_key = key[v];
+                next = v;
+            }
+        }
+        double tree = 0.0;
+        for (int added = 2; added < n; ++added)
+        {
+            in_tree[next] = 1;
+            tree += next_key;
+            degree[next] += 1;
+            degree[parent[next]] += 1;
+
+            /// Aktualizacja kluczy i wybór następnego miasta w jednym przebiegu
+            int added_city = next;
+            next = -1;
+            next_key = inf;
+            for (int v = 2; v < n; ++v)
+            {
+                if (in_tree[v])
+                    continue;
+                double w = cost(added_city, v) + pi[added_city] + pi[v];
+                if (w < key[v])
+                {
+                    key[v] = w;
+                    parent[v] = added_city;
+                }
+                if (key[v] < next_key)
+                {
+                    next_key = key[v];
+                    next = v;
+                }
+            }
+        }
+
+        int first = -1, second = -1;
+        double first_cost = inf, second_cost = inf;
+        for (int v = 1; v < n; ++v)
+        {
+            double w = cost(0, v) + pi[0] + pi[v];
+            if (w < first_cost)
+            {
+                second = first;
+                second_cost = first_cost;
+                first = v;
+                first_cost = w;
+            }
+            else if (w < second_cost)
+            {
+                second = v;
+                second_cost = w;
+            }
+        }
+        tree += first_cost + second_cost;
+        degree[0] = 2;
+        degree[first] += 1;
+        degree[second] += 1;
+
+        double pi_sum = 0.0;
+        for (int v = 0; v < n; ++v)
+        {
+            pi_sum += pi[v];
+        }
+        double value = tree - 2.0 * pi_sum;
+
+        if (value > best)
+        {
+            best = value;
+            stall = 0;
+        }
+        else if (++stall >= kHeldKarpPatience)
+        {
+            step_scale *= 0.5;
+            stall = 0;
+        }
+
+        /// Subgradient: deg(v) - 2 (zero - 1-drzewo jest trasą, ograniczenie jest optymalne)
+        double norm = 0.0;
+        for (int v = 0; v < n; ++v)
+        {
+            norm += static_cast<double>(degree[v] - 2) * (degree[v] - 2);
+        }
+        if (norm == 0.0 || step_scale < kHeldKarpMinStep || value >= upper)
+            break;
+
+        double step = step_scale * (upper - value) / norm;
+        for (int v = 0; v < n; ++v)
+        {
+            pi[v] += step * (degree[v] - 2);
+        }
+    }
+
+    if (iterations != nullptr)
+    {
+        *iterations = done;
+    }
+    return best - std::abs(best) * cost.Slack();
+}
+
+int HeldKarpIterations(int n)
+{
+    double per_iteration = std::max(1.0, static_cast<double>(n) * n);
+    return static_cast<int>(std::clamp(kHeldKarpWork / per_iteration, static_cast<double>(kHeldKarpMinIterations),
+                                       static_cast<double>(kHeldKarpMaxIterations)));
+}
+
+LowerBound ComputeLowerBound(const ProblemData &data, BoundMethod method)
+{
+    LowerBound bound;
+    double start = omp_get_wtime();
+
+    if (method == BoundMethod::HeldKarp || method == BoundMethod::Auto)
+    {
+        bound.value = HeldKarpBound(data, HeldKarpIterations(data.n), &bound.iterations);
+        bound.method = BoundMethod::HeldKarp;
+    }
+    if (method == BoundMethod::Assignment || (method == BoundMethod::Auto && data.n <= kAutoAssignmentMaxN))
+    {
+        double value = AssignmentBound(data);
+        if (bound.method == BoundMethod::None || value > bound.value)
+        {
+            bound.value = value;
+            bound.method = BoundMethod::Assignment;
+        }
+    }
+
+    if (bound.method != BoundMethod::None && data.edges.SinglePrecision())
+    {
+        bound.value -= std::abs(bound.value) * kSinglePrecisionSlack;
+    }
+    bound.time = omp_get_wtime() - start;
+    return bound;
+}
+
+double RelativeGap(double cost, double bound)
+{
+    if (!(cost > 0.0))
+        return 0.0;
+    return std::max(0.0, (cost - bound) / cost);
+}
+
+double TargetCost(double bound, double target_gap)
+{
+    if (target_gap >= 1.0)
+        return std::numeric_limits<double>::max();
+    return bound / (1.0 - target_gap);
+}
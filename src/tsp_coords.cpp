@@ -0,0 +1,201 @@
+#include "tsp_coords.hpp"
+#include "tsp_utils.hpp"
+#include <algorithm>
+#include <cmath>
+#include <omp.h>
+
+/**
+ * @file tsp_coords.cpp
+ * @brief Odległości ze współrzędnych (reguły TSPLIB jak w tsp_distance.py) i pamięć podręczna wierszy.
+ */
+
+/// Promień Ziemi (TSPLIB).
+static const double kEarthRadius = 6378.388;
+
+/// Zaokrąglanie TSPLIB do najbliższej liczby całkowitej: floor(x + 0.5).
+static double Nint(double x)
+{
+    return std::floor(x + 0.5);
+}
+
+bool ParseDistanceType(const std::string &name, DistanceType &type)
+{
+    static const std::pair<const char *, DistanceType> kTypes[] = {
+        {"EUC_2D", DistanceType::Euc2D},
+        {"CEIL_2D", DistanceType::Ceil2D},
+        {"MAN_2D", DistanceType::Man2D},
+        {"MAX_2D", DistanceType::Max2D},
+        {"ATT", DistanceType::Att},
+        {"GEO", DistanceType::Geo},
+        {"EUC_2D_R2", DistanceType::Euc2DR2},
+    };
+    for (const auto &entry : kTypes)
+    {
+        if (name == entry.first)
+        {
+            type = entry.second;
+            return true;
+        }
+    }
+    return false;
+}
+
+CoordEdges::CoordEdges(DistanceType type, const std::vector<std::pair<double, double>> &coords, double speed,
+                       double a, double b, int cache_rows)
+    : type_(type), speed_(speed), a_(a), b_(b), n_(static_cast<int>(coords.size())),
+      cache_rows_(std::max(0, std::min(cache_rows, static_cast<int>(coords.size()))))
+{
+    x_.reserve(coords.size());
+    y_.reserve(coords.size());
+    for (const auto &c : coords)
+    {
+        double x = c.first;
+        double y = c.second;
+        if (type_ == DistanceType::Geo)
+        {
+            /// Stopnie.minuty -> radiany (raz dla wszystkich miast)
+            double deg_x = std::trunc(x);
+            double deg_y = std::trunc(y);
+            x = M_PI * (deg_x + 5.0 * (x - deg_x) / 3.0) / 180.0;
+            y = M_PI * (deg_y + 5.0 * (y - deg_y) / 3.0) / 180.0;
+        }
+        x_.push_back(x);
+        y_.push_back(y);
+    }
+    if (cache_rows_ > 0)
+    {
+        caches_.resize(omp_get_max_threads());
+    }
+}
+
+double CoordEdges::Distance(int u, int v) const
+{
+    if (u == v)
+        return 0.0;
+
+    if (type_ == DistanceType::Geo)
+    {
+        /// x - szerokość, y - długość geograficzna
+        double q1 = std::cos(y_[u] - y_[v]);
+        double q2 = std::cos(x_[u] - x_[v]);
+        double q3 = std::cos(x_[u] + x_[v]);
+        double arg = std::clamp(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0);
+        return std::trunc(kEarthRadius * std::acos(arg) + 1.0);
+    }
+
+    double dx = x_[u] - x_[v];
+    double dy = y_[u] - y_[v];
+    switch (type_)
+    {
+    case DistanceType::Euc2D:
+        return Nint(std::hypot(dx, dy));
+    case DistanceType::Ceil2D:
+        return std::ceil(std::hypot(dx, dy));
+    case DistanceType::Man2D:
+        return Nint(std::abs(dx) + std::abs(dy));
+    case DistanceType::Max2D:
+        return std::max(Nint(std::abs(dx)), Nint(std::abs(dy)));
+    case DistanceType::Att:
+    {
+        double r = std::sqrt((dx * dx + dy * dy) / 10.0);
+        double t = Nint(r);
+        return t < r ? t + 1.0 : t;
+    }
+    case DistanceType::Euc2DR2:
+    default:
+        /// Jak np.round(x, 2): zaokrąglenie połówek do parzystej
+        return std::nearbyint(std::hypot(dx, dy) * 100.0) / 100.0;
+    }
+}
+
+double CoordEdges::LowerBound(double r) const
+{
+    if (r <= 0.0)
+        return 0.0;
+    /// Margines na błąd zaokrągleń przy liczeniu r z granic komórek
+    r = r * (1.0 - 1e-12) - 1e-9;
+    switch (type_)
+    {
+    case DistanceType::Euc2D:
+    case DistanceType::Man2D: ///< |dx| + |dy| >= odległość euklidesowa
+        return std::max(0.0, Nint(r));
+    case DistanceType::Ceil2D:
+        return std::max(0.0, std::ceil(r));
+    case DistanceType::Max2D: ///< max(|dx|, |dy|) >= odległość euklidesowa / sqrt(2)
+        return std::max(0.0, Nint(r / std::sqrt(2.0)));
+    case DistanceType::Att: ///< Distance() dla ATT to ceil(sqrt(d^2 / 10))
+        return std::ceil(std::sqrt(r * r / 10.0));
+    case DistanceType::Euc2DR2:
+        return std::max(0.0, std::nearbyint(r * 100.0) / 100.0);
+    case DistanceType::Geo:
+    default:
+        return 0.0;
+    }
+}
+
+const CoordEdges::RowCache *CoordEdges::Cached(int u, std::size_t &offset) const
+{
+    std::size_t tid = static_cast<std::size_t>(omp_get_thread_num());
+    if (tid >= caches_.size())
+        return nullptr;
+    const RowCache &cache = caches_[tid];
+    int slot = u % cache_rows_;
+    if (cache.rows.empty() || cache.rows[slot] != u)
+        return nullptr;
+    offset = static_cast<std::size_t>(slot) * n_;
+    return &cache;
+}
+
+double CoordEdges::Cost(int u, int v) const
+{
+    std::size_t offset;
+    if (cache_rows_ > 0)
+    {
+        if (const RowCache *cache = Cached(u, offset))
+            return cache->cost[offset + v];
+    }
+    double dist = Distance(u, v);
+    return dist + CalcFuelCost(dist, a_, b_);
+}
+
+double CoordEdges::Time(int u, int v) const
+{
+    std::size_t offset;
+    if (cache_rows_ > 0)
+    {
+        if (const RowCache *cache = Cached(u, offset))
+            return cache->time[offset + v];
+    }
+    return Distance(u, v) / speed_;
+}
+
+void CoordEdges::CacheRow(int u) const
+{
+    if (cache_rows_ == 0)
+        return;
+    std::size_t tid = static_cast<std::size_t>(omp_get_thread_num());
+    if (tid >= caches_.size())
+        return;
+
+    RowCache &cache = caches_[tid];
+    if (cache.rows.empty())
+    {
+        /// Pamięć wątku przydzielana przy pierwszym użyciu
+        cache.rows.assign(cache_rows_, -1);
+        cache.cost.resize(static_cast<std::size_t>(cache_rows_) * n_);
+        cache.time.resize(static_cast<std::size_t>(cache_rows_) * n_);
+    }
+    int slot = u % cache_rows_;
+    if (cache.rows[slot] == u)
+        return;
+
+    double *cost = cache.cost.data() + static_cast<std::size_t>(slot) * n_;
+    double *time = cache.time.data() + static_cast<std::size_t>(slot) * n_;
+    for (int v = 0; v < n_; ++v)
+    {
+        double dist = Distance(u, v);
+        cost[v] = dist + CalcFuelCost(dist, a_, b_);
+        time[v] = dist / speed_;
+    }
+    cache.rows[slot] = u;
+}
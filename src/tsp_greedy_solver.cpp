@@ -1,9 +1,13 @@
 #include "tsp_greedy_solver.hpp"
 #include "tsp_utils.hpp"
+#include "tsp_stats.hpp"
 #include <vector>
 #include <algorithm>
 #include <random>
 #include <limits>
+#include <numeric>
+#include <cmath>
+#include <optional>
 #include <omp.h>
 
 /**
@@ -11,19 +15,765 @@
  * @brief Implementacja algorytmu zachłannego z losowaniem z RCL z wykorzystaniem biblioteki OpenMP.
  */
 
+namespace
+{
+
+/**
+ * @brief Ocena kandydata next_node przy wyjeździe z current_node w chwili current_time.
+ *
+ * Koszt krawędzi powiększony o karę za spóźnienie (waga 2) i czas oczekiwania (waga 0.5) -
+ * nigdy mniejsza od kosztu krawędzi.
+ */
+inline double ScoreCandidate(const ProblemData &data, int current_node, double current_time, int next_node,
+                             double edge_cost)
+{
+    double drive_time = data.TravelTime(current_node, next_node);
+
+    /// Czas przyjazdu, ewentualne oczekiwanie i kara.
+    double arrival = current_time + drive_time;
+    double wait_time = 0.0;
+    double penalty = 0.0;
+
+    /// Okna czasowe.
+    double e_i = data.windows[next_node].first;
+    double l_i = data.windows[next_node].second;
+
+    if (arrival < e_i)
+    {
+        wait_time = e_i - arrival;
+        arrival = e_i; ///< Jeśli przyjechano za wcześnie.
+    }
+    if (arrival > l_i)
+    {
+        penalty = arrival - l_i; ///< Kara za spóźnienie.
+    }
+
+    /// Heurystyka: kara jest gorsza od czasu oczekiwania.
+    return edge_cost + (penalty * 2.0) + (wait_time * 0.5);
+}
+
+/// Porządek RCL: rosnąco według oceny, przy równych ocenach według numeru miasta.
+inline bool CandidateBefore(const Candidate &a, const Candidate &b)
+{
+    return a.cost < b.cost || (a.cost == b.cost && a.city_index < b.city_index);
+}
+
+/**
+ * @brief k najlepszych kandydatów jednego kroku, rosnąco według oceny.
+ */
+class Rcl
+{
+public:
+    void Reset(int k)
+    {
+        k_ = k;
+        best_.clear();
+    }
+
+    bool Full() const { return static_cast<int>(best_.size()) >= k_; }
+    double Worst() const { return best_.back().cost; } ///< Ocena k-tego kandydata (tylko gdy Full()).
+    const Candidate &operator[](int i) const { return best_[i]; }
+
+    void Offer(int city, double score)
+    {
+        Candidate candidate{city, score};
+        if (Full() && !CandidateBefore(candidate, best_.back()))
+            return;
+        best_.insert(std::upper_bound(best_.begin(), best_.end(), candidate, CandidateBefore), candidate);
+        if (static_cast<int>(best_.size()) > k_)
+            best_.pop_back();
+    }
+
+private:
+    int k_ = 0;
+    std::vector<Candidate> best_;
+};
+
+/**
+ * @brief Kandydaci jednego kroku w kolejności rosnącego kosztu krawędzi: lista miasta albo pierścienie
+ *        komórek siatki wokół niego.
+ *
+ * Bound() ogranicza z dołu koszt krawędzi do każdego miasta, które nie zostało jeszcze zwrócone.
+ * Gdy dalsze pierścienie są liczniejsze od nieodwiedzonych miast (albo lista się skończy), strumień
+ * zatrzymuje się z ostatnim ograniczeniem - resztę miast dostarcza strumień okien czasowych.
+ */
+class SpatialStream
+{
+public:
+    SpatialStream(const ProblemData &data, const GreedyCandidates &index, const std::vector<int> &cell_items,
+                  const std::vector<int> &cell_count, const std::vector<char> &visited)
+        : data_(data), index_(index), grid_(index.Grid()), cell_items_(cell_items), cell_count_(cell_count),
+          visited_(visited)
+    {
+    }
+
+    /// Rozpoczyna przegląd z miasta `city`; `remaining` - liczba nieodwiedzonych miast.
+    void Start(int city, int remaining)
+    {
+        city_ = city;
+        remaining_ = remaining;
+        pos_ = 0;
+        ring_ = 0;
+        buffer_.clear();
+        stopped_ = false;
+        if (grid_ != nullptr)
+        {
+            LoadRing();
+        }
+        else
+        {
+            SkipVisited();
+        }
+    }
+
+    bool Done() const { return stopped_; }
+
+    double Bound() const { return bound_; }
+
+    /// Kolejne miasto (tylko gdy !Done()).
+    int Pull()
+    {
+        if (grid_ != nullptr)
+        {
+            int city = buffer_[pos_++];
+            if (pos_ == static_cast<int>(buffer_.size()))
+                LoadRing();
+            return city;
+        }
+        int city = index_.Of(city_)[pos_++];
+        SkipVisited();
+        return city;
+    }
+
+private:
+    /// Lista: przesuwa pozycję na kolejne nieodwiedzone miasto i ustawia ograniczenie.
+    void SkipVisited()
+    {
+        const int *list = index_.Of(city_);
+        int k = index_.K();
+        while (pos_ < k && visited_[list[pos_]])
+            ++pos_;
+        if (pos_ < k)
+        {
+            bound_ = data_.EdgeCost(city_, list[pos_]);
+            return;
+        }
+        stopped_ = true;
+        /// Miasta spoza listy: krawędź nie tańsza niż do ostatniego miasta listy
+        bound_ = k == data_.n - 1 ? std::numeric_limits<double>::infinity()
+                 : k > 0          ? data_.EdgeCost(city_, list[k - 1])
+                                  : 0.0;
+    }
+
+    /// Siatka: wczytuje miasta kolejnego niepustego pierścienia (i ograniczenie dla niego).
+    void LoadRing()
+    {
+        const CandidateGrid &grid = *grid_;
+        const CoordEdges &coords = *data_.edges.Coords();
+        double px = coords.X(city_);
+        double py = coords.Y(city_);
+        int cx = grid.cell_of[city_] % grid.cols;
+        int cy = grid.cell_of[city_] / grid.cols;
+        buffer_.clear();
+        pos_ = 0;
+
+        auto add_cell = [&](int x, int y)
+        {
+            int cell = y * grid.cols + x;
+            const int *cities = cell_items_.data() + grid.start[cell];
+            buffer_.insert(buffer_.end(), cities, cities + cell_count_[cell]);
+        };
+
+        while (buffer_.empty())
+        {
+            int r = ring_++;
+            int x_lo = cx - r;
+            int x_hi = cx + r;
+            int y_lo = cy - r;
+            int y_hi = cy + r;
+            if (x_lo < 0 && y_lo < 0 && x_hi >= grid.cols && y_hi >= grid.rows)
+            {
+                /// Przejrzano całą siatkę
+                stopped_ = true;
+                bound_ = std::numeric_limits<double>::infinity();
+                return;
+            }
+            if (r == 0)
+            {
+                bound_ = 0.0;
+                add_cell(cx, cy);
+                continue;
+            }
+
+            /// Odległość do miast poza kwadratem pierścieni 0..r-1 (tylko strony z komórkami)
+            double gap = std::numeric_limits<double>::infinity();
+            if (x_lo >= 0)
+                gap = std::min(gap, px - (grid.x0 + (x_lo + 1) * grid.cell));
+            if (x_hi < grid.cols)
+                gap = std::min(gap, grid.x0 + x_hi * grid.cell - px);
+            if (y_lo >= 0)
+                gap = std::min(gap, py - (grid.y0 + (y_lo + 1) * grid.cell));
+            if (y_hi < grid.rows)
+                gap = std::min(gap, grid.y0 + y_hi * grid.cell - py);
+            double distance = coords.LowerBound(gap);
+            bound_ = distance + CalcFuelCost(distance, data_.a, data_.b);
+
+            if (8 * r > remaining_)
+            {
+                stopped_ = true;
+                return;
+            }
+            for (int x = std::max(x_lo, 0); x <= std::min(x_hi, grid.cols - 1); ++x)
+            {
+                if (y_lo >= 0)
+                    add_cell(x, y_lo);
+                if (y_hi < grid.rows)
+                    add_cell(x, y_hi);
+            }
+            for (int y = std::max(y_lo + 1, 0); y <= std::min(y_hi - 1, grid.rows - 1); ++y)
+            {
+                if (x_lo >= 0)
+                    add_cell(x_lo, y);
+                if (x_hi < grid.cols)
+                    add_cell(x_hi, y);
+            }
+        }
+    }
+
+    const ProblemData &data_;
+    const GreedyCandidates &index_;
+    const CandidateGrid *grid_;
+    const std::vector<int> &cell_items_;
+    const std::vector<int> &cell_count_;
+    const std::vector<char> &visited_;
+    int city_ = 0;
+    int remaining_ = 0;
+    int pos_ = 0;              ///< Pozycja na liście albo w buforze pierścienia.
+    int ring_ = 0;             ///< Kolejny pierścień do wczytania.
+    std::vector<int> buffer_;  ///< Miasta bieżącego pierścienia.
+    bool stopped_ = false;
+    double bound_ = 0.0;
+};
+
+/**
+ * @brief Stan jednej konstrukcji z indeksem kandydatów.
+ *
+ * Nieodwiedzone miasta przechowywane są na dwóch listach dwukierunkowych: według końca okna
+ * (spóźnione - l < T - przeglądane od najmniej spóźnionego) i według początku okna (pozostałe).
+ * Bieżący czas T nie maleje, więc miasto raz spóźnione pozostaje spóźnione - jest wtedy usuwane
+ * z listy początków. Z siatką utrzymywane są też nieodwiedzone miasta każdej komórki.
+ */
+class IndexedConstruction
+{
+public:
+    IndexedConstruction(const ProblemData &data, const GreedyCandidates &index)
+        : data_(data), index_(index), visited_(data.n, 0), seen_(data.n, -1),
+          spatial_(data, index, cell_items_, cell_count_, visited_)
+    {
+        int n = data.n;
+        remaining_ = n;
+        InitList(index.ByClosing(), close_next_, close_prev_, close_node_);
+        InitList(index.ByOpening(), open_next_, open_prev_, open_node_);
+        overdue_ = 0;
+
+        if (const CandidateGrid *grid = index.Grid())
+        {
+            cell_items_ = grid->items;
+            cell_count_.resize(grid->start.size() - 1);
+            for (std::size_t c = 0; c < cell_count_.size(); ++c)
+                cell_count_[c] = grid->start[c + 1] - grid->start[c];
+            cell_slot_.resize(n);
+            for (int i = 0; i < n; ++i)
+                cell_slot_[cell_items_[i]] = i;
+        }
+    }
+
+    /**
+     * @brief Zgłasza do `offer` miasta, które mogą trafić do RCL przy wyjeździe z `city` w chwili `time`.
+     *
+     * Ocena miasta v jest nie mniejsza niż koszt krawędzi + 2 * max(0, T - l_v)
+     * + 0.5 * max(0, e_v - T - tmax), gdzie tmax ogranicza czas przejazdu z `city`. Miasta pobierane
+     * są na przemian ze strumienia przestrzennego i czasowego; przegląd kończy się, gdy suma ograniczeń
+     * obu strumieni przekracza k-tą najlepszą ocenę (pozostałe miasta nie mogą trafić do RCL).
+     */
+    template <typename Offer>
+    void Scan(int step, int city, double time, const Rcl &rcl, Offer offer)
+    {
+        double max_time = index_.MaxTime(city);
+        const std::vector<std::pair<double, double>> &windows = data_.windows;
+
+        /// Miasta, które stały się spóźnione
+        while (close_next_[overdue_] != Tail() && windows[CloseCity(close_next_[overdue_])].second < time)
+            overdue_ = close_next_[overdue_];
+
+        int late = overdue_;           ///< Kolejne spóźnione (malejąco według l).
+        int early = open_next_[0];     ///< Kolejne niespóźnione (rosnąco według e).
+        auto late_bound = [&]()
+        {
+            return late == 0 ? std::numeric_limits<double>::infinity()
+                             : 2.0 * (time - windows[CloseCity(late)].second);
+        };
+        auto early_bound = [&]()
+        {
+            /// Spóźnione miasta usuwane z listy początków
+            while (early != Tail() && windows[OpenCity(early)].second < time)
+            {
+                int next = open_next_[early];
+                Unlink(open_next_, open_prev_, early);
+                early = next;
+            }
+            return early == Tail() ? std::numeric_limits<double>::infinity()
+                                   : std::max(0.0, 0.5 * (windows[OpenCity(early)].first - (time + max_time)));
+        };
+
+        auto consider = [&](int next_node)
+        {
+            if (seen_[next_node] == step)
+                return;
+            seen_[next_node] = step;
+            offer(next_node, data_.EdgeCost(city, next_node));
+        };
+
+        spatial_.Start(city, remaining_);
+        for (;;)
+        {
+            double late_next = late_bound();
+            double early_next = early_bound();
+            double time_next = std::min(late_next, early_next);
+            if (time_next == std::numeric_limits<double>::infinity())
+                return; ///< Przejrzano wszystkie nieodwiedzone miasta.
+            if (rcl.Full() && spatial_.Bound() + time_next > rcl.Worst())
+                return;
+
+            if (late_next <= early_next)
+            {
+                consider(CloseCity(late));
+                late = close_prev_[late];
+            }
+            else
+            {
+                consider(OpenCity(early));
+                early = open_next_[early];
+            }
+            if (!spatial_.Done())
+            {
+                consider(spatial_.Pull());
+            }
+        }
+    }
+
+    /// Oznacza miasto jako odwiedzone.
+    void Visit(int city)
+    {
+        visited_[city] = 1;
+        --remaining_;
+
+        int node = close_node_[city];
+        if (node == overdue_)
+            overdue_ = close_prev_[node];
+        Unlink(close_next_, close_prev_, node);
+        node = open_node_[city];
+        if (open_prev_[node] >= 0)
+            Unlink(open_next_, open_prev_, node);
+
+        if (const CandidateGrid *grid = index_.Grid())
+        {
+            /// Zamiana z ostatnim nieodwiedzonym miastem komórki
+            int cell = grid->cell_of[city];
+            int end = grid->start[cell] + --cell_count_[cell];
+            int other = cell_items_[end];
+            cell_items_[cell_slot_[city]] = other;
+            cell_slot_[other] = cell_slot_[city];
+            cell_items_[end] = city;
+            cell_slot_[city] = end;
+        }
+    }
+
+private:
+    /// Węzły list: 0 - głowa, 1..n - miasta w kolejności `order`, n + 1 - ogon.
+    int Tail() const { return data_.n + 1; }
+    int CloseCity(int node) const { return index_.ByClosing()[node - 1]; }
+    int OpenCity(int node) const { return index_.ByOpening()[node - 1]; }
+
+    void InitList(const std::vector<int> &order, std::vector<int> &next, std::vector<int> &prev,
+                  std::vector<int> &node_of)
+    {
+        int n = data_.n;
+        next.resize(n + 2);
+        prev.resize(n + 2);
+        node_of.resize(n);
+        for (int i = 0; i <= n + 1; ++i)
+        {
+            next[i] = i + 1;
+            prev[i] = i - 1;
+        }
+        for (int i = 0; i < n; ++i)
+            node_of[order[i]] = i + 1;
+    }
+
+    /// Usuwa węzeł z listy (prev = -1 oznacza węzeł usunięty).
+    static void Unlink(std::vector<int> &next, std::vector<int> &prev, int node)
+    {
+        next[prev[node]] = next[node];
+        prev[next[node]] = prev[node];
+        prev[node] = -1;
+    }
+
+    const ProblemData &data_;
+    const GreedyCandidates &index_;
+    std::vector<char> visited_;
+    std::vector<int> seen_; ///< Krok, w którym miasto zostało już ocenione.
+    int remaining_ = 0;
+
+    std::vector<int> close_next_, close_prev_, close_node_; ///< Lista według końca okna.
+    std::vector<int> open_next_, open_prev_, open_node_;    ///< Lista według początku okna.
+    int overdue_ = 0; ///< Ostatni węzeł listy końców z l < T (0 - brak spóźnionych).
+
+    std::vector<int> cell_items_; ///< Kopia grid->items; nieodwiedzone na początku każdej komórki.
+    std::vector<int> cell_count_; ///< Nieodwiedzone miasta w komórce.
+    std::vector<int> cell_slot_;  ///< Pozycja miasta w cell_items_.
+
+    SpatialStream spatial_;
+};
+
+/**
+ * @brief Koszt częściowy konstrukcji i ograniczenie dolne kosztu jej dokończenia (GreedyBound).
+ */
+class CutoffTracker
+{
+public:
+    CutoffTracker(const ProblemData &data, const GreedyCutoff &cutoff)
+        : data_(data), cutoff_(cutoff), bound_(*cutoff.bound), remaining_(data.n, 1), position_(data.n)
+    {
+        const std::vector<int> &order = bound_.ByDeadline();
+        for (int i = 0; i < data.n; ++i)
+        {
+            position_[order[i]] = i;
+            edge_sum_ += bound_.MinInCost(i); ///< Wszystkie miasta, baza jako powrót.
+        }
+        Advance();
+    }
+
+    /// Przejazd do miasta `city` (koszt krawędzi, czas przyjazdu po ewentualnym oczekiwaniu).
+    void Arrive(int city, double edge_cost, double arrival)
+    {
+        partial_ += edge_cost;
+        if (arrival > data_.windows[city].second)
+            partial_ += arrival - data_.windows[city].second;
+
+        remaining_[city] = 0;
+        edge_sum_ -= bound_.MinInCost(city);
+        if (position_[city] < cursor_)
+        {
+            --late_count_;
+            late_keys_ -= Key(city);
+        }
+        time_ = arrival;
+        Advance();
+    }
+
+    /// Czy koszt częściowy z ograniczeniem reszty trasy przekracza próg.
+    bool Exceeded() const
+    {
+        double bound = partial_ + edge_sum_ + std::max(0.0, late_count_ * time_ - late_keys_);
+        double limit = cutoff_.Limit();
+        /// Margines na różnice zaokrągleń sum przyrostowych
+        return bound > limit + 1e-9 * std::abs(limit);
+    }
+
+private:
+    double Key(int city) const { return data_.windows[city].second - bound_.MinInTime(city); }
+
+    /// Dolicza miasta, dla których przyjazd po chwili time_ oznacza karę.
+    void Advance()
+    {
+        const std::vector<int> &order = bound_.ByDeadline();
+        while (cursor_ < data_.n && Key(order[cursor_]) < time_)
+        {
+            int city = order[cursor_++];
+            if (remaining_[city])
+            {
+                ++late_count_;
+                late_keys_ += Key(city);
+            }
+        }
+    }
+
+    const ProblemData &data_;
+    const GreedyCutoff &cutoff_;
+    const GreedyBound &bound_;
+    std::vector<char> remaining_; ///< Baza pozostaje do końca (powrót).
+    std::vector<int> position_;   ///< Pozycja miasta w ByDeadline().
+    int cursor_ = 0;              ///< Miasta przed kursorem mają l_v - tmin_v < T.
+    double partial_ = 0.0;        ///< Koszt krawędzi i kar dotychczasowej trasy.
+    double edge_sum_ = 0.0;       ///< Suma najtańszych krawędzi wchodzących pozostałych miast.
+    double time_ = 0.0;
+    long long late_count_ = 0;    ///< Pozostałe miasta przed kursorem.
+    double late_keys_ = 0.0;      ///< Suma ich l_v - tmin_v.
+};
+
+/// Przerwana konstrukcja: niepełna trasa, koszt max().
+Solution PrunedSolution(std::vector<int> route)
+{
+    Solution sol;
+    sol.route = std::move(route);
+    sol.total_cost = std::numeric_limits<double>::max();
+    sol.is_valid = false;
+    return sol;
+}
+
+/// Siatka o około dwóch miastach na komórkę, obejmująca wszystkie miasta.
+CandidateGrid BuildGrid(const CoordEdges &coords, int n)
+{
+    CandidateGrid grid;
+    double x_min = coords.X(0), x_max = x_min, y_min = coords.Y(0), y_max = y_min;
+    for (int i = 1; i < n; ++i)
+    {
+        x_min = std::min(x_min, coords.X(i));
+        x_max = std::max(x_max, coords.X(i));
+        y_min = std::min(y_min, coords.Y(i));
+        y_max = std::max(y_max, coords.Y(i));
+    }
+    double width = x_max - x_min;
+    double height = y_max - y_min;
+    double cell = std::sqrt(width * height * 2.0 / n);
+    if (!(cell > 0.0))
+        cell = std::max(width, height) * 2.0 / n; ///< Miasta na jednej prostej
+    if (!(cell > 0.0))
+        cell = 1.0;
+
+    grid.x0 = x_min;
+    grid.y0 = y_min;
+    grid.cell = cell;
+    grid.cols = std::max(1, std::min(n, static_cast<int>(width / cell) + 1));
+    grid.rows = std::max(1, std::min(n, static_cast<int>(height / cell) + 1));
+
+    auto index = [&](double v, double v0, int size)
+    {
+        return std::clamp(static_cast<int>(std::floor((v - v0) / cell)), 0, size - 1);
+    };
+    int cells = grid.cols * grid.rows;
+    grid.cell_of.resize(n);
+    grid.start.assign(cells + 1, 0);
+    for (int i = 0; i < n; ++i)
+    {
+        grid.cell_of[i] = index(coords.Y(i), grid.y0, grid.rows) * grid.cols + index(coords.X(i), grid.x0, grid.cols);
+        ++grid.start[grid.cell_of[i] + 1];
+    }
+    std::partial_sum(grid.start.begin(), grid.start.end(), grid.start.begin());
+    grid.items.resize(n);
+    std::vector<int> fill(grid.start.begin(), grid.start.end() - 1);
+    for (int i = 0; i < n; ++i)
+        grid.items[fill[grid.cell_of[i]]++] = i;
+    return grid;
+}
+
+/**
+ * @brief Konstrukcja zachłanna z indeksem kandydatów (ta sama RCL co przy pełnym przeglądzie).
+ */
+Solution GenGreedySolutionIndexed(const ProblemData &data, int k_best, std::mt19937 &rng,
+                                  const GreedyCandidates &index, const GreedyCutoff *cutoff)
+{
+    int n = data.n;
+    std::vector<int> route;
+    route.reserve(n + 1);
+    IndexedConstruction construction(data, index);
+    std::optional<CutoffTracker> tracker;
+    if (cutoff != nullptr)
+        tracker.emplace(data, *cutoff);
+
+    /// Start w mieście 0.
+    int current_node = 0;
+    route.push_back(current_node);
+    construction.Visit(current_node);
+
+    double current_time = 0.0;
+    Rcl rcl;
+
+    for (int step = 1; step < n; ++step)
+    {
+        int k = std::min(n - step, k_best);
+        rcl.Reset(k);
+        construction.Scan(step, current_node, current_time, rcl,
+                          [&](int next_node, double edge_cost)
+                          {
+                              if (rcl.Full() && edge_cost > rcl.Worst())
+                                  return; ///< Ocena nie mniejsza od kosztu krawędzi.
+                              rcl.Offer(next_node, ScoreCandidate(data, current_node, current_time, next_node, edge_cost));
+                          });
+
+        /// Losowanie miasta z RCL.
+        std::uniform_int_distribution<> distr(0, k - 1);
+        int next_city = rcl[distr(rng)].city_index;
+
+        double final_arrival = current_time + data.TravelTime(current_node, next_city);
+        if (final_arrival < data.windows[next_city].first)
+        {
+            final_arrival = data.windows[next_city].first;
+        }
+        if (tracker)
+        {
+            tracker->Arrive(next_city, data.EdgeCost(current_node, next_city), final_arrival);
+        }
+
+        current_time = final_arrival;
+        current_node = next_city;
+        route.push_back(current_node);
+        construction.Visit(current_node);
+
+        if (tracker && tracker->Exceeded())
+        {
+            return PrunedSolution(std::move(route));
+        }
+    }
+
+    /// Powrót do bazy.
+    route.push_back(0);
+
+    Solution sol;
+    sol.route = route;
+    sol.total_cost = EvaluateSolution(data, route);
+    sol.is_valid = true;
+    return sol;
+}
+
+} // namespace
+
+GreedyCandidates::GreedyCandidates(const ProblemData &data, int k)
+{
+    int n = data.n;
+
+    /// Kolejność według okien czasowych (strumień czasowy)
+    by_opening_.resize(n);
+    std::iota(by_opening_.begin(), by_opening_.end(), 0);
+    by_closing_ = by_opening_;
+    std::stable_sort(by_opening_.begin(), by_opening_.end(),
+                     [&data](int a, int b) { return data.windows[a].first < data.windows[b].first; });
+    std::stable_sort(by_closing_.begin(), by_closing_.end(),
+                     [&data](int a, int b) { return data.windows[a].second < data.windows[b].second; });
+    max_time_.assign(n, 0.0);
+
+    const CoordEdges *coords = data.edges.Coords();
+    /// Ograniczenie z pierścieni wymaga kosztu niemalejącego z odległością
+    if (coords != nullptr && coords->Planar() && n > 0 && data.a >= 0.0 && data.b >= 0.0)
+    {
+        grid_ = BuildGrid(*coords, n);
+        double x1 = grid_->x0 + grid_->cols * grid_->cell;
+        double y1 = grid_->y0 + grid_->rows * grid_->cell;
+        for (int i = 0; i < n; ++i)
+        {
+            /// Najdalszy narożnik siatki; sqrt(2) i +1 obejmują MAN_2D i zaokrąglenia wszystkich typów
+            double dx = std::max(coords->X(i) - grid_->x0, x1 - coords->X(i));
+            double dy = std::max(coords->Y(i) - grid_->y0, y1 - coords->Y(i));
+            max_time_[i] = (std::sqrt(2.0) * std::hypot(dx, dy) + 1.0) / coords->Speed();
+        }
+        return;
+    }
+
+    k_ = std::max(0, std::min(k, n - 1));
+    lists_.resize(static_cast<std::size_t>(n) * k_);
+
+#pragma omp parallel
+    {
+        std::vector<int> order(n);
+        std::vector<double> costs(n);
+
+#pragma omp for schedule(static)
+        for (int i = 0; i < n; ++i)
+        {
+            std::iota(order.begin(), order.end(), 0);
+            std::swap(order[i], order[n - 1]); ///< Samo miasto na koniec - poza zakresem sortowania.
+
+            double max_time = 0.0;
+            for (int j = 0; j < n; ++j)
+            {
+                costs[j] = data.EdgeCost(i, j);
+                max_time = std::max(max_time, data.TravelTime(i, j));
+            }
+            max_time_[i] = max_time;
+            const double *row = costs.data();
+            std::partial_sort(order.begin(), order.begin() + k_, order.end() - 1,
+                              [row](int a, int b)
+                              {
+                                  return row[a] < row[b] || (row[a] == row[b] && a < b);
+                              });
+            std::copy(order.begin(), order.begin() + k_, lists_.begin() + static_cast<std::size_t>(i) * k_);
+        }
+    }
+}
+
+GreedyBound::GreedyBound(const ProblemData &data)
+{
+    int n = data.n;
+    min_in_cost_.assign(n, 0.0);
+    min_in_time_.assign(n, 0.0);
+
+    if (data.edges.Coords() == nullptr && n > 1)
+    {
+        std::fill(min_in_cost_.begin(), min_in_cost_.end(), std::numeric_limits<double>::max());
+        std::fill(min_in_time_.begin(), min_in_time_.end(), std::numeric_limits<double>::max());
+#pragma omp parallel
+        {
+            /// Minima wątku po wierszach (odczyt wierszami), łączone na końcu
+            std::vector<double> cost(n, std::numeric_limits<double>::max());
+            std::vector<double> time(n, std::numeric_limits<double>::max());
+#pragma omp for schedule(static) nowait
+            for (int u = 0; u < n; ++u)
+            {
+                for (int v = 0; v < n; ++v)
+                {
+                    if (u == v)
+                        continue;
+                    cost[v] = std::min(cost[v], data.EdgeCost(u, v));
+                    time[v] = std::min(time[v], data.TravelTime(u, v));
+                }
+            }
+#pragma omp critical
+            {
+                for (int v = 0; v < n; ++v)
+                {
+                    min_in_cost_[v] = std::min(min_in_cost_[v], cost[v]);
+                    min_in_time_[v] = std::min(min_in_time_[v], time[v]);
+                }
+            }
+        }
+    }
+
+    by_deadline_.resize(n);
+    std::iota(by_deadline_.begin(), by_deadline_.end(), 0);
+    std::stable_sort(by_deadline_.begin(), by_deadline_.end(),
+                     [this, &data](int a, int b)
+                     {
+                         return data.windows[a].second - min_in_time_[a] < data.windows[b].second - min_in_time_[b];
+                     });
+}
+
 /**
  * @brief Generuje pojedyncze rozwiązanie metodą zachłanną z RCL.
  * @param data Dane problemu.
  * @param k_best Rozmiar listy RCL.
  * @param rng Generator losowy.
+ * @param index Indeks kandydatów (nullptr - przegląd wszystkich miast).
+ * @param cutoff Próg przerywania (nullptr - konstrukcja zawsze do końca).
  * @return Wygenerowane rozwiązanie.
  */
-Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rng)
+Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rng,
+                           const GreedyCandidates *index, const GreedyCutoff *cutoff)
 {
+    if (index != nullptr)
+    {
+        return GenGreedySolutionIndexed(data, k_best, rng, *index, cutoff);
+    }
+
     int n = data.n;
     std::vector<int> route;
     route.reserve(n + 1);
     std::vector<bool> visited(n, false);
+    std::optional<CutoffTracker> tracker;
+    if (cutoff != nullptr)
+    {
+        tracker.emplace(data, *cutoff);
+    }
 
     /// Start w mieście 0.
     int current_node = 0;
@@ -37,6 +787,7 @@ Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rn
     {
         std::vector<Candidate> candidates;
         candidates.reserve(n - step);
+        data.edges.CacheRow(current_node); ///< Cały wiersz będzie przeglądany.
 
         /// Budowa listy kandydatów.
         for (int next_node = 0; next_node < n; ++next_node)
@@ -44,43 +795,15 @@ Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rn
             if (visited[next_node])
                 continue;
 
-            double dist = data.c_matrix[current_node][next_node];
-            double drive_time = data.t_matrix[current_node][next_node];
-
-            /// Czas przyjazdu, ewentualne oczekiwanie i kara.
-            double arrival = current_time + drive_time;
-            double wait_time = 0.0;
-            double penalty = 0.0;
-
-            /// Okna czasowe.
-            double e_i = data.windows[next_node].first;
-            double l_i = data.windows[next_node].second;
-
-            if (arrival < e_i)
-            {
-                wait_time = e_i - arrival;
-                arrival = e_i; ///< Jeśli przyjechano za wcześnie.
-            }
-            if (arrival > l_i)
-            {
-                penalty = arrival - l_i; ///< Kara za spóźnienie.
-            }
-
-            double fuel_cost = CalcFuelCost(dist, data.a, data.b); ///< Koszt paliwa.
-
-            /// Heurystyka: kara jest gorsza od czasu oczekiwania.
-            double score = (dist + fuel_cost) + (penalty * 2.0) + (wait_time * 0.5);
+            double edge_cost = data.EdgeCost(current_node, next_node); ///< Odległość + paliwo.
+            double score = ScoreCandidate(data, current_node, current_time, next_node, edge_cost);
 
             candidates.push_back({next_node, score});
         }
 
         /// Sortowanie częściowe, aby dostać k_best dla RCL.
         int k = std::min((int)candidates.size(), k_best);
-        std::partial_sort(candidates.begin(), candidates.begin() + k, candidates.end(),
-                          [](const Candidate &a, const Candidate &b)
-                          {
-                              return a.cost < b.cost;
-                          });
+        std::partial_sort(candidates.begin(), candidates.begin() + k, candidates.end(), CandidateBefore);
 
         /// Losowanie miasta z RCL.
         std::uniform_int_distribution<> distr(0, k - 1);
@@ -90,18 +813,28 @@ Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rn
         int next_city = chosen.city_index;
 
         /// Aktualizacja czasu dla wybranego miasta.
-        double final_drive_time = data.t_matrix[current_node][next_city];
+        double final_drive_time = data.TravelTime(current_node, next_city);
         double final_arrival = current_time + final_drive_time;
         if (final_arrival < data.windows[next_city].first)
         {
             final_arrival = data.windows[next_city].first;
         }
+        if (tracker)
+        {
+            tracker->Arrive(next_city, data.EdgeCost(current_node, next_city), final_arrival);
+        }
 
         /// Aktualizacja stanu.
         current_time = final_arrival;
         current_node = next_city;
         route.push_back(current_node);
         visited[current_node] = true;
+
+        /// Trasa nie może już być lepsza od progu.
+        if (tracker && tracker->Exceeded())
+        {
+            return PrunedSolution(std::move(route));
+        }
     }
 
     /// Powrót do bazy.
@@ -117,36 +850,140 @@ Solution GenGreedySolution(const ProblemData &data, int k_best, std::mt19937 &rn
     return sol;
 }
 
-Solution RunParallelGreedySolver(const ProblemData &data, int iterations, int k_best)
+Solution RunParallelGreedySolver(const ProblemData &data, int iterations, int k_best,
+                                 std::optional<std::uint32_t> seed,
+                                 const NeighborLists *local_search,
+                                 Incumbent *incumbent,
+                                 SolverStats *stats,
+                                 const GreedyCandidates *candidates,
+                                 GreedyPruning *pruning)
 {
     Solution global_best;
     global_best.total_cost = std::numeric_limits<double>::max(); ///< Inicjalizacja: największa wartość.
     global_best.is_valid = false;
 
+    if (stats != nullptr)
+    {
+        stats->Prepare(omp_get_max_threads());
+    }
+
+    /// Koniec limitu czasu zostaje na przeszukiwanie lokalne najlepszych rozwiązań wątków
+    if (incumbent != nullptr && local_search != nullptr)
+    {
+        incumbent->ReserveTime(kLocalSearchTimeShare);
+    }
+
 #pragma omp parallel
     {
-        /// Inny seed dla każdego wątku.
-        std::random_device rd;
-        std::mt19937 thread_rng(rd() + omp_get_thread_num());
+        double thread_start = omp_get_wtime();
+        std::mt19937 thread_rng = MakeThreadRng(seed);
 
         Solution thread_best;
         thread_best.total_cost = std::numeric_limits<double>::max();
+        long long constructions = 0;
+        long long improvements = 0;
 
-        /// Podział pętli na wątki.
-#pragma omp for
-        for (int i = 0; i < iterations; ++i)
+        /// Odcinanie: każda konstrukcja z własnym ziarnem (przerwanie nie zmienia kolejnych konstrukcji)
+        long long pruned = 0;
+        long long steps = 0;         ///< Wykonane kroki konstrukcji.
+        long long skipped_steps = 0; ///< Kroki pominięte przez przerwane konstrukcje.
+        double construct_time = 0.0;
+        auto construct = [&]()
         {
-            Solution current_sol = GenGreedySolution(data, k_best, thread_rng);
+            if (pruning == nullptr)
+            {
+                return GenGreedySolution(data, k_best, thread_rng, candidates);
+            }
+            double construct_start = omp_get_wtime();
+            std::mt19937 construction_rng(thread_rng());
+            GreedyCutoff cutoff;
+            cutoff.bound = pruning->bound;
+            /// Z przeszukiwaniem lokalnym próg wątku - poprawiane jest to samo rozwiązanie co bez odcinania
+            cutoff.incumbent = local_search != nullptr ? nullptr : incumbent;
+            cutoff.limit = thread_best.total_cost;
+            Solution sol = GenGreedySolution(data, k_best, construction_rng, candidates, &cutoff);
+            long long done = sol.is_valid ? data.n - 1 : static_cast<long long>(sol.route.size()) - 1;
+            steps += done;
+            if (!sol.is_valid)
+            {
+                ++pruned;
+                skipped_steps += data.n - 1 - done;
+            }
+            construct_time += omp_get_wtime() - construct_start;
+            return sol;
+        };
 
+        auto consider = [&](const Solution &current_sol)
+        {
+            ++constructions;
             if (current_sol.total_cost < thread_best.total_cost)
             {
                 thread_best = current_sol;
+                ++improvements;
+                if (incumbent != nullptr)
+                {
+                    incumbent->Offer(thread_best);
+                }
+            }
+        };
+
+        if (incumbent != nullptr && incumbent->Limited())
+        {
+            /// Limit czasu: każdy wątek konstruuje rozwiązania aż do terminu przeszukiwania (co najmniej jedno).
+            do
+            {
+                consider(construct());
+            } while (!incumbent->SearchStopped());
+        }
+        else
+        {
+            /// Podział pętli na wątki (statyczny - powtarzalny przy zadanym ziarnie).
+#pragma omp for schedule(static) nowait
+            for (int i = 0; i < iterations; ++i)
+            {
+                /// Osiągnięty koszt docelowy - pozostałe iteracje są pomijane
+                if (incumbent != nullptr && incumbent->TargetReached())
+                    continue;
+                consider(construct());
+            }
+        }
+
+        /// Przeszukiwanie lokalne najlepszego rozwiązania wątku.
+        double ls_time = 0.0;
+        if (local_search != nullptr && !thread_best.route.empty())
+        {
+            double ls_start = omp_get_wtime();
+            thread_best = LocalSearch(data, *local_search).Improve(thread_best, incumbent);
+            ls_time = omp_get_wtime() - ls_start;
+            if (incumbent != nullptr)
+            {
+                incumbent->Offer(thread_best);
             }
         }
 
+        /// Czas pominiętych kroków: średni czas kroku wątku razy liczba pominiętych
+        double time_saved = steps > 0 ? construct_time / steps * skipped_steps : 0.0;
+
+        if (stats != nullptr)
+        {
+            ThreadStats &ts = stats->Thread(omp_get_thread_num());
+            ts.constructions = constructions;
+            ts.improvements = improvements;
+            ts.local_search_time = ls_time;
+            ts.pruned = pruned;
+            ts.pruned_time_saved = time_saved;
+            ts.busy_time = omp_get_wtime() - thread_start;
+        }
+
         /// Tylko jeden wątek na raz aktualizuje najlepsze rozwiązanie.
 #pragma omp critical
         {
+            if (pruning != nullptr)
+            {
+                pruning->constructions += constructions;
+                pruning->pruned += pruned;
+                pruning->time_saved += time_saved;
+            }
             if (thread_best.total_cost < global_best.total_cost)
             {
                 global_best = thread_best;
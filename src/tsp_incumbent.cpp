@@ -0,0 +1,81 @@
+#include "tsp_incumbent.hpp"
+#include "json.hpp"
+#include <algorithm>
+#include <limits>
+#include <omp.h>
+
+/**
+ * @file tsp_incumbent.cpp
+ * @brief Implementacja wspólnego najlepszego rozwiązania i zegara przebiegu.
+ */
+
+using json = nlohmann::json;
+
+Incumbent::Incumbent(double time_limit, std::ostream *stream)
+    : start_(omp_get_wtime()), time_limit_(time_limit), search_limit_(time_limit), stream_(stream),
+      best_cost_(std::numeric_limits<double>::max())
+{
+    best_.total_cost = std::numeric_limits<double>::max();
+    best_.is_valid = false;
+}
+
+double Incumbent::Elapsed() const
+{
+    return omp_get_wtime() - start_;
+}
+
+double Incumbent::Progress() const
+{
+    if (!Limited())
+        return 0.0;
+    return std::min(1.0, Elapsed() / search_limit_);
+}
+
+void Incumbent::ReserveTime(double share)
+{
+    search_limit_ = time_limit_ * (1.0 - std::clamp(share, 0.0, 1.0));
+}
+
+void Incumbent::SetTarget(double target_cost)
+{
+    has_target_ = true;
+    target_cost_ = target_cost;
+    if (BestCost() <= target_cost)
+    {
+        target_reached_.store(true, std::memory_order_relaxed);
+    }
+}
+
+bool Incumbent::Offer(const Solution &solution)
+{
+    /// Szybka ścieżka bez blokady - zdecydowana większość zgłoszeń nie jest poprawą
+    if (solution.total_cost >= BestCost())
+        return false;
+
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (solution.total_cost >= best_.total_cost)
+        return false;
+
+    best_ = solution;
+    best_cost_.store(solution.total_cost, std::memory_order_relaxed);
+    if (has_target_ && solution.total_cost <= target_cost_)
+    {
+        target_reached_.store(true, std::memory_order_relaxed);
+    }
+
+    if (stream_ != nullptr)
+    {
+        json line;
+        line["time"] = Elapsed();
+        line["cost"] = solution.total_cost;
+        line["route"] = solution.route;
+        *stream_ << line.dump() << std::endl;
+    }
+    return true;
+}
+
+Solution Incumbent::Best() const
+{
+    std::lock_guard<std::mutex> lock(mutex_);
+    return best_;
+}
@@ -0,0 +1,230 @@
+#include "tsp_local_search.hpp"
+#include <algorithm>
+#include <numeric>
+#include <cmath>
+#include <omp.h>
+
+/**
+ * @file tsp_local_search.cpp
+ * @brief Implementacja przeszukiwania lokalnego na listach kandydatów.
+ */
+
+/// Minimalna względna poprawa kosztu uznawana za poprawę (odporność na błędy zaokrągleń).
+static const double kImproveEps = 1e-9;
+
+/// Najdłuższy fragment przenoszony w ruchu Or-opt.
+static const int kMaxOrOptLength = 3;
+
+NeighborLists::NeighborLists(const ProblemData &data, int k)
+{
+    int n = data.n;
+    k_ = std::max(0, std::min(k, n - 1));
+    lists_.resize(static_cast<std::size_t>(n) * k_);
+
+#pragma omp parallel
+    {
+        std::vector<int> order(n);
+        std::vector<double> distances(n); ///< Wiersz odległości (macierz lub współrzędne).
+
+#pragma omp for schedule(static)
+        for (int i = 0; i < n; ++i)
+        {
+            std::iota(order.begin(), order.end(), 0);
+            std::swap(order[i], order[n - 1]); ///< Samo miasto na koniec - poza zakresem sortowania.
+
+            for (int j = 0; j < n; ++j)
+                distances[j] = data.Distance(i, j);
+            const double *row = distances.data();
+            std::partial_sort(order.begin(), order.begin() + k_, order.end() - 1,
+                              [row](int a, int b)
+                              {
+                                  return row[a] < row[b] || (row[a] == row[b] && a < b);
+                              });
+            std::copy(order.begin(), order.begin() + k_, lists_.begin() + static_cast<std::size_t>(i) * k_);
+        }
+    }
+}
+
+LocalSearch::LocalSearch(const ProblemData &data, const NeighborLists &neighbors)
+    : data_(data), neighbors_(neighbors), eval_(data)
+{
+}
+
+void LocalSearch::Activate(int city)
+{
+    if (!active_[city])
+    {
+        active_[city] = 1;
+        queue_.push_back(city);
+    }
+}
+
+bool LocalSearch::TryMove(int start, int end, const RouteSegment *segments, int count)
+{
+    double cost = eval_.Cost();
+    if (eval_.MoveCost(start, end, segments, count) >= cost - kImproveEps * std::max(1.0, std::abs(cost)))
+        return false;
+
+    /// Miasta na końcach zmienionych krawędzi
+    const std::vector<int> &route = eval_.Route();
+    int touched[2 + 2 * 3];
+    int t = 0;
+    touched[t++] = route[start - 1];
+    touched[t++] = route[end + 1];
+    for (int s = 0; s < count; ++s)
+    {
+        touched[t++] = route[segments[s].first];
+        touched[t++] = route[segments[s].last];
+    }
+
+    eval_.ApplyMove(start, end, segments, count);
+    for (int c = 0; c < t; ++c)
+    {
+        Activate(touched[c]);
+    }
+    return true;
+}
+
+bool LocalSearch::TryTwoOpt(int p, int q)
+{
+    /// Odwrócenie fragmentu między miastami tworzy krawędź route[min] -> route[max]
+    int i = std::min(p, q) + 1;
+    int j = std::max(p, q);
+    if (i >= j || j > data_.n - 1)
+        return false;
+
+    RouteSegment reversed{j, i};
+    return TryMove(i, j, &reversed, 1);
+}
+
+bool LocalSearch::TryRelocate(int s, int e, int after)
+{
+    if (s < 1 || e > data_.n - 1 || s > e || after < 0 || after > data_.n - 1)
+        return false;
+    if (after >= s - 1 && after <= e)
+        return false; ///< Fragment już stoi za `after` (lub `after` leży w nim)
+
+    for (int reversed = 0; reversed < 2; ++reversed)
+    {
+        RouteSegment moved = reversed ? RouteSegment{e, s} : RouteSegment{s, e};
+        if (after < s)
+        {
+            RouteSegment segments[2] = {moved, {after + 1, s - 1}};
+            if (TryMove(after + 1, e, segments, 2))
+                return true;
+        }
+        else
+        {
+            RouteSegment segments[2] = {{e + 1, after}, moved};
+            if (TryMove(s, after, segments, 2))
+                return true;
+        }
+    }
+    return false;
+}
+
+bool LocalSearch::TryOrOpt(int p, int q)
+{
+    for (int len = 1; len <= kMaxOrOptLength; ++len)
+    {
+        /// Fragment zaczynający się na p wstawiony za q (krawędź route[q] -> route[p])
+        if (TryRelocate(p, p + len - 1, q))
+            return true;
+        /// Fragment kończący się na p wstawiony przed q (krawędź route[p] -> route[q])
+        if (q > 0 && TryRelocate(p - len + 1, p, q - 1))
+            return true;
+    }
+    return false;
+}
+
+bool LocalSearch::TrySwap(int x, int y)
+{
+    if (x > y)
+        std::swap(x, y);
+    if (x < 1 || y > data_.n - 1 || x == y)
+        return false;
+
+    if (y == x + 1)
+    {
+        RouteSegment segments[2] = {{y, y}, {x, x}};
+        return TryMove(x, y, segments, 2);
+    }
+    RouteSegment segments[3] = {{y, y}, {x + 1, y - 1}, {x, x}};
+    return TryMove(x, y, segments, 3);
+}
+
+bool LocalSearch::ImproveCity(int city)
+{
+    const int *candidates = neighbors_.Of(city);
+    for (int c = 0; c < neighbors_.K(); ++c)
+    {
+        /// Pozycje odczytywane na nowo - mogły się zmienić po wcześniejszym ruchu
+        int p = eval_.Position(city);
+        int q = eval_.Position(candidates[c]);
+
+        if (TryTwoOpt(p, q))
+            return true;
+        if (TryOrOpt(p, q))
+            return true;
+        /// Zamiana: miasto staje obok kandydata (przed nim lub za nim)
+        if (TrySwap(p, q - 1) || TrySwap(p, q + 1))
+            return true;
+    }
+    return false;
+}
+
+Solution LocalSearch::Improve(const Solution &solution, const Incumbent *clock)
+{
+    if (data_.n < 3 || neighbors_.K() == 0 || solution.route.empty())
+        return solution;
+
+    eval_.Assign(solution.route);
+
+    /// Wszystkie miasta aktywne, w kolejności trasy
+    active_.assign(data_.n, 1);
+    queue_.assign(solution.route.begin(), solution.route.end() - 1);
+
+    bool limited = clock != nullptr && clock->Stoppable();
+    while (!queue_.empty())
+    {
+        if (limited && clock->Stopped())
+            break;
+
+        int city = queue_.front();
+        queue_.pop_front();
+        active_[city] = 0;
+
+        if (ImproveCity(city))
+        {
+            Activate(city);
+        }
+    }
+
+    if (eval_.Cost() >= solution.total_cost)
+        return solution;
+
+    Solution improved;
+    improved.route = eval_.Route();
+    improved.total_cost = eval_.Cost();
+    improved.is_valid = true;
+    return improved;
+}
+
+bool DrawNeighborInvert(const RouteEvaluator &eval, const NeighborLists &neighbors,
+                        std::mt19937 &rng, int &i, int &j)
+{
+    int n = static_cast<int>(eval.Route().size()) - 1;
+    if (n < 3 || neighbors.K() == 0)
+        return false;
+
+    std::uniform_int_distribution<> pos_distr(1, n - 1);
+    std::uniform_int_distribution<> nb_distr(0, neighbors.K() - 1);
+
+    int p = pos_distr(rng);
+    int q = eval.Position(neighbors.Of(eval.Route()[p])[nb_distr(rng)]);
+
+    /// Odwrócenie [min + 1, max] tworzy krawędź między wylosowanym miastem a sąsiadem
+    i = std::min(p, q) + 1;
+    j = std::max(p, q);
+    return i < j;
+}
@@ -0,0 +1,338 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+#include <omp.h>
+#include <optional>
+#include <cstdint>
+#include <fstream>
+#include <memory>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
+#include "tsp_types.hpp"
+#include "tsp_utils.hpp"
+#include "tsp_greedy_solver.hpp"
+#include "tsp_sa_solver.hpp"
+#include "tsp_local_search.hpp"
+#include "tsp_incumbent.hpp"
+#include "tsp_stats.hpp"
+#include "tsp_bound.hpp"
+
+/**
+ * @file tsp_python.cpp
+ * @brief Moduł Pythona `tsp_native` - solvery wywoływane w procesie interpretera.
+ *
+ * Zamiast uruchamiać `tsp_solver` i wymieniać dane przez pliki JSON, skrypty mogą
+ * przekazać macierze NumPy bezpośrednio. Tablice float64 ciągłe w pamięci (C order)
+ * są używane bez kopiowania; pozostałe są konwertowane. Na czas obliczeń zwalniana
+ * jest blokada GIL.
+ */
+
+namespace py = pybind11;
+
+namespace
+{
+    /// Tablica double w układzie C (konwersja tylko, gdy jest konieczna).
+    using DoubleArray = py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+    /**
+     * @brief Buduje ProblemData na danych tablic NumPy (bez kopiowania macierzy).
+     *
+     * Tablice muszą żyć dłużej niż zwrócona struktura - wystarcza to w obrębie
+     * jednego wywołania funkcji modułu, bo argumenty trzyma interpreter.
+     */
+    ProblemData MakeProblem(const DoubleArray &c_matrix, const DoubleArray &t_matrix,
+                            const DoubleArray &t_windows, double a, double b, double M)
+    {
+        if (c_matrix.ndim() != 2 || c_matrix.shape(0) != c_matrix.shape(1))
+        {
+            throw std::invalid_argument("c_matrix musi byc macierza kwadratowa n x n");
+        }
+        const py::ssize_t n = c_matrix.shape(0);
+        if (t_matrix.ndim() != 2 || t_matrix.shape(0) != n || t_matrix.shape(1) != n)
+        {
+            throw std::invalid_argument("t_matrix musi miec wymiary n x n");
+        }
+        if (t_windows.size() != 2 * n)
+        {
+            throw std::invalid_argument("t_windows musi miec wymiary n x 2");
+        }
+
+        ProblemData data;
+        data.n = static_cast<int>(n);
+        data.c_matrix.Borrow(data.n, c_matrix.data(), nullptr);
+        data.t_matrix.Borrow(data.n, t_matrix.data(), nullptr);
+
+        const double *w = t_windows.data();
+        data.windows.reserve(n);
+        for (py::ssize_t i = 0; i < n; ++i)
+        {
+            data.windows.emplace_back(w[2 * i], w[2 * i + 1]);
+        }
+
+        data.a = a;
+        data.b = b;
+        data.M = M;
+        return data;
+    }
+
+    /// Tablica krawędzi dla solverów (float32 - jak --float32 w tsp_solver).
+    void BuildEdges(ProblemData &data, bool float32)
+    {
+        data.edges.Build(data.c_matrix, data.t_matrix, data.a, data.b, float32);
+    }
+
+    /// Dokładny koszt wyniku, gdy solver liczył na tablicy float32.
+    void ExactCost(const ProblemData &data, Solution &solution)
+    {
+        if (data.edges.SinglePrecision() && !solution.route.empty())
+        {
+            solution.total_cost = EvaluateSolutionExact(data, solution.route);
+        }
+    }
+
+    /// Wynik w tym samym układzie co plik zapisywany przez SaveResults.
+    py::dict ToDict(const Solution &solution, double execution_time, const SolverStats *stats,
+                    const LowerBound &bound)
+    {
+        py::dict result;
+        result["total_cost"] = solution.total_cost;
+        result["route"] = solution.route;
+        result["is_valid"] = solution.is_valid;
+        result["execution_time"] = execution_time;
+        result["gap"] = py::none();
+        if (bound.method != BoundMethod::None)
+        {
+            result["lower_bound"] = bound.value;
+            result["bound_method"] = BoundMethodName(bound.method);
+            result["lower_bound_time"] = bound.time;
+            if (solution.is_valid)
+            {
+                result["gap"] = RelativeGap(solution.total_cost, bound.value);
+            }
+        }
+        if (stats != nullptr)
+        {
+            result["stats"] = py::module_::import("json").attr("loads")(stats->ToJson().dump());
+        }
+        return result;
+    }
+
+    /// Instrumentacja tylko na żądanie (jak --stats / --stats-trace w tsp_solver).
+    std::unique_ptr<SolverStats> MakeStats(bool stats, bool stats_trace)
+    {
+        return stats || stats_trace ? std::make_unique<SolverStats>(stats_trace) : nullptr;
+    }
+
+    /// Listy kandydatów - tylko gdy są potrzebne (jak w tsp_solver).
+    std::unique_ptr<NeighborLists> MakeNeighbors(const ProblemData &data, bool needed, int k)
+    {
+        return needed ? std::make_unique<NeighborLists>(data, k) : nullptr;
+    }
+
+    /// Indeks kandydatów konstrukcji zachłannej (jak --greedy-candidates w tsp_solver; 0 - bez indeksu).
+    std::unique_ptr<GreedyCandidates> MakeGreedyCandidates(const ProblemData &data, int k)
+    {
+        return k > 0 ? std::make_unique<GreedyCandidates>(data, k) : nullptr;
+    }
+
+    /// Otwiera plik strumienia kolejnych najlepszych rozwiązań (brak ścieżki - bez zapisu).
+    std::ostream *OpenStream(const std::optional<std::string> &path, std::ofstream &file)
+    {
+        if (!path)
+        {
+            return nullptr;
+        }
+        file.open(*path);
+        if (!file.is_open())
+        {
+            throw std::runtime_error("Nie mozna otworzyc pliku strumienia " + *path);
+        }
+        return &file;
+    }
+
+    /// Metoda ograniczenia dolnego (jak --bound i --target-gap w tsp_solver: domyślnie none, z target_gap auto).
+    BoundMethod ParseBound(const std::optional<std::string> &name, double target_gap)
+    {
+        BoundMethod method = target_gap > 0.0 ? BoundMethod::Auto : BoundMethod::None;
+        if (name && !ParseBoundMethod(*name, method))
+        {
+            throw std::invalid_argument("Nieznana metoda ograniczenia: " + *name);
+        }
+        if (target_gap > 0.0 && method == BoundMethod::None)
+        {
+            throw std::invalid_argument("target_gap wymaga ograniczenia dolnego (bound)");
+        }
+        return method;
+    }
+
+    /// Ustawia liczbę wątków OpenMP dla wywołującego wątku (brak - bez zmian).
+    void SetThreads(const std::optional<int> &threads)
+    {
+        if (threads)
+        {
+            omp_set_num_threads(*threads);
+        }
+    }
+}
+
+PYBIND11_MODULE(tsp_native, m)
+{
+    m.doc() = "Solvery TSP z ograniczeniem czasu i paliwa (greedy, SA) wywolywane bez uruchamiania procesu";
+
+    m.def(
+        "RunParallelGreedySolver",
+        [](const DoubleArray &c_matrix, const DoubleArray &t_matrix, const DoubleArray &t_windows,
+           double a, double b, double M, int iterations, int k_best,
+           std::optional<std::uint32_t> seed, std::optional<int> threads,
+           bool local_search, int neighbors, double time_limit, const std::optional<std::string> &stream,
+           bool stats, bool stats_trace, bool float32, int greedy_candidates, bool prune,
+           const std::optional<std::string> &bound_name, double target_gap)
+        {
+            ProblemData data = MakeProblem(c_matrix, t_matrix, t_windows, a, b, M);
+            BoundMethod bound_method = ParseBound(bound_name, target_gap);
+            auto solver_stats = MakeStats(stats, stats_trace);
+            std::ofstream stream_file;
+            std::ostream *stream_ptr = OpenStream(stream, stream_file);
+            Solution best;
+            double elapsed;
+            GreedyPruning pruning;
+            LowerBound lower_bound;
+            {
+                py::gil_scoped_release release;
+                SetThreads(threads);
+                BuildEdges(data, float32);
+                /// Ograniczenie przed startem zegara - poza limitem czasu i execution_time (jak w tsp_solver)
+                lower_bound = ComputeLowerBound(data, bound_method);
+                double start_time = omp_get_wtime();
+                Incumbent incumbent(time_limit, stream_ptr);
+                if (target_gap > 0.0)
+                {
+                    incumbent.SetTarget(TargetCost(lower_bound.value, target_gap));
+                }
+                auto lists = MakeNeighbors(data, local_search, neighbors);
+                auto index = MakeGreedyCandidates(data, greedy_candidates);
+                std::unique_ptr<GreedyBound> bound = prune ? std::make_unique<GreedyBound>(data) : nullptr;
+                pruning.bound = bound.get();
+                best = RunParallelGreedySolver(data, iterations, k_best, seed, lists.get(), &incumbent,
+                                               solver_stats.get(), index.get(), prune ? &pruning : nullptr);
+                ExactCost(data, best);
+                elapsed = omp_get_wtime() - start_time;
+            }
+            py::dict result = ToDict(best, elapsed, solver_stats.get(), lower_bound);
+            if (prune)
+            {
+                /// Odpowiednik raportu "Odciete konstrukcje" tsp_solver
+                py::dict report;
+                report["constructions"] = pruning.constructions;
+                report["pruned"] = pruning.pruned;
+                report["time_saved"] = pruning.time_saved;
+                result["pruning"] = report;
+            }
+            return result;
+        },
+        py::arg("c_matrix"), py::arg("t_matrix"), py::arg("t_windows"),
+        py::arg("a"), py::arg("b"), py::arg("M"),
+        py::arg("iterations") = 1000, py::arg("k_best") = 4,
+        py::arg("seed") = py::none(), py::arg("threads") = py::none(),
+        py::arg("local_search") = false, py::arg("neighbors") = 10,
+        py::arg("time_limit") = 0.0, py::arg("stream") = py::none(),
+        py::arg("stats") = false, py::arg("stats_trace") = false, py::arg("float32") = false,
+        py::arg("greedy_candidates") = 0, py::arg("prune") = false,
+        py::arg("bound") = py::none(), py::arg("target_gap") = 0.0,
+        "Wielowatkowy algorytm zachlanny z RCL. Zwraca slownik: total_cost, route, is_valid, execution_time, gap "
+        "(i pruning dla prune=True).");
+
+    m.def(
+        "RunParallelSASolver",
+        [](const DoubleArray &c_matrix, const DoubleArray &t_matrix, const DoubleArray &t_windows,
+           double a, double b, double M, double initial_temp, double cooling_rate, double min_temp,
+           int iterations, int k_best, std::optional<std::uint32_t> seed, std::optional<int> threads,
+           bool local_search, int neighbors, double neighbor_bias,
+           const std::string &mode, int exchange_interval,
+           double time_limit, const std::optional<std::string> &stream,
+           bool stats, bool stats_trace, bool float32, int greedy_candidates,
+           const std::optional<std::string> &bound_name, double target_gap)
+        {
+            ProblemData data = MakeProblem(c_matrix, t_matrix, t_windows, a, b, M);
+            BoundMethod bound_method = ParseBound(bound_name, target_gap);
+            auto solver_stats = MakeStats(stats, stats_trace);
+
+            SAParams params;
+            params.initial_temp = initial_temp;
+            params.cooling_rate = cooling_rate;
+            params.min_temp = min_temp;
+            params.iterations_per_temp = iterations;
+            params.k_best_greedy = k_best;
+            params.seed = seed;
+            params.neighbor_bias = neighbor_bias;
+            params.local_search = local_search;
+            params.exchange_interval = exchange_interval;
+            if (!ParseSAMode(mode, params.mode))
+            {
+                throw std::invalid_argument("Nieznany tryb SA: " + mode);
+            }
+            std::ofstream stream_file;
+            std::ostream *stream_ptr = OpenStream(stream, stream_file);
+
+            Solution best;
+            double elapsed;
+            LowerBound lower_bound;
+            {
+                py::gil_scoped_release release;
+                SetThreads(threads);
+                BuildEdges(data, float32);
+                /// Ograniczenie przed startem zegara - poza limitem czasu i execution_time (jak w tsp_solver)
+                lower_bound = ComputeLowerBound(data, bound_method);
+                double start_time = omp_get_wtime();
+                Incumbent incumbent(time_limit, stream_ptr);
+                if (target_gap > 0.0)
+                {
+                    incumbent.SetTarget(TargetCost(lower_bound.value, target_gap));
+                }
+                auto lists = MakeNeighbors(data, local_search || neighbor_bias > 0.0, neighbors);
+                params.neighbors = lists.get();
+                auto index = MakeGreedyCandidates(data, greedy_candidates);
+                params.greedy_candidates = index.get();
+                params.incumbent = &incumbent;
+                params.stats = solver_stats.get();
+                best = RunParallelSASolver(data, params);
+                ExactCost(data, best);
+                elapsed = omp_get_wtime() - start_time;
+            }
+            return ToDict(best, elapsed, solver_stats.get(), lower_bound);
+        },
+        py::arg("c_matrix"), py::arg("t_matrix"), py::arg("t_windows"),
+        py::arg("a"), py::arg("b"), py::arg("M"),
+        py::arg("initial_temp") = 5000.0, py::arg("cooling_rate") = 0.99, py::arg("min_temp") = 0.1,
+        py::arg("iterations") = 1000, py::arg("k_best") = 4,
+        py::arg("seed") = py::none(), py::arg("threads") = py::none(),
+        py::arg("local_search") = false, py::arg("neighbors") = 10, py::arg("neighbor_bias") = 0.0,
+        py::arg("mode") = "independent", py::arg("exchange_interval") = 10,
+        py::arg("time_limit") = 0.0, py::arg("stream") = py::none(),
+        py::arg("stats") = false, py::arg("stats_trace") = false, py::arg("float32") = false,
+        py::arg("greedy_candidates") = 0, py::arg("bound") = py::none(), py::arg("target_gap") = 0.0,
+        "Wielowatkowe symulowane wyzarzanie. Zwraca slownik: total_cost, route, is_valid, execution_time, gap.");
+
+    m.def(
+        "EvaluateSolution",
+        [](const DoubleArray &c_matrix, const DoubleArray &t_matrix, const DoubleArray &t_windows,
+           double a, double b, double M, const std::vector<int> &route)
+        {
+            ProblemData data = MakeProblem(c_matrix, t_matrix, t_windows, a, b, M);
+            for (int city : route)
+            {
+                if (city < 0 || city >= data.n)
+                {
+                    throw std::out_of_range("Nieprawidlowy indeks miasta w trasie: " + std::to_string(city));
+                }
+            }
+            py::gil_scoped_release release;
+            /// Pojedyncza trasa - bez budowy tablicy krawędzi
+            return EvaluateSolutionExact(data, route);
+        },
+        py::arg("c_matrix"), py::arg("t_matrix"), py::arg("t_windows"),
+        py::arg("a"), py::arg("b"), py::arg("M"), py::arg("route"),
+        "Koszt trasy (odleglosc + paliwo + kara za okna czasowe).");
+}
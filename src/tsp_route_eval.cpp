@@ -0,0 +1,180 @@
+#include "tsp_route_eval.hpp"
+#include "tsp_utils.hpp"
+#include <algorithm>
+#ifdef TSP_CHECK_INCREMENTAL
+#include <cmath>
+#include <cstdlib>
+#include <iostream>
+#endif
+
+/**
+ * @file tsp_route_eval.cpp
+ * @brief Implementacja przyrostowej oceny ruchów na trasie.
+ */
+
+RouteEvaluator::RouteEvaluator(const ProblemData &data) : data_(data)
+{
+}
+
+double RouteEvaluator::EdgeCost(int u, int v) const
+{
+    return data_.EdgeCost(u, v);
+}
+
+double RouteEvaluator::Arrive(int u, int v, double time) const
+{
+    double arrival = time + data_.TravelTime(u, v);
+    return std::max(arrival, data_.windows[v].first);
+}
+
+double RouteEvaluator::Late(int v, double time) const
+{
+    double end_window = data_.windows[v].second;
+    return time > end_window ? time - end_window : 0.0;
+}
+
+void RouteEvaluator::Assign(const std::vector<int> &route)
+{
+    route_ = route;
+    last_ = static_cast<int>(route_.size()) - 1;
+    position_.assign(data_.n, 0);
+    travel_.assign(route_.size(), 0.0);
+    travel_rev_.assign(route_.size(), 0.0);
+    arrival_.assign(route_.size(), 0.0);
+    penalty_.assign(route_.size(), 0.0);
+    Rebuild(1);
+}
+
+void RouteEvaluator::Rebuild(int from)
+{
+    /// Ta sama kolejność sumowania co w EvaluateSolution - koszt jest identyczny co do bitu.
+    for (int p = std::max(from, 1); p <= last_; ++p)
+    {
+        int u = route_[p - 1];
+        int v = route_[p];
+        if (p < last_)
+        {
+            position_[v] = p;
+        }
+        travel_[p] = travel_[p - 1] + EdgeCost(u, v);
+        travel_rev_[p] = travel_rev_[p - 1] + EdgeCost(v, u);
+        arrival_[p] = Arrive(u, v, arrival_[p - 1]);
+        penalty_[p] = penalty_[p - 1] + Late(v, arrival_[p]);
+    }
+}
+
+double RouteEvaluator::InvertCost(int i, int j) const
+{
+    RouteSegment reversed{j, i};
+    return MoveCost(i, j, &reversed, 1);
+}
+
+double RouteEvaluator::MoveCost(int start, int end, const RouteSegment *segments, int count) const
+{
+    /// Koszt przejazdu: krawędzie poza oknem bez zmian, wewnątrz fragmentów - z sum
+    /// prefiksowych (w kierunku trasy lub odwrotnym), do tego krawędzie łączące fragmenty.
+    double travel = travel_[last_] - (travel_[end + 1] - travel_[start - 1]);
+    int prev = route_[start - 1];
+    for (int s = 0; s < count; ++s)
+    {
+        const RouteSegment &seg = segments[s];
+        travel += EdgeCost(prev, route_[seg.first]);
+        travel += seg.first <= seg.last ? travel_[seg.last] - travel_[seg.first]
+                                        : travel_rev_[seg.first] - travel_rev_[seg.last];
+        prev = route_[seg.last];
+    }
+    travel += EdgeCost(prev, route_[end + 1]);
+
+    /// Kary: symulacja od pozycji start (czasy przed oknem się nie zmieniają).
+    double time = arrival_[start - 1];
+    double penalty = penalty_[start - 1];
+    prev = route_[start - 1];
+
+    for (int s = 0; s < count; ++s)
+    {
+        const RouteSegment &seg = segments[s];
+        int step = seg.first <= seg.last ? 1 : -1;
+        for (int p = seg.first;; p += step)
+        {
+            int city = route_[p];
+            time = Arrive(prev, city, time);
+            penalty += Late(city, time);
+            prev = city;
+            if (p == seg.last)
+                break;
+        }
+    }
+
+    for (int p = end + 1; p <= last_; ++p)
+    {
+        int city = route_[p];
+        time = Arrive(prev, city, time);
+        if (time == arrival_[p])
+        {
+            /// Czasy wyrównane - reszta kar bez zmian.
+            penalty += penalty_[last_] - penalty_[p - 1];
+            break;
+        }
+        penalty += Late(city, time);
+        prev = city;
+    }
+
+#ifdef TSP_CHECK_INCREMENTAL
+    /// Tryb diagnostyczny: porównanie z pełnym EvaluateSolution trasy po ruchu
+    std::vector<int> moved(route_.begin(), route_.begin() + start);
+    for (int s = 0; s < count; ++s)
+    {
+        int step = segments[s].first <= segments[s].last ? 1 : -1;
+        for (int p = segments[s].first;; p += step)
+        {
+            moved.push_back(route_[p]);
+            if (p == segments[s].last)
+                break;
+        }
+    }
+    moved.insert(moved.end(), route_.begin() + end + 1, route_.end());
+    double expected = EvaluateSolution(data_, moved);
+    if (std::abs(expected - (travel + penalty)) > 1e-6 * std::max(1.0, std::abs(expected)))
+    {
+        std::cerr << "Blad oceny przyrostowej ruchu [" << start << ", " << end << "]: "
+                  << travel + penalty << " != " << expected << std::endl;
+        std::abort();
+    }
+#endif
+
+    return travel + penalty;
+}
+
+void RouteEvaluator::ApplyMove(int start, int end, const RouteSegment *segments, int count)
+{
+    buffer_.clear();
+    for (int s = 0; s < count; ++s)
+    {
+        const RouteSegment &seg = segments[s];
+        int step = seg.first <= seg.last ? 1 : -1;
+        for (int p = seg.first;; p += step)
+        {
+            buffer_.push_back(route_[p]);
+            if (p == seg.last)
+                break;
+        }
+    }
+#ifdef TSP_CHECK_INCREMENTAL
+    if (static_cast<int>(buffer_.size()) != end - start + 1)
+    {
+        std::cerr << "Fragmenty ruchu nie pokrywaja pozycji [" << start << ", " << end << "]: "
+                  << buffer_.size() << " miast" << std::endl;
+        std::abort();
+    }
+#else
+    static_cast<void>(end);
+#endif
+    std::copy(buffer_.begin(), buffer_.end(), route_.begin() + start);
+    Rebuild(start);
+}
+
+void RouteEvaluator::ApplyInvert(int i, int j)
+{
+    std::reverse(route_.begin() + i, route_.begin() + j + 1);
+    Rebuild(i);
+}
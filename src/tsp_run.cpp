@@ -0,0 +1,337 @@
+#include "tsp_run.hpp"
+#include "tsp_utils.hpp"
+#include "tsp_local_search.hpp"
+#include "tsp_incumbent.hpp"
+#include <algorithm>
+#include <iostream>
+#include <omp.h>
+
+/**
+ * @file tsp_run.cpp
+ * @brief Odczyt opcji i pojedyncze uruchomienie solvera (wspólne dla trybów tsp_solver).
+ */
+
+using json = nlohmann::json;
+
+bool ReadOptions(Cli &cli, RunOptions &opts, std::string &error)
+{
+    if (cli.arg_input)
+    {
+        opts.input = args::get(cli.arg_input);
+    }
+    if (cli.arg_output)
+    {
+        opts.output = args::get(cli.arg_output);
+    }
+
+    opts.iterations = cli.arg_iterations ? args::get(cli.arg_iterations) : 1000;
+    opts.k_best = cli.arg_k ? args::get(cli.arg_k) : 4;
+    if (cli.arg_sa)
+    {
+        opts.algorithm = "sa";
+    }
+
+    // Parametry SA
+    opts.initial_temp = cli.arg_T ? args::get(cli.arg_T) : 5000.0;
+    opts.cooling_rate = cli.arg_cooling_rate ? args::get(cli.arg_cooling_rate) : 0.99;
+    opts.min_temp = cli.arg_t ? args::get(cli.arg_t) : 0.1;
+
+    opts.sa_mode_name = cli.arg_sa_mode ? args::get(cli.arg_sa_mode) : "independent";
+    if (!ParseSAMode(opts.sa_mode_name, opts.sa_mode))
+    {
+        error = "Nieznany tryb SA: " + opts.sa_mode_name;
+        return false;
+    }
+    opts.exchange_interval = cli.arg_exchange ? args::get(cli.arg_exchange) : 10;
+
+    opts.local_search = cli.arg_local_search;
+    opts.neighbor_k = cli.arg_neighbors ? args::get(cli.arg_neighbors) : 10;
+    opts.neighbor_bias = cli.arg_neighbor_bias ? args::get(cli.arg_neighbor_bias) : 0.0;
+
+    opts.time_limit = cli.arg_time_limit ? args::get(cli.arg_time_limit) : 0.0;
+    opts.greedy_candidates_k = cli.arg_greedy_candidates ? args::get(cli.arg_greedy_candidates) : 0;
+    opts.prune = cli.arg_prune;
+    if (cli.arg_bound && !ParseBoundMethod(args::get(cli.arg_bound), opts.bound))
+    {
+        error = "Nieznana metoda ograniczenia: " + args::get(cli.arg_bound);
+        return false;
+    }
+    opts.target_gap = cli.arg_target_gap ? args::get(cli.arg_target_gap) : 0.0;
+    if (opts.target_gap < 0.0)
+    {
+        error = "--target-gap musi byc nieujemne";
+        return false;
+    }
+    if (opts.target_gap > 0.0 && !cli.arg_bound)
+    {
+        /// Sam --target-gap: ograniczenie metodą domyślną
+        opts.bound = BoundMethod::Auto;
+    }
+    if (opts.target_gap > 0.0 && opts.bound == BoundMethod::None)
+    {
+        error = "--target-gap wymaga ograniczenia dolnego (--bound)";
+        return false;
+    }
+    opts.float32 = cli.arg_float32;
+    opts.row_cache = cli.arg_row_cache ? args::get(cli.arg_row_cache) : 0;
+    if (cli.arg_stream)
+    {
+        opts.stream_path = args::get(cli.arg_stream);
+    }
+    if (cli.arg_seed)
+    {
+        opts.seed = args::get(cli.arg_seed);
+    }
+    opts.stats = cli.arg_stats;
+    opts.stats_trace = cli.arg_stats_trace;
+    return true;
+}
+
+bool AppendJsonArgs(const json &algorithm, const json &params, std::vector<std::string> &tokens,
+                    std::string &error)
+{
+    auto text = [](const json &value)
+    {
+        return value.is_string() ? value.get<std::string>() : value.dump();
+    };
+
+    if (!algorithm.is_null())
+    {
+        std::string name = text(algorithm);
+        if (name != "greedy" && name != "sa")
+        {
+            error = "nieznany algorytm: " + name;
+            return false;
+        }
+        /// Algorytm z opisu zastępuje flagę algorytmu z argumentów domyślnych (grupa wykluczająca się)
+        tokens.erase(std::remove_if(tokens.begin(), tokens.end(),
+                                    [](const std::string &token)
+                                    { return token == "-g" || token == "--greedy" || token == "-s" || token == "--sa"; }),
+                     tokens.end());
+        tokens.push_back("--" + name);
+    }
+
+    if (params.is_null())
+    {
+        return true;
+    }
+    if (params.is_array())
+    {
+        for (const auto &value : params)
+        {
+            tokens.push_back(text(value));
+        }
+        return true;
+    }
+    if (!params.is_object())
+    {
+        error = "params musi byc obiektem albo lista argumentow";
+        return false;
+    }
+    for (const auto &item : params.items())
+    {
+        std::string name = (item.key().size() == 1 ? "-" : "--") + item.key();
+        const json &value = item.value();
+        if (value.is_null() || (value.is_boolean() && !value.get<bool>()))
+        {
+            continue;
+        }
+        if (value.is_structured())
+        {
+            error = "nieprawidlowa wartosc opcji " + item.key();
+            return false;
+        }
+        tokens.push_back(name);
+        if (!value.is_boolean())
+        {
+            tokens.push_back(text(value));
+        }
+    }
+    return true;
+}
+
+bool OpenStream(const RunOptions &opts, std::ofstream &file, std::ostream *&stream)
+{
+    stream = nullptr;
+    if (!opts.stream_path)
+    {
+        return true;
+    }
+    if (*opts.stream_path == "-")
+    {
+        stream = &std::cout;
+        return true;
+    }
+    file.open(*opts.stream_path);
+    if (!file.is_open())
+    {
+        return false;
+    }
+    stream = &file;
+    return true;
+}
+
+std::unique_ptr<SolverStats> MakeStats(const RunOptions &opts)
+{
+    return opts.stats || opts.stats_trace ? std::make_unique<SolverStats>(opts.stats_trace) : nullptr;
+}
+
+bool CheckRoute(const std::vector<int> &route, int n, std::string &error)
+{
+    if (route.size() != static_cast<std::size_t>(n) + 1 || route.front() != 0 || route.back() != 0)
+    {
+        error = "trasa musi miec postac 0 -> ... -> 0 i n + 1 elementow";
+        return false;
+    }
+    std::vector<char> seen(n, 0);
+    for (std::size_t i = 0; i + 1 < route.size(); ++i)
+    {
+        int city = route[i];
+        if (city < 0 || city >= n || seen[city])
+        {
+            error = "trasa nie odwiedza kazdego miasta dokladnie raz";
+            return false;
+        }
+        seen[city] = 1;
+    }
+    return true;
+}
+
+RunResult Solve(const ProblemData &data, const RunOptions &opts, std::ostream *stream, SolverStats *stats,
+                std::ostream &log, const std::vector<int> *warm_route)
+{
+    RunResult result;
+
+    /// Ograniczenie dolne kosztu (luka wyniku, koszt docelowy) - przed startem zegara, poza
+    /// limitem czasu i czasem wykonania; jego czas raportowany jest osobno (lower_bound_time)
+    if (opts.bound != BoundMethod::None)
+    {
+        result.lower_bound = ComputeLowerBound(data, opts.bound);
+        log << "Ograniczenie dolne: " << result.lower_bound.value << " (" << BoundMethodName(result.lower_bound.method)
+            << ", " << result.lower_bound.time << " s)" << std::endl;
+        if (stats)
+        {
+            stats->AddPhase("lower_bound", result.lower_bound.time);
+        }
+    }
+
+    double start_time = omp_get_wtime();
+
+    /// Wspólne najlepsze rozwiązanie - zegar limitu czasu i zapis do strumienia
+    Incumbent incumbent(opts.time_limit, stream);
+    if (opts.target_gap > 0.0)
+    {
+        incumbent.SetTarget(TargetCost(result.lower_bound.value, opts.target_gap));
+    }
+
+    /// Listy kandydatów liczone raz (wspólne dla wątków) - tylko gdy są potrzebne
+    std::unique_ptr<NeighborLists> neighbors;
+    if (opts.local_search || opts.neighbor_bias > 0.0)
+    {
+        double neighbors_start = omp_get_wtime();
+        neighbors = std::make_unique<NeighborLists>(data, opts.neighbor_k);
+        if (stats)
+        {
+            stats->AddPhase("neighbors", omp_get_wtime() - neighbors_start);
+        }
+    }
+
+    /// Indeks kandydatów konstrukcji zachłannej (greedy i rozwiązania początkowe SA)
+    std::unique_ptr<GreedyCandidates> greedy_candidates;
+    if (opts.greedy_candidates_k > 0)
+    {
+        double index_start = omp_get_wtime();
+        greedy_candidates = std::make_unique<GreedyCandidates>(data, opts.greedy_candidates_k);
+        log << "Indeks kandydatow: "
+            << (greedy_candidates->Grid() != nullptr
+                    ? "siatka " + std::to_string(greedy_candidates->Grid()->cols) + "x" + std::to_string(greedy_candidates->Grid()->rows)
+                    : std::to_string(greedy_candidates->K()) + " krawedzi na miasto")
+            << " (" << omp_get_wtime() - index_start << " s)" << std::endl;
+        if (stats)
+        {
+            stats->AddPhase("candidates", omp_get_wtime() - index_start);
+        }
+    }
+
+    /// Ograniczenie dolne do odcinania konstrukcji zachłannych
+    std::unique_ptr<GreedyBound> greedy_bound;
+    if (opts.prune && opts.algorithm == "greedy")
+    {
+        double bound_start = omp_get_wtime();
+        greedy_bound = std::make_unique<GreedyBound>(data);
+        result.pruning.bound = greedy_bound.get();
+        result.pruned = true;
+        if (stats)
+        {
+            stats->AddPhase("bound", omp_get_wtime() - bound_start);
+        }
+    }
+
+    double solve_start = omp_get_wtime();
+    if (opts.algorithm == "greedy")
+    {
+        /// Trasa startowa jako pierwsze najlepsze rozwiązanie (po zmianie okien zwykle bliska optimum)
+        Solution warm;
+        if (warm_route != nullptr)
+        {
+            warm.route = *warm_route;
+            warm.total_cost = EvaluateSolution(data, warm.route);
+            warm.is_valid = true;
+            if (opts.local_search)
+            {
+                warm = LocalSearch(data, *neighbors).Improve(warm, &incumbent);
+            }
+            incumbent.Offer(warm);
+        }
+        result.best = RunParallelGreedySolver(data, opts.iterations, opts.k_best, opts.seed,
+                                              opts.local_search ? neighbors.get() : nullptr, &incumbent, stats,
+                                              greedy_candidates.get(), greedy_bound ? &result.pruning : nullptr);
+        if (warm_route != nullptr && (!result.best.is_valid || warm.total_cost <= result.best.total_cost))
+        {
+            result.best = warm;
+        }
+    }
+    else
+    {
+        SAParams params;
+        params.initial_temp = opts.initial_temp;
+        params.cooling_rate = opts.cooling_rate;
+        params.min_temp = opts.min_temp;
+        params.iterations_per_temp = opts.iterations;
+        params.k_best_greedy = opts.k_best;
+        params.greedy_candidates = greedy_candidates.get();
+        params.initial_route = warm_route;
+        params.seed = opts.seed;
+        params.neighbors = neighbors.get();
+        params.neighbor_bias = opts.neighbor_bias;
+        params.local_search = opts.local_search;
+        params.mode = opts.sa_mode;
+        params.exchange_interval = opts.exchange_interval;
+        params.incumbent = &incumbent;
+        params.stats = stats;
+
+        result.best = RunParallelSASolver(data, params);
+    }
+    result.pruning.bound = nullptr;
+
+    /// Koszt z tablicy float32 jest przybliżony - wynik podawany jest w podwójnej precyzji
+    if (data.edges.SinglePrecision() && !result.best.route.empty())
+    {
+        result.best.total_cost = EvaluateSolutionExact(data, result.best.route);
+    }
+
+    double end_time = omp_get_wtime();
+    if (stats)
+    {
+        stats->AddPhase("solve", end_time - solve_start);
+    }
+    result.elapsed = end_time - start_time;
+    return result;
+}
+
+json PruningJson(const GreedyPruning &pruning)
+{
+    return {{"constructions", pruning.constructions},
+            {"pruned", pruning.pruned},
+            {"time_saved", pruning.time_saved}};
+}
@@ -1,6 +1,9 @@
 #include "tsp_sa_solver.hpp"
 #include "tsp_utils.hpp"
 #include "tsp_greedy_solver.hpp"
+#include "tsp_route_eval.hpp"
+#include "tsp_local_search.hpp"
+#include "tsp_stats.hpp"
 #include <vector>
 #include <cmath>
 #include <algorithm>
@@ -14,34 +17,264 @@
  */
 
 /**
- * @brief Generuje sąsiada poprzez operację odwrócenia fragmentu trasy (2-opt).
- * Funkcja losuje dwa indeksy i odwraca kolejność miast pomiędzy nimi.
- * Modyfikuje wektor 'route' w miejscu. Nie rusza miasta startowego/końcowego (0).
- * @param route Trasa do zmodyfikowania.
+ * @brief Losuje ruch odwrócenia fragmentu trasy (2-opt).
+ * Funkcja losuje dwa indeksy i < j; odwrócenie kolejności miast pomiędzy nimi
+ * wykonuje RouteEvaluator. Nie rusza miasta startowego/końcowego (0).
  * @param n Liczba miast (indeksy w wektorze to 0..n).
  * @param rng Generator liczb losowych.
+ * @param i Początek fragmentu (wynik).
+ * @param j Koniec fragmentu (wynik).
+ * @return `false`, jeśli nie wylosowano zmiany.
  */
-static void MutateInvert(std::vector<int> &route, int n, std::mt19937 &rng)
+static bool DrawInvert(int n, std::mt19937 &rng, int &i, int &j)
 {
     /// Można zmieniać indeksy od 1 do n-1, ponieważ trasa zaczyna i kończy się w mieście 0.
-    if (n < 3) return;
+    if (n < 3) return false;
 
     std::uniform_int_distribution<> distr(1, n - 1);
     
-    int i = distr(rng);
-    int j = distr(rng);
+    i = distr(rng);
+    j = distr(rng);
 
     /// Sprawdzenie czy i != j, jeśli tak to ponownie losujemy j
     if (i == j) 
     {
         j = distr(rng);
-        if (i == j) return; ///< Brak zmiany
+        if (i == j) return false; ///< Brak zmiany
     }
 
     if (i > j) std::swap(i, j);
+    return true;
+}
 
-    /// Odwracamy fragment wektora
-    std::reverse(route.begin() + i, route.begin() + j + 1);
+bool ParseSAMode(const std::string &name, SAMode &mode)
+{
+    if (name == "independent")
+        mode = SAMode::Independent;
+    else if (name == "tempering")
+        mode = SAMode::Tempering;
+    else if (name == "islands")
+        mode = SAMode::Islands;
+    else
+        return false;
+    return true;
+}
+
+/**
+ * @brief Pojedynczy łańcuch Symulowanego Wyżarzania (stan jednego wątku).
+ *
+ * Przechowuje bieżącą trasę w ewaluatorze przyrostowym oraz najlepsze rozwiązanie
+ * znalezione przez łańcuch. Temperaturą steruje wywołujący (harmonogram zależy od trybu).
+ */
+class SAChain
+{
+public:
+    /// Rozwiązanie początkowe generowane metodą Greedy (albo params.initial_route).
+    SAChain(const ProblemData &data, const SAParams &params, std::mt19937 &rng)
+        : data_(data), params_(params), rng_(rng), eval_(data), prob_dist_(0.0, 1.0)
+    {
+        Solution initial;
+        if (params.initial_route != nullptr)
+        {
+            initial.route = *params.initial_route;
+            initial.total_cost = EvaluateSolution(data, initial.route);
+            initial.is_valid = true;
+        }
+        else
+        {
+            initial = GenGreedySolution(data, params.k_best_greedy, rng, params.greedy_candidates);
+        }
+        eval_.Assign(initial.route);
+        current_cost_ = initial.total_cost;
+        best_ = initial;
+        limited_ = params.incumbent != nullptr && params.incumbent->Stoppable();
+        tid_ = omp_get_thread_num();
+        stats_ = params.stats != nullptr ? &params.stats->Thread(tid_) : nullptr;
+        if (stats_ != nullptr && params.initial_route == nullptr)
+        {
+            stats_->constructions += 1;
+        }
+        Publish();
+    }
+
+    /// Wykonuje iterations_per_temp prób w temperaturze `temp` (mniej, jeśli minie limit czasu
+    /// albo zostanie osiągnięty koszt docelowy).
+    void Sweep(double temp)
+    {
+        long long proposed = 0;
+        long long accepted = 0;
+        long long improvements = 0;
+
+        for (int k = 0; k < params_.iterations_per_temp; ++k)
+        {
+            if (limited_ && (k & 15) == 0 && params_.incumbent->SearchStopped())
+                break;
+
+            /// Mutacja (2-opt) - tylko losowanie fragmentu (losowo lub do sąsiada z listy)
+            int i, j;
+            bool moved;
+            if (params_.neighbors != nullptr && params_.neighbor_bias > 0.0 && prob_dist_(rng_) < params_.neighbor_bias)
+            {
+                moved = DrawNeighborInvert(eval_, *params_.neighbors, rng_, i, j);
+            }
+            else
+            {
+                moved = DrawInvert(data_.n, rng_, i, j);
+            }
+            if (!moved)
+            {
+                /// Brak zmiany: sąsiad równy bieżącemu (delta = 0) jest zawsze akceptowany,
+                /// ale losowanie wykonujemy jak dla każdego nie-lepszego sąsiada,
+                /// aby strumień liczb losowych nie zależał od sposobu oceny.
+                prob_dist_(rng_);
+                continue;
+            }
+
+            /// Ocena sąsiada (przyrostowo)
+            double neighbor_cost = eval_.InvertCost(i, j);
+            ++proposed;
+            
+            /// Obliczenie różnicy kosztów
+            double delta = neighbor_cost - current_cost_;
+
+            /// Kryterium akceptacji Metropolis-Hastings
+            bool accept = delta < 0.0;
+            if (!accept)
+            {
+                /// Gorsze rozwiązanie - akceptujemy z prawdopodobieństwem exp(-delta / T)
+                double acceptance_prob = std::exp(-delta / temp); ///< e^{-\delta/T}
+                accept = prob_dist_(rng_) < acceptance_prob; ///< Losowa akceptacja
+            }
+
+            if (accept)
+            {
+                /// Odwrócenie fragmentu w miejscu dopiero po akceptacji
+                eval_.ApplyInvert(i, j);
+                current_cost_ = eval_.Cost();
+                ++accepted;
+
+                /// Aktualizacja najlepszego rozwiązania
+                if (delta < 0.0 && current_cost_ < best_.total_cost)
+                {
+                    best_.route = eval_.Route();
+                    best_.total_cost = current_cost_;
+                    best_.is_valid = true;
+                    ++improvements;
+                    Publish();
+                }
+            }
+        }
+
+        if (stats_ != nullptr)
+        {
+            stats_->proposed += proposed;
+            stats_->accepted += accepted;
+            stats_->improvements += improvements;
+            stats_->sweeps += 1;
+            if (params_.stats->TraceEnabled())
+            {
+                params_.stats->Record(tid_, {params_.stats->Elapsed(), temp, proposed, accepted,
+                                             current_cost_, best_.total_cost});
+            }
+        }
+    }
+
+    /// Zastępuje bieżący stan łańcucha podaną trasą (wymiana między wątkami).
+    void Adopt(const std::vector<int> &route, double cost)
+    {
+        eval_.Assign(route);
+        current_cost_ = cost;
+        if (stats_ != nullptr)
+        {
+            stats_->exchanges += 1;
+        }
+        if (cost < best_.total_cost)
+        {
+            best_.route = route;
+            best_.total_cost = cost;
+            best_.is_valid = true;
+        }
+    }
+
+    const std::vector<int> &Route() const { return eval_.Route(); } ///< Bieżąca trasa.
+    double Cost() const { return current_cost_; }                   ///< Koszt bieżącej trasy.
+    const Solution &Best() const { return best_; }                  ///< Najlepsze rozwiązanie łańcucha.
+
+    /// Najlepsze rozwiązanie, opcjonalnie po przeszukiwaniu lokalnym.
+    Solution Finish()
+    {
+        if (params_.local_search && params_.neighbors != nullptr)
+        {
+            double ls_start = omp_get_wtime();
+            best_ = LocalSearch(data_, *params_.neighbors).Improve(best_, params_.incumbent);
+            if (stats_ != nullptr)
+            {
+                stats_->local_search_time += omp_get_wtime() - ls_start;
+            }
+            Publish();
+        }
+        return best_;
+    }
+
+private:
+    /// Zgłasza najlepsze rozwiązanie łańcucha do wspólnego (jeśli jest).
+    void Publish()
+    {
+        if (params_.incumbent != nullptr)
+        {
+            params_.incumbent->Offer(best_);
+        }
+    }
+
+    const ProblemData &data_;
+    const SAParams &params_;
+    std::mt19937 &rng_;
+    RouteEvaluator eval_;
+    std::uniform_real_distribution<> prob_dist_; ///< Rozkład dla prawdopodobieństwa akceptacji
+    double current_cost_;
+    Solution best_;
+    bool limited_; ///< Czy obowiązuje warunek zakończenia (limit czasu, koszt docelowy).
+    int tid_;      ///< Numer wątku łańcucha.
+    ThreadStats *stats_; ///< Liczniki wątku (nullptr - bez pomiarów).
+};
+
+/**
+ * @brief Rozwiązanie wystawione przez wątek do wymiany (jedno miejsce na wątek).
+ */
+struct ExchangeSlot
+{
+    std::vector<int> route;
+    double cost;
+};
+
+/**
+ * @brief Liczba kroków temperatury w harmonogramie geometrycznym (jak w trybie niezależnym).
+ */
+static int CountEpochs(const SAParams &params)
+{
+    int epochs = 0;
+    for (double temp = params.initial_temp; temp > params.min_temp; temp *= params.cooling_rate)
+    {
+        ++epochs;
+    }
+    return epochs;
+}
+
+/**
+ * @brief Temperatura przy limicie czasu: geometrycznie od initial_temp do min_temp
+ * wraz z wykorzystaną częścią limitu.
+ */
+static double TimedTemp(const SAParams &params, double progress)
+{
+    return params.initial_temp * std::pow(params.min_temp / params.initial_temp, progress);
+}
+
+/**
+ * @brief Czy zakończyć wyżarzanie (termin przeszukiwania albo koszt docelowy).
+ */
+static bool ShouldStop(const SAParams &params)
+{
+    return params.incumbent != nullptr && params.incumbent->SearchStopped();
 }
 
 /**
@@ -53,66 +286,182 @@ static void MutateInvert(std::vector<int> &route, int n, std::mt19937 &rng)
  */
 static Solution GenSASolution(const ProblemData &data, const SAParams &params, std::mt19937 &rng)
 {
-    /// Generowanie rozwiązania bazowego metodą Greedy
-    Solution current_sol = GenGreedySolution(data, params.k_best_greedy, rng);
+    SAChain chain(data, params, rng);
+
+    if (params.incumbent != nullptr && params.incumbent->Limited())
+    {
+        const Incumbent &clock = *params.incumbent;
+        while (!clock.SearchStopped())
+        {
+            chain.Sweep(TimedTemp(params, clock.Progress()));
+        }
+        return chain.Finish();
+    }
+
+    for (double temp = params.initial_temp; temp > params.min_temp; temp *= params.cooling_rate)
+    {
+        chain.Sweep(temp);
+        if (ShouldStop(params))
+            break;
+    }
+
+    return chain.Finish();
+}
+
+/**
+ * @brief Stan współdzielony przez wątki w trybach współpracy.
+ */
+struct ExchangeState
+{
+    std::vector<ExchangeSlot> slots; ///< Rozwiązania wystawione przez wątki.
+    std::vector<int> partner;        ///< Partner wymiany każdego wątku (tempering).
+    std::mt19937 rng;                ///< Generator decyzji o wymianie (tylko w `single`).
+    bool stop = false;               ///< Wspólna decyzja o końcu (limit czasu, koszt docelowy).
+};
+
+/**
+ * @brief Zegar z limitem czasu z parametrów (nullptr - harmonogram wg cooling_rate).
+ */
+static const Incumbent *TimeLimitClock(const SAParams &params)
+{
+    return params.incumbent != nullptr && params.incumbent->Limited() ? params.incumbent : nullptr;
+}
+
+/**
+ * @brief Model wysp: wspólny harmonogram, co exchange_interval kroków każda wyspa
+ * przejmuje najlepsze rozwiązanie poprzedniej wyspy w pierścieniu, jeśli jest lepsze od bieżącego.
+ *
+ * Wywoływana przez wszystkie wątki zespołu (zawiera bariery). Przy limicie czasu (i po osiągnięciu
+ * kosztu docelowego) o końcu decyduje jeden wątek w punkcie wymiany, aby wszystkie wątki
+ * przeszły tyle samo barier.
+ */
+static Solution RunIsland(const ProblemData &data, const SAParams &params, std::mt19937 &rng,
+                          ExchangeState &shared)
+{
+    int tid = omp_get_thread_num();
+    int threads = omp_get_num_threads();
+    int interval = std::max(1, params.exchange_interval);
+    const Incumbent *clock = TimeLimitClock(params);
+
+    SAChain chain(data, params, rng);
 
-    /// Dodatkowe przeliczenie kosztu
-    /// current_sol.total_cost = EvaluateSolution(data, current_sol.route);
-    
-    Solution best_sol = current_sol;
     double temp = params.initial_temp;
-    
-    /// Rozkład dla prawdopodobieństwa akceptacji
-    std::uniform_real_distribution<> prob_dist(0.0, 1.0);
+    int epochs = clock != nullptr ? 0 : CountEpochs(params);
+    if (clock == nullptr && epochs == 0)
+        return chain.Finish();
 
-    while (temp > params.min_temp)
+    for (int epoch = 1;; ++epoch, temp *= params.cooling_rate)
     {
-        for (int k = 0; k < params.iterations_per_temp; ++k)
+        chain.Sweep(clock != nullptr ? TimedTemp(params, clock->Progress()) : temp);
+
+        bool last = clock == nullptr && epoch >= epochs;
+        if (threads > 1 && epoch % interval == 0 && !last)
         {
-            /// Kandydat na sąsiada (kopia trasy)
-            std::vector<int> neighbor_route = current_sol.route;
-            
-            /// Mutacja (2-opt)
-            MutateInvert(neighbor_route, data.n, rng);
+            /// Migracja elity: zapis własnej, bariera, odczyt od poprzednika, bariera
+            shared.slots[tid].route = chain.Best().route;
+            shared.slots[tid].cost = chain.Best().total_cost;
+#pragma omp barrier
+            const ExchangeSlot &incoming = shared.slots[(tid + threads - 1) % threads];
+            if (incoming.cost < chain.Cost())
+            {
+                chain.Adopt(incoming.route, incoming.cost);
+            }
+#pragma omp single
+            {
+                shared.stop = ShouldStop(params);
+            } ///< Niejawna bariera na końcu `single`
+            if (shared.stop)
+                break;
+        }
+        else if (last || (threads == 1 && ShouldStop(params)))
+        {
+            break;
+        }
+    }
 
-            /// Ocena sąsiada
-            double neighbor_cost = EvaluateSolution(data, neighbor_route);
-            
-            /// Obliczenie różnicy kosztów
-            double delta = neighbor_cost - current_sol.total_cost;
+    return chain.Finish();
+}
 
-            /// Kryterium akceptacji Metropolis-Hastings
-            if (delta < 0.0)
-            {
-                /// Bezwarunkowa akceptacja lepszego rozwiązania
-                current_sol.route = neighbor_route;
-                current_sol.total_cost = neighbor_cost;
-                current_sol.is_valid = true;
+/**
+ * @brief Parallel tempering: wątek k pracuje w stałej temperaturze z drabiny geometrycznej
+ * od initial_temp (k = 0) do min_temp (ostatni wątek). Co exchange_interval kroków
+ * sąsiednie temperatury (na przemian pary parzyste i nieparzyste) wymieniają stany
+ * z prawdopodobieństwem min(1, exp((1/T_k - 1/T_{k+1}) (E_k - E_{k+1}))).
+ *
+ * O wymianach decyduje jeden wątek wspólnym generatorem - wynik zależy tylko od ziarna.
+ * Wywoływana przez wszystkie wątki zespołu (zawiera bariery).
+ */
+static Solution RunTempering(const ProblemData &data, const SAParams &params, std::mt19937 &rng,
+                             ExchangeState &shared)
+{
+    int tid = omp_get_thread_num();
+    int threads = omp_get_num_threads();
+    int interval = std::max(1, params.exchange_interval);
+    const Incumbent *clock = TimeLimitClock(params);
 
-                /// Aktualizacja najlepszego rozwiązania
-                if (current_sol.total_cost < best_sol.total_cost)
+    /// Temperatura wątku (drabina geometryczna)
+    auto ladder = [&](int k)
+    {
+        if (threads == 1)
+            return params.initial_temp;
+        return params.initial_temp * std::pow(params.min_temp / params.initial_temp,
+                                              static_cast<double>(k) / (threads - 1));
+    };
+    double temp = ladder(tid);
+
+    SAChain chain(data, params, rng);
+
+    int epochs = clock != nullptr ? 0 : CountEpochs(params);
+    if (clock == nullptr && epochs == 0)
+        return chain.Finish();
+
+    for (int epoch = 1, round = 0;; ++epoch)
+    {
+        chain.Sweep(temp);
+
+        bool last = clock == nullptr && epoch >= epochs;
+        if (threads > 1 && epoch % interval == 0 && !last)
+        {
+            shared.slots[tid].route = chain.Route();
+            shared.slots[tid].cost = chain.Cost();
+#pragma omp barrier
+#pragma omp single
+            {
+                std::uniform_real_distribution<> prob_dist(0.0, 1.0);
+                for (int k = 0; k < threads; ++k)
                 {
-                    best_sol = current_sol;
+                    shared.partner[k] = k;
                 }
-            }
-            else
-            {
-                /// Gorsze rozwiązanie - akceptujemy z prawdopodobieństwem exp(-delta / T)
-                double acceptance_prob = std::exp(-delta / temp); ///< e^{-\delta/T}
-                if (prob_dist(rng) < acceptance_prob) ///< Losowa akceptacja
+                for (int k = round % 2; k + 1 < threads; k += 2)
                 {
-                    current_sol.route = neighbor_route;
-                    current_sol.total_cost = neighbor_cost;
-                    current_sol.is_valid = true;
+                    double log_prob = (1.0 / ladder(k) - 1.0 / ladder(k + 1))
+                                    * (shared.slots[k].cost - shared.slots[k + 1].cost);
+                    if (log_prob >= 0.0 || prob_dist(shared.rng) < std::exp(log_prob))
+                    {
+                        shared.partner[k] = k + 1;
+                        shared.partner[k + 1] = k;
+                    }
                 }
+                shared.stop = ShouldStop(params);
+            } ///< Niejawna bariera na końcu `single`
+            int other = shared.partner[tid];
+            if (other != tid)
+            {
+                chain.Adopt(shared.slots[other].route, shared.slots[other].cost);
             }
+            bool stop = shared.stop;
+            ++round;
+#pragma omp barrier
+            if (stop)
+                break;
+        }
+        else if (last || (threads == 1 && ShouldStop(params)))
+        {
+            break;
         }
-
-        /// Chłodzenie
-        temp *= params.cooling_rate;
     }
 
-    return best_sol;
+    return chain.Finish();
 }
 
 Solution RunParallelSASolver(const ProblemData &data, const SAParams &params)
@@ -121,13 +470,54 @@ Solution RunParallelSASolver(const ProblemData &data, const SAParams &params)
     global_best.total_cost = std::numeric_limits<double>::max(); ///< Inicjalizacja: największa wartość.
     global_best.is_valid = false;
 
+    /// Wspólne bufory wymiany (po jednym miejscu na wątek) i generator decyzji o wymianie
+    ExchangeState shared;
+    shared.slots.resize(omp_get_max_threads());
+    shared.partner.resize(omp_get_max_threads());
+    if (params.seed)
+    {
+        std::seed_seq seq{*params.seed, 0x9E3779B9u};
+        shared.rng.seed(seq);
+    }
+    else
+    {
+        shared.rng.seed(std::random_device{}());
+    }
+
+    if (params.stats != nullptr)
+    {
+        params.stats->Prepare(omp_get_max_threads());
+    }
+
+    /// Koniec limitu czasu zostaje na przeszukiwanie lokalne wyniku (Finish)
+    if (params.incumbent != nullptr && params.local_search && params.neighbors != nullptr)
+    {
+        params.incumbent->ReserveTime(kLocalSearchTimeShare);
+    }
+
     #pragma omp parallel
     {
-        /// Inny seed dla każdego wątku.
-        std::random_device rd;
-        std::mt19937 thread_rng(rd() + omp_get_thread_num());
+        double thread_start = omp_get_wtime();
+        std::mt19937 thread_rng = MakeThreadRng(params.seed);
+
+        Solution thread_best;
+        switch (params.mode)
+        {
+        case SAMode::Tempering:
+            thread_best = RunTempering(data, params, thread_rng, shared);
+            break;
+        case SAMode::Islands:
+            thread_best = RunIsland(data, params, thread_rng, shared);
+            break;
+        default:
+            thread_best = GenSASolution(data, params, thread_rng);
+            break;
+        }
 
-        Solution thread_best = GenSASolution(data, params, thread_rng);
+        if (params.stats != nullptr)
+        {
+            params.stats->Thread(omp_get_thread_num()).busy_time = omp_get_wtime() - thread_start;
+        }
 
         /// Tylko jeden wątek na raz aktualizuje najlepsze rozwiązanie.
         #pragma omp critical
@@ -140,4 +530,4 @@ Solution RunParallelSASolver(const ProblemData &data, const SAParams &params)
     }
 
     return global_best;
-}
\ No newline at end of file
+}
@@ -0,0 +1,711 @@
+#include "tsp_service.hpp"
+#include "tsp_utils.hpp"
+#include <algorithm>
+#include <atomic>
+#include <cerrno>
+#include <condition_variable>
+#include <csignal>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <deque>
+#include <functional>
+#include <fstream>
+#include <future>
+#include <iostream>
+#include <iterator>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <sstream>
+#include <thread>
+#include <omp.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+/**
+ * @file tsp_service.cpp
+ * @brief Implementacja usługi tsp_solver --serve.
+ */
+
+using json = nlohmann::json;
+
+namespace
+{
+    /// Gniazdo nasłuchujące - zamykane przez obsługę sygnału, żeby przerwać accept().
+    std::atomic<int> g_listen_fd{-1};
+
+    void StopOnSignal(int)
+    {
+        int fd = g_listen_fd.load();
+        if (fd >= 0)
+        {
+            ::shutdown(fd, SHUT_RDWR);
+        }
+    }
+
+    /// Skrót FNV-1a (64 bity) zawartości instancji jako 16 znaków szesnastkowych.
+    std::string ContentKey(const std::string &bytes)
+    {
+        std::uint64_t hash = 14695981039346656037ull;
+        for (unsigned char c : bytes)
+        {
+            hash ^= c;
+            hash *= 1099511628211ull;
+        }
+        char key[17];
+        std::snprintf(key, sizeof(key), "%016llx", static_cast<unsigned long long>(hash));
+        return key;
+    }
+
+    /**
+     * @brief Wczytane instancje (kolejność od ostatnio używanej) i ostatnie zwrócone trasy.
+     *
+     * Dostęp z wielu wątków (połączenia, pula) - wszystkie operacje pod blokadą;
+     * dane instancji są niemodyfikowalne i współdzielone przez shared_ptr.
+     */
+    class InstanceStore
+    {
+    public:
+        InstanceStore(int capacity, bool float32) : capacity_(std::max(1, capacity)), float32_(float32) {}
+
+        /**
+         * @brief Instancja z pliku (skrót z zawartości; wczytanie tylko przy pierwszym użyciu).
+         * @return nullptr przy błędzie (komunikat w `error`).
+         */
+        std::shared_ptr<const ProblemData> LoadPath(const std::string &path, std::string &key, bool &cached,
+                                                    std::string &error)
+        {
+            std::ifstream file(path, std::ios::binary);
+            if (!file.is_open())
+            {
+                error = "nie mozna otworzyc pliku " + path;
+                return nullptr;
+            }
+            std::string bytes((std::istreambuf_iterator<char>(file)), std::istreambuf_iterator<char>());
+            key = ContentKey(bytes);
+            if (auto data = Find(key))
+            {
+                cached = true;
+                return data;
+            }
+
+            cached = false;
+            auto data = std::make_shared<ProblemData>();
+            bool loaded;
+            if (path.size() >= 5 && path.compare(path.size() - 5, 5, ".tspb") == 0)
+            {
+                loaded = LoadData(path, *data, float32_);
+            }
+            else
+            {
+                json j = json::parse(bytes, nullptr, false);
+                loaded = !j.is_discarded() && LoadDataJson(j, *data, float32_);
+            }
+            if (!loaded)
+            {
+                error = "nie udalo sie wczytac pliku " + path;
+                return nullptr;
+            }
+            Insert(key, data);
+            return data;
+        }
+
+        /// Instancja przesłana w żądaniu (skrót z postaci kanonicznej JSON).
+        std::shared_ptr<const ProblemData> LoadJson(const json &instance, std::string &key, bool &cached,
+                                                    std::string &error)
+        {
+            key = ContentKey(instance.dump());
+            if (auto data = Find(key))
+            {
+                cached = true;
+                return data;
+            }
+            cached = false;
+            auto data = std::make_shared<ProblemData>();
+            if (!LoadDataJson(instance, *data, float32_))
+            {
+                error = "niepoprawna instancja";
+                return nullptr;
+            }
+            Insert(key, data);
+            return data;
+        }
+
+        /// Wczytana instancja o kluczu `key` (nullptr - brak).
+        std::shared_ptr<const ProblemData> Find(const std::string &key)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = Locate(key);
+            if (it == entries_.end())
+                return nullptr;
+            it->hits += 1;
+            entries_.splice(entries_.begin(), entries_, it);
+            return entries_.front().data;
+        }
+
+        /// Ostatnia trasa zwrócona dla instancji (pusta - brak).
+        std::vector<int> LastRoute(const std::string &key)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = Locate(key);
+            return it != entries_.end() ? it->last_route : std::vector<int>();
+        }
+
+        void SetLastRoute(const std::string &key, const std::vector<int> &route)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = Locate(key);
+            if (it != entries_.end())
+                it->last_route = route;
+        }
+
+        bool Evict(const std::string &key)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = Locate(key);
+            if (it == entries_.end())
+                return false;
+            entries_.erase(it);
+            return true;
+        }
+
+        /// Lista instancji (od ostatnio używanej) dla żądania "status".
+        json Status()
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            json list = json::array();
+            for (const auto &entry : entries_)
+            {
+                list.push_back({{"key", entry.key}, {"n", entry.data->n}, {"hits", entry.hits},
+                                {"last_route", !entry.last_route.empty()}});
+            }
+            return list;
+        }
+
+    private:
+        struct Entry
+        {
+            std::string key;
+            std::shared_ptr<const ProblemData> data;
+            std::vector<int> last_route;
+            long long hits = 0;
+        };
+
+        std::list<Entry>::iterator Locate(const std::string &key)
+        {
+            return std::find_if(entries_.begin(), entries_.end(), [&key](const Entry &e) { return e.key == key; });
+        }
+
+        void Insert(const std::string &key, std::shared_ptr<const ProblemData> data)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            auto it = Locate(key);
+            if (it != entries_.end())
+                entries_.erase(it);
+            entries_.push_front({key, std::move(data), {}, 0});
+            while (static_cast<int>(entries_.size()) > capacity_)
+            {
+                entries_.pop_back();
+            }
+        }
+
+        int capacity_;
+        bool float32_;
+        std::mutex mutex_;
+        std::list<Entry> entries_;
+    };
+
+    /// Żądanie "solve" oczekujące w kolejce puli.
+    struct Task
+    {
+        json request;
+        double submitted;
+        std::promise<json> result;
+    };
+
+    /**
+     * @brief Stała liczba wątków wykonujących żądania "solve" z ograniczonej kolejki.
+     */
+    class WorkerPool
+    {
+    public:
+        template <typename Fn>
+        WorkerPool(int workers, int max_queue, Fn run)
+            : max_queue_(static_cast<std::size_t>(std::max(0, max_queue))), run_(run)
+        {
+            for (int i = 0; i < workers; ++i)
+            {
+                threads_.emplace_back([this]() { Loop(); });
+            }
+        }
+
+        /// Dodaje zadanie; `false`, gdy kolejka jest pełna albo pula zatrzymana.
+        bool Submit(const std::shared_ptr<Task> &task)
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            if (stopped_ || queue_.size() >= max_queue_ + idle_)
+                return false;
+            queue_.push_back(task);
+            ready_.notify_one();
+            return true;
+        }
+
+        /// Kończy bieżące zadania; oczekujące otrzymują błąd.
+        void Stop()
+        {
+            {
+                std::lock_guard<std::mutex> lock(mutex_);
+                stopped_ = true;
+                for (auto &task : queue_)
+                {
+                    task->result.set_value({{"status", "ERROR"}, {"error", "usluga zatrzymana"}});
+                }
+                queue_.clear();
+            }
+            ready_.notify_all();
+            for (auto &thread : threads_)
+            {
+                thread.join();
+            }
+            threads_.clear();
+        }
+
+        json Status()
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            return {{"workers", threads_.size()}, {"running", threads_.size() - idle_},
+                    {"queued", queue_.size()}, {"max_queue", max_queue_}, {"solved", solved_}};
+        }
+
+    private:
+        void Loop()
+        {
+            std::unique_lock<std::mutex> lock(mutex_);
+            while (true)
+            {
+                ++idle_;
+                ready_.wait(lock, [this]() { return stopped_ || !queue_.empty(); });
+                --idle_;
+                if (stopped_)
+                    return;
+                std::shared_ptr<Task> task = queue_.front();
+                queue_.pop_front();
+                lock.unlock();
+                task->result.set_value(run_(*task));
+                lock.lock();
+                ++solved_;
+            }
+        }
+
+        std::size_t max_queue_;
+        std::function<json(Task &)> run_;
+        std::mutex mutex_;
+        std::condition_variable ready_;
+        std::deque<std::shared_ptr<Task>> queue_;
+        std::vector<std::thread> threads_;
+        std::size_t idle_ = 0;
+        bool stopped_ = false;
+        long long solved_ = 0;
+    };
+
+    /**
+     * @brief Stan usługi: instancje, pula, połączenia.
+     */
+    class Service
+    {
+    public:
+        Service(Cli &cli, const std::vector<std::string> &defaults)
+            : defaults_(defaults),
+              workers_(std::max(1, cli.arg_workers ? args::get(cli.arg_workers) : 1)),
+              store_(cli.arg_batch_cache ? args::get(cli.arg_batch_cache) : 4, cli.arg_float32),
+              pool_(workers_, cli.arg_queue ? args::get(cli.arg_queue) : 16,
+                    [this](Task &task) { return RunSolve(task); })
+        {
+            /// Domyślnie wątki OpenMP dzielone równo między zadania wykonywane jednocześnie
+            default_threads_ = std::max(1, omp_get_max_threads() / workers_);
+        }
+
+        /// Obsługa jednego żądania (w wątku połączenia; "solve" czeka na pulę).
+        json Handle(const json &request, bool &shutdown)
+        {
+            std::string op = request.value("op", std::string("solve"));
+            if (op == "solve")
+            {
+                auto task = std::make_shared<Task>();
+                task->request = request;
+                task->submitted = omp_get_wtime();
+                std::future<json> result = task->result.get_future();
+                if (!pool_.Submit(task))
+                    return Error("kolejka zadan jest pelna");
+                return result.get();
+            }
+            if (op == "load")
+            {
+                std::string key, error;
+                bool cached = false;
+                auto data = Resolve(request, key, cached, error);
+                if (!data)
+                    return Error(error);
+                return {{"status", "OK"}, {"key", key}, {"n", data->n}, {"cached", cached}};
+            }
+            if (op == "status")
+            {
+                json status = pool_.Status();
+                status["status"] = "OK";
+                status["instances"] = store_.Status();
+                return status;
+            }
+            if (op == "evict")
+            {
+                if (!request.contains("key") || !request["key"].is_string())
+                    return Error("brak klucza instancji (key)");
+                return {{"status", "OK"}, {"evicted", store_.Evict(request["key"].get<std::string>())}};
+            }
+            if (op == "shutdown")
+            {
+                shutdown = true;
+                return {{"status", "OK"}};
+            }
+            return Error("nieznana operacja: " + op);
+        }
+
+        /// Zatrzymuje pulę (bieżące zadania są kończone).
+        void Stop() { pool_.Stop(); }
+
+        int Workers() const { return workers_; }
+
+    private:
+        static json Error(const std::string &message)
+        {
+            return {{"status", "ERROR"}, {"error", message}};
+        }
+
+        /// Instancja żądania: `key` (już wczytana), `path` albo `instance`.
+        std::shared_ptr<const ProblemData> Resolve(const json &request, std::string &key, bool &cached,
+                                                   std::string &error)
+        {
+            if (request.contains("key"))
+            {
+                if (!request["key"].is_string())
+                {
+                    error = "key musi byc napisem";
+                    return nullptr;
+                }
+                key = request["key"].get<std::string>();
+                cached = true;
+                auto data = store_.Find(key);
+                if (!data)
+                    error = "nieznany klucz instancji: " + key;
+                return data;
+            }
+            if (request.contains("path"))
+            {
+                if (!request["path"].is_string())
+                {
+                    error = "path musi byc sciezka";
+                    return nullptr;
+                }
+                return store_.LoadPath(request["path"].get<std::string>(), key, cached, error);
+            }
+            if (request.contains("instance"))
+            {
+                return store_.LoadJson(request["instance"], key, cached, error);
+            }
+            error = "brak instancji (key, path albo instance)";
+            return nullptr;
+        }
+
+        /// Żądanie "solve" w wątku puli.
+        json RunSolve(Task &task)
+        {
+            const json &request = task.request;
+            double queue_time = omp_get_wtime() - task.submitted;
+
+            std::vector<std::string> tokens = defaults_;
+            std::string error;
+            if (!AppendJsonArgs(request.value("algorithm", json()), request.value("params", json()), tokens, error))
+                return Error(error);
+            if (request.contains("time_limit") && !request["time_limit"].is_null())
+            {
+                if (!request["time_limit"].is_number())
+                    return Error("time_limit musi byc liczba sekund");
+                tokens.push_back("--time-limit");
+                tokens.push_back(request["time_limit"].dump());
+            }
+
+            Cli cli;
+            RunOptions opts;
+            try
+            {
+                cli.parser.ParseArgs(tokens);
+            }
+            catch (const args::Error &e)
+            {
+                return Error(std::string("opcje: ") + e.what());
+            }
+            if (!ReadOptions(cli, opts, error))
+                return Error(error);
+            if (opts.stream_path && *opts.stream_path == "-")
+                return Error("--stream - jest niedostepne w trybie --serve");
+
+            std::string key;
+            bool cached = false;
+            std::shared_ptr<const ProblemData> data = Resolve(request, key, cached, error);
+            if (!data)
+                return Error(error);
+
+            /// Nowe okna czasowe: kopia danych współdzieli macierze i tablicę krawędzi
+            if (request.contains("windows") && !request["windows"].is_null())
+            {
+                const json &windows = request["windows"];
+                if (!windows.is_array() || windows.size() != static_cast<std::size_t>(data->n))
+                    return Error("windows musi miec n par [e, l]");
+                auto changed = std::make_shared<ProblemData>(*data);
+                try
+                {
+                    for (int i = 0; i < data->n; ++i)
+                    {
+                        changed->windows[i] = {windows[i].at(0).get<double>(), windows[i].at(1).get<double>()};
+                    }
+                }
+                catch (const json::exception &)
+                {
+                    return Error("windows musi miec n par [e, l]");
+                }
+                data = changed;
+            }
+
+            std::vector<int> warm_route;
+            if (request.contains("warm_start"))
+            {
+                const json &warm = request["warm_start"];
+                if (warm.is_array())
+                {
+                    try
+                    {
+                        warm_route = warm.get<std::vector<int>>();
+                    }
+                    catch (const json::exception &)
+                    {
+                        return Error("warm_start musi byc trasa albo true");
+                    }
+                }
+                else if (warm.is_boolean())
+                {
+                    if (warm.get<bool>())
+                        warm_route = store_.LastRoute(key);
+                }
+                else if (!warm.is_null())
+                {
+                    return Error("warm_start musi byc trasa albo true");
+                }
+                if (!warm_route.empty() && !CheckRoute(warm_route, data->n, error))
+                    return Error("warm_start: " + error);
+            }
+
+            int threads = default_threads_;
+            if (request.contains("threads") && !request["threads"].is_null())
+            {
+                if (!request["threads"].is_number_integer() || request["threads"].get<int>() < 1)
+                    return Error("threads musi byc dodatnia liczba calkowita");
+                threads = request["threads"].get<int>();
+            }
+            omp_set_num_threads(threads);
+
+            std::ofstream stream_file;
+            std::ostream *stream = nullptr;
+            if (!OpenStream(opts, stream_file, stream))
+                return Error("nie mozna otworzyc pliku strumienia " + *opts.stream_path);
+
+            std::unique_ptr<SolverStats> stats = MakeStats(opts);
+            std::ostream null_log(nullptr);
+            RunResult result = Solve(*data, opts, stream, stats.get(), null_log,
+                                     warm_route.empty() ? nullptr : &warm_route);
+            if (result.best.is_valid)
+            {
+                store_.SetLastRoute(key, result.best.route);
+            }
+            if (opts.output)
+            {
+                SaveResults(*opts.output, result.best, result.elapsed, stats.get(), &result.lower_bound);
+            }
+
+            json response = ResultJson(result.best, result.elapsed, stats.get(), &result.lower_bound);
+            response["status"] = "OK";
+            response["key"] = key;
+            response["cached"] = cached;
+            response["algorithm"] = opts.algorithm;
+            response["threads"] = threads;
+            response["warm_start"] = !warm_route.empty();
+            response["queue_time"] = queue_time;
+            if (result.pruned)
+            {
+                response["pruning"] = PruningJson(result.pruning);
+            }
+            std::cerr << "[serve] " << opts.algorithm << " " << key << ": koszt " << result.best.total_cost
+                      << ", " << result.elapsed << " s" << (warm_route.empty() ? "" : " (trasa startowa)") << std::endl;
+            return response;
+        }
+
+        std::vector<std::string> defaults_;
+        int workers_;
+        int default_threads_ = 1;
+        InstanceStore store_;
+        WorkerPool pool_;
+    };
+
+    /// Wysyła cały bufor (bez SIGPIPE przy zerwanym połączeniu).
+    bool SendAll(int fd, const std::string &data)
+    {
+        std::size_t sent = 0;
+        while (sent < data.size())
+        {
+            ssize_t n = ::send(fd, data.data() + sent, data.size() - sent, MSG_NOSIGNAL);
+            if (n < 0 && errno == EINTR)
+                continue;
+            if (n <= 0)
+                return false;
+            sent += static_cast<std::size_t>(n);
+        }
+        return true;
+    }
+
+    /// Jedno połączenie klienta: kolejne wiersze żądań, odpowiedź na każdy.
+    struct Connection
+    {
+        int fd;
+        std::thread thread;
+        std::atomic<bool> finished{false};
+    };
+
+    void ServeConnection(Service &service, Connection &connection, int listen_fd)
+    {
+        std::string buffer;
+        char chunk[65536];
+        bool open = true;
+        while (open)
+        {
+            ssize_t n = ::recv(connection.fd, chunk, sizeof(chunk), 0);
+            if (n < 0 && errno == EINTR)
+                continue;
+            if (n <= 0)
+                break;
+            buffer.append(chunk, static_cast<std::size_t>(n));
+
+            std::size_t end;
+            while (open && (end = buffer.find('\n')) != std::string::npos)
+            {
+                std::string line = buffer.substr(0, end);
+                buffer.erase(0, end + 1);
+                if (line.find_first_not_of(" \t\r") == std::string::npos)
+                    continue;
+
+                bool shutdown = false;
+                json request = json::parse(line, nullptr, false);
+                json response;
+                if (request.is_discarded() || !request.is_object())
+                {
+                    response = {{"status", "ERROR"}, {"error", "zadanie nie jest obiektem JSON"}};
+                }
+                else
+                {
+                    response = service.Handle(request, shutdown);
+                    if (request.contains("id"))
+                        response["id"] = request["id"];
+                }
+                open = SendAll(connection.fd, response.dump() + "\n");
+                if (shutdown)
+                {
+                    /// Przerywa accept() w pętli głównej
+                    ::shutdown(listen_fd, SHUT_RDWR);
+                }
+            }
+        }
+        connection.finished = true;
+    }
+}
+
+int RunService(Cli &cli, const std::vector<std::string> &defaults)
+{
+    std::string socket_path = args::get(cli.arg_serve);
+    sockaddr_un address{};
+    address.sun_family = AF_UNIX;
+    if (socket_path.empty() || socket_path.size() >= sizeof(address.sun_path))
+    {
+        std::cerr << "Blad: Niepoprawna sciezka gniazda " << socket_path << std::endl;
+        return 1;
+    }
+    std::strncpy(address.sun_path, socket_path.c_str(), sizeof(address.sun_path) - 1);
+
+    int listen_fd = ::socket(AF_UNIX, SOCK_STREAM, 0);
+    if (listen_fd < 0)
+    {
+        std::cerr << "Blad: Nie mozna utworzyc gniazda: " << std::strerror(errno) << std::endl;
+        return 1;
+    }
+    ::unlink(socket_path.c_str()); ///< Pozostałość po poprzednim uruchomieniu
+    if (::bind(listen_fd, reinterpret_cast<sockaddr *>(&address), sizeof(address)) < 0 ||
+        ::listen(listen_fd, 16) < 0)
+    {
+        std::cerr << "Blad: Nie mozna nasluchiwac na " << socket_path << ": " << std::strerror(errno) << std::endl;
+        ::close(listen_fd);
+        return 1;
+    }
+
+    Service service(cli, defaults);
+    g_listen_fd = listen_fd;
+    std::signal(SIGINT, StopOnSignal);
+    std::signal(SIGTERM, StopOnSignal);
+    std::signal(SIGPIPE, SIG_IGN);
+
+    std::cerr << "--- TSP z ograniczeniem czasu i paliwa: usluga " << socket_path << " ---" << std::endl;
+    std::cerr << "Watki robocze: " << service.Workers() << ", watki OpenMP: " << omp_get_max_threads() << std::endl;
+
+    std::list<std::unique_ptr<Connection>> connections;
+    while (true)
+    {
+        int fd = ::accept(listen_fd, nullptr, nullptr);
+        if (fd < 0)
+        {
+            if (errno == EINTR)
+                continue;
+            break; ///< Gniazdo zamknięte ("shutdown" albo sygnał)
+        }
+
+        /// Zakończone połączenia
+        for (auto it = connections.begin(); it != connections.end();)
+        {
+            if ((*it)->finished)
+            {
+                (*it)->thread.join();
+                ::close((*it)->fd);
+                it = connections.erase(it);
+            }
+            else
+            {
+                ++it;
+            }
+        }
+
+        auto connection = std::make_unique<Connection>();
+        connection->fd = fd;
+        Connection &ref = *connection;
+        connection->thread = std::thread([&service, &ref, listen_fd]() { ServeConnection(service, ref, listen_fd); });
+        connections.push_back(std::move(connection));
+    }
+
+    std::cerr << "Zatrzymywanie uslugi..." << std::endl;
+    g_listen_fd = -1;
+    service.Stop();
+    for (auto &connection : connections)
+    {
+        ::shutdown(connection->fd, SHUT_RDWR);
+        connection->thread.join();
+        ::close(connection->fd);
+    }
+    ::close(listen_fd);
+    ::unlink(socket_path.c_str());
+    return 0;
+}
@@ -0,0 +1,177 @@
+#include "tsp_stats.hpp"
+#include <algorithm>
+#include <omp.h>
+
+/**
+ * @file tsp_stats.cpp
+ * @brief Implementacja instrumentacji solvera.
+ */
+
+using json = nlohmann::json;
+
+/// Największa liczba punktów przebiegu temperatury na wątek.
+static const std::size_t kMaxTraceSamples = 2048;
+
+/// Łączy kolejne pomiary: liczniki sumowane, temperatura pierwszego, stan ostatniego.
+static void Merge(TempSample &into, const TempSample &next)
+{
+    into.time = next.time;
+    into.proposed += next.proposed;
+    into.accepted += next.accepted;
+    into.cost = next.cost;
+    into.best = next.best;
+}
+
+SolverStats::SolverStats(bool trace)
+    : trace_(trace)
+{
+}
+
+void SolverStats::Prepare(int threads)
+{
+    threads_.assign(threads, ThreadStats{});
+    traces_.assign(trace_ ? threads : 0, Trace{});
+    start_ = omp_get_wtime();
+}
+
+double SolverStats::Elapsed() const
+{
+    return omp_get_wtime() - start_;
+}
+
+void SolverStats::AddPhase(const std::string &name, double seconds)
+{
+    for (auto &phase : phases_)
+    {
+        if (phase.first == name)
+        {
+            phase.second += seconds;
+            return;
+        }
+    }
+    phases_.emplace_back(name, seconds);
+}
+
+void SolverStats::Record(int tid, const TempSample &sample)
+{
+    Trace &trace = traces_[tid];
+    if (trace.pending_steps == 0)
+        trace.pending = sample;
+    else
+        Merge(trace.pending, sample);
+
+    if (++trace.pending_steps < trace.stride)
+        return;
+
+    trace.samples.push_back(trace.pending);
+    trace.pending_steps = 0;
+
+    if (trace.samples.size() >= kMaxTraceSamples)
+    {
+        /// Połowa punktów, każdy z dwóch sąsiednich
+        std::size_t half = trace.samples.size() / 2;
+        for (std::size_t i = 0; i < half; ++i)
+        {
+            TempSample merged = trace.samples[2 * i];
+            Merge(merged, trace.samples[2 * i + 1]);
+            trace.samples[i] = merged;
+        }
+        trace.samples.resize(half);
+        trace.stride *= 2;
+    }
+}
+
+json SolverStats::ToJson() const
+{
+    json j;
+
+    json phases = json::object();
+    for (const auto &phase : phases_)
+    {
+        phases[phase.first] = phase.second;
+    }
+    j["phases"] = phases;
+
+    ThreadStats total;
+    double max_busy = 0.0;
+    double max_search = 0.0; ///< Najdłuższy czas wątku bez przeszukiwania lokalnego.
+    json threads = json::array();
+    for (std::size_t tid = 0; tid < threads_.size(); ++tid)
+    {
+        const ThreadStats &t = threads_[tid];
+        json jt;
+        jt["thread"] = tid;
+        jt["busy_time"] = t.busy_time;
+        jt["local_search_time"] = t.local_search_time;
+        jt["constructions"] = t.constructions;
+        jt["pruned"] = t.pruned;
+        jt["pruned_time_saved"] = t.pruned_time_saved;
+        jt["proposed"] = t.proposed;
+        jt["accepted"] = t.accepted;
+        jt["improvements"] = t.improvements;
+        jt["exchanges"] = t.exchanges;
+        jt["sweeps"] = t.sweeps;
+        threads.push_back(jt);
+
+        total.busy_time += t.busy_time;
+        total.local_search_time += t.local_search_time;
+        total.constructions += t.constructions;
+        total.pruned += t.pruned;
+        total.pruned_time_saved += t.pruned_time_saved;
+        total.proposed += t.proposed;
+        total.accepted += t.accepted;
+        total.improvements += t.improvements;
+        total.exchanges += t.exchanges;
+        total.sweeps += t.sweeps;
+        max_busy = std::max(max_busy, t.busy_time);
+        max_search = std::max(max_search, t.busy_time - t.local_search_time);
+    }
+    j["threads"] = threads;
+
+    /// Przepustowość: suma po wątkach / czas najdłużej pracującego wątku (bez przeszukiwania lokalnego)
+    json summary;
+    summary["threads"] = threads_.size();
+    summary["constructions"] = total.constructions;
+    summary["pruned"] = total.pruned;
+    summary["pruned_time_saved"] = total.pruned_time_saved;
+    summary["proposed"] = total.proposed;
+    summary["accepted"] = total.accepted;
+    summary["improvements"] = total.improvements;
+    summary["exchanges"] = total.exchanges;
+    summary["sweeps"] = total.sweeps;
+    summary["local_search_time"] = total.local_search_time;
+    summary["constructions_per_s"] = max_search > 0.0 ? total.constructions / max_search : 0.0;
+    summary["moves_per_s"] = max_search > 0.0 ? total.proposed / max_search : 0.0;
+    summary["acceptance_rate"] = total.proposed > 0 ? static_cast<double>(total.accepted) / total.proposed : 0.0;
+    /// Nierównomierność: najdłuższy czas wątku / średni (1 - idealnie równo)
+    double mean_busy = threads_.empty() ? 0.0 : total.busy_time / threads_.size();
+    summary["imbalance"] = mean_busy > 0.0 ? max_busy / mean_busy : 1.0;
+    j["summary"] = summary;
+
+    if (trace_)
+    {
+        json traces = json::array();
+        for (std::size_t tid = 0; tid < traces_.size(); ++tid)
+        {
+            const Trace &trace = traces_[tid];
+            json samples = json::array();
+            auto add = [&samples](const TempSample &s)
+            {
+                samples.push_back({s.time, s.temp, s.proposed, s.accepted, s.cost, s.best});
+            };
+            for (const TempSample &s : trace.samples)
+            {
+                add(s);
+            }
+            if (trace.pending_steps > 0)
+            {
+                add(trace.pending);
+            }
+            traces.push_back({{"thread", tid}, {"steps_per_sample", trace.stride}, {"samples", samples}});
+        }
+        j["trace_columns"] = {"time", "temp", "proposed", "accepted", "cost", "best"};
+        j["trace"] = traces;
+    }
+
+    return j;
+}
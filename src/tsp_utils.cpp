@@ -3,16 +3,245 @@
 #include <iostream>
 #include <cmath>
 #include <algorithm>
+#include <cstdint>
+#include <cstring>
+#include <stdexcept>
+#include <omp.h>
 #include "json.hpp"
+#include "tsp_stats.hpp"
+#include "tsp_bound.hpp"
+
+#if defined(__unix__) || defined(__APPLE__)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#define TSP_HAVE_MMAP 1
+#endif
 
 using json = nlohmann::json;
 
+namespace
+{
+
+/**
+ * @brief Nagłówek pliku binarnego `.tspb` (64 B, little-endian).
+ *
+ * Po nagłówku: c_matrix (n*n), t_matrix (n*n), t_windows (n*2),
+ * każdy element ma `elem_size` bajtów (4 - float, 8 - double).
+ */
+struct BinaryHeader
+{
+    char magic[4];           ///< "TSPB".
+    std::uint32_t version;   ///< Wersja formatu.
+    std::uint32_t n;         ///< Liczba miast.
+    std::uint32_t elem_size; ///< Rozmiar elementu macierzy w bajtach.
+    double a;                ///< Parametr liniowy kosztu paliwa.
+    double b;                ///< Parametr kwadratowy kosztu paliwa.
+    double M;                ///< Stała big-M.
+    char reserved[24];       ///< Zarezerwowane (zera).
+};
+static_assert(sizeof(BinaryHeader) == 64, "Naglowek .tspb musi miec 64 bajty");
+
+const std::uint32_t kBinaryVersion = 1;
+const std::string kBinaryExt = ".tspb";
+
+bool HasExtension(const std::string &filename, const std::string &ext)
+{
+    return filename.size() >= ext.size() &&
+           filename.compare(filename.size() - ext.size(), ext.size(), ext) == 0;
+}
+
+bool IsLittleEndian()
+{
+    const std::uint16_t probe = 1;
+    unsigned char first;
+    std::memcpy(&first, &probe, 1);
+    return first == 1;
+}
+
+/**
+ * @brief Udostępnia zawartość pliku jako bufor tylko do odczytu.
+ *
+ * Na systemach POSIX plik jest mapowany w pamięci (mmap), w pozostałych
+ * przypadkach wczytywany w całości. Bufor zwalniany jest wraz z ostatnią kopią wskaźnika.
+ */
+std::shared_ptr<const unsigned char> MapFile(const std::string &filename, std::size_t &size)
+{
+#ifdef TSP_HAVE_MMAP
+    int fd = open(filename.c_str(), O_RDONLY);
+    if (fd < 0)
+        return nullptr;
+
+    struct stat st;
+    if (fstat(fd, &st) != 0 || st.st_size == 0)
+    {
+        close(fd);
+        return nullptr;
+    }
+    size = static_cast<std::size_t>(st.st_size);
+
+    void *addr = mmap(nullptr, size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd); ///< Mapowanie pozostaje ważne po zamknięciu deskryptora.
+    if (addr == MAP_FAILED)
+        return nullptr;
+
+    std::size_t mapped_size = size;
+    return std::shared_ptr<const unsigned char>(static_cast<const unsigned char *>(addr),
+                                                [mapped_size](const unsigned char *p)
+                                                {
+                                                    munmap(const_cast<unsigned char *>(p), mapped_size);
+                                                });
+#else
+    std::ifstream f(filename, std::ios::binary | std::ios::ate);
+    if (!f.is_open())
+        return nullptr;
+    size = static_cast<std::size_t>(f.tellg());
+    auto buffer = std::make_shared<std::vector<unsigned char>>(size);
+    f.seekg(0);
+    f.read(reinterpret_cast<char *>(buffer->data()), size);
+    return std::shared_ptr<const unsigned char>(buffer, buffer->data());
+#endif
+}
+
+/**
+ * @brief Zwraca element `index` tablicy o elementach `elem_size` bajtów jako double.
+ */
+double ReadElement(const unsigned char *base, std::size_t index, std::uint32_t elem_size)
+{
+    if (elem_size == sizeof(float))
+    {
+        float value;
+        std::memcpy(&value, base + index * sizeof(float), sizeof(float));
+        return value;
+    }
+    double value;
+    std::memcpy(&value, base + index * sizeof(double), sizeof(double));
+    return value;
+}
+
+/**
+ * @brief Tworzy macierz z bufora pliku binarnego.
+ *
+ * Dla elementów typu double macierz wskazuje bezpośrednio na zmapowany plik
+ * (bez kopiowania), dla float wartości są konwertowane do double.
+ */
+DenseMatrix MatrixFromBuffer(const std::shared_ptr<const unsigned char> &file, std::size_t offset,
+                             int n, std::uint32_t elem_size)
+{
+    DenseMatrix m;
+    const unsigned char *base = file.get() + offset;
+    if (elem_size == sizeof(double))
+    {
+        m.Borrow(n, reinterpret_cast<const double *>(base), file);
+    }
+    else
+    {
+        std::size_t count = static_cast<std::size_t>(n) * n;
+        std::vector<double> values(count);
+        for (std::size_t i = 0; i < count; ++i)
+            values[i] = ReadElement(base, i, elem_size);
+        m.Assign(n, std::move(values));
+    }
+    return m;
+}
+
+/**
+ * @brief Wczytuje dane problemu z pliku binarnego `.tspb`.
+ */
+bool LoadBinaryData(const std::string &filename, ProblemData &data)
+{
+    std::size_t size = 0;
+    std::shared_ptr<const unsigned char> file = MapFile(filename, size);
+    if (!file)
+        return false;
+
+    try
+    {
+        if (!IsLittleEndian())
+            throw std::runtime_error("format .tspb wymaga architektury little-endian");
+        if (size < sizeof(BinaryHeader))
+            throw std::runtime_error("plik krotszy niz naglowek");
+
+        BinaryHeader header;
+        std::memcpy(&header, file.get(), sizeof(header));
+        if (std::memcmp(header.magic, "TSPB", 4) != 0)
+            throw std::runtime_error("niepoprawny identyfikator pliku");
+        if (header.version != kBinaryVersion)
+            throw std::runtime_error("nieobslugiwana wersja formatu");
+        if (header.elem_size != sizeof(float) && header.elem_size != sizeof(double))
+            throw std::runtime_error("nieobslugiwany rozmiar elementu");
+
+        std::size_t n = header.n;
+        std::size_t matrix_bytes = n * n * header.elem_size;
+        std::size_t c_offset = sizeof(BinaryHeader);
+        std::size_t t_offset = c_offset + matrix_bytes;
+        std::size_t w_offset = t_offset + matrix_bytes;
+        if (size < w_offset + n * 2 * header.elem_size)
+            throw std::runtime_error("plik jest obciety");
+
+        data.n = static_cast<int>(n);
+        data.a = header.a;
+        data.b = header.b;
+        data.M = header.M;
+        data.c_matrix = MatrixFromBuffer(file, c_offset, data.n, header.elem_size);
+        data.t_matrix = MatrixFromBuffer(file, t_offset, data.n, header.elem_size);
+
+        data.windows.clear();
+        data.windows.reserve(n);
+        for (std::size_t i = 0; i < n; ++i)
+        {
+            data.windows.push_back({ReadElement(file.get() + w_offset, 2 * i, header.elem_size),
+                                    ReadElement(file.get() + w_offset, 2 * i + 1, header.elem_size)});
+        }
+    }
+    catch (const std::exception &e)
+    {
+        std::cerr << "Blad formatu " << kBinaryExt << ": " << e.what() << std::endl;
+        return false;
+    }
+    return true;
+}
+
+/**
+ * @brief Przepisuje macierz n x n z JSON do ciągłego bufora.
+ */
+DenseMatrix MatrixFromJson(const json &rows, int n)
+{
+    if (rows.size() != static_cast<std::size_t>(n))
+        throw std::runtime_error("niepoprawna liczba wierszy macierzy");
+
+    std::vector<double> values;
+    values.reserve(static_cast<std::size_t>(n) * n);
+    for (const auto &row : rows)
+    {
+        if (row.size() != static_cast<std::size_t>(n))
+            throw std::runtime_error("niepoprawna liczba kolumn macierzy");
+        for (const auto &value : row)
+            values.push_back(value.get<double>());
+    }
+
+    DenseMatrix m;
+    m.Assign(n, std::move(values));
+    return m;
+}
+
+} // namespace
+
 /**
- * @brief Wczytuje dane problemu z pliku JSON.
+ * @brief Wczytuje dane problemu z pliku JSON lub binarnego `.tspb`.
  * Wymaga biblioteki nlohmann/json.hpp.
  */
-bool LoadData(const std::string &filename, ProblemData &data)
+bool LoadData(const std::string &filename, ProblemData &data, bool single_precision, int row_cache)
 {
+    if (HasExtension(filename, kBinaryExt))
+    {
+        if (!LoadBinaryData(filename, data))
+            return false;
+        data.edges.Build(data.c_matrix, data.t_matrix, data.a, data.b, single_precision);
+        return true;
+    }
+
     std::ifstream f(filename);
     if (!f.is_open())
         return false;
@@ -21,28 +250,138 @@ bool LoadData(const std::string &filename, ProblemData &data)
     try
     {
         f >> j;
-        data.n = j["n"];
-        data.a = j["a"];
-        data.b = j["b"];
-        data.M = j["M"];
+    }
+    catch (const std::exception &e)
+    {
+        std::cerr << "Blad parsowania JSON: " << e.what() << std::endl;
+        return false;
+    }
+    return LoadDataJson(j, data, single_precision, row_cache);
+}
 
-        data.c_matrix = j["c_matrix"].get<std::vector<std::vector<double>>>();
-        data.t_matrix = j["t_matrix"].get<std::vector<std::vector<double>>>();
+bool LoadDataJson(const json &j, ProblemData &data, bool single_precision, int row_cache)
+{
+    try
+    {
+        data.n = j.at("n");
+        data.a = j.at("a");
+        data.b = j.at("b");
+        data.M = j.at("M");
 
         data.windows.clear();
-        for (auto &win : j["t_windows"])
+        for (auto &win : j.at("t_windows"))
         {
             data.windows.push_back({win[0], win[1]});
         }
+
+        if (j.contains("coords"))
+        {
+            /// Tryb współrzędnych: bez macierzy, odległości liczone na żądanie
+            DistanceType type;
+            std::string type_name = j.value("edge_weight_type", "EUC_2D");
+            if (!ParseDistanceType(type_name, type))
+                throw std::runtime_error("nieobslugiwany edge_weight_type: " + type_name);
+            std::vector<std::pair<double, double>> coords;
+            coords.reserve(data.n);
+            for (auto &c : j.at("coords"))
+            {
+                coords.push_back({c[0], c[1]});
+            }
+            if (coords.size() != static_cast<std::size_t>(data.n) || data.windows.size() != coords.size())
+                throw std::runtime_error("liczba wspolrzednych lub okien rozna od n");
+            data.c_matrix = DenseMatrix();
+            data.t_matrix = DenseMatrix();
+            data.edges.UseCoords(std::make_shared<CoordEdges>(type, coords, j.value("speed", 1.0),
+                                                              data.a, data.b, row_cache));
+            return true;
+        }
+
+        if (data.windows.size() != static_cast<std::size_t>(data.n))
+            throw std::runtime_error("liczba okien rozna od n");
+        data.c_matrix = MatrixFromJson(j.at("c_matrix"), data.n);
+        data.t_matrix = MatrixFromJson(j.at("t_matrix"), data.n);
     }
     catch (const std::exception &e)
     {
         std::cerr << "Blad parsowania JSON: " << e.what() << std::endl;
         return false;
     }
+    data.edges.Build(data.c_matrix, data.t_matrix, data.a, data.b, single_precision);
     return true;
 }
 
+namespace
+{
+
+/// Wyrównanie bufora i długości wierszy tablicy krawędzi (linia pamięci podręcznej).
+const std::size_t kCacheLine = 64;
+
+/**
+ * @brief Wypełnia macierze kosztów i czasów typu T (wiersze co `stride` elementów).
+ */
+template <typename T>
+void FillEdges(T *cost, T *time, std::size_t stride, const DenseMatrix &c, const DenseMatrix &t,
+               double a, double b)
+{
+    int n = c.Size();
+#pragma omp parallel for schedule(static)
+    for (int u = 0; u < n; ++u)
+    {
+        const double *c_row = c[u];
+        const double *t_row = t[u];
+        T *cost_row = cost + static_cast<std::size_t>(u) * stride;
+        T *time_row = time + static_cast<std::size_t>(u) * stride;
+        for (int v = 0; v < n; ++v)
+        {
+            /// To samo wyrażenie co dotąd w solverach - w double koszt identyczny co do bitu.
+            double dist = c_row[v];
+            cost_row[v] = static_cast<T>(dist + CalcFuelCost(dist, a, b));
+            time_row[v] = static_cast<T>(t_row[v]);
+        }
+        std::fill(cost_row + n, cost_row + stride, T(0));
+        std::fill(time_row + n, time_row + stride, T(0));
+    }
+}
+
+} // namespace
+
+void EdgeTable::Build(const DenseMatrix &c, const DenseMatrix &t, double a, double b, bool single_precision)
+{
+    std::size_t n = static_cast<std::size_t>(c.Size());
+    std::size_t elem = single_precision ? sizeof(float) : sizeof(double);
+    std::size_t per_line = kCacheLine / elem;
+    coords_ = nullptr;
+    single_ = single_precision;
+    stride_ = (n + per_line - 1) / per_line * per_line;
+    bytes_ = 2 * n * stride_ * elem;
+
+    /// Bufor z zapasem na wyrównanie początku do linii pamięci podręcznej; bez zerowania -
+    /// pierwszy zapis wykonują wątki wypełniające swoje wiersze
+    std::shared_ptr<unsigned char> storage(new unsigned char[bytes_ + kCacheLine],
+                                           std::default_delete<unsigned char[]>());
+    std::uintptr_t address = reinterpret_cast<std::uintptr_t>(storage.get());
+    unsigned char *base = storage.get() + (kCacheLine - address % kCacheLine) % kCacheLine;
+    std::size_t plane = n * stride_;
+
+    if (single_)
+    {
+        float *cost = reinterpret_cast<float *>(base);
+        FillEdges(cost, cost + plane, stride_, c, t, a, b);
+        cost_f_ = cost;
+        time_f_ = cost + plane;
+        cost_d_ = time_d_ = nullptr;
+    }
+    else
+    {
+        double *cost = reinterpret_cast<double *>(base);
+        FillEdges(cost, cost + plane, stride_, c, t, a, b);
+        cost_d_ = cost;
+        time_d_ = cost + plane;
+        cost_f_ = time_f_ = nullptr;
+    }
+    owner_ = std::move(storage);
+}
+
 /**
  * @brief Oblicza koszt paliwa: $f = a \cdot d + b \cdot d^2$.
  */
@@ -51,10 +390,30 @@ double CalcFuelCost(double distance, double a, double b)
     return a * distance + b * std::pow(distance, 2);
 }
 
+std::mt19937 MakeThreadRng(const std::optional<std::uint32_t> &seed)
+{
+    std::uint32_t thread_id = static_cast<std::uint32_t>(omp_get_thread_num());
+    if (seed)
+    {
+        /// seed_seq rozprasza (seed, wątek) na pełny stan generatora.
+        std::seed_seq seq{*seed, thread_id};
+        return std::mt19937(seq);
+    }
+
+    /// Inny seed dla każdego wątku.
+    std::random_device rd;
+    return std::mt19937(rd() + thread_id);
+}
+
+namespace
+{
+
 /**
- * @brief Wylicza koszt trasy (odległość + paliwo + kara za spóźnienie).
+ * @brief Koszt trasy przy zadanych funkcjach kosztu odcinka i czasu przejazdu.
  */
-double EvaluateSolution(const ProblemData &data, const std::vector<int> &route)
+template <typename EdgeCostFn, typename TravelTimeFn>
+double EvaluateRoute(const ProblemData &data, const std::vector<int> &route,
+                     EdgeCostFn edge_cost, TravelTimeFn travel_time_of)
 {
     double total_cost = 0.0;
     double current_time = 0.0;
@@ -65,11 +424,8 @@ double EvaluateSolution(const ProblemData &data, const std::vector<int> &route)
         int u = route[i];
         int v = route[i + 1];
 
-        double dist = data.c_matrix[u][v];
-        double travel_time = data.t_matrix[u][v];
-
-        double fuel = CalcFuelCost(dist, data.a, data.b);
-        total_cost += (dist + fuel);
+        double travel_time = travel_time_of(u, v);
+        total_cost += edge_cost(u, v);
 
         double arrival = current_time + travel_time;
         double start_window = data.windows[v].first;
@@ -90,21 +446,73 @@ double EvaluateSolution(const ProblemData &data, const std::vector<int> &route)
     return total_cost + penalty_sum;
 }
 
+} // namespace
+
+/**
+ * @brief Wylicza koszt trasy (odległość + paliwo + kara za spóźnienie) z tablicy krawędzi.
+ */
+double EvaluateSolution(const ProblemData &data, const std::vector<int> &route)
+{
+    return EvaluateRoute(data, route,
+                         [&data](int u, int v) { return data.EdgeCost(u, v); },
+                         [&data](int u, int v) { return data.TravelTime(u, v); });
+}
+
+/**
+ * @brief Wylicza koszt trasy z macierzy wejściowych (podwójna precyzja).
+ */
+double EvaluateSolutionExact(const ProblemData &data, const std::vector<int> &route)
+{
+    if (data.edges.Coords() != nullptr)
+        return EvaluateSolution(data, route); ///< Współrzędne - wartości liczone w double
+    return EvaluateRoute(data, route,
+                         [&data](int u, int v)
+                         {
+                             double dist = data.c_matrix[u][v];
+                             return dist + CalcFuelCost(dist, data.a, data.b);
+                         },
+                         [&data](int u, int v) { return data.t_matrix[u][v]; });
+}
+
 /**
- * @brief Zapisuje wyniki do pliku JSON.
+ * @brief Buduje obiekt wyniku (bez zapisu): trasa, koszt, czas, luka i opcjonalny blok `stats`.
+ *
+ * Z ograniczeniem dolnym (`bound` różne od nullptr i metoda inna niż None) dopisuje
+ * `lower_bound`, `bound_method`, `lower_bound_time` oraz - dla poprawnej trasy - `gap`.
  */
-void SaveResults(const std::string &filename, const Solution &solution, double execution_time)
+json ResultJson(const Solution &solution, double execution_time, const SolverStats *stats,
+                const LowerBound *bound)
 {
     json j;
     j["total_cost"] = solution.total_cost;
     j["route"] = solution.route;
     j["is_valid"] = solution.is_valid;
     j["execution_time"] = execution_time;
+    j["gap"] = nullptr;
+    if (bound != nullptr && bound->method != BoundMethod::None)
+    {
+        j["lower_bound"] = bound->value;
+        j["bound_method"] = BoundMethodName(bound->method);
+        j["lower_bound_time"] = bound->time;
+        if (solution.is_valid)
+        {
+            j["gap"] = RelativeGap(solution.total_cost, bound->value);
+        }
+    }
+    if (stats != nullptr)
+    {
+        j["stats"] = stats->ToJson();
+    }
+    return j;
+}
 
+void SaveResults(const std::string &filename, const Solution &solution, double execution_time,
+                 const SolverStats *stats, const LowerBound *bound)
+{
     std::ofstream f(filename);
     if (f.is_open())
     {
-        f << j.dump(4);
+        f << ResultJson(solution, execution_time, stats, bound).dump(4);
     }
     else
     {